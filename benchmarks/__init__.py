@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for samstacks.
+
+These are not part of the test suite; run them with ``python -m benchmarks.<name>``.
+"""
@@ -0,0 +1,219 @@
+"""
+End-to-end orchestration benchmarks against a fake SAM CLI and CloudFormation.
+
+Runs Pipeline.deploy (twice, to cover redeploys) and Pipeline.delete over
+generated manifests of several shapes and sizes. The SAM CLI and CloudFormation
+are replaced by the local stand-ins in benchmarks/fake_aws.py, so results show
+samstacks' own overhead per stack, apart from AWS latency. Each scenario runs
+in a fresh process so its peak RSS is its own.
+
+Usage:
+    python -m benchmarks.bench_orchestration                 # run and compare to baseline
+    python -m benchmarks.bench_orchestration --update-baseline
+    python -m benchmarks.bench_orchestration --scenarios chain:20,diamond:20 --latency 0.5
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from unittest import mock
+
+from samstacks import core
+from samstacks.core import Pipeline
+
+from .common import BenchmarkResults, add_baseline_arguments, report_results
+from .fake_aws import FakeCloudFormation, fake_aws
+from .manifests import build_shaped_manifest, write_pipeline
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "orchestration.json"
+DEFAULT_SCENARIOS = "chain:10,chain:50,fan:50,diamond:50"
+
+
+def _peak_rss_kib() -> float:
+    """Peak resident set size of this process, in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB on Linux
+    return peak / 1024 if sys.platform == "darwin" else float(peak)
+
+
+class _SubprocessTimer:
+    """Wraps core's SAM command runner to total the time spent in sam itself."""
+
+    def __init__(self, runner: Callable[..., Tuple[int, str]]):
+        self._runner = runner
+        self.seconds = 0.0
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Tuple[int, str]:
+        start = time.perf_counter()
+        try:
+            return self._runner(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def _run_phase(
+    name: str,
+    action: Callable[[], None],
+    num_stacks: int,
+    cloudformation: FakeCloudFormation,
+) -> Dict[str, float]:
+    """Run one deploy/delete phase and measure it."""
+    timer = _SubprocessTimer(core._run_command_with_stderr_capture)
+    api_calls_before = sum(cloudformation.api_calls.values())
+    sam_calls_before = sum(cloudformation.sam_invocations().values())
+
+    with mock.patch.object(core, "_run_command_with_stderr_capture", timer):
+        start = time.perf_counter()
+        action()
+        wall = time.perf_counter() - start
+
+    overhead = wall - timer.seconds
+    return {
+        "seconds": overhead,
+        "wall_seconds": wall,
+        "sam_seconds": timer.seconds,
+        "overhead_per_stack_ms": overhead / num_stacks * 1000,
+        "ops_per_sec": num_stacks / wall if wall else 0.0,
+        "api_calls": float(sum(cloudformation.api_calls.values()) - api_calls_before),
+        "sam_invocations": float(
+            sum(cloudformation.sam_invocations().values()) - sam_calls_before
+        ),
+    }
+
+
+def run_scenario(
+    shape: str,
+    num_stacks: int,
+    latency: float = 0.0,
+    output_lines: int = 0,
+    no_changes: bool = False,
+    quiet: bool = True,
+) -> BenchmarkResults:
+    """Deploy, redeploy and delete one generated pipeline against the fakes.
+
+    Returns results keyed by phase, e.g. "deploy[chain:10]".
+    """
+    if quiet:
+        # Discard samstacks' console output and the fake sam's stdout alike
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+
+    results: BenchmarkResults = {}
+    label = f"{shape}:{num_stacks}"
+    with tempfile.TemporaryDirectory(prefix="samstacks-orch-") as tmp:
+        work_dir = Path(tmp)
+        manifest_path = write_pipeline(
+            work_dir / "pipeline", build_shaped_manifest(shape, num_stacks)
+        )
+        with fake_aws(
+            work_dir,
+            latency=latency,
+            output_lines=output_lines,
+            no_changes=no_changes,
+        ) as cloudformation:
+            phases: List[Tuple[str, Callable[[], None]]] = [
+                ("deploy", lambda: Pipeline.from_file(manifest_path).deploy()),
+                ("redeploy", lambda: Pipeline.from_file(manifest_path).deploy()),
+                (
+                    "delete",
+                    lambda: Pipeline.from_file(manifest_path).delete(no_prompts=True),
+                ),
+            ]
+            for phase, action in phases:
+                results[f"{phase}[{label}]"] = _run_phase(
+                    phase, action, num_stacks, cloudformation
+                )
+
+    peak_kib = _peak_rss_kib()
+    for result in results.values():
+        result["peak_kib"] = peak_kib
+    return results
+
+
+def run_scenarios(
+    scenarios: List[Tuple[str, int]],
+    latency: float = 0.0,
+    output_lines: int = 0,
+    no_changes: bool = False,
+) -> BenchmarkResults:
+    """Run each scenario in its own spawned process and merge the results."""
+    context = multiprocessing.get_context("spawn")
+    results: BenchmarkResults = {}
+    for shape, num_stacks in scenarios:
+        with context.Pool(processes=1) as pool:
+            results.update(
+                pool.apply(
+                    run_scenario,
+                    (shape, num_stacks, latency, output_lines, no_changes),
+                )
+            )
+    return results
+
+
+def print_orchestration_results(results: BenchmarkResults) -> None:
+    """Print orchestration results as an aligned table."""
+    width = max((len(name) for name in results), default=10)
+    print(
+        f"{'phase':<{width}}  {'wall s':>8}  {'sam s':>8}  {'ms/stack':>9}  "
+        f"{'API calls':>9}  {'sam calls':>9}  {'peak RSS MiB':>12}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<{width}}  {result['wall_seconds']:>8.2f}  "
+            f"{result['sam_seconds']:>8.2f}  {result['overhead_per_stack_ms']:>9.1f}  "
+            f"{result['api_calls']:>9.0f}  {result['sam_invocations']:>9.0f}  "
+            f"{result['peak_kib'] / 1024:>12.1f}"
+        )
+
+
+def _parse_scenarios(value: str) -> List[Tuple[str, int]]:
+    scenarios = []
+    for item in value.split(","):
+        shape, _, size = item.partition(":")
+        scenarios.append((shape.strip(), int(size)))
+    return scenarios
+
+
+def main(argv: Any = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--scenarios",
+        default=DEFAULT_SCENARIOS,
+        help="Comma-separated shape:stacks pairs; shapes are chain, fan and diamond",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per fake sam call"
+    )
+    parser.add_argument(
+        "--output-lines", type=int, default=0, help="Lines printed per fake sam call"
+    )
+    parser.add_argument(
+        "--no-changes",
+        action="store_true",
+        help="Make redeploys report 'No changes to deploy' (exercises changeset cleanup)",
+    )
+    add_baseline_arguments(
+        parser, DEFAULT_BASELINE, "Allowed overhead / memory growth before failing"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_scenarios(
+        _parse_scenarios(args.scenarios),
+        latency=args.latency,
+        output_lines=args.output_lines,
+        no_changes=args.no_changes,
+    )
+    # Overhead ("seconds") excludes time spent inside the fake sam processes
+    return report_results(
+        results, args, print_orchestration_results, min_delta_seconds=0.05
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Startup benchmarks: how long samstacks takes to import before doing any work.
+
+Each case runs a statement in a fresh interpreter under ``python -X importtime``
+and reports the cumulative import time of samstacks (its own modules and
+everything they import), plus the number of modules loaded. Every case has a
+budget: a maximum import time and modules it must not load at all, such as
+boto3 for ``samstacks --help``, which never talks to AWS. tests/test_benchmarks.py
+checks the forbidden modules, which do not depend on the machine, and the import
+times against a multiple of the budget that leaves room for slow CI machines;
+run this script to check the budgets themselves, or compare to a baseline.
+
+Usage:
+    python -m benchmarks.bench_startup                  # run and compare to baseline
+    python -m benchmarks.bench_startup --update-baseline
+    python -m benchmarks.bench_startup --repeat 20
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from .common import BenchmarkResults, add_baseline_arguments, report_results
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "startup.json"
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+class StartupCase(NamedTuple):
+    """A statement to time and the budget it must stay within."""
+
+    statement: str
+    budget_seconds: float
+    forbidden_modules: Tuple[str, ...]
+
+
+# Budgets leave room for slower machines; the forbidden modules are the strict
+# part. validate needs core (pydantic, yaml) but not boto3, rich or the run
+# history's sqlite3.
+STARTUP_CASES: Dict[str, StartupCase] = {
+    "cli --help": StartupCase(
+        "from samstacks.cli import cli; cli(['--help'])",
+        0.2,
+        ("boto3", "botocore", "pydantic", "rich", "yaml"),
+    ),
+    "cli --version": StartupCase(
+        "from samstacks.cli import cli; cli(['--version'])",
+        0.2,
+        ("boto3", "botocore", "pydantic", "rich", "yaml"),
+    ),
+    "cli validate": StartupCase(
+        "from samstacks.cli import cli; "
+        "cli(['validate', 'examples/pipeline.yml', '--no-validation-cache'])",
+        0.6,
+        ("boto3", "botocore", "rich", "sqlite3"),
+    ),
+    "import samstacks.core": StartupCase(
+        "import samstacks.core",
+        0.6,
+        ("boto3", "botocore", "rich"),
+    ),
+}
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, float]]:
+    """Parse ``-X importtime`` output into (module, depth, cumulative seconds).
+
+    Depth is 0 for modules imported directly by the statement and grows by
+    one per level of nested import.
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # The column header
+        # One space separates the column from the name, then two per level
+        indent = len(name) - len(name.lstrip()) - 1
+        imports.append((name.strip(), indent // 2, int(cumulative) / 1_000_000))
+    return imports
+
+
+def run_case(statement: str) -> Tuple[float, List[str]]:
+    """Run statement under -X importtime in a fresh interpreter.
+
+    Returns:
+        The cumulative import time of samstacks, in seconds, and the names of
+        all modules imported after interpreter startup.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f"'{statement}' exited with {completed.returncode}:\n{completed.stderr}"
+        )
+    imports = parse_importtime(completed.stderr)
+    seconds = sum(
+        cumulative
+        for name, depth, cumulative in imports
+        if depth == 0 and name.split(".")[0] == "samstacks"
+    )
+    return seconds, [name for name, _, _ in imports]
+
+
+def forbidden_imports(case: StartupCase, modules: List[str]) -> List[str]:
+    """Return one message per forbidden module the case imported."""
+    loaded = {name.split(".")[0] for name in modules}
+    return [
+        f"imports {module}" for module in case.forbidden_modules if module in loaded
+    ]
+
+
+def check_budget(case: StartupCase, seconds: float, modules: List[str]) -> List[str]:
+    """Return one message per way the measurement exceeds the case's budget."""
+    problems = []
+    if seconds > case.budget_seconds:
+        problems.append(
+            f"imports took {seconds * 1000:.0f} ms, "
+            f"budget is {case.budget_seconds * 1000:.0f} ms"
+        )
+    return problems + forbidden_imports(case, modules)
+
+
+def run_benchmarks(
+    repeat: int, cases: Dict[str, StartupCase] = STARTUP_CASES
+) -> Tuple[BenchmarkResults, Dict[str, List[str]]]:
+    """Time each case (best of repeat runs) and check it against its budget.
+
+    Returns:
+        The results, keyed by case name, and the budget problems of each case.
+    """
+    results: BenchmarkResults = {}
+    problems: Dict[str, List[str]] = {}
+    for name, case in cases.items():
+        run_case(case.statement)  # Warm the bytecode cache
+        timings = []
+        modules: List[str] = []
+        for _ in range(repeat):
+            seconds, modules = run_case(case.statement)
+            timings.append(seconds)
+        best = min(timings)
+        results[name] = {"seconds": best, "modules": float(len(modules))}
+        problems[name] = check_budget(case, best, modules)
+    return results, problems
+
+
+def print_results(results: BenchmarkResults) -> None:
+    """Print results as an aligned table."""
+    width = max((len(name) for name in results), default=10)
+    print(f"{'case':<{width}}  {'ms':>10}  {'budget ms':>10}  {'modules':>8}")
+    for name, result in results.items():
+        budget = STARTUP_CASES[name].budget_seconds if name in STARTUP_CASES else 0
+        print(
+            f"{name:<{width}}  {result['seconds'] * 1000:>10.1f}  "
+            f"{budget * 1000:>10.0f}  {result['modules']:>8.0f}"
+        )
+
+
+def main(argv: Any = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per case")
+    add_baseline_arguments(parser, DEFAULT_BASELINE, "Allowed slowdown before failing")
+    args = parser.parse_args(argv)
+
+    results, problems = run_benchmarks(args.repeat)
+    over_budget = [
+        f"{name}: {problem}"
+        for name, case_problems in problems.items()
+        for problem in case_problems
+    ]
+
+    def print_table(results: BenchmarkResults) -> None:
+        print_results(results)
+        if over_budget:
+            print("\nOver budget:")
+            for message in over_budget:
+                print(f"  - {message}")
+
+    return report_results(results, args, print_table, failed=bool(over_budget))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Template engine micro-benchmarks over synthetic manifests.
+
+Measures throughput and peak memory of TemplateProcessor.process_string,
+TemplateProcessor.process_structure, SamConfigManager's config merging,
+ManifestValidator.validate_template_expressions and Pipeline.from_file for
+manifests of increasing size.
+
+Usage:
+    python -m benchmarks.bench_templating                 # run and compare to baseline
+    python -m benchmarks.bench_templating --update-baseline
+    python -m benchmarks.bench_templating --sizes 10,100 --threshold 0.5
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from samstacks.core import Pipeline
+from samstacks.pipeline_models import PipelineManifestModel
+from samstacks.samconfig_manager import SamConfigManager
+from samstacks.templating import TemplateProcessor
+from samstacks.validation import ManifestValidator
+
+from .common import BenchmarkResults, add_baseline_arguments, measure, report_results
+from .manifests import (
+    build_manifest,
+    fake_outputs,
+    set_bench_environment,
+    write_pipeline,
+)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "templating.json"
+DEFAULT_SIZES = (10, 100, 1000)
+
+
+def _collect_expressions(manifest: Dict[str, Any]) -> List[str]:
+    """Return every stack-level template string in the manifest."""
+    expressions: List[str] = []
+    for stack in manifest["stacks"]:
+        expressions.extend(stack["params"].values())
+        expressions.append(stack["if"])
+    return expressions
+
+
+def _new_processor(manifest: Dict[str, Any], num_stacks: int) -> TemplateProcessor:
+    """Build a processor that knows the manifest's inputs and every stack's outputs."""
+    settings = manifest["pipeline_settings"]
+    processor = TemplateProcessor(
+        defined_inputs=settings["inputs"],
+        cli_inputs={},
+        pipeline_name=manifest["pipeline_name"],
+        pipeline_description=manifest["pipeline_description"],
+    )
+    for stack_id, outputs in fake_outputs(num_stacks).items():
+        processor.add_stack_outputs(stack_id, outputs)
+    return processor
+
+
+def _benchmarks_for_size(
+    num_stacks: int, work_dir: Path
+) -> List[Tuple[str, Callable[[], Any], int]]:
+    """Build the (name, callable, operations) cases for one manifest size."""
+    manifest = build_manifest(num_stacks)
+    manifest_path = write_pipeline(work_dir / f"stacks-{num_stacks}", manifest)
+    expressions = _collect_expressions(manifest)
+    default_sam_config = manifest["pipeline_settings"]["default_sam_config"]
+
+    def process_string_cold() -> None:
+        processor = _new_processor(manifest, num_stacks)
+        for expression in expressions:
+            processor.process_string(expression)
+
+    warm_processor = _new_processor(manifest, num_stacks)
+
+    def process_string_warm() -> None:
+        for expression in expressions:
+            warm_processor.process_string(expression)
+
+    process_string_warm()  # Prime the memo cache
+
+    def process_structure() -> None:
+        # One default_sam_config pass per stack, as during samconfig generation
+        processor = _new_processor(manifest, num_stacks)
+        for _ in range(num_stacks):
+            processor.process_structure(default_sam_config)
+
+    pipeline_model = PipelineManifestModel.model_validate(manifest)
+    samconfig_manager = SamConfigManager(
+        pipeline_name=manifest["pipeline_name"],
+        pipeline_description=manifest["pipeline_description"],
+        default_sam_config_from_pipeline=default_sam_config,
+        template_processor=_new_processor(manifest, num_stacks),
+    )
+    local_config = {"version": 0.1, "default": {"deploy": {"parameters": {}}}}
+
+    def samconfig_merge() -> None:
+        # The merges of samconfig generation, without templating or file I/O
+        for stack in pipeline_model.stacks:
+            pipeline_config = samconfig_manager._deep_merge_dicts(
+                samconfig_manager.default_sam_config_from_pipeline,
+                stack.sam_config_overrides or {},
+            )
+            samconfig_manager._apply_stack_specific_configs(
+                samconfig_manager._deep_merge_dicts(local_config, pipeline_config),
+                f"bench-{stack.id}",
+                "us-east-1",
+                stack.params,
+            )
+
+    def validate_template_expressions() -> None:
+        validator = ManifestValidator(
+            pipeline_model, manifest_base_dir=manifest_path.parent
+        )
+        validator.validate_template_expressions()
+
+    def pipeline_from_file() -> None:
+        Pipeline.from_file(manifest_path)
+
+    suffix = f"[stacks={num_stacks}]"
+    return [
+        (f"process_string_cold{suffix}", process_string_cold, len(expressions)),
+        (f"process_string_warm{suffix}", process_string_warm, len(expressions)),
+        (f"process_structure{suffix}", process_structure, num_stacks),
+        (f"samconfig_merge{suffix}", samconfig_merge, num_stacks),
+        (
+            f"validate_template_expressions{suffix}",
+            validate_template_expressions,
+            len(expressions),
+        ),
+        (f"pipeline_from_file{suffix}", pipeline_from_file, num_stacks),
+    ]
+
+
+def run_benchmarks(sizes: Tuple[int, ...], repeat: int) -> BenchmarkResults:
+    """Run every benchmark for every manifest size."""
+    set_bench_environment()
+    results: BenchmarkResults = {}
+    with tempfile.TemporaryDirectory(prefix="samstacks-bench-") as tmp:
+        for num_stacks in sizes:
+            for name, func, operations in _benchmarks_for_size(num_stacks, Path(tmp)):
+                results[name] = measure(func, operations, repeat=repeat)
+    return results
+
+
+def main(argv: Any = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated manifest sizes (number of stacks)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    add_baseline_arguments(
+        parser, DEFAULT_BASELINE, "Allowed slowdown / memory growth before failing"
+    )
+    args = parser.parse_args(argv)
+
+    sizes = tuple(int(size) for size in args.sizes.split(","))
+    return report_results(run_benchmarks(sizes, args.repeat), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Measurement and baseline helpers shared by the benchmark scripts.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Results are keyed by benchmark name, e.g. "process_string[stacks=100]"
+BenchmarkResults = Dict[str, Dict[str, float]]
+
+
+def measure(
+    func: Callable[[], Any], operations: int, repeat: int = 5
+) -> Dict[str, float]:
+    """Time func (best of repeat runs) and record its peak traced memory.
+
+    Args:
+        func: The code under test; called repeat + 1 times.
+        operations: Number of logical operations one call performs, for throughput.
+        repeat: Number of timed runs.
+
+    Returns:
+        A dict with seconds (fastest run), ops_per_sec and peak_kib.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # Memory is measured in a separate run so tracing does not skew timings
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # The fastest run is the least disturbed by other load, as in timeit
+    seconds = min(timings)
+    return {
+        "seconds": seconds,
+        "ops_per_sec": operations / seconds if seconds else 0.0,
+        "peak_kib": peak / 1024,
+    }
+
+
+def environment_metadata() -> Dict[str, str]:
+    """Describe the machine the results were collected on."""
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "collected_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_results(results: BenchmarkResults, path: Path) -> None:
+    """Write results to path as a JSON baseline."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"metadata": environment_metadata(), "results": results}
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+
+
+def load_results(path: Path) -> BenchmarkResults:
+    """Load the results section of a JSON baseline."""
+    payload = json.loads(path.read_text())
+    results: BenchmarkResults = payload.get("results", {})
+    return results
+
+
+def find_regressions(
+    baseline: BenchmarkResults,
+    current: BenchmarkResults,
+    time_threshold: float = 0.3,
+    memory_threshold: float = 0.3,
+    min_delta_seconds: float = 0.001,
+) -> List[str]:
+    """Compare current results to a baseline.
+
+    A benchmark regresses when it is more than time_threshold slower, or uses
+    more than memory_threshold more peak memory, than its baseline. Slowdowns
+    smaller than min_delta_seconds are treated as noise. Benchmarks missing
+    from either side are ignored.
+
+    Returns:
+        One human-readable message per regression.
+    """
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        result = current.get(name)
+        if result is None:
+            continue
+        slowdown = result["seconds"] - base["seconds"]
+        if (
+            result["seconds"] > base["seconds"] * (1 + time_threshold)
+            and slowdown > min_delta_seconds
+        ):
+            regressions.append(
+                f"{name}: {result['seconds'] * 1000:.1f} ms vs baseline "
+                f"{base['seconds'] * 1000:.1f} ms "
+                f"(+{(result['seconds'] / base['seconds'] - 1):.0%})"
+            )
+        if base.get("peak_kib") and result["peak_kib"] > base["peak_kib"] * (
+            1 + memory_threshold
+        ):
+            regressions.append(
+                f"{name}: peak memory {result['peak_kib']:.0f} KiB vs baseline "
+                f"{base['peak_kib']:.0f} KiB "
+                f"(+{(result['peak_kib'] / base['peak_kib'] - 1):.0%})"
+            )
+    return regressions
+
+
+def print_results(results: BenchmarkResults) -> None:
+    """Print results as an aligned table."""
+    width = max((len(name) for name in results), default=10)
+    print(f"{'benchmark':<{width}}  {'ms':>10}  {'ops/s':>12}  {'peak KiB':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<{width}}  {result['seconds'] * 1000:>10.2f}  "
+            f"{result['ops_per_sec']:>12.0f}  {result['peak_kib']:>10.0f}"
+        )
+
+
+def add_baseline_arguments(
+    parser: argparse.ArgumentParser, default_baseline: Path, threshold_help: str
+) -> None:
+    """Add the --baseline, --update-baseline, --threshold and --output options."""
+    parser.add_argument("--baseline", type=Path, default=default_baseline)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write results to the baseline file instead of comparing",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.3, help=f"{threshold_help} (0.3 = 30%%)"
+    )
+    parser.add_argument("--output", type=Path, help="Also write results to this file")
+
+
+def report_results(
+    results: BenchmarkResults,
+    args: argparse.Namespace,
+    print_table: Callable[[BenchmarkResults], None] = print_results,
+    failed: bool = False,
+    min_delta_seconds: float = 0.001,
+) -> int:
+    """Print results, save them and compare them to the baseline.
+
+    Args:
+        results: The results of this run.
+        args: Parsed options, including those from add_baseline_arguments.
+        print_table: Prints the results table.
+        failed: Whether the run already failed a check of its own, such as a
+            budget; the exit code is 1 even without regressions.
+        min_delta_seconds: Slowdowns below this are noise (see find_regressions).
+
+    Returns:
+        The exit code: 1 on regressions or if failed, else 0.
+    """
+    print_table(results)
+    if args.output:
+        save_results(results, args.output)
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 1 if failed else 0
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline first.")
+        return 1 if failed else 0
+
+    regressions = find_regressions(
+        load_results(args.baseline),
+        results,
+        time_threshold=args.threshold,
+        memory_threshold=args.threshold,
+        min_delta_seconds=min_delta_seconds,
+    )
+    if regressions:
+        print("\nRegressions against baseline:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    if failed:
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
@@ -0,0 +1,259 @@
+"""
+Local stand-ins for the SAM CLI and CloudFormation, for orchestration benchmarks.
+
+A fake ``sam`` executable is written to a temporary bin directory and put first
+on PATH. It records each invocation, sleeps for a configurable latency, prints a
+configurable amount of output and exits with a configurable code. Successful
+``sam deploy`` runs record the stack in a state directory, which the in-process
+CloudFormation stand-in reads. The stand-in replaces ``boto3`` inside
+``samstacks.aws_utils``, so every AWS helper runs unchanged against it, and it
+counts API calls by operation.
+"""
+
+import json
+import os
+import stat
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Generator, List, Optional
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+from samstacks import aws_utils
+
+FAKE_SAM_SCRIPT = '''\
+#!{python}
+"""Fake SAM CLI used by samstacks benchmarks."""
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+state_dir = Path(os.environ["FAKE_SAM_STATE_DIR"])
+args = sys.argv[1:]
+command = args[0] if args else ""
+
+with open(state_dir / "invocations.log", "a", encoding="utf-8") as log:
+    log.write(command + "\\n")
+
+time.sleep(float(os.environ.get("FAKE_SAM_LATENCY", "0")))
+for line in range(int(os.environ.get("FAKE_SAM_OUTPUT_LINES", "0"))):
+    print(f"fake sam {{command}}: output line {{line}}")
+
+exit_code = int(os.environ.get("FAKE_SAM_EXIT_CODE", "0"))
+if exit_code:
+    sys.stderr.write(f"Error: fake sam {{command}} failed\\n")
+    sys.exit(exit_code)
+
+
+def stack_name():
+    config_file = "samconfig.yaml"
+    if "--config-file" in args:
+        config_file = args[args.index("--config-file") + 1]
+    content = Path(config_file).read_text(encoding="utf-8")
+    match = re.search(r"stack_name:\\s*['\\"]?([^'\\"\\s]+)", content)
+    return match.group(1)
+
+
+if command == "deploy":
+    name = stack_name()
+    stack_file = state_dir / "stacks" / f"{{name}}.json"
+    if os.environ.get("FAKE_SAM_NO_CHANGES") == "1" and stack_file.exists():
+        sys.stderr.write(f"Error: No changes to deploy. Stack {{name}} is up to date\\n")
+        sys.exit(1)
+    outputs = {{
+        f"Output{{index}}": f"arn:aws:sqs:us-east-1:123456789012:{{name}}-{{index}}"
+        for index in range(int(os.environ.get("FAKE_SAM_OUTPUTS", "2")))
+    }}
+    status = "UPDATE_COMPLETE" if stack_file.exists() else "CREATE_COMPLETE"
+    stack_file.write_text(json.dumps({{"StackStatus": status, "Outputs": outputs}}))
+elif command == "delete":
+    (state_dir / "stacks" / f"{{stack_name()}}.json").unlink(missing_ok=True)
+'''
+
+
+def _stack_missing_error(stack_name: str, operation: str) -> ClientError:
+    return ClientError(
+        {
+            "Error": {
+                "Code": "ValidationError",
+                "Message": f"Stack with id {stack_name} does not exist",
+            }
+        },
+        operation,
+    )
+
+
+class FakeCloudFormation:
+    """In-process CloudFormation backed by the fake SAM CLI's state directory."""
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = state_dir
+        self.stacks_dir = state_dir / "stacks"
+        self.stacks_dir.mkdir(parents=True, exist_ok=True)
+        self.api_calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, operation: str) -> None:
+        with self._lock:
+            self.api_calls[operation] += 1
+
+    def load_stack(self, stack_name: str) -> Optional[Dict[str, Any]]:
+        stack_file = self.stacks_dir / f"{stack_name}.json"
+        if not stack_file.exists():
+            return None
+        stack: Dict[str, Any] = json.loads(stack_file.read_text())
+        return stack
+
+    def remove_stack(self, stack_name: str) -> None:
+        (self.stacks_dir / f"{stack_name}.json").unlink(missing_ok=True)
+
+    def sam_invocations(self) -> Counter:
+        """Count fake SAM CLI invocations by subcommand."""
+        log_file = self.state_dir / "invocations.log"
+        if not log_file.exists():
+            return Counter()
+        return Counter(log_file.read_text().split())
+
+
+class _FakeWaiter:
+    def __init__(self, cloudformation: FakeCloudFormation, name: str):
+        self._cloudformation = cloudformation
+        self._name = name
+
+    def wait(self, StackName: str, **kwargs: Any) -> None:
+        # Deletes are synchronous here, so a single poll always succeeds
+        self._cloudformation.record("DescribeStacks")
+
+
+class _FakeChangeSetPaginator:
+    def __init__(self, cloudformation: FakeCloudFormation):
+        self._cloudformation = cloudformation
+
+    def paginate(self, StackName: str) -> List[Dict[str, Any]]:
+        self._cloudformation.record("ListChangeSets")
+        if self._cloudformation.load_stack(StackName) is None:
+            raise _stack_missing_error(StackName, "ListChangeSets")
+        return [
+            {
+                "Summaries": [
+                    {
+                        "ChangeSetId": f"arn:aws:cloudformation:us-east-1:123456789012:changeSet/{StackName}-noop",
+                        "Status": "FAILED",
+                        "StatusReason": "No updates are to be performed.",
+                    }
+                ]
+            }
+        ]
+
+
+class FakeCloudFormationClient:
+    """The subset of the boto3 CloudFormation client used by aws_utils."""
+
+    def __init__(self, cloudformation: FakeCloudFormation):
+        self._cloudformation = cloudformation
+
+    def describe_stacks(self, StackName: str) -> Dict[str, Any]:
+        self._cloudformation.record("DescribeStacks")
+        stack = self._cloudformation.load_stack(StackName)
+        if stack is None:
+            raise _stack_missing_error(StackName, "DescribeStacks")
+        return {
+            "Stacks": [
+                {
+                    "StackName": StackName,
+                    "StackStatus": stack["StackStatus"],
+                    "Outputs": [
+                        {"OutputKey": key, "OutputValue": value}
+                        for key, value in stack["Outputs"].items()
+                    ],
+                }
+            ]
+        }
+
+    def delete_stack(self, StackName: str) -> None:
+        self._cloudformation.record("DeleteStack")
+        self._cloudformation.remove_stack(StackName)
+
+    def get_waiter(self, name: str) -> _FakeWaiter:
+        return _FakeWaiter(self._cloudformation, name)
+
+    def get_paginator(self, name: str) -> _FakeChangeSetPaginator:
+        if name != "list_change_sets":
+            raise NotImplementedError(f"Fake paginator '{name}' is not implemented")
+        return _FakeChangeSetPaginator(self._cloudformation)
+
+    def delete_change_set(self, ChangeSetName: str, StackName: str) -> None:
+        self._cloudformation.record("DeleteChangeSet")
+
+
+class _FakeSession:
+    def __init__(self, cloudformation: FakeCloudFormation):
+        self._cloudformation = cloudformation
+
+    def client(self, service_name: str, region_name: Optional[str] = None) -> Any:
+        if service_name != "cloudformation":
+            raise NotImplementedError(f"Fake client '{service_name}' not implemented")
+        return FakeCloudFormationClient(self._cloudformation)
+
+
+class _FakeBoto3:
+    """Stands in for the boto3 module inside samstacks.aws_utils."""
+
+    def __init__(self, cloudformation: FakeCloudFormation):
+        self._cloudformation = cloudformation
+
+    def Session(self, profile_name: Optional[str] = None) -> _FakeSession:
+        return _FakeSession(self._cloudformation)
+
+
+def install_fake_sam(bin_dir: Path) -> Path:
+    """Write the fake sam executable into bin_dir and return its path."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    sam_path = bin_dir / "sam"
+    sam_path.write_text(FAKE_SAM_SCRIPT.format(python=sys.executable))
+    sam_path.chmod(sam_path.stat().st_mode | stat.S_IEXEC)
+    return sam_path
+
+
+@contextmanager
+def fake_aws(
+    work_dir: Path,
+    latency: float = 0.0,
+    output_lines: int = 0,
+    exit_code: int = 0,
+    no_changes: bool = False,
+) -> Generator[FakeCloudFormation, None, None]:
+    """Route sam and CloudFormation calls to local fakes for the duration.
+
+    Args:
+        work_dir: Scratch directory for the fake sam binary and stack state.
+        latency: Seconds each fake sam invocation sleeps.
+        output_lines: Lines of stdout each fake sam invocation prints.
+        exit_code: Exit code of every fake sam invocation.
+        no_changes: Make redeploys of existing stacks report "No changes to deploy".
+    """
+    state_dir = work_dir / "state"
+    cloudformation = FakeCloudFormation(state_dir)
+    bin_dir = work_dir / "bin"
+    install_fake_sam(bin_dir)
+
+    fake_env = {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "FAKE_SAM_STATE_DIR": str(state_dir),
+        "FAKE_SAM_LATENCY": str(latency),
+        "FAKE_SAM_OUTPUT_LINES": str(output_lines),
+        "FAKE_SAM_EXIT_CODE": str(exit_code),
+        "FAKE_SAM_NO_CHANGES": "1" if no_changes else "0",
+    }
+    with (
+        mock.patch.dict(os.environ, fake_env),
+        mock.patch.object(aws_utils, "boto3", _FakeBoto3(cloudformation)),
+    ):
+        yield cloudformation
@@ -0,0 +1,212 @@
+"""
+Synthetic pipeline manifests for benchmarks.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+# Environment variables referenced by generated expressions
+BENCH_ENV_VARS = {
+    "BENCH_REGION": "us-east-1",
+    "BENCH_TEAM": "platform",
+}
+
+TEMPLATE_HEADER = """\
+AWSTemplateFormatVersion: '2010-09-09'
+Transform: AWS::Serverless-2016-10-31
+Conditions:
+  Never: !Equals [a, b]
+"""
+# "Missing" is declared but never created, so references to it fall back
+TEMPLATE_OUTPUTS = """\
+Outputs:
+  Output0:
+    Value: !Ref AWS::StackName
+  Output1:
+    Value: !Ref AWS::StackName
+  Missing:
+    Condition: Never
+    Value: !Ref AWS::StackName
+"""
+
+
+def stack_template(param_names: List[str]) -> str:
+    """Return a template declaring param_names and the generated outputs."""
+    parameters = "".join(f"  {name}:\n    Type: String\n" for name in param_names)
+    if parameters:
+        parameters = "Parameters:\n" + parameters
+    return TEMPLATE_HEADER + parameters + TEMPLATE_OUTPUTS
+
+
+def set_bench_environment() -> None:
+    """Export the environment variables referenced by generated manifests."""
+    for name, value in BENCH_ENV_VARS.items():
+        os.environ.setdefault(name, value)
+
+
+def stack_id(index: int) -> str:
+    """Return the id of the index-th generated stack."""
+    return f"stack-{index:04d}"
+
+
+def _stack_expressions(index: int, expressions_per_stack: int) -> List[str]:
+    """Build a mix of input, env, output, fallback and arithmetic expressions."""
+    upstream = stack_id(index - 1) if index > 0 else None
+    patterns = [
+        "${{ inputs.environment }}",
+        "${{ env.BENCH_REGION || 'us-west-2' }}",
+        "${{ inputs.replicas * 2 + 1 }}",
+        "${{ inputs.name }}-${{ env.BENCH_TEAM }}",
+        "${{ env.BENCH_MISSING || inputs.environment || 'dev' }}",
+        "${{ inputs.replicas > 1 }}",
+    ]
+    if upstream:
+        patterns += [
+            f"${{{{ stacks.{upstream}.outputs.Output0 }}}}",
+            f"${{{{ stacks.{upstream}.outputs.Missing || inputs.name }}}}",
+            f"${{{{ stacks.{stack_id(index // 2)}.outputs.Output1 || 'none' }}}}",
+        ]
+    return [patterns[i % len(patterns)] for i in range(expressions_per_stack)]
+
+
+def build_manifest(
+    num_stacks: int, expressions_per_stack: int = 12, default_sam_config_keys: int = 50
+) -> Dict[str, Any]:
+    """Build a manifest dictionary with num_stacks chained stacks.
+
+    Stack parameters carry expressions_per_stack template expressions each, so
+    1,000 stacks yield 12,000+ expressions with the default settings.
+    """
+    default_sam_config: Dict[str, Any] = {
+        "version": 0.1,
+        "default": {
+            "deploy": {
+                "parameters": {
+                    "capabilities": "CAPABILITY_IAM",
+                    "tags": "team=${{ env.BENCH_TEAM }} env=${{ inputs.environment }}",
+                }
+            },
+            "build": {"parameters": {"cached": True, "parallel": True}},
+        },
+    }
+    extra = default_sam_config["default"].setdefault("extra", {})
+    for i in range(default_sam_config_keys):
+        extra[f"setting_{i}"] = (
+            f"${{{{ inputs.name }}}}-{i}" if i % 10 == 0 else f"static-{i}"
+        )
+
+    stacks = []
+    for index in range(num_stacks):
+        expressions = _stack_expressions(index, expressions_per_stack)
+        stacks.append(
+            {
+                "id": stack_id(index),
+                "dir": f"stacks/{stack_id(index)}",
+                "if": "${{ inputs.enabled }}",
+                "params": {f"Param{i}": expr for i, expr in enumerate(expressions)},
+                "sam_config_overrides": {
+                    "default": {
+                        "deploy": {
+                            "parameters": {"s3_prefix": "${{ inputs.environment }}"}
+                        }
+                    }
+                },
+            }
+        )
+
+    return {
+        "pipeline_name": "bench-pipeline",
+        "pipeline_description": "Synthetic benchmark pipeline",
+        "pipeline_settings": {
+            "stack_name_prefix": "${{ inputs.environment }}-",
+            "default_region": "${{ env.BENCH_REGION || 'us-east-1' }}",
+            "inputs": {
+                "environment": {"type": "string", "default": "dev"},
+                "name": {"type": "string", "default": "bench"},
+                "replicas": {"type": "number", "default": 2},
+                "enabled": {"type": "boolean", "default": True},
+            },
+            "default_sam_config": default_sam_config,
+        },
+        "stacks": stacks,
+    }
+
+
+def write_pipeline(base_dir: Path, manifest: Dict[str, Any]) -> Path:
+    """Write a manifest dictionary and its stack directories under base_dir."""
+    for stack in manifest["stacks"]:
+        stack_dir = base_dir / stack["dir"]
+        stack_dir.mkdir(parents=True, exist_ok=True)
+        (stack_dir / "template.yaml").write_text(
+            stack_template(list(stack.get("params", {}))), encoding="utf-8"
+        )
+
+    manifest_path = base_dir / "pipeline.yml"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(manifest, f, sort_keys=False)
+    return manifest_path
+
+
+def _output_ref(upstream_index: int) -> str:
+    return f"${{{{ stacks.{stack_id(upstream_index)}.outputs.Output0 }}}}"
+
+
+def stack_dependencies(shape: str, num_stacks: int) -> List[List[int]]:
+    """Return, for each stack index, the indexes of the stacks it reads outputs from.
+
+    Shapes:
+        chain: every stack depends on the previous one.
+        fan: one root stack, every other stack depends on it.
+        diamond: one root, a wide middle layer depending on the root, and a
+            final stack depending on every middle stack.
+    """
+    if shape == "chain":
+        return [[index - 1] if index else [] for index in range(num_stacks)]
+    if shape == "fan":
+        return [[0] if index else [] for index in range(num_stacks)]
+    if shape == "diamond":
+        if num_stacks < 3:
+            raise ValueError("A diamond needs at least 3 stacks")
+        middle = list(range(1, num_stacks - 1))
+        return [[]] + [[0] for _ in middle] + [middle]
+    raise ValueError(f"Unknown manifest shape '{shape}'")
+
+
+def build_shaped_manifest(shape: str, num_stacks: int) -> Dict[str, Any]:
+    """Build a deployable manifest whose stacks are wired together in a shape."""
+    stacks = []
+    for index, upstream in enumerate(stack_dependencies(shape, num_stacks)):
+        params = {"Environment": "${{ inputs.environment }}"}
+        for position, upstream_index in enumerate(upstream):
+            params[f"Upstream{position}"] = _output_ref(upstream_index)
+        stacks.append(
+            {
+                "id": stack_id(index),
+                "dir": f"stacks/{stack_id(index)}",
+                "params": params,
+            }
+        )
+
+    return {
+        "pipeline_name": f"bench-{shape}",
+        "pipeline_settings": {
+            "stack_name_prefix": "${{ inputs.environment }}-",
+            "default_region": "us-east-1",
+            "inputs": {"environment": {"type": "string", "default": "bench"}},
+        },
+        "stacks": stacks,
+    }
+
+
+def fake_outputs(num_stacks: int) -> Dict[str, Dict[str, str]]:
+    """Return plausible outputs for every generated stack."""
+    return {
+        stack_id(index): {
+            "Output0": f"arn:aws:sqs:us-east-1:123456789012:{stack_id(index)}",
+            "Output1": f"https://{stack_id(index)}.example.com",
+        }
+        for index in range(num_stacks)
+    }
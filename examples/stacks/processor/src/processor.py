@@ -10,9 +10,11 @@ from typing import Any, Dict
 import boto3
 from botocore.exceptions import ClientError
 
-# Configure logging
+# Configure logging; DETAILED_LOGGING comes from the EnableDetailedLogging parameter
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(
+    logging.DEBUG if os.environ.get("DETAILED_LOGGING") == "true" else logging.INFO
+)
 
 # Initialize AWS clients
 s3_client = boto3.client("s3")
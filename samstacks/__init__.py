@@ -19,7 +19,21 @@ except ImportError:
 __author__ = "Alessandro Bologna"
 __email__ = "alessandro.bologna@gmail.com"
 
-from .core import Pipeline, Stack
+from typing import TYPE_CHECKING, Any
+
 from .exceptions import SamStacksError
 
+if TYPE_CHECKING:
+    from .core import Pipeline, Stack
+
 __all__ = ["Pipeline", "Stack", "SamStacksError", "__version__"]
+
+
+def __getattr__(name: str) -> Any:
+    # core pulls in boto3 and pydantic; import it only when Pipeline or Stack
+    # is used, so the CLI can print --help and --version without it
+    if name in ("Pipeline", "Stack"):
+        from . import core
+
+        return getattr(core, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
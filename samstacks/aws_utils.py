@@ -3,16 +3,89 @@ AWS utilities for samstacks.
 """
 
 import logging
-from typing import Dict, Optional, List, cast, Any
+import time
+from contextlib import contextmanager
+from typing import Dict, Generator, Optional, List, cast, Any
 import re
 
-import boto3
-from botocore.exceptions import BotoCoreError, ClientError, WaiterError
-
+from . import metrics
 from .exceptions import OutputRetrievalError, StackDeletionError
 
 logger = logging.getLogger(__name__)
 
+AWS_API_CALLS = metrics.counter(
+    "samstacks_aws_api_calls",
+    "CloudFormation API calls by operation and outcome.",
+    ["operation", "outcome"],
+)
+AWS_API_CALL_DURATION = metrics.summary(
+    "samstacks_aws_api_call_duration_seconds",
+    "Latency of CloudFormation API calls, including SDK retries.",
+    ["operation"],
+)
+AWS_API_RETRIES = metrics.counter(
+    "samstacks_aws_api_retries",
+    "SDK retry attempts (mostly throttling) on CloudFormation API calls.",
+    ["operation"],
+)
+
+_THROTTLING_ERROR_CODES = {"Throttling", "ThrottlingException", "RequestLimitExceeded"}
+
+
+def __getattr__(name: str) -> Any:
+    # boto3 takes longer to import than the rest of samstacks together, so it
+    # is imported on first use; aws_utils.boto3 stays available (and patchable)
+    if name == "boto3":
+        return _boto3()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _boto3() -> Any:
+    """Import boto3 on first use and keep it as the module's boto3 attribute."""
+    module = globals().get("boto3")
+    if module is None:
+        import boto3 as module
+
+        globals()["boto3"] = module
+    return module
+
+
+def _session(profile: Optional[str]) -> Any:
+    """Create a boto3 session, for the given profile if there is one."""
+    boto3 = _boto3()
+    return boto3.Session(profile_name=profile) if profile else boto3.Session()
+
+
+@contextmanager
+def _track_api_call(operation: str) -> Generator[Dict[str, Any], None, None]:
+    """Record the count, latency and retries of one CloudFormation API call.
+
+    Store the call's response under "response" in the yielded dict so its
+    retry count can be read from the response metadata.
+    """
+    from botocore.exceptions import ClientError
+
+    call: Dict[str, Any] = {}
+    outcome = "success"
+    start = time.perf_counter()
+    try:
+        yield call
+    except ClientError as e:
+        error_code = e.response.get("Error", {}).get("Code", "Unknown")
+        outcome = "throttled" if error_code in _THROTTLING_ERROR_CODES else "error"
+        call.setdefault("response", e.response)
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        AWS_API_CALLS.inc(operation=operation, outcome=outcome)
+        AWS_API_CALL_DURATION.observe(time.perf_counter() - start, operation=operation)
+        response = call.get("response") or {}
+        retries = response.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        if retries:
+            AWS_API_RETRIES.inc(retries, operation=operation)
+
 
 def mask_account_id(value: Any, mask_char: str = "*") -> str:
     """
@@ -434,15 +507,20 @@ def get_stack_outputs(
     Raises:
         OutputRetrievalError: If the stack outputs cannot be retrieved
     """
+    from botocore.exceptions import BotoCoreError, ClientError
+
     try:
         # Create session with optional profile
-        session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+        session = _session(profile)
 
         # Create CloudFormation client
         cf_client = session.client("cloudformation", region_name=region)
 
         # Describe the stack to get its outputs
-        response = cf_client.describe_stacks(StackName=stack_name)
+        with _track_api_call("DescribeStacks") as call:
+            response = call["response"] = cf_client.describe_stacks(
+                StackName=stack_name
+            )
 
         stacks = response.get("Stacks", [])
         if not stacks:
@@ -486,6 +564,63 @@ def get_stack_outputs(
         )
 
 
+def get_all_stack_outputs(
+    region: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> Dict[str, Dict[str, str]]:
+    """
+    Retrieve the outputs of every stack in a region with paginated
+    DescribeStacks calls, instead of one call per stack.
+
+    Args:
+        region: AWS region (optional)
+        profile: AWS profile (optional)
+
+    Returns:
+        Dictionary mapping stack names to their output keys and values
+
+    Raises:
+        OutputRetrievalError: If the stacks cannot be described
+    """
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    try:
+        session = _session(profile)
+        cf_client = session.client("cloudformation", region_name=region)
+
+        all_outputs: Dict[str, Dict[str, str]] = {}
+        next_token: Optional[str] = None
+        while True:
+            kwargs = {"NextToken": next_token} if next_token else {}
+            with _track_api_call("DescribeStacks") as call:
+                response = call["response"] = cf_client.describe_stacks(**kwargs)
+            for stack in response.get("Stacks", []):
+                all_outputs[stack["StackName"]] = {
+                    output["OutputKey"]: output["OutputValue"]
+                    for output in stack.get("Outputs", [])
+                    if output.get("OutputKey") and output.get("OutputValue") is not None
+                }
+            next_token = response.get("NextToken")
+            if not next_token:
+                break
+
+        logger.debug(
+            f"Retrieved outputs of {len(all_outputs)} stacks in region '{region}'"
+        )
+        return all_outputs
+
+    except ClientError as e:
+        error_message = e.response.get("Error", {}).get("Message", str(e))
+        raise OutputRetrievalError(
+            f"AWS error describing stacks in region '{region}': {error_message}"
+        )
+
+    except BotoCoreError as e:
+        raise OutputRetrievalError(
+            f"AWS configuration error describing stacks in region '{region}': {e}"
+        )
+
+
 def get_stack_status(
     stack_name: str,
     region: str | None = None,
@@ -505,11 +640,16 @@ def get_stack_status(
     Raises:
         SamStacksError: If there's an AWS or configuration error.
     """
+    from botocore.exceptions import BotoCoreError, ClientError
+
     try:
-        session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+        session = _session(profile)
         cf_client = session.client("cloudformation", region_name=region)
 
-        response = cf_client.describe_stacks(StackName=stack_name)
+        with _track_api_call("DescribeStacks") as call:
+            response = call["response"] = cf_client.describe_stacks(
+                StackName=stack_name
+            )
         stacks = response.get("Stacks", [])
         if not stacks:
             return None  # Stack does not exist
@@ -557,9 +697,10 @@ def delete_cloudformation_stack(
     """
     logger.info(f"Deleting CloudFormation stack: {stack_name}")
     try:
-        session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+        session = _session(profile)
         cf_client = session.client("cloudformation", region_name=region)
-        cf_client.delete_stack(StackName=stack_name)
+        with _track_api_call("DeleteStack") as call:
+            call["response"] = cf_client.delete_stack(StackName=stack_name)
         logger.debug(f"Delete command issued for stack '{stack_name}'.")
     except Exception as e:
         raise StackDeletionError(
@@ -583,18 +724,21 @@ def wait_for_stack_delete_complete(
     Raises:
         StackDeletionError: If waiting fails or stack deletion results in an error.
     """
+    from botocore.exceptions import WaiterError
+
     logger.info(f"Waiting for stack '{stack_name}' to delete...")
     try:
-        session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+        session = _session(profile)
         cf_client = session.client("cloudformation", region_name=region)
         waiter = cf_client.get_waiter("stack_delete_complete")
-        waiter.wait(
-            StackName=stack_name,
-            WaiterConfig={
-                "Delay": 10,  # Poll every 10 seconds
-                "MaxAttempts": 60,  # Wait for up to 10 minutes (60 * 10s)
-            },
-        )
+        with _track_api_call("WaitStackDeleteComplete"):
+            waiter.wait(
+                StackName=stack_name,
+                WaiterConfig={
+                    "Delay": 10,  # Poll every 10 seconds
+                    "MaxAttempts": 60,  # Wait for up to 10 minutes (60 * 10s)
+                },
+            )
         logger.info(f"Stack '{stack_name}' deleted successfully.")
     except WaiterError as e:
         # Check if the error is because the stack no longer exists (which is good)
@@ -638,13 +782,17 @@ def list_failed_no_update_changesets(
     Returns:
         A list of changeset ARNs to be deleted.
     """
+    from botocore.exceptions import ClientError
+
     changeset_arns = []
     try:
-        session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+        session = _session(profile)
         cf_client = session.client("cloudformation", region_name=region)
 
         paginator = cf_client.get_paginator("list_change_sets")
-        for page in paginator.paginate(StackName=stack_name):
+        with _track_api_call("ListChangeSets"):
+            pages = list(paginator.paginate(StackName=stack_name))
+        for page in pages:
             for summary in page.get("Summaries", []):
                 if (
                     summary.get("Status") == "FAILED"
@@ -694,15 +842,18 @@ def delete_changeset(
         region: AWS region.
         profile: AWS profile.
     """
+    from botocore.exceptions import ClientError
+
     logger.debug(
         f"Deleting changeset '{changeset_name_or_arn}' for stack '{stack_name}'."
     )
     try:
-        session = boto3.Session(profile_name=profile) if profile else boto3.Session()
+        session = _session(profile)
         cf_client = session.client("cloudformation", region_name=region)
-        cf_client.delete_change_set(
-            ChangeSetName=changeset_name_or_arn, StackName=stack_name
-        )
+        with _track_api_call("DeleteChangeSet") as call:
+            call["response"] = cf_client.delete_change_set(
+                ChangeSetName=changeset_name_or_arn, StackName=stack_name
+            )
         logger.debug(
             f"Successfully initiated deletion of changeset '{changeset_name_or_arn}'."
         )
@@ -2,40 +2,20 @@
 Core logic for the `samstacks bootstrap` command.
 """
 
+import copy
 import os
 import tomllib  # Use standard library tomllib for Python 3.11+
 import yaml
 from pathlib import Path
-from typing import List, Dict, Any, Set, Optional, Tuple, cast
+from typing import List, Dict, Any, Sequence, Set, Optional, Tuple, cast
 import logging
 
 from . import ui  # Import UI module
+from .discovery import DEFAULT_IGNORE_PATTERNS, find_stack_directories
+from .io_utils import dump_yaml, load_toml_file, load_yaml_file
 from .exceptions import SamStacksError  # Or a new BootstrapError
 
 
-# --- Add default constructor for unknown YAML tags ---
-def default_yaml_constructor(
-    loader: yaml.SafeLoader, tag_suffix: str, node: yaml.Node
-) -> Any:
-    """A default constructor for PyYAML to handle unknown tags like !Ref, !Sub.
-    It attempts to construct the node as a standard Python type.
-    """
-    if isinstance(node, yaml.ScalarNode):
-        return loader.construct_scalar(node)
-    elif isinstance(node, yaml.SequenceNode):
-        return loader.construct_sequence(node, deep=True)
-    elif isinstance(node, yaml.MappingNode):
-        return loader.construct_mapping(node, deep=True)
-    return None  # Or raise an error for unhandled node types if strictness is needed
-
-
-# Register for any tag starting with '!'
-# This allows parsing of CloudFormation intrinsic functions without defining each one.
-yaml.add_multi_constructor("!", default_yaml_constructor, Loader=yaml.SafeLoader)
-if hasattr(yaml, "CSafeLoader"):  # Also register for CSafeLoader if available
-    yaml.add_multi_constructor("!", default_yaml_constructor, Loader=yaml.CSafeLoader)  # type: ignore
-# --- End YAML tag handling ---
-
 logger = logging.getLogger(__name__)
 
 
@@ -76,6 +56,8 @@ class BootstrapManager:
         pipeline_name: Optional[str] = None,
         stack_name_prefix: Optional[str] = None,
         overwrite: bool = False,
+        ignore_patterns: Sequence[str] = (),
+        use_gitignore: bool = True,
     ):
         self.scan_path: Path = Path(scan_path).resolve()
         self.output_file_path: Path = (
@@ -85,6 +67,12 @@ class BootstrapManager:
         self.pipeline_name: str = pipeline_name or self.scan_path.name + "-pipeline"
         self.stack_name_prefix: Optional[str] = stack_name_prefix
         self.overwrite: bool = overwrite
+        # Directories not scanned for stacks, in .gitignore syntax
+        self.ignore_patterns: List[str] = [
+            *DEFAULT_IGNORE_PATTERNS,
+            *ignore_patterns,
+        ]
+        self.use_gitignore: bool = use_gitignore
 
         self.discovered_stacks: List[DiscoveredStack] = []
         self.logger = logger  # Alias for convenience
@@ -166,9 +154,10 @@ class BootstrapManager:
 
         # 6. Write pipeline.yml
         # self.logger.info(f"Writing the following structure to {self.output_file_path}:\n{yaml.dump(pipeline_yaml_structure, indent=2, sort_keys=False, default_flow_style=False)}") # Too verbose for INFO
-        self.logger.debug(
-            f"Generated pipeline YAML structure:\n{yaml.dump(pipeline_yaml_structure, indent=2, sort_keys=False, default_flow_style=False)}"
-        )  # Good for DEBUG
+        if self.logger.isEnabledFor(logging.DEBUG):  # Skip the dump otherwise
+            self.logger.debug(
+                f"Generated pipeline YAML structure:\n{dump_yaml(pipeline_yaml_structure)}"
+            )
         self._write_pipeline_yaml(pipeline_yaml_structure)
         # Success message will be handled by the CLI layer
         # self.logger.info(f"Successfully generated pipeline manifest at: {self.output_file_path}")
@@ -177,108 +166,81 @@ class BootstrapManager:
         """Scans the path for directories containing template.yaml or template.yml."""
         self.logger.debug(f"Scanning for SAM templates in {self.scan_path}...")
         self.discovered_stacks = []
-        processed_dirs: Set[Path] = set()
-
-        for pattern in ["template.yaml", "template.yml"]:
-            for template_file_path in self.scan_path.rglob(f"**/{pattern}"):
-                if any(part == ".aws-sam" for part in template_file_path.parts):
-                    self.logger.debug(
-                        f"Skipping template inside .aws-sam directory: {template_file_path}"
-                    )
-                    continue
-
-                abs_stack_dir = template_file_path.parent.resolve()
-                if abs_stack_dir in processed_dirs:
-                    self.logger.debug(
-                        f"Skipping already processed directory: {abs_stack_dir}"
-                    )
-                    continue
 
+        for stack_dir in find_stack_directories(
+            self.scan_path, self.ignore_patterns, self.use_gitignore
+        ):
+            abs_stack_dir = stack_dir.path
+            self.logger.debug(
+                f"Found template: {stack_dir.template_path} in dir: {abs_stack_dir}"
+            )
+            if stack_dir.samconfig_path:
                 self.logger.debug(
-                    f"Found template: {template_file_path} in dir: {abs_stack_dir}"
+                    f"Found {stack_dir.samconfig_path.name}: {stack_dir.samconfig_path}"
+                )
+            else:
+                self.logger.debug(
+                    f"No samconfig file (.toml, .yaml, or .yml) found in {abs_stack_dir}"
                 )
 
-                # Discover samconfig file: .toml, then .yaml, then .yml
-                samconfig_path_to_use: Optional[Path] = None
-                samconfig_toml_path = abs_stack_dir / "samconfig.toml"
-                samconfig_yaml_path = abs_stack_dir / "samconfig.yaml"
-                samconfig_yml_path = abs_stack_dir / "samconfig.yml"
-
-                if samconfig_toml_path.is_file():
-                    samconfig_path_to_use = samconfig_toml_path
-                    self.logger.debug(f"Found samconfig.toml: {samconfig_path_to_use}")
-                elif samconfig_yaml_path.is_file():
-                    samconfig_path_to_use = samconfig_yaml_path
-                    self.logger.debug(f"Found samconfig.yaml: {samconfig_path_to_use}")
-                elif samconfig_yml_path.is_file():
-                    samconfig_path_to_use = samconfig_yml_path
-                    self.logger.debug(f"Found samconfig.yml: {samconfig_path_to_use}")
-                else:
-                    self.logger.debug(
-                        f"No samconfig file (.toml, .yaml, or .yml) found in {abs_stack_dir}"
-                    )
+            stack_obj = DiscoveredStack(
+                abs_dir_path=abs_stack_dir,
+                template_path=stack_dir.template_path,
+                samconfig_path=stack_dir.samconfig_path,
+            )
 
-                stack_obj = DiscoveredStack(
-                    abs_dir_path=abs_stack_dir,
-                    template_path=template_file_path,
-                    samconfig_path=samconfig_path_to_use,  # Use the discovered one
+            # Determine stack ID based on strategy
+            if self.default_stack_id_source == "dir":
+                stack_id_base = abs_stack_dir.name
+            elif self.default_stack_id_source == "samconfig_stack_name":
+                # This part will be fleshed out when _analyze_stacks populates samconfig_data
+                # For now, fallback to dir name if samconfig parsing isn't done yet or lacks stack_name
+                # We will refine this logic later. For discovery, dir name is a safe start.
+                stack_id_base = abs_stack_dir.name
+            else:
+                stack_id_base = (
+                    abs_stack_dir.name
+                )  # Default to dir if strategy is unknown
+
+            # Sanitize stack_id_base to be CloudFormation-compatible
+            # CloudFormation stack names: letters, numbers, hyphens only (no underscores)
+            # Replace invalid chars with hyphens, ensure starts with letter
+            sanitized_id = "".join(c if c.isalnum() else "-" for c in stack_id_base)
+            # Remove consecutive hyphens and leading/trailing hyphens
+            sanitized_id = "-".join(part for part in sanitized_id.split("-") if part)
+            if not sanitized_id or not sanitized_id[0].isalpha():
+                sanitized_id = "stack-" + sanitized_id
+            # Ensure uniqueness if multiple stacks might sanitize to the same ID
+            # (simple counter for now, can be made more robust)
+            temp_id = sanitized_id
+            counter = 1
+            while any(s.id == temp_id for s in self.discovered_stacks):
+                temp_id = f"{sanitized_id}-{counter}"
+                counter += 1
+            stack_obj.id = temp_id
+
+            # Determine relative_dir_path
+            try:
+                # Path should be relative to the scan_path (project root where pipeline.yml is typically placed)
+                stack_obj.relative_dir_path = os.path.relpath(
+                    abs_stack_dir, self.scan_path
                 )
-
-                # Determine stack ID based on strategy
-                if self.default_stack_id_source == "dir":
-                    stack_id_base = abs_stack_dir.name
-                elif self.default_stack_id_source == "samconfig_stack_name":
-                    # This part will be fleshed out when _analyze_stacks populates samconfig_data
-                    # For now, fallback to dir name if samconfig parsing isn't done yet or lacks stack_name
-                    # We will refine this logic later. For discovery, dir name is a safe start.
-                    stack_id_base = abs_stack_dir.name
-                else:
-                    stack_id_base = (
-                        abs_stack_dir.name
-                    )  # Default to dir if strategy is unknown
-
-                # Sanitize stack_id_base to be CloudFormation-compatible
-                # CloudFormation stack names: letters, numbers, hyphens only (no underscores)
-                # Replace invalid chars with hyphens, ensure starts with letter
-                sanitized_id = "".join(c if c.isalnum() else "-" for c in stack_id_base)
-                # Remove consecutive hyphens and leading/trailing hyphens
-                sanitized_id = "-".join(
-                    part for part in sanitized_id.split("-") if part
+            except ValueError as e:
+                # This can happen if scan_path and output_file_path are on different drives (Windows)
+                # or if output_file_path is not a child of scan_path in a way that allows relative path
+                # However, with scan_path as the base, this is less likely unless scan_path itself is odd.
+                self.logger.warning(
+                    f"Could not determine relative path for {abs_stack_dir} from {self.scan_path}. "
+                    f"Using directory name as fallback. Error: {e}"
                 )
-                if not sanitized_id or not sanitized_id[0].isalpha():
-                    sanitized_id = "stack-" + sanitized_id
-                # Ensure uniqueness if multiple stacks might sanitize to the same ID
-                # (simple counter for now, can be made more robust)
-                temp_id = sanitized_id
-                counter = 1
-                while any(s.id == temp_id for s in self.discovered_stacks):
-                    temp_id = f"{sanitized_id}-{counter}"
-                    counter += 1
-                stack_obj.id = temp_id
-
-                # Determine relative_dir_path
-                try:
-                    # Path should be relative to the scan_path (project root where pipeline.yml is typically placed)
-                    stack_obj.relative_dir_path = os.path.relpath(
-                        abs_stack_dir, self.scan_path
-                    )
-                except ValueError as e:
-                    # This can happen if scan_path and output_file_path are on different drives (Windows)
-                    # or if output_file_path is not a child of scan_path in a way that allows relative path
-                    # However, with scan_path as the base, this is less likely unless scan_path itself is odd.
-                    self.logger.warning(
-                        f"Could not determine relative path for {abs_stack_dir} from {self.scan_path}. "
-                        f"Using directory name as fallback. Error: {e}"
-                    )
-                    stack_obj.relative_dir_path = (
-                        abs_stack_dir.name
-                    )  # Fallback to just the dir name
+                stack_obj.relative_dir_path = (
+                    abs_stack_dir.name
+                )  # Fallback to just the dir name
 
-                self.discovered_stacks.append(stack_obj)
-                processed_dirs.add(abs_stack_dir)
-                self.logger.debug(
-                    f"  + Discovered stack: '{stack_obj.id}' in '{stack_obj.relative_dir_path}'"
-                )
+            self.discovered_stacks.append(stack_obj)
+            self.logger.debug(
+                f"  + Discovered stack: '{stack_obj.id}' in '{stack_obj.relative_dir_path}'"
+            )
 
         # Optionally, sort discovered_stacks by path or id for consistent ordering if needed before dependency sort
         self.discovered_stacks.sort(key=lambda s: s.id)
@@ -294,14 +256,16 @@ class BootstrapManager:
             )
             # Parse template.yaml
             try:
-                with open(stack_obj.template_path, "r", encoding="utf-8") as f_template:
-                    template_content = cast(Dict[str, Any], yaml.safe_load(f_template))
-                    if not isinstance(template_content, dict):
-                        self.logger.warning(
-                            f"Template file {stack_obj.template_path} for stack {stack_obj.id} is not a valid YAML mapping. Skipping parameter/output analysis."
-                        )
-                        template_content = {}  # Ensure it's a dict to avoid errors below
-                    stack_obj.template_data = template_content
+                template_content = cast(
+                    Dict[str, Any],
+                    load_yaml_file(stack_obj.template_path, template=True),
+                )
+                if not isinstance(template_content, dict):
+                    self.logger.warning(
+                        f"Template file {stack_obj.template_path} for stack {stack_obj.id} is not a valid YAML mapping. Skipping parameter/output analysis."
+                    )
+                    template_content = {}  # Ensure it's a dict to avoid errors below
+                stack_obj.template_data = template_content
 
                 # Extract Parameters
                 parameters_section = stack_obj.template_data.get("Parameters")
@@ -363,30 +327,23 @@ class BootstrapManager:
                     self.logger.debug(
                         f"Attempting to parse samconfig file: {file_to_parse}"
                     )
-                    with open(
-                        file_to_parse, "rb"
-                    ) as f_samconfig:  # Open in binary for tomllib
-                        if file_to_parse.suffix == ".toml":
-                            stack_obj.samconfig_data = tomllib.load(f_samconfig)
-                            self.logger.debug(
-                                f"  Successfully parsed as TOML: {file_to_parse}"
-                            )
-                        elif file_to_parse.suffix in [".yaml", ".yml"]:
-                            # PyYAML needs text mode, so re-open or read then decode
-                            # For simplicity, read bytes then decode for yaml.safe_load
-                            file_content_bytes = f_samconfig.read()
-                            stack_obj.samconfig_data = cast(
-                                Dict[str, Any],
-                                yaml.safe_load(file_content_bytes.decode("utf-8")),
-                            )
-                            self.logger.debug(
-                                f"  Successfully parsed as YAML: {file_to_parse}"
-                            )
-                        else:
-                            self.logger.warning(
-                                f"Unrecognized samconfig file extension: {file_to_parse.suffix}. Skipping parse."
-                            )
-                            stack_obj.samconfig_data = None
+                    if file_to_parse.suffix == ".toml":
+                        stack_obj.samconfig_data = load_toml_file(file_to_parse)
+                        self.logger.debug(
+                            f"  Successfully parsed as TOML: {file_to_parse}"
+                        )
+                    elif file_to_parse.suffix in [".yaml", ".yml"]:
+                        stack_obj.samconfig_data = cast(
+                            Dict[str, Any], load_yaml_file(file_to_parse)
+                        )
+                        self.logger.debug(
+                            f"  Successfully parsed as YAML: {file_to_parse}"
+                        )
+                    else:
+                        self.logger.warning(
+                            f"Unrecognized samconfig file extension: {file_to_parse.suffix}. Skipping parse."
+                        )
+                        stack_obj.samconfig_data = None
                 except FileNotFoundError:
                     self.logger.warning(
                         f"Samconfig file listed but not found during analysis: {file_to_parse}"
@@ -527,9 +484,7 @@ class BootstrapManager:
             if not isinstance(config, dict):
                 return config  # Should not happen at top level
 
-            copied_config = cast(
-                Dict[str, Any], yaml.safe_load(yaml.safe_dump(config))
-            )  # Deep copy
+            copied_config = copy.deepcopy(config)
 
             # Remove globally skipped fields from all levels of parameters
             # e.g. default.deploy.parameters, prod.sync.parameters etc.
@@ -556,9 +511,7 @@ class BootstrapManager:
 
         # Find common settings
         # Start with the first sanitized config as a candidate for common settings
-        common_settings_candidate = cast(
-            Dict[str, Any], yaml.safe_load(yaml.safe_dump(sanitized_configs[0][1]))
-        )
+        common_settings_candidate = copy.deepcopy(sanitized_configs[0][1])
 
         for _, other_config_data in sanitized_configs[1:]:
             common_settings_candidate = self._intersect_configs(
@@ -591,10 +544,7 @@ class BootstrapManager:
                 )
             else:
                 # If no default_sam_config, then everything from the sanitized config is an override
-                current_overrides = cast(
-                    Dict[str, Any],
-                    yaml.safe_load(yaml.safe_dump(original_sanitized_config)),
-                )
+                current_overrides = copy.deepcopy(original_sanitized_config)
 
             # Always store the result for the stack_id, even if current_overrides is empty.
             all_stack_specific_overrides[stack_id] = current_overrides
@@ -635,9 +585,7 @@ class BootstrapManager:
         diff: Dict[str, Any] = {}
         for key, value_primary in config_primary.items():
             if key not in config_to_subtract:
-                diff[key] = cast(
-                    Any, yaml.safe_load(yaml.safe_dump(value_primary))
-                )  # Deep copy new items
+                diff[key] = copy.deepcopy(value_primary)  # Deep copy new items
             else:
                 value_to_subtract = config_to_subtract[key]
                 if isinstance(value_primary, dict) and isinstance(
@@ -647,8 +595,8 @@ class BootstrapManager:
                     if nested_diff:
                         diff[key] = nested_diff
                 elif value_primary != value_to_subtract:
-                    diff[key] = cast(
-                        Any, yaml.safe_load(yaml.safe_dump(value_primary))
+                    diff[key] = copy.deepcopy(
+                        value_primary
                     )  # Deep copy different items
         return diff
 
@@ -788,13 +736,7 @@ class BootstrapManager:
         """Writes the generated pipeline content to the output file."""
         try:
             with open(self.output_file_path, "w", encoding="utf-8") as f:
-                yaml.dump(
-                    pipeline_content,
-                    f,
-                    sort_keys=False,
-                    default_flow_style=False,
-                    indent=2,
-                )
+                dump_yaml(pipeline_content, f)
             self.logger.debug(f"Pipeline manifest written to {self.output_file_path}")
         except IOError as e:
             raise SamStacksError(
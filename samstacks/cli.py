@@ -4,18 +4,50 @@ Command-line interface for samstacks.
 
 import logging
 import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import click
 
 from . import __version__
-from .core import Pipeline
 from .exceptions import SamStacksError
+from . import metrics, profiling, tracing
 from . import ui  # Import the new ui module
-from .bootstrap import BootstrapManager  # Import BootstrapManager
+from .dependency_graph import (
+    DEPLOY_SCHEDULES,
+    GRAPH_FORMATS,
+    StackGraph,
+    render_graph,
+)
+
+# core (boto3, pydantic), bootstrap, history (sqlite3), validation_cache and
+# rich are imported by the commands that use them, so --help, --version and
+# validate start quickly
 
-from rich.logging import RichHandler
+
+class _LazyRichHandler(logging.Handler):
+    """Hand records to a RichHandler, importing rich on the first record.
+
+    Most runs log nothing besides the ui module's own output, so they never
+    pay for importing rich.
+    """
+
+    def __init__(self, level: int = logging.NOTSET, **handler_kwargs: Any) -> None:
+        super().__init__(level)
+        self._handler_kwargs = handler_kwargs
+        self._handler: Optional[logging.Handler] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._handler is None:
+            from rich.console import Console
+            from rich.logging import RichHandler
+
+            self._handler = RichHandler(
+                console=Console(stderr=True), **self._handler_kwargs
+            )
+            self._handler.setFormatter(self.formatter)
+        self._handler.emit(record)
 
 
 def setup_logging(debug: bool, quiet: bool) -> None:
@@ -39,13 +71,14 @@ def setup_logging(debug: bool, quiet: bool) -> None:
     logging.getLogger("botocore").setLevel(boto_level)
     logging.getLogger("urllib3").setLevel(boto_level)
 
-    # Minimal RichHandler config; primary output via ui module
+    # Minimal RichHandler config; primary output via ui module. Log records
+    # are diagnostics and go to stderr, so they never mix with command output
     logging.basicConfig(
         level=samstacks_level,
         format="%(message)s",
         datefmt="[%X]",
         handlers=[
-            RichHandler(
+            _LazyRichHandler(
                 rich_tracebacks=True,
                 show_path=debug,
                 show_level=debug,
@@ -56,14 +89,141 @@ def setup_logging(debug: bool, quiet: bool) -> None:
     )
 
 
+RUN_DURATION = metrics.gauge(
+    "samstacks_run_duration_seconds", "Wall time of the samstacks run.", ["command"]
+)
+RUN_SUCCESS = metrics.gauge(
+    "samstacks_run_success", "1 if the samstacks run succeeded, else 0.", ["command"]
+)
+RUN_TIMESTAMP = metrics.gauge(
+    "samstacks_run_timestamp_seconds",
+    "Unix time at which the samstacks run finished.",
+    ["command"],
+)
+
+METRICS_FILE_OPTION = click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False, writable=True, resolve_path=True, path_type=Path),
+    help="Write run metrics to this file in OpenMetrics text format "
+    "(e.g. for the node_exporter textfile collector).",
+)
+
+NO_VALIDATION_CACHE_OPTION = click.option(
+    "--no-validation-cache",
+    is_flag=True,
+    help="Validate the manifest even if it and its stack directories are "
+    "unchanged since the last successful validation "
+    "(cache: $SAMSTACKS_VALIDATION_CACHE_DIR or ~/.cache/samstacks/validation).",
+)
+
+
+def _parse_inputs(inputs_kv: tuple[str, ...]) -> dict[str, str]:
+    """Parse repeated --input name=value options."""
+    parsed_inputs: dict[str, str] = {}
+    for item in inputs_kv:
+        if "=" not in item:
+            raise click.BadParameter(f"Input '{item}' must be in 'name=value' format.")
+
+        name, value = item.split("=", 1)
+        if not name.strip():
+            raise click.BadParameter(
+                f"Input '{item}' must be in 'name=value' format, and 'name' cannot be empty."
+            )
+
+        if not value.strip():
+            raise click.BadParameter(
+                f"Input '{item}' has an empty value. Use 'name=value' format with a non-empty value, or omit the input to use defaults."
+            )
+
+        parsed_inputs[name] = value
+    return parsed_inputs
+
+
+def _parse_output_values(outputs_kv: tuple[str, ...]) -> dict[str, dict[str, str]]:
+    """Parse repeated --output-value stack_id.OutputName=value options."""
+    output_values: dict[str, dict[str, str]] = {}
+    for item in outputs_kv:
+        reference, separator, value = item.partition("=")
+        stack_id, dot, output_name = reference.partition(".")
+        if not separator or not dot or not stack_id.strip() or not output_name.strip():
+            raise click.BadParameter(
+                f"Output value '{item}' must be in 'stack_id.OutputName=value' format."
+            )
+        output_values.setdefault(stack_id, {})[output_name] = value
+    return output_values
+
+
+def _write_metrics_file(
+    metrics_file: Path, command: str, succeeded: bool, started_at: float
+) -> None:
+    """Record run-level metrics and write the registry to metrics_file."""
+    RUN_DURATION.set(time.monotonic() - started_at, command=command)
+    RUN_SUCCESS.set(1 if succeeded else 0, command=command)
+    RUN_TIMESTAMP.set(time.time(), command=command)
+    try:
+        metrics.REGISTRY.write_textfile(metrics_file)
+        ui.info("Metrics written", str(metrics_file))
+    except OSError as e:
+        ui.warning("Failed to write metrics file", details=str(e))
+    finally:
+        metrics.disable_phase_metrics()
+
+
+def _write_trace_file(trace_file: Path) -> None:
+    """Write the collected spans, if tracing is enabled, to trace_file."""
+    tracer = tracing.get_tracer()
+    if tracer is None:
+        return
+    try:
+        tracer.write(trace_file)
+        ui.info("Trace written", str(trace_file))
+    except OSError as e:
+        ui.warning("Failed to write trace file", details=str(e))
+    finally:
+        tracing.disable_tracing()
+
+
+def _stop_profiler(profiler: profiling.Profiler) -> None:
+    """Write the profile and summarize the hottest functions on stderr."""
+    try:
+        profiling.report(profiler.stop())
+    except OSError as e:
+        ui.warning("Failed to write profile", details=str(e))
+
+
 @click.group(invoke_without_command=True)
 @click.version_option(version=__version__)
 @click.option(
     "--debug", "-d", is_flag=True, help="Enable debug logging and verbose output."
 )  # Added -d short flag
 @click.option("--quiet", is_flag=True, help="Suppress all output except errors.")
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False, writable=True, resolve_path=True, path_type=Path),
+    help="Write per-stack phase timings as Chrome trace-event JSON (open in Perfetto).",
+)
+@click.option(
+    "--profile",
+    "profile_file",
+    type=click.Path(dir_okay=False, writable=True, resolve_path=True, path_type=Path),
+    help="Profile samstacks itself with cProfile, write the stats to this .pstats "
+    "file and summarize the top functions on exit.",
+)
+@click.option(
+    "--profile-memory",
+    is_flag=True,
+    help="With --profile, also trace allocations and summarize the sites that "
+    "grew memory the most.",
+)
 @click.pass_context
-def cli(ctx: click.Context, debug: bool, quiet: bool) -> None:
+def cli(
+    ctx: click.Context,
+    debug: bool,
+    quiet: bool,
+    trace_file: Optional[Path],
+    profile_file: Optional[Path],
+    profile_memory: bool,
+) -> None:
     """Deploy a pipeline of AWS SAM stacks using a YAML manifest."""  # Simplified description
     ctx.ensure_object(dict)
     # Store debug/quiet state for potential use in other commands or core logic if needed directly
@@ -72,6 +232,18 @@ def cli(ctx: click.Context, debug: bool, quiet: bool) -> None:
     ctx.obj["quiet"] = quiet
     setup_logging(debug, quiet)
 
+    if trace_file:
+        tracing.enable_tracing()
+        # Runs when the command finishes, including on sys.exit after an error
+        ctx.call_on_close(lambda: _write_trace_file(trace_file))
+
+    if profile_memory and not profile_file:
+        raise click.UsageError("--profile-memory requires --profile.")
+    if profile_file:
+        profiler = profiling.Profiler(profile_file, trace_memory=profile_memory)
+        profiler.start()
+        ctx.call_on_close(lambda: _stop_profiler(profiler))
+
     if ctx.invoked_subcommand is None:
         click.echo(ctx.get_help())  # Click's default help is fine
         ctx.exit()
@@ -99,6 +271,34 @@ def cli(ctx: click.Context, debug: bool, quiet: bool) -> None:
     type=click.Path(dir_okay=False, writable=True, resolve_path=True),
     help="Optional path to write a Markdown deployment report file.",
 )
+@click.option(
+    "--history-file",
+    type=click.Path(dir_okay=False, resolve_path=True, path_type=Path),
+    help="Run history database used for ETAs and scheduling "
+    "(default: $SAMSTACKS_HISTORY_FILE or ~/.cache/samstacks/history.sqlite).",
+)
+@click.option(
+    "--no-history",
+    is_flag=True,
+    help="Neither read nor record the run history.",
+)
+@click.option(
+    "--schedule",
+    type=click.Choice(DEPLOY_SCHEDULES),
+    default="manifest",
+    show_default=True,
+    help="Stack order: manifest order, or longest historical critical path first "
+    "among stacks whose dependencies are deployed.",
+)
+@click.option(
+    "--isolated-configs",
+    is_flag=True,
+    help="Generate samconfig files and build directories in a temporary directory "
+    "for this run instead of the stack directories, so concurrent runs against the "
+    "same stack directories do not interfere.",
+)
+@NO_VALIDATION_CACHE_OPTION
+@METRICS_FILE_OPTION
 @click.pass_context
 def deploy(
     ctx: click.Context,
@@ -108,35 +308,47 @@ def deploy(
     ],  # Changed from list to tuple as per click's multiple=True
     auto_delete_failed: bool,
     report_file: Optional[Path],
+    history_file: Optional[Path],
+    no_history: bool,
+    schedule: str,
+    isolated_configs: bool,
+    no_validation_cache: bool,
+    metrics_file: Optional[Path],
 ) -> None:
     """Deploy stacks defined in the manifest file."""
     is_debug = ctx.obj.get("debug", False) if ctx.obj else False
-    parsed_inputs: dict[str, str] = {}
-    for item in inputs_kv:
-        if "=" not in item:
-            raise click.BadParameter(f"Input '{item}' must be in 'name=value' format.")
-
-        name, value = item.split("=", 1)
-        if not name.strip():
-            raise click.BadParameter(
-                f"Input '{item}' must be in 'name=value' format, and 'name' cannot be empty."
-            )
-
-        if not value.strip():
-            raise click.BadParameter(
-                f"Input '{item}' has an empty value. Use 'name=value' format with a non-empty value, or omit the input to use defaults."
-            )
-
-        parsed_inputs[name] = value
-
+    parsed_inputs = _parse_inputs(inputs_kv)
+
+    from .core import Pipeline
+    from .history import default_history_path
+    from .validation_cache import open_validation_cache
+
+    started_at = time.monotonic()
+    succeeded = False
+    if metrics_file:
+        # The textfile describes this run only
+        metrics.REGISTRY.reset()
+        metrics.enable_phase_metrics()
     try:
         # Pass parsed_inputs to Pipeline.from_file to provide user-defined inputs.
-        pipeline = Pipeline.from_file(
-            manifest_file, cli_inputs=parsed_inputs
-        )  # parsed_inputs is now finalized as part of the pipeline execution path.
-
-        pipeline.deploy(auto_delete_failed=auto_delete_failed, report_file=report_file)
+        with tracing.span("deploy pipeline", "pipeline", manifest=str(manifest_file)):
+            pipeline = Pipeline.from_file(
+                manifest_file,
+                cli_inputs=parsed_inputs,
+                validation_cache=open_validation_cache(not no_validation_cache),
+            )  # parsed_inputs is now finalized as part of the pipeline execution path.
+
+            pipeline.deploy(
+                auto_delete_failed=auto_delete_failed,
+                report_file=report_file,
+                history_file=None
+                if no_history
+                else history_file or default_history_path(),
+                schedule=schedule,
+                isolated_configs=isolated_configs,
+            )
 
+        succeeded = True
         ui.success("Pipeline deployment completed successfully!")
 
     except SamStacksError as e:
@@ -149,17 +361,70 @@ def deploy(
             exc_info=e if is_debug else None,
         )
         sys.exit(1)
+    finally:
+        if metrics_file:
+            _write_metrics_file(metrics_file, "deploy", succeeded, started_at)
 
 
 @cli.command()
 @click.argument("manifest_file", type=click.Path(exists=True, path_type=Path))
+@NO_VALIDATION_CACHE_OPTION
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and validate again whenever the manifest or a stack's "
+    "directory or template changes, showing only the errors that changed.",
+)
+@click.option(
+    "--poll-interval",
+    type=click.FloatRange(min=0.05),
+    default=0.5,
+    show_default=True,
+    help="Seconds between checks for changed files with --watch.",
+)
 @click.pass_context
-def validate(ctx: click.Context, manifest_file: Path) -> None:
+def validate(
+    ctx: click.Context,
+    manifest_file: Path,
+    no_validation_cache: bool,
+    watch: bool,
+    poll_interval: float,
+) -> None:
     """Validate the manifest file syntax and structure."""
     is_debug = ctx.obj.get("debug", False) if ctx.obj else False
+    if watch:
+        _watch_manifest(manifest_file, poll_interval)
+        return
+    from .validation_cache import open_validation_cache, stack_files
+
     try:
-        pipeline = Pipeline.from_file(manifest_file)
-        pipeline.validate()
+        with tracing.span("validate pipeline", "pipeline", manifest=str(manifest_file)):
+            # An unchanged manifest whose stack directories are unchanged too
+            # is still valid; return before importing and running the checks
+            cache = open_validation_cache(not no_validation_cache)
+            cache_key = ""
+            if cache is not None:
+                cache_key = cache.key(
+                    manifest_file.read_bytes(), "pipeline", manifest_file
+                )
+                cached_warnings = cache.lookup(cache_key, scope="pipeline")
+                if cached_warnings is not None:
+                    # Shown without importing validation, which needs pydantic
+                    for message in cached_warnings:
+                        ui.warning(message)
+                    ui.success("Manifest file is valid! (cached)")
+                    return
+
+            from .core import Pipeline
+
+            pipeline = Pipeline.from_file(manifest_file, validation_cache=cache)
+            pipeline.validate()
+            if cache is not None:
+                cache.store(
+                    cache_key,
+                    stack_files(s.dir for s in pipeline.stacks),
+                    pipeline.validation_warnings,
+                )
         ui.success("Manifest file is valid!")
 
     except SamStacksError as e:
@@ -174,6 +439,202 @@ def validate(ctx: click.Context, manifest_file: Path) -> None:
         sys.exit(1)
 
 
+def _watch_manifest(manifest_file: Path, poll_interval: float) -> None:
+    """Validate manifest_file whenever it changes, until interrupted."""
+    from .watch import ManifestWatcher
+
+    watcher = ManifestWatcher(manifest_file)
+    ui.info("Watching", f"{manifest_file} (press Ctrl+C to stop)")
+    try:
+        while True:
+            changes = watcher.check()
+            if changes is not None:
+                for error in changes.resolved_errors:
+                    ui.success("Fixed", error)
+                for error in changes.new_errors:
+                    ui.error("Validation error", details=error)
+                if not changes.errors:
+                    ui.success("Manifest file is valid!")
+                elif changes.new_errors or changes.resolved_errors:
+                    ui.info("Validation errors", str(len(changes.errors)))
+                else:
+                    ui.info("Validation errors", f"{len(changes.errors)} (unchanged)")
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command()
+@click.argument("manifest_file", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(GRAPH_FORMATS),
+    default="dot",
+    show_default=True,
+    help="Output format.",
+)
+@click.option(
+    "--output",
+    "-o",
+    "output_file",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Write the graph to this file instead of stdout.",
+)
+@click.option(
+    "--history-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Run history database to read stack durations from "
+    "(default: $SAMSTACKS_HISTORY_FILE or ~/.cache/samstacks/history.sqlite).",
+)
+@click.option(
+    "--no-history",
+    is_flag=True,
+    help="Do not attach historical durations to the stacks.",
+)
+@click.pass_context
+def graph(
+    ctx: click.Context,
+    manifest_file: Path,
+    output_format: str,
+    output_file: Optional[Path],
+    history_file: Optional[Path],
+    no_history: bool,
+) -> None:
+    """Print the stack dependency graph with its parallelism levels.
+
+    Dependencies come from stacks.<id>.outputs.<name> references in the
+    manifest. Stacks on the same level can be deployed in parallel. No AWS
+    calls are made.
+    """
+    from .core import Pipeline
+    from .history import RunHistory, default_history_path
+
+    is_debug = ctx.obj.get("debug", False) if ctx.obj else False
+    try:
+        pipeline = Pipeline.from_file(manifest_file)
+        if not pipeline.pydantic_model:
+            raise SamStacksError("Pipeline manifest could not be parsed.")
+        stack_graph = StackGraph.from_stack_models(pipeline.pydantic_model.stacks)
+
+        durations: dict[str, float] = {}
+        history_path = None if no_history else history_file or default_history_path()
+        # Reading must not create a history database as a side effect
+        if history_path and history_path.exists():
+            with RunHistory(history_path) as history:
+                durations = history.stack_estimates(pipeline.name)
+
+        rendered = render_graph(stack_graph, output_format, pipeline.name, durations)
+        if output_file:
+            output_file.write_text(rendered, encoding="utf-8")
+            ui.success("Dependency graph written", str(output_file))
+        else:
+            click.echo(rendered, nl=False)
+
+    except SamStacksError as e:
+        ui.error("Graph error", details=str(e), exc_info=e if is_debug else None)
+        sys.exit(1)
+    except Exception as e:
+        ui.error(
+            "Unexpected graph error",
+            details=str(e),
+            exc_info=e if is_debug else None,
+        )
+        sys.exit(1)
+
+
+@cli.command("render")
+@click.argument("manifest_file", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--output-dir",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False, resolve_path=True, path_type=Path),
+    help="Directory to write each stack's samconfig.yaml into, as <stack id>/samconfig.yaml.",
+)
+@click.option(
+    "--input",
+    "-i",
+    "inputs_kv",
+    multiple=True,
+    type=str,
+    help="Provide input values for pipeline inputs defined in `pipeline_settings.inputs`. "
+    "Format: name=value. Can be used multiple times.",
+)
+@click.option(
+    "--output-value",
+    "outputs_kv",
+    multiple=True,
+    type=str,
+    help="Value to use for a stack output, instead of the deployed one. "
+    "Format: stack_id.OutputName=value. Can be used multiple times.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Make no AWS calls. Outputs not given with --output-value are rendered "
+    "as <stacks.<id>.outputs.<name>> placeholders.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    help="Threads used to look up outputs and write configs (default: Python's thread pool default).",
+)
+@NO_VALIDATION_CACHE_OPTION
+@click.pass_context
+def render(
+    ctx: click.Context,
+    manifest_file: Path,
+    output_dir: Path,
+    inputs_kv: tuple[str, ...],
+    outputs_kv: tuple[str, ...],
+    offline: bool,
+    jobs: Optional[int],
+    no_validation_cache: bool,
+) -> None:
+    """Write the samconfig of every stack without running SAM.
+
+    Stack outputs are looked up with one paginated CloudFormation call per
+    region and profile, or given with --output-value. Unchanged files are not
+    rewritten, so rendered configs can be diffed between commits or used as
+    build cache keys.
+    """
+    is_debug = ctx.obj.get("debug", False) if ctx.obj else False
+    parsed_inputs = _parse_inputs(inputs_kv)
+    output_values = _parse_output_values(outputs_kv)
+
+    from .core import Pipeline
+    from .validation_cache import open_validation_cache
+
+    try:
+        with tracing.span("render pipeline", "pipeline", manifest=str(manifest_file)):
+            pipeline = Pipeline.from_file(
+                manifest_file,
+                cli_inputs=parsed_inputs,
+                validation_cache=open_validation_cache(not no_validation_cache),
+            )
+            pipeline.render(
+                output_dir,
+                output_values=output_values,
+                offline=offline,
+                max_workers=jobs,
+            )
+        ui.success("Rendered configs written", str(output_dir))
+
+    except SamStacksError as e:
+        ui.error("Render failed", details=str(e), exc_info=e if is_debug else None)
+        sys.exit(1)
+    except Exception as e:
+        ui.error(
+            "Unexpected render error",
+            details=str(e),
+            exc_info=e if is_debug else None,
+        )
+        sys.exit(1)
+
+
 @cli.command("bootstrap")
 @click.argument(
     "scan_path",
@@ -208,6 +669,20 @@ def validate(ctx: click.Context, manifest_file: Path) -> None:
 @click.option(
     "--overwrite", is_flag=True, help="Allow overwriting an existing output file."
 )
+@click.option(
+    "--ignore",
+    "ignore_patterns",
+    multiple=True,
+    type=str,
+    help="Directory pattern (.gitignore syntax, relative to the scan path) to skip "
+    "when scanning, in addition to .aws-sam, .git, .venv, cdk.out and node_modules. "
+    "Can be used multiple times.",
+)
+@click.option(
+    "--no-gitignore",
+    is_flag=True,
+    help="Scan directories that .gitignore files exclude.",
+)
 @click.pass_context
 def bootstrap(
     ctx: click.Context,
@@ -217,8 +692,12 @@ def bootstrap(
     pipeline_name: Optional[str],
     stack_name_prefix: Optional[str],
     overwrite: bool,
+    ignore_patterns: tuple[str, ...],
+    no_gitignore: bool,
 ) -> None:
     """Bootstrap a pipeline.yml from existing SAM projects in a directory."""
+    from .bootstrap import BootstrapManager
+
     is_debug = ctx.obj.get("debug", False) if ctx.obj else False
     ui.header(f"Bootstrapping SAM project in: {click.style(scan_path, fg='cyan')}")
 
@@ -230,6 +709,8 @@ def bootstrap(
             pipeline_name=pipeline_name,
             stack_name_prefix=stack_name_prefix,
             overwrite=overwrite,
+            ignore_patterns=ignore_patterns,
+            use_gitignore=not no_gitignore,
         )
         bootstrapper.bootstrap_pipeline()
 
@@ -290,6 +771,7 @@ def bootstrap(
     is_flag=True,
     help="Show what would be deleted without actually deleting",
 )
+@METRICS_FILE_OPTION
 @click.pass_context
 def delete(
     ctx: click.Context,
@@ -299,6 +781,7 @@ def delete(
     ],  # Changed from list to tuple as per click's multiple=True
     no_prompts: bool,
     dry_run: bool,
+    metrics_file: Optional[Path],
 ) -> None:
     """Delete all stacks in a pipeline in reverse dependency order.
 
@@ -308,29 +791,23 @@ def delete(
     By default, interactive confirmation is required before deletion proceeds.
     """
     is_debug = ctx.obj.get("debug", False) if ctx.obj else False
-    parsed_inputs: dict[str, str] = {}
-    for item in inputs_kv:
-        if "=" not in item:
-            raise click.BadParameter(f"Input '{item}' must be in 'name=value' format.")
-
-        name, value = item.split("=", 1)
-        if not name.strip():
-            raise click.BadParameter(
-                f"Input '{item}' must be in 'name=value' format, and 'name' cannot be empty."
-            )
+    parsed_inputs = _parse_inputs(inputs_kv)
 
-        if not value.strip():
-            raise click.BadParameter(
-                f"Input '{item}' has an empty value. Use 'name=value' format with a non-empty value, or omit the input to use defaults."
-            )
-
-        parsed_inputs[name] = value
+    from .core import Pipeline
 
+    started_at = time.monotonic()
+    succeeded = False
+    if metrics_file:
+        # The textfile describes this run only
+        metrics.REGISTRY.reset()
+        metrics.enable_phase_metrics()
     try:
         # Pass parsed_inputs to Pipeline.from_file to provide user-defined inputs.
-        pipeline = Pipeline.from_file(manifest_file, cli_inputs=parsed_inputs)
+        with tracing.span("delete pipeline", "pipeline", manifest=str(manifest_file)):
+            pipeline = Pipeline.from_file(manifest_file, cli_inputs=parsed_inputs)
 
-        pipeline.delete(no_prompts=no_prompts, dry_run=dry_run)
+            pipeline.delete(no_prompts=no_prompts, dry_run=dry_run)
+        succeeded = True
 
     except SamStacksError as e:
         ui.error(
@@ -344,6 +821,9 @@ def delete(
             exc_info=e if is_debug else None,
         )
         sys.exit(1)
+    finally:
+        if metrics_file:
+            _write_metrics_file(metrics_file, "delete", succeeded, started_at)
 
 
 def main() -> None:
@@ -5,32 +5,51 @@ Core classes for samstacks pipeline and stack management.
 import logging
 import os
 import subprocess
+import tempfile
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, Tuple, Generator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Union,
+    Tuple,
+    Generator,
+)
 import shlex
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 import click
 
-
-# Import the global console from presentation.py
-# This creates a slight coupling but is pragmatic for a CLI tool.
-# Ensure presentation.py defines 'console = Console()' globally.
-
 # Import ui module
-from . import ui
+from . import metrics, presentation, ui
 
 from .exceptions import (
     ConditionalEvaluationError,
+    HistoryError,
     ManifestError,
     OutputRetrievalError,
     PostDeploymentScriptError,
     StackDeploymentError,
     TemplateError,
 )
-from .input_utils import process_cli_input_value, coerce_and_validate_value
+from .input_utils import (
+    ResolvedInput,
+    coerce_and_validate_value,
+    resolve_input_values,
+)
+from .template_index import load_template_interface
 from .templating import TemplateProcessor
-from .validation import ManifestValidator, LineNumberTracker
+from .dependency_graph import DEPLOY_SCHEDULES, StackGraph
+from .io_utils import load_yaml_file
+from .tracing import AnySpan, span, span_listener
+from .validation import ManifestValidator, LineNumberTracker, show_warnings
+from .validation_cache import ValidationCache, stack_files
 from .aws_utils import (
+    get_all_stack_outputs,
     get_stack_outputs,
     get_stack_status,
     list_failed_no_update_changesets,
@@ -38,8 +57,9 @@ from .aws_utils import (
     delete_cloudformation_stack,
     wait_for_stack_delete_complete,
 )
-from .presentation import console  # Ensure this is the rich Console
 from .pipeline_models import (
+    PhaseTiming,
+    RenderReportItem,
     SamConfigContentType,
     PipelineManifestModel,
     StackModel as PydanticStackModel,
@@ -50,13 +70,38 @@ from pydantic import (
 )  # For catching Pydantic errors
 
 from .samconfig_manager import SamConfigManager  # Import SamConfigManager
-from . import reporting  # Add this import
+
+if TYPE_CHECKING:
+    # Imported by deploy, so sqlite3 stays out of validate, graph and render
+    from .history import RunHistory
 
 logger = logging.getLogger(__name__)
 
 # Constants
 DEFAULT_EXIT_CODE_ON_ERROR = 1
 SAM_NO_CHANGES_MESSAGE = "No changes to deploy"
+# Top-level spans of a stack's deployment; together they make up its duration
+STACK_DURATION_SPANS = frozenset({"deploy stack", "retrieve final status"})
+
+SUBPROCESS_RUNS = metrics.counter(
+    "samstacks_subprocess_runs",
+    "SAM CLI and run-script subprocesses by command and exit code.",
+    ["command", "exit_code"],
+)
+STACKS_PROCESSED = metrics.counter(
+    "samstacks_stacks",
+    "Stacks processed by operation and outcome (deployed, skipped, failed, ...).",
+    ["operation", "outcome"],
+)
+TEMPLATE_CACHE_HITS = metrics.gauge(
+    "samstacks_template_cache_hits", "Template cache hits during the run."
+)
+TEMPLATE_CACHE_MISSES = metrics.gauge(
+    "samstacks_template_cache_misses", "Template cache misses during the run."
+)
+TEMPLATE_CACHE_HIT_RATIO = metrics.gauge(
+    "samstacks_template_cache_hit_ratio", "Template cache hit ratio (0 to 1)."
+)
 
 
 def _format_pydantic_error_user_friendly(error: dict) -> str:
@@ -162,8 +207,14 @@ def _format_pydantic_error_user_friendly(error: dict) -> str:
         return f"  - {loc_str}: {clean_msg}"
 
 
-def _format_pydantic_validation_errors(e: PydanticValidationError) -> str:
-    """Format Pydantic validation errors in a user-friendly way."""
+def _format_pydantic_validation_errors(
+    e: PydanticValidationError, line_tracker: Optional[LineNumberTracker] = None
+) -> str:
+    """Format Pydantic validation errors in a user-friendly way.
+
+    With a line tracker, each error ends with the manifest line its location
+    (or, for a missing field, the enclosing mapping) is on.
+    """
     error_count = len(e.errors())
 
     if error_count == 1:
@@ -173,11 +224,64 @@ def _format_pydantic_validation_errors(e: PydanticValidationError) -> str:
 
     formatted_errors = []
     for error in e.errors():
-        formatted_errors.append(_format_pydantic_error_user_friendly(error))  # type: ignore
+        formatted = _format_pydantic_error_user_friendly(error)  # type: ignore
+        line = line_tracker.get_line_number(error["loc"]) if line_tracker else None
+        if line is not None:
+            formatted += f" (line {line})"
+        formatted_errors.append(formatted)
 
     return header + "\n" + "\n".join(formatted_errors)
 
 
+def load_manifest_model(
+    manifest_path_obj: Path,
+) -> Tuple[PipelineManifestModel, LineNumberTracker, str]:
+    """Parse a manifest file and validate it against the schema.
+
+    Returns the Pydantic model, the line numbers of the parsed manifest and
+    the manifest text. Semantic checks are left to ManifestValidator.
+
+    Raises:
+        ManifestError: If the file cannot be read or parsed, or does not
+            match the schema.
+    """
+    manifest_file = str(manifest_path_obj)
+
+    # 1. Parse YAML and track line numbers
+    with span("parse manifest", "manifest", manifest=manifest_file):
+        try:
+            with open(manifest_path_obj, "r", encoding="utf-8") as f:
+                yaml_content = f.read()
+        except Exception as e:
+            raise ManifestError(
+                f"Failed to load manifest file '{manifest_path_obj}': {e}"
+            )
+
+        line_tracker = LineNumberTracker(manifest_path_obj)
+        try:
+            raw_manifest_data, _ = line_tracker.parse_yaml_with_line_numbers(
+                yaml_content
+            )
+            if not isinstance(raw_manifest_data, dict):
+                raise ManifestError(
+                    "Manifest content is not a valid YAML mapping (dictionary)."
+                )
+        except ManifestError as e:
+            raise ManifestError(f"YAML parsing error in '{manifest_path_obj}': {e}")
+
+    # 2. Pydantic Validation and Parsing
+    with span("validate schema", "manifest", manifest=manifest_file):
+        try:
+            pipeline_pydantic_model = PipelineManifestModel.model_validate(
+                raw_manifest_data
+            )
+        except PydanticValidationError as e:
+            user_friendly_message = _format_pydantic_validation_errors(e, line_tracker)
+            raise ManifestError(user_friendly_message)
+
+    return pipeline_pydantic_model, line_tracker, yaml_content
+
+
 def _read_deployed_stack_name_from_samconfig(
     stack_dir: Path, stack_id: str, sam_env: str = "default"
 ) -> Optional[str]:
@@ -192,8 +296,6 @@ def _read_deployed_stack_name_from_samconfig(
     Returns:
         The deployed stack name if found, None if file doesn't exist or stack_name not found
     """
-    import yaml
-
     samconfig_path = stack_dir / "samconfig.yaml"
 
     if not samconfig_path.exists():
@@ -203,8 +305,7 @@ def _read_deployed_stack_name_from_samconfig(
         return None
 
     try:
-        with open(samconfig_path, "r", encoding="utf-8") as f:
-            samconfig_data = yaml.safe_load(f)
+        samconfig_data = load_yaml_file(samconfig_path)
 
         if not isinstance(samconfig_data, dict):
             logger.warning(
@@ -285,17 +386,6 @@ def temporary_env(
         logger.debug("Restored original os.environ after temporary update.")
 
 
-@contextmanager
-def change_directory(target_dir: Union[str, Path]) -> Generator[None, None, None]:
-    """Context manager for safely changing directories."""
-    original_cwd = os.getcwd()
-    try:
-        os.chdir(str(target_dir))
-        yield
-    finally:
-        os.chdir(original_cwd)
-
-
 def _run_command_with_stderr_capture(
     cmd_args: List[str], cwd: str, env_dict: Optional[Dict[str, str]] = None
 ) -> Tuple[int, str]:
@@ -329,6 +419,10 @@ def _run_command_with_stderr_capture(
         )
 
         stderr_output = result.stderr or ""
+        SUBPROCESS_RUNS.inc(
+            command=" ".join(str(arg) for arg in cmd_args[:2]),
+            exit_code=result.returncode,
+        )
 
         logger.debug(
             f"Command '{cmd_args[0]}' finished with exit code {result.returncode}"
@@ -485,6 +579,10 @@ class Pipeline:
         self.cli_inputs = cli_inputs or {}
         self.pydantic_model = pydantic_model
         self.logger = logger  # Initialize logger instance attribute
+        # Resolved input values, computed once by validate()
+        self.resolved_inputs: Mapping[str, ResolvedInput] = {}
+        # Warnings of the manifest's semantic validation, set by from_file
+        self.validation_warnings: List[str] = []
 
         # Resolve and validate templated default values for inputs
         if self.defined_inputs:
@@ -553,53 +651,63 @@ class Pipeline:
             ),
             template_processor=self.template_processor,
         )
+        # Set while deploy(isolated_configs=True) runs: per-stack samconfig
+        # files and build directories are generated under it
+        self._run_config_dir: Optional[Path] = None
 
     @classmethod
     def from_file(
         cls,
         manifest_path: Union[str, Path],
         cli_inputs: Optional[Dict[str, str]] = None,
+        validation_cache: Optional["ValidationCache"] = None,
     ) -> "Pipeline":
-        """Create a Pipeline instance from a manifest file."""
+        """Create a Pipeline instance from a manifest file.
+
+        Args:
+            manifest_path: Path to the manifest file.
+            cli_inputs: Values for the pipeline inputs, by name.
+            validation_cache: Skip the semantic checks when this cache
+                records a successful validation of the same manifest and
+                stack directories, and record one otherwise.
+        """
         manifest_path_obj = Path(manifest_path).resolve()
         manifest_base_dir = manifest_path_obj.parent
 
-        try:
-            with open(manifest_path_obj, "r", encoding="utf-8") as f:
-                yaml_content = f.read()
-        except Exception as e:
-            raise ManifestError(
-                f"Failed to load manifest file '{manifest_path_obj}': {e}"
-            )
+        manifest_file = str(manifest_path_obj)
 
-        # 1. Parse YAML and track line numbers
+        # 1. Parse YAML and track line numbers, 2. Pydantic Validation and Parsing
+        pipeline_pydantic_model, line_tracker, yaml_content = load_manifest_model(
+            manifest_path_obj
+        )
 
-        line_tracker = LineNumberTracker(manifest_path_obj)
-        try:
-            raw_manifest_data, _ = line_tracker.parse_yaml_with_line_numbers(
-                yaml_content
+        # 3. Semantic Validation (using adapted ManifestValidator)
+        cache_key = ""
+        validation_warnings: Optional[List[str]] = None
+        if validation_cache is not None:
+            cache_key = validation_cache.key(
+                yaml_content.encode(), "manifest", manifest_path_obj
             )
-            if not isinstance(raw_manifest_data, dict):
-                raise ManifestError(
-                    "Manifest content is not a valid YAML mapping (dictionary)."
+            validation_warnings = validation_cache.lookup(cache_key)
+        if validation_warnings is not None:
+            # A cached validation reports the same warnings as a fresh one
+            show_warnings(validation_warnings)
+        else:
+            with span("validate semantics", "manifest", manifest=manifest_file):
+                validator = ManifestValidator(
+                    pipeline_pydantic_model, line_tracker, manifest_base_dir
+                )
+                validator.validate_semantic_rules_and_raise_if_errors()  # Expecting this new method in ManifestValidator
+            validation_warnings = [str(warning) for warning in validator.warnings]
+            if validation_cache is not None:
+                validation_cache.store(
+                    cache_key,
+                    stack_files(
+                        (manifest_base_dir / stack_model.dir).resolve()
+                        for stack_model in pipeline_pydantic_model.stacks
+                    ),
+                    validation_warnings,
                 )
-        except ManifestError as e:
-            raise ManifestError(f"YAML parsing error in '{manifest_path_obj}': {e}")
-
-        # 2. Pydantic Validation and Parsing
-        try:
-            pipeline_pydantic_model = PipelineManifestModel.model_validate(
-                raw_manifest_data
-            )
-        except PydanticValidationError as e:
-            user_friendly_message = _format_pydantic_validation_errors(e)
-            raise ManifestError(user_friendly_message)
-
-        # 3. Semantic Validation (using adapted ManifestValidator)
-        validator = ManifestValidator(
-            pipeline_pydantic_model, line_tracker, manifest_base_dir
-        )
-        validator.validate_semantic_rules_and_raise_if_errors()  # Expecting this new method in ManifestValidator
 
         # 4. Instantiate runtime Pipeline and Stack objects
         defined_inputs_for_runtime: Dict[str, Dict[str, Any]] = {}
@@ -650,7 +758,7 @@ class Pipeline:
             )
             runtime_stacks.append(stack_runtime)
 
-        return cls(
+        pipeline = cls(
             name=pipeline_pydantic_model.pipeline_name,
             description=pipeline_pydantic_model.pipeline_description or "",
             stacks=runtime_stacks,
@@ -659,6 +767,8 @@ class Pipeline:
             cli_inputs=cli_inputs or {},
             pydantic_model=pipeline_pydantic_model,  # Pass the parsed Pydantic model
         )
+        pipeline.validation_warnings = validation_warnings
+        return pipeline
 
     @classmethod
     def from_dict(
@@ -786,36 +896,61 @@ class Pipeline:
                 f"Unknown CLI input keys provided: {', '.join(sorted(unknown_keys))}"
             )
 
-        # Validate required inputs are provided (CLI or default)
+        # Resolve every input once (coercing CLI values), then check required ones
+        self.resolved_inputs = resolve_input_values(
+            self.defined_inputs, self.cli_inputs
+        )
         for input_name, definition in self.defined_inputs.items():
             is_required = definition.get("default") is None
 
-            # Process CLI input if provided
-            processed_cli_value = None
-            if input_name in self.cli_inputs:
-                processed_cli_value = process_cli_input_value(
-                    input_name, self.cli_inputs[input_name], definition
-                )
-
-            # Check if required input is missing
-            # Note: process_cli_input_value returns None for whitespace-only values,
-            # ensuring they are treated as not provided for required input validation
-            if is_required and processed_cli_value is None:
+            # Note: whitespace-only CLI values are treated as not provided
+            resolved_input = self.resolved_inputs.get(input_name)
+            provided_via_cli = (
+                resolved_input is not None and resolved_input.source == "cli"
+            )
+            if is_required and not provided_via_cli:
                 raise ManifestError(
                     f"Required input '{input_name}' not provided via CLI and has no default value."
                 )
 
+        # Every template expression now reads the same coerced values
+        self.template_processor.use_resolved_inputs(self.resolved_inputs)
+
     def deploy(
-        self, auto_delete_failed: bool = False, report_file: Optional[Path] = None
+        self,
+        auto_delete_failed: bool = False,
+        report_file: Optional[Path] = None,
+        history_file: Optional[Path] = None,
+        schedule: str = "manifest",
+        isolated_configs: bool = False,
     ) -> None:
-        """Deploy all stacks in the pipeline."""
+        """Deploy all stacks in the pipeline.
+
+        Args:
+            auto_delete_failed: Delete ROLLBACK_COMPLETE stacks before deploying.
+            report_file: Optional path for a Markdown deployment report.
+            history_file: Optional run history database; past durations drive
+                the ETA and are updated with this run's durations.
+            schedule: "manifest" deploys stacks in manifest order;
+                "critical-path" starts the stacks with the longest remaining
+                critical path (from history) first, respecting dependencies.
+            isolated_configs: Generate each stack's samconfig and build
+                directory in a temporary directory for this run instead of
+                the stack directory, so concurrent runs against the same
+                stack directories do not overwrite each other's files.
+        """
+        if schedule not in DEPLOY_SCHEDULES:
+            raise ManifestError(
+                f"Unknown schedule '{schedule}'. Expected one of: {', '.join(DEPLOY_SCHEDULES)}"
+            )
         ui.header(f"Starting deployment of pipeline: {self.name}")
 
         if self.description and self.description.strip():
             ui.info("Pipeline Description", self.description.strip())
-            console.print()  # Add visual separation
+            presentation.console.print()  # Add visual separation
 
-        self.validate()
+        with span("validate pipeline", "manifest"):
+            self.validate()
 
         if not self.pydantic_model:
             raise ManifestError(
@@ -829,100 +964,179 @@ class Pipeline:
 
         deployment_report_items: List[StackReportItem] = []
         deployment_failed = False  # Track if any fatal errors occurred
-
-        for i, runtime_stack in enumerate(self.stacks):
-            pydantic_stack_model = self.pydantic_model.stacks[i]
-            if runtime_stack.id != pydantic_stack_model.id:
+        stack_durations: Dict[str, float] = {}
+        stack_outcomes: Dict[str, str] = {}
+        phase_durations: List[PhaseTiming] = []
+        started_at = time.time()
+
+        graph = StackGraph.from_stack_models(self.pydantic_model.stacks)
+        history = None
+        if history_file:
+            from .history import RunHistory
+
+            history = RunHistory(history_file)
+        estimates = self._load_stack_estimates(history)
+        stack_index = {stack.id: i for i, stack in enumerate(self.stacks)}
+        if schedule == "critical-path":
+            try:
+                priority_order = graph.priority_order(estimates)
+            except ValueError as e:
                 raise ManifestError(
-                    f"ID mismatch at index {i}: runtime stack '{runtime_stack.id}' vs pydantic model '{pydantic_stack_model.id}'."
-                )
-
-            # Data for the report
-            resolved_params_for_report: Dict[str, str] = {}
-            current_cfn_status: Optional[str] = None
-            current_outputs: Dict[str, str] = {}
+                    f"Cannot use the critical-path schedule: {e}"
+                ) from e
+            deployment_order = [stack_index[sid] for sid in priority_order]
+        else:
+            deployment_order = list(range(len(self.stacks)))
 
-            try:
-                self._deploy_stack(
-                    runtime_stack,
-                    pydantic_stack_model,
-                    auto_delete_failed,
-                    resolved_params_for_report,
+        def record_stack_timing(
+            name: str, category: str, duration: float, args: Dict[str, Any]
+        ) -> None:
+            stack_id = args.get("stack_id")
+            if stack_id is None:
+                return
+            if name in STACK_DURATION_SPANS:
+                stack_durations[stack_id] = (
+                    stack_durations.get(stack_id, 0.0) + duration
                 )
-            except StackDeploymentError as e:
-                # Critical deployment errors should fail the entire pipeline
-                error_msg = str(e)
-                ui.error(
-                    "Pipeline deployment failed",
-                    f"Fatal error in stack '{runtime_stack.id}': {error_msg}",
+            if name != "deploy stack":
+                phase_durations.append(
+                    {"stack_id": stack_id, "phase": name, "seconds": duration}
                 )
-                deployment_failed = True
-                current_cfn_status = "DEPLOYMENT_ERROR_FATAL"
-
-                # Add this stack to the report and stop processing further stacks
-                failed_report_item: StackReportItem = {
-                    "stack_id_from_pipeline": runtime_stack.id,
-                    "deployed_stack_name": runtime_stack.deployed_stack_name or "N/A",
-                    "cfn_status": current_cfn_status,
-                    "parameters": resolved_params_for_report,
-                    "outputs": {},
-                }
-                deployment_report_items.append(failed_report_item)
-                break  # Stop processing remaining stacks
-            except Exception:
-                # Other exceptions - continue but mark as error
-                ui.warning(
-                    f"Deployment of stack {runtime_stack.id} encountered an error, attempting to get final status."
-                )
-                current_cfn_status = "DEPLOYMENT_ERROR_SAMSTACKS"
-            finally:
-                # Always try to get final status and outputs for the report
-                if runtime_stack.deployed_stack_name:
-                    try:
-                        current_cfn_status = get_stack_status(
-                            runtime_stack.deployed_stack_name,
-                            runtime_stack.region
-                            or self.pipeline_settings.get("default_region"),
-                            runtime_stack.profile
-                            or self.pipeline_settings.get("default_profile"),
-                        )
-                        current_outputs = get_stack_outputs(
-                            runtime_stack.deployed_stack_name,
-                            runtime_stack.region
-                            or self.pipeline_settings.get("default_region"),
-                            runtime_stack.profile
-                            or self.pipeline_settings.get("default_profile"),
-                        )  # get_stack_outputs already handles non-existent stacks gracefully by returning {}
-                    except Exception as status_ex:
-                        ui.warning(
-                            f"Could not retrieve final status/outputs for {runtime_stack.deployed_stack_name}: {status_ex}"
+
+        with span_listener(record_stack_timing), self._run_configs(isolated_configs):
+            for position, i in enumerate(deployment_order):
+                runtime_stack = self.stacks[i]
+                if estimates:
+                    self._display_eta(
+                        [self.stacks[j].id for j in deployment_order[position:]],
+                        estimates,
+                    )
+                pydantic_stack_model = self.pydantic_model.stacks[i]
+                if runtime_stack.id != pydantic_stack_model.id:
+                    raise ManifestError(
+                        f"ID mismatch at index {i}: runtime stack '{runtime_stack.id}' vs pydantic model '{pydantic_stack_model.id}'."
+                    )
+
+                # Data for the report
+                resolved_params_for_report: Dict[str, str] = {}
+                current_cfn_status: Optional[str] = None
+                current_outputs: Dict[str, str] = {}
+                stack_outcome = "deployed"
+
+                try:
+                    with self._stack_span("deploy stack", runtime_stack) as stack_span:
+                        self._deploy_stack(
+                            runtime_stack,
+                            pydantic_stack_model,
+                            auto_delete_failed,
+                            resolved_params_for_report,
                         )
-                        if (
-                            not current_cfn_status
-                        ):  # Only set if not already DEPLOYMENT_ERROR
-                            current_cfn_status = "STATUS_RETRIEVAL_FAILED"
-                elif runtime_stack.skipped:
-                    current_cfn_status = "SKIPPED"
-                else:  # Not skipped, but no deployed_stack_name (e.g. pre-deploy failure in _deploy_stack before name is set)
-                    current_cfn_status = "PRE_DEPLOYMENT_FAILURE"
-
-                report_item: StackReportItem = {
-                    "stack_id_from_pipeline": runtime_stack.id,
-                    "deployed_stack_name": runtime_stack.deployed_stack_name or "N/A",
-                    "cfn_status": current_cfn_status,
-                    "parameters": resolved_params_for_report,  # This needs to be populated by _deploy_stack
-                    "outputs": current_outputs,
-                }
-                deployment_report_items.append(report_item)
+                        if runtime_stack.skipped:
+                            stack_span.set(outcome="skipped")
+                except StackDeploymentError as e:
+                    # Critical deployment errors should fail the entire pipeline
+                    error_msg = str(e)
+                    ui.error(
+                        "Pipeline deployment failed",
+                        f"Fatal error in stack '{runtime_stack.id}': {error_msg}",
+                    )
+                    deployment_failed = True
+                    stack_outcome = "failed"
+                    current_cfn_status = "DEPLOYMENT_ERROR_FATAL"
+
+                    # Add this stack to the report and stop processing further stacks
+                    failed_report_item: StackReportItem = {
+                        "stack_id_from_pipeline": runtime_stack.id,
+                        "deployed_stack_name": runtime_stack.deployed_stack_name
+                        or "N/A",
+                        "cfn_status": current_cfn_status,
+                        "parameters": resolved_params_for_report,
+                        "outputs": {},
+                    }
+                    deployment_report_items.append(failed_report_item)
+                    break  # Stop processing remaining stacks
+                except Exception:
+                    # Other exceptions - continue but mark as error
+                    ui.warning(
+                        f"Deployment of stack {runtime_stack.id} encountered an error, attempting to get final status."
+                    )
+                    stack_outcome = "error"
+                    current_cfn_status = "DEPLOYMENT_ERROR_SAMSTACKS"
+                finally:
+                    if runtime_stack.skipped:
+                        stack_outcome = "skipped"
+                    stack_outcomes[runtime_stack.id] = stack_outcome
+                    STACKS_PROCESSED.inc(operation="deploy", outcome=stack_outcome)
+
+                    # Always try to get final status and outputs for the report
+                    if runtime_stack.deployed_stack_name:
+                        try:
+                            with self._stack_span(
+                                "retrieve final status", runtime_stack, "aws"
+                            ):
+                                current_cfn_status = get_stack_status(
+                                    runtime_stack.deployed_stack_name,
+                                    runtime_stack.region
+                                    or self.pipeline_settings.get("default_region"),
+                                    runtime_stack.profile
+                                    or self.pipeline_settings.get("default_profile"),
+                                )
+                                current_outputs = get_stack_outputs(
+                                    runtime_stack.deployed_stack_name,
+                                    runtime_stack.region
+                                    or self.pipeline_settings.get("default_region"),
+                                    runtime_stack.profile
+                                    or self.pipeline_settings.get("default_profile"),
+                                )  # get_stack_outputs already handles non-existent stacks gracefully by returning {}
+                        except Exception as status_ex:
+                            ui.warning(
+                                f"Could not retrieve final status/outputs for {runtime_stack.deployed_stack_name}: {status_ex}"
+                            )
+                            if (
+                                not current_cfn_status
+                            ):  # Only set if not already DEPLOYMENT_ERROR
+                                current_cfn_status = "STATUS_RETRIEVAL_FAILED"
+                    elif runtime_stack.skipped:
+                        current_cfn_status = "SKIPPED"
+                    else:  # Not skipped, but no deployed_stack_name (e.g. pre-deploy failure in _deploy_stack before name is set)
+                        current_cfn_status = "PRE_DEPLOYMENT_FAILURE"
+
+                    report_item: StackReportItem = {
+                        "stack_id_from_pipeline": runtime_stack.id,
+                        "deployed_stack_name": runtime_stack.deployed_stack_name
+                        or "N/A",
+                        "cfn_status": current_cfn_status,
+                        "parameters": resolved_params_for_report,  # This needs to be populated by _deploy_stack
+                        "outputs": current_outputs,
+                    }
+                    deployment_report_items.append(report_item)
+
+        if history:
+            self._record_run_history(
+                history,
+                not deployment_failed,
+                stack_durations,
+                stack_outcomes,
+                phase_durations,
+                started_at,
+            )
 
         # After all stacks, generate and display/write the report
         if deployment_report_items:
+            from . import reporting
+
+            timing_report = reporting.build_timing_report(
+                graph,
+                stack_durations,
+                phase_durations,
+            )
             # Pass the global ui instance to the console reporter
             reporting.display_console_report(
                 deployment_report_items,
                 pipeline_settings=self.pydantic_model.pipeline_settings
                 if self.pydantic_model
                 else None,
+                timing=timing_report,
             )
             if report_file:
                 # Process summary if available for the report
@@ -946,11 +1160,14 @@ class Pipeline:
                     pipeline_settings=self.pydantic_model.pipeline_settings
                     if self.pydantic_model
                     else None,
+                    timing=timing_report,
                 )
                 reporting.write_markdown_report_to_file(markdown_content, report_file)
             # Remove the debug print and pass placeholders
             # ui.debug(f"Deployment report items collected: {deployment_report_items}")
 
+        self._report_template_cache_stats()
+
         # Fail the pipeline if there were fatal deployment errors
         if deployment_failed:
             raise ManifestError(
@@ -978,96 +1195,95 @@ class Pipeline:
             stack.skipped = True
             return
 
-        global_prefix = self.pipeline_settings.get("stack_name_prefix", "")
-        global_suffix = self.pipeline_settings.get("stack_name_suffix", "")
-
-        if global_prefix:
-            global_prefix = self.template_processor.process_string(global_prefix)
-        if global_suffix:
-            global_suffix = self.template_processor.process_string(global_suffix)
-
-        stack.deployed_stack_name = stack.get_stack_name(global_prefix, global_suffix)
-        if stack.deployed_stack_name is None:  # Should be set by get_stack_name
-            raise StackDeploymentError(
-                f"Failed to determine deployed_stack_name for stack '{stack.id}'."
-            )
+        stack.deployed_stack_name = self._resolve_deployed_stack_name(stack)
 
         if auto_delete_failed:
-            self._handle_auto_delete(stack)
+            with self._stack_span("auto-delete", stack, "aws"):
+                self._handle_auto_delete(stack)
 
-        console.print(
+        presentation.console.print(
             f"  Deploying stack [cyan]'{stack.id}'[/cyan] as [green]'{stack.deployed_stack_name}'[/green]..."
         )
 
         stack_abs_dir = stack.dir.absolute()
 
-        # Process template expressions in config_path if present
-        resolved_config_path: Optional[Path] = None
-        if stack.config_path:
-            # Apply template processing to the config path string
-            config_path_str = str(stack.config_path)
-            processed_config_path_str = self.template_processor.process_string(
-                config_path_str
-            )
-            resolved_config_path = Path(processed_config_path_str)
+        with self._stack_span("resolve templates", stack):
+            resolved_config_path = self._resolve_config_path(stack)
 
-            # Validate the resolved config path for safety
-            _validate_config_path(resolved_config_path, stack.id)
-
-        # Fully resolve stack.params before passing to SamConfigManager
-        resolved_stack_params_for_samconfig: Dict[str, str] = {}
-        if stack.params:  # stack.params are from the runtime Stack object, originally from pipeline.yml
-            for key, value in stack.params.items():
-                # Ensure all template types, including stack outputs, are resolved for params
-                resolved_value = self.template_processor.process_string(str(value))
-                resolved_stack_params_for_samconfig[key] = resolved_value
+            # Fully resolve stack.params before passing to SamConfigManager
+            resolved_stack_params_for_samconfig = self._resolve_stack_params(stack)
 
         resolved_params_container.update(
             resolved_stack_params_for_samconfig
         )  # Populate for report
 
-        # Dual-mode config generation: external config vs local config
-        if resolved_config_path:
-            # External config mode: generate config file at specified path
-            ui.info(
-                "Using external config mode",
-                f"Generating config at {resolved_config_path}",
-            )
-            self.sam_config_manager.generate_external_config_file(
-                config_path=resolved_config_path,
-                stack_dir=stack.dir,
-                stack_id=stack.id,
-                pydantic_stack_model=pydantic_stack_model,
-                deployed_stack_name=stack.deployed_stack_name,
-                effective_region=(
-                    stack.region or self.pipeline_settings.get("default_region")
-                ),
-                resolved_stack_params=resolved_stack_params_for_samconfig,
-            )
-        else:
-            # Local config mode: generate samconfig.yaml in stack directory (existing behavior)
-            ui.debug(f"Using local config mode for stack '{stack.id}'")
-            self.sam_config_manager.generate_samconfig_for_stack(
-                stack_dir=stack.dir,
-                stack_id=stack.id,
-                pydantic_stack_model=pydantic_stack_model,
-                deployed_stack_name=stack.deployed_stack_name,
-                effective_region=(
-                    stack.region or self.pipeline_settings.get("default_region")
-                ),
-                resolved_stack_params=resolved_stack_params_for_samconfig,
-            )
-
-        # Use appropriate SAM CLI invocation based on config mode
-        if resolved_config_path:
-            # External config mode: run from the config file's directory for correct relative paths
-            with change_directory(resolved_config_path.parent):
-                self._run_sam_build_with_external_config(stack, resolved_config_path)
-                self._run_sam_deploy_with_external_config(stack, resolved_config_path)
+        run_config_path: Optional[Path] = None
+        with self._stack_span("generate samconfig", stack):
+            # Config generation: external config, run-scoped config or local config
+            if resolved_config_path:
+                # External config mode: generate config file at specified path
+                ui.info(
+                    "Using external config mode",
+                    f"Generating config at {resolved_config_path}",
+                )
+                self.sam_config_manager.generate_external_config_file(
+                    config_path=resolved_config_path,
+                    stack_dir=stack.dir,
+                    stack_id=stack.id,
+                    pydantic_stack_model=pydantic_stack_model,
+                    deployed_stack_name=stack.deployed_stack_name,
+                    effective_region=(
+                        stack.region or self.pipeline_settings.get("default_region")
+                    ),
+                    resolved_stack_params=resolved_stack_params_for_samconfig,
+                )
+            elif self._run_config_dir is not None:
+                # Run config mode: generate the config outside the stack directory
+                stack_run_dir = self._run_config_dir / stack.id
+                ui.debug(
+                    f"Using run config mode for stack '{stack.id}' in {stack_run_dir}"
+                )
+                run_config_path = self.sam_config_manager.generate_run_config_file(
+                    config_path=stack_run_dir / "samconfig.yaml",
+                    build_dir=stack_run_dir / "build",
+                    stack_dir=stack.dir,
+                    stack_id=stack.id,
+                    pydantic_stack_model=pydantic_stack_model,
+                    deployed_stack_name=stack.deployed_stack_name,
+                    effective_region=(
+                        stack.region or self.pipeline_settings.get("default_region")
+                    ),
+                    resolved_stack_params=resolved_stack_params_for_samconfig,
+                )
+            else:
+                # Local config mode: generate samconfig.yaml in stack directory (existing behavior)
+                ui.debug(f"Using local config mode for stack '{stack.id}'")
+                self.sam_config_manager.generate_samconfig_for_stack(
+                    stack_dir=stack.dir,
+                    stack_id=stack.id,
+                    pydantic_stack_model=pydantic_stack_model,
+                    deployed_stack_name=stack.deployed_stack_name,
+                    effective_region=(
+                        stack.region or self.pipeline_settings.get("default_region")
+                    ),
+                    resolved_stack_params=resolved_stack_params_for_samconfig,
+                )
+
+        # Use appropriate SAM CLI invocation based on config mode. Every
+        # command gets its working directory explicitly; the process's own
+        # working directory is never changed, so concurrent runs are safe
+        sam_config_path = resolved_config_path or run_config_path
+        if sam_config_path:
+            # External or run config mode: run from the config file's directory for correct relative paths
+            with self._stack_span("sam build", stack, "sam"):
+                self._run_sam_build_with_external_config(stack, sam_config_path)
+            with self._stack_span("sam deploy", stack, "sam"):
+                self._run_sam_deploy_with_external_config(stack, sam_config_path)
         else:
             # Local config mode: run from stack directory (existing behavior)
-            with change_directory(stack.dir):
+            with self._stack_span("sam build", stack, "sam"):
                 self._run_sam_build(stack)
+            with self._stack_span("sam deploy", stack, "sam"):
                 self._run_sam_deploy(stack)
 
         # Common post-deployment steps for both config modes
@@ -1075,7 +1291,8 @@ class Pipeline:
             raise StackDeploymentError(
                 f"Stack {stack.id} has no deployed_stack_name after deploy call, cannot retrieve outputs."
             )
-        self._retrieve_stack_outputs(stack)
+        with self._stack_span("retrieve outputs", stack, "aws"):
+            self._retrieve_stack_outputs(stack)
 
         if stack.outputs:
             ui.subheader(f"Outputs for Stack: {stack.deployed_stack_name}")
@@ -1100,7 +1317,7 @@ class Pipeline:
             if output_rows:  # Ensure there are rows to display
                 ui.format_table(headers=["Output Key", "Value"], rows=output_rows)
                 # Add visual separation after the table
-                console.print()
+                presentation.console.print()
         else:
             ui.debug(f"No outputs found for stack '{stack.id}'.")
 
@@ -1112,7 +1329,64 @@ class Pipeline:
                 stack.run_script
             )
             if processed_script:
-                self._run_post_deployment_script(stack, stack_abs_dir, processed_script)
+                with self._stack_span("run script", stack):
+                    self._run_post_deployment_script(
+                        stack, stack_abs_dir, processed_script
+                    )
+
+    def _resolve_deployed_stack_name(self, stack: Stack) -> str:
+        """Resolve the CloudFormation stack name, with the global prefix and suffix."""
+        global_prefix = self.pipeline_settings.get("stack_name_prefix", "")
+        global_suffix = self.pipeline_settings.get("stack_name_suffix", "")
+
+        if global_prefix:
+            global_prefix = self.template_processor.process_string(global_prefix)
+        if global_suffix:
+            global_suffix = self.template_processor.process_string(global_suffix)
+
+        deployed_stack_name = stack.get_stack_name(global_prefix, global_suffix)
+        if deployed_stack_name is None:  # Should be set by get_stack_name
+            raise StackDeploymentError(
+                f"Failed to determine deployed_stack_name for stack '{stack.id}'."
+            )
+        return deployed_stack_name
+
+    def _resolve_config_path(self, stack: Stack) -> Optional[Path]:
+        """Resolve the external config path of a stack, if it has one."""
+        if not stack.config_path:
+            return None
+        # Apply template processing to the config path string
+        resolved_config_path = Path(
+            self.template_processor.process_string(str(stack.config_path))
+        )
+        # Validate the resolved config path for safety
+        _validate_config_path(resolved_config_path, stack.id)
+        return resolved_config_path
+
+    def _resolve_stack_params(self, stack: Stack) -> Dict[str, str]:
+        """Resolve all template expressions in a stack's params."""
+        resolved_params: Dict[str, str] = {}
+        if stack.params:  # stack.params are from the runtime Stack object, originally from pipeline.yml
+            for key, value in stack.params.items():
+                # Ensure all template types, including stack outputs, are resolved for params
+                resolved_params[key] = self.template_processor.process_string(
+                    str(value)
+                )
+        return resolved_params
+
+    @contextmanager
+    def _run_configs(self, enabled: bool) -> Generator[None, None, None]:
+        """Provide a temporary run config directory for the duration of a deploy."""
+        if not enabled:
+            yield
+            return
+        with tempfile.TemporaryDirectory(prefix="samstacks-run-") as run_dir:
+            self._run_config_dir = Path(run_dir)
+            ui.debug(f"Generating run-scoped SAM configs in {run_dir}")
+            try:
+                yield
+            finally:
+                self._run_config_dir = None
 
     def _run_sam_build(self, stack: Stack) -> None:
         """Run sam build for the stack. Relies on samconfig.yaml in stack.dir."""
@@ -1188,7 +1462,8 @@ class Pipeline:
                         f"Stack '{stack.id}' is already up to date",
                         "No changes deployed.",
                     )
-                    self._cleanup_just_created_no_update_changeset(stack)
+                    with self._stack_span("cleanup changesets", stack, "aws"):
+                        self._cleanup_just_created_no_update_changeset(stack)
                     return
                 else:
                     error_detail = (
@@ -1226,7 +1501,6 @@ class Pipeline:
         effective_env = self._get_effective_env(stack.region, stack.profile)
         try:
             # Use stderr capture only - stdout streams directly to terminal for real-time feedback
-            # Note: cwd is set by the change_directory context manager above
             return_code, stderr_output = _run_command_with_stderr_capture(
                 cmd, cwd=str(config_path.parent), env_dict=effective_env
             )
@@ -1282,7 +1556,6 @@ class Pipeline:
 
         try:
             # Use stderr capture only - stdout streams directly to terminal for real-time feedback
-            # Note: cwd is set by the change_directory context manager above
             return_code, stderr_output = _run_command_with_stderr_capture(
                 cmd, cwd=str(config_path.parent), env_dict=effective_env
             )
@@ -1294,7 +1567,8 @@ class Pipeline:
                         f"Stack '{stack.id}' is already up to date",
                         "No changes deployed.",
                     )
-                    self._cleanup_just_created_no_update_changeset(stack)
+                    with self._stack_span("cleanup changesets", stack, "aws"):
+                        self._cleanup_just_created_no_update_changeset(stack)
                     return
                 else:
                     error_detail = (
@@ -1361,6 +1635,7 @@ class Pipeline:
                 text=True,
                 cwd=str(stack_abs_dir),
             )
+            SUBPROCESS_RUNS.inc(command="run script", exit_code=result.returncode)
 
             # Log output
             if result.stdout:
@@ -1560,6 +1835,78 @@ class Pipeline:
                     details=f"Error listing/deleting 'FAILED - No updates' changesets: {e}. Proceeding.",
                 )
 
+    def _stack_span(self, name: str, stack: Stack, category: str = "stack") -> AnySpan:
+        """Start a tracing span tagged with the stack's id and effective region."""
+        return span(
+            name,
+            category,
+            stack_id=stack.id,
+            region=stack.region or self.pipeline_settings.get("default_region"),
+        )
+
+    def _load_stack_estimates(
+        self, history: Optional["RunHistory"]
+    ) -> Dict[str, float]:
+        """Return historical stack durations, or nothing if unavailable."""
+        if history is None:
+            return {}
+        try:
+            return history.stack_estimates(self.name)
+        except HistoryError as e:
+            ui.warning("Run history unavailable", details=str(e))
+            return {}
+
+    def _record_run_history(
+        self,
+        history: "RunHistory",
+        succeeded: bool,
+        stack_durations: Mapping[str, float],
+        stack_outcomes: Mapping[str, str],
+        phase_durations: List[PhaseTiming],
+        started_at: float,
+    ) -> None:
+        """Store this run's durations; history problems never fail a deploy."""
+        try:
+            with history:
+                history.record_run(
+                    self.name,
+                    succeeded,
+                    stack_durations,
+                    stack_outcomes,
+                    phase_durations,
+                    started_at=started_at,
+                )
+        except HistoryError as e:
+            ui.warning("Could not record run history", details=str(e))
+
+    def _display_eta(
+        self, remaining_stack_ids: List[str], estimates: Mapping[str, float]
+    ) -> None:
+        """Show the estimated time left for the stacks not yet deployed."""
+        known = [estimates[sid] for sid in remaining_stack_ids if sid in estimates]
+        unknown = len(remaining_stack_ids) - len(known)
+        remaining = ui.format_elapsed_time(sum(known))
+        if unknown:
+            remaining += (
+                f" (+{unknown} stack{'s' if unknown != 1 else ''} without history)"
+            )
+        ui.info(
+            f"Estimated time remaining ({len(remaining_stack_ids)} of {len(self.stacks)} stacks)",
+            remaining,
+        )
+
+    def _report_template_cache_stats(self) -> None:
+        """Log and record memoization statistics for the template processor."""
+        stats = self.template_processor.cache_stats()
+        TEMPLATE_CACHE_HITS.set(stats["hits"])
+        TEMPLATE_CACHE_MISSES.set(stats["misses"])
+        TEMPLATE_CACHE_HIT_RATIO.set(stats["hit_rate"])
+        ui.debug(
+            f"Template cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['invalidations']} invalidations, "
+            f"{stats['entries']} entries"
+        )
+
     def _render_summary_if_present(self) -> None:
         """Render the pipeline summary if it exists, with template substitution."""
         if not self.pydantic_model or not self.pydantic_model.summary:
@@ -1597,6 +1944,166 @@ class Pipeline:
                 details=f"Failed to process or render pipeline summary: {e}",
             )
 
+    def render(
+        self,
+        output_dir: Path,
+        output_values: Optional[Dict[str, Dict[str, str]]] = None,
+        offline: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> List[RenderReportItem]:
+        """Write the samconfig every stack would deploy with, without running SAM.
+
+        Each stack's config is written to output_dir/<stack id>/samconfig.yaml
+        as local mode would generate it, except that a stack with a config:
+        path gets the external config deploy writes at that path, as
+        output_dir/<stack id>/<config file name>. Nothing outside output_dir
+        is written. Files whose
+        content is unchanged are left in place, so their mtimes only move when
+        the config changes.
+
+        Args:
+            output_dir: Directory to write the configs into.
+            output_values: Stack outputs by stack id, taking precedence over
+                deployed outputs.
+            offline: Make no AWS calls. Outputs come from output_values, and
+                any other output a stack template declares is replaced by a
+                ``<stacks.<id>.outputs.<name>>`` placeholder.
+            max_workers: Threads used for the output lookups and for
+                rendering and writing the configs.
+        """
+        ui.header(f"Rendering pipeline: {self.name}")
+
+        with span("validate pipeline", "manifest"):
+            self.validate()
+
+        if not self.pydantic_model:
+            raise ManifestError(
+                "Pipeline was not initialized with the Pydantic model. Cannot proceed."
+            )
+
+        output_values = output_values or {}
+        # (region, profile) -> deployed stack name -> outputs
+        deployed_outputs: Dict[
+            Tuple[Optional[str], Optional[str]], Dict[str, Dict[str, str]]
+        ] = {}
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="samstacks-render"
+        ) as executor:
+            if not offline:
+                # One paginated lookup per region and profile, not one per stack
+                accounts = list(
+                    {
+                        (
+                            stack.region
+                            or self.pipeline_settings.get("default_region"),
+                            stack.profile
+                            or self.pipeline_settings.get("default_profile"),
+                        )
+                        for stack in self.stacks
+                    }
+                )
+                with span("retrieve outputs", "aws"):
+                    account_outputs = executor.map(
+                        lambda account: get_all_stack_outputs(*account), accounts
+                    )
+                    deployed_outputs = dict(zip(accounts, account_outputs))
+
+            # Template resolution reads and updates the template processor, so
+            # it runs on this thread; only rendering and writing are parallel
+            report_items: List[RenderReportItem] = []
+            pending_writes = []
+            for stack, pydantic_stack_model in zip(
+                self.stacks, self.pydantic_model.stacks
+            ):
+                item: RenderReportItem = {
+                    "stack_id": stack.id,
+                    "deployed_stack_name": None,
+                    "config_path": None,
+                    "status": "skipped",
+                }
+                report_items.append(item)
+                if not stack.should_deploy(self.template_processor):
+                    continue
+
+                with self._stack_span("resolve templates", stack):
+                    stack.deployed_stack_name = self._resolve_deployed_stack_name(stack)
+                    item["deployed_stack_name"] = stack.deployed_stack_name
+                    effective_region = stack.region or self.pipeline_settings.get(
+                        "default_region"
+                    )
+                    resolved_stack_params = self._resolve_stack_params(stack)
+                    # Stacks with a config: path get the file deploy writes there,
+                    # with template references relative to that path, but it is
+                    # written under output_dir like every other rendered config
+                    external_config_path = self._resolve_config_path(stack)
+                    if external_config_path:
+                        config_path = output_dir / stack.id / external_config_path.name
+                        config = self.sam_config_manager.build_external_config(
+                            config_path=external_config_path,
+                            stack_dir=stack.dir,
+                            pydantic_stack_model=pydantic_stack_model,
+                            deployed_stack_name=stack.deployed_stack_name,
+                            effective_region=effective_region,
+                            resolved_stack_params=resolved_stack_params,
+                        )
+                    else:
+                        config_path = output_dir / stack.id / "samconfig.yaml"
+                        config = self.sam_config_manager.build_stack_config(
+                            stack_dir=stack.dir,
+                            stack_id=stack.id,
+                            pydantic_stack_model=pydantic_stack_model,
+                            deployed_stack_name=stack.deployed_stack_name,
+                            effective_region=effective_region,
+                            resolved_stack_params=resolved_stack_params,
+                        )
+                item["config_path"] = str(config_path)
+                pending_writes.append(
+                    (
+                        item,
+                        executor.submit(
+                            self.sam_config_manager.write_config_file,
+                            config_path,
+                            config,
+                            "render",
+                        ),
+                    )
+                )
+
+                account = (
+                    effective_region,
+                    stack.profile or self.pipeline_settings.get("default_profile"),
+                )
+                stack.outputs = {
+                    **deployed_outputs.get(account, {}).get(
+                        stack.deployed_stack_name, {}
+                    ),
+                    **output_values.get(stack.id, {}),
+                }
+                interface = load_template_interface(stack.dir)
+                for output_name in sorted(interface.outputs or ()) if interface else ():
+                    stack.outputs.setdefault(
+                        output_name, f"<stacks.{stack.id}.outputs.{output_name}>"
+                    )
+                self.template_processor.add_stack_outputs(stack.id, stack.outputs)
+
+            with span("write configs", "pipeline"):
+                for item, write in pending_writes:
+                    item["status"] = "written" if write.result() else "unchanged"
+
+        ui.format_table(
+            headers=["Stack", "Stack Name", "Config", "Status"],
+            rows=[
+                [
+                    item["stack_id"],
+                    item["deployed_stack_name"] or "-",
+                    item["config_path"] or "-",
+                    item["status"],
+                ]
+                for item in report_items
+            ],
+        )
+        return report_items
+
     def delete(self, no_prompts: bool = False, dry_run: bool = False) -> None:
         """Delete all stacks in the pipeline in reverse dependency order."""
         ui.header(f"Deleting pipeline: {self.name}")
@@ -1604,10 +2111,11 @@ class Pipeline:
         # Display pipeline description if available
         if self.description and self.description.strip():
             ui.info("Pipeline Description", self.description.strip())
-            console.print()  # Add visual separation
+            presentation.console.print()  # Add visual separation
 
         # Validate pipeline first
-        self.validate()
+        with span("validate pipeline", "manifest"):
+            self.validate()
 
         # Determine deletion order (reverse of deployment order)
         deletion_order = self._get_deletion_order()
@@ -1706,7 +2214,8 @@ class Pipeline:
                 continue
 
             try:
-                self._delete_stack(stack)
+                with self._stack_span("delete stack", stack, "sam"):
+                    self._delete_stack(stack)
                 successful_deletions.append(stack.id)
             except Exception as e:
                 self.logger.error(f"Failed to delete stack '{stack.id}': {e}")
@@ -1717,6 +2226,16 @@ class Pipeline:
                     f"Error: {e}. Continuing with remaining stacks...",
                 )
 
+        STACKS_PROCESSED.inc(
+            len(successful_deletions), operation="delete", outcome="deleted"
+        )
+        STACKS_PROCESSED.inc(
+            len(skipped_deletions), operation="delete", outcome="skipped"
+        )
+        STACKS_PROCESSED.inc(
+            len(failed_deletions), operation="delete", outcome="failed"
+        )
+
         # Summary report
         ui.subheader("Deletion Summary")
         if successful_deletions:
@@ -1735,6 +2254,8 @@ class Pipeline:
                 "; ".join([f"{stack}: {error}" for stack, error in failed_deletions]),
             )
 
+        self._report_template_cache_stats()
+
         if failed_deletions:
             raise StackDeploymentError(
                 f"Failed to delete {len(failed_deletions)} stack(s). See errors above."
@@ -0,0 +1,398 @@
+"""
+Stack dependency graph derived from template expressions in the manifest.
+
+A stack depends on every stack whose outputs it references through
+``${{ stacks.<id>.outputs.<name> }}`` in its params, condition, name suffix,
+config path, SAM config overrides or run script. The graph answers the
+scheduling questions samstacks asks after (and before) a run: which stacks
+could run side by side, which chain of stacks bounds the total run time, and
+how long a run would take with a given number of parallel workers.
+"""
+
+import heapq
+import json
+import re
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .ui import format_elapsed_time
+
+if TYPE_CHECKING:
+    from .pipeline_models import StackModel
+
+# Shared with validation and watch, so all three agree on what a reference is
+TEMPLATE_EXPRESSION_PATTERN = re.compile(r"\$\{\{\s*([^}]+)\s*\}\}")
+STACK_REFERENCE_PATTERN = re.compile(r"\bstacks\.([A-Za-z0-9_-]+)\.outputs\.")
+# (stack id, output name) of each output reference in an expression
+STACK_OUTPUT_REFERENCE_PATTERN = re.compile(
+    r"\bstacks\.([A-Za-z0-9_-]+)\.outputs\.([A-Za-z0-9_]*)"
+)
+# Orders in which deploy can process stacks: as listed in the manifest, or
+# longest remaining critical path first (see StackGraph.priority_order)
+DEPLOY_SCHEDULES = ("manifest", "critical-path")
+
+
+def template_expressions(value: str) -> List[str]:
+    """Return the bodies of the ``${{ ... }}`` expressions in value, stripped."""
+    if "${{" not in value:
+        return []
+    return [
+        match.group(1).strip() for match in TEMPLATE_EXPRESSION_PATTERN.finditer(value)
+    ]
+
+
+def extract_stack_references(value: Any) -> Set[str]:
+    """Return the ids of stacks whose outputs are referenced anywhere in value.
+
+    Strings are searched inside ``${{ ... }}`` expressions only; dicts (keys
+    and values) and lists are searched recursively.
+    """
+    references: Set[str] = set()
+    pending = [value]
+    while pending:
+        current = pending.pop()
+        if isinstance(current, str):
+            for expression in template_expressions(current):
+                references.update(STACK_REFERENCE_PATTERN.findall(expression))
+        elif isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            pending.extend(current)
+    return references
+
+
+def stack_model_references(stack: "StackModel") -> Set[str]:
+    """Return the ids of other stacks that a stack definition references."""
+    fields = [
+        stack.params,
+        stack.if_condition,
+        stack.stack_name_suffix,
+        stack.run_script,
+        stack.sam_config_overrides,
+        str(stack.config) if stack.config is not None else None,
+    ]
+    references = extract_stack_references(fields)
+    references.discard(stack.id)
+    return references
+
+
+class StackGraph:
+    """Directed acyclic graph of stacks, edges pointing from dependency to dependent."""
+
+    def __init__(
+        self,
+        stack_ids: Sequence[str],
+        dependencies: Mapping[str, Iterable[str]],
+    ):
+        """
+        Args:
+            stack_ids: Stack ids in manifest order, used to break ties.
+            dependencies: Map of stack id to the ids it depends on. Unknown ids
+                and self-references are ignored.
+        """
+        self.stack_ids: List[str] = list(stack_ids)
+        self._index = {stack_id: i for i, stack_id in enumerate(self.stack_ids)}
+        self._dependencies: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {sid: set() for sid in self.stack_ids}
+        for stack_id in self.stack_ids:
+            deps = {
+                dep
+                for dep in dependencies.get(stack_id, ())
+                if dep in self._index and dep != stack_id
+            }
+            self._dependencies[stack_id] = deps
+            for dep in deps:
+                self._dependents[dep].add(stack_id)
+
+    @classmethod
+    def from_stack_models(cls, stacks: Sequence["StackModel"]) -> "StackGraph":
+        """Build the graph from the stacks of a parsed manifest."""
+        return cls(
+            [stack.id for stack in stacks],
+            {stack.id: stack_model_references(stack) for stack in stacks},
+        )
+
+    def _sorted(self, stack_ids: Iterable[str]) -> List[str]:
+        return sorted(stack_ids, key=self._index.__getitem__)
+
+    def dependencies(self, stack_id: str) -> List[str]:
+        """Stacks that stack_id depends on, in manifest order."""
+        return self._sorted(self._dependencies[stack_id])
+
+    def dependents(self, stack_id: str) -> List[str]:
+        """Stacks that depend on stack_id, in manifest order."""
+        return self._sorted(self._dependents[stack_id])
+
+    def topological_order(self) -> List[str]:
+        """Return stack ids so that every stack follows its dependencies.
+
+        Ties are broken by manifest order, so a valid manifest comes back as-is.
+
+        Raises:
+            ValueError: If the graph contains a cycle.
+        """
+        in_degree = {sid: len(deps) for sid, deps in self._dependencies.items()}
+        ready = [self._index[sid] for sid, degree in in_degree.items() if degree == 0]
+        heapq.heapify(ready)
+        order: List[str] = []
+        while ready:
+            stack_id = self.stack_ids[heapq.heappop(ready)]
+            order.append(stack_id)
+            for dependent in self._dependents[stack_id]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    heapq.heappush(ready, self._index[dependent])
+        if len(order) != len(self.stack_ids):
+            cyclic = self._sorted(sid for sid in self.stack_ids if sid not in order)
+            raise ValueError(f"Stack dependency cycle among: {', '.join(cyclic)}")
+        return order
+
+    def topological_levels(self) -> List[List[str]]:
+        """Group stacks into levels; every stack in a level can run in parallel.
+
+        A stack's level is one more than the highest level among its
+        dependencies, so level 0 holds the stacks with no dependencies.
+        """
+        level_of: Dict[str, int] = {}
+        for stack_id in self.topological_order():
+            level_of[stack_id] = 1 + max(
+                (level_of[dep] for dep in self._dependencies[stack_id]), default=-1
+            )
+        levels: List[List[str]] = [
+            [] for _ in range(max(level_of.values(), default=-1) + 1)
+        ]
+        for stack_id in self.stack_ids:
+            levels[level_of[stack_id]].append(stack_id)
+        return levels
+
+    def bottom_levels(self, durations: Mapping[str, float]) -> Dict[str, float]:
+        """Longest duration from the start of each stack to the end of the run.
+
+        Stacks missing from durations count as taking no time.
+        """
+        bottom: Dict[str, float] = {}
+        for stack_id in reversed(self.topological_order()):
+            bottom[stack_id] = durations.get(stack_id, 0.0) + max(
+                (bottom[dep] for dep in self._dependents[stack_id]), default=0.0
+            )
+        return bottom
+
+    def critical_path(self, durations: Mapping[str, float]) -> Tuple[List[str], float]:
+        """Return the chain of dependent stacks with the largest total duration.
+
+        No amount of parallelism can finish a run faster than this chain.
+        """
+        if not self.stack_ids:
+            return [], 0.0
+        bottom = self.bottom_levels(durations)
+
+        def by_priority(stack_ids: Iterable[str]) -> str:
+            # Highest bottom level first, manifest order on ties
+            return min(stack_ids, key=lambda sid: (-bottom[sid], self._index[sid]))
+
+        roots = [sid for sid in self.stack_ids if not self._dependencies[sid]]
+        current = by_priority(roots)
+        path = [current]
+        while self._dependents[current]:
+            current = by_priority(self._dependents[current])
+            path.append(current)
+        return path, bottom[path[0]]
+
+    def priority_order(self, durations: Mapping[str, float]) -> List[str]:
+        """Return a topological order that starts the longest chains first.
+
+        Whenever several stacks are ready, the one with the longest remaining
+        critical path goes first; stacks without durations keep manifest order.
+        """
+        bottom = self.bottom_levels(durations)
+        remaining = {sid: len(deps) for sid, deps in self._dependencies.items()}
+        ready = [
+            (-bottom[sid], self._index[sid], sid)
+            for sid, count in remaining.items()
+            if count == 0
+        ]
+        heapq.heapify(ready)
+        order: List[str] = []
+        while ready:
+            _, _, stack_id = heapq.heappop(ready)
+            order.append(stack_id)
+            for dependent in self._dependents[stack_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(
+                        ready, (-bottom[dependent], self._index[dependent], dependent)
+                    )
+        return order
+
+    def estimate_makespan(
+        self, durations: Mapping[str, float], workers: Optional[int] = None
+    ) -> float:
+        """Estimate the wall-clock time of a run with up to `workers` stacks at once.
+
+        Simulates list scheduling: whenever a worker is free it starts the
+        ready stack with the longest remaining critical path. With workers=None
+        the result is the critical path length.
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        bottom = self.bottom_levels(durations)
+        remaining = {sid: len(deps) for sid, deps in self._dependencies.items()}
+        ready = [
+            (-bottom[sid], self._index[sid], sid)
+            for sid, count in remaining.items()
+            if count == 0
+        ]
+        heapq.heapify(ready)
+        running: List[Tuple[float, int, str]] = []
+        now = 0.0
+        while ready or running:
+            while ready and (workers is None or len(running) < workers):
+                _, index, stack_id = heapq.heappop(ready)
+                heapq.heappush(
+                    running, (now + durations.get(stack_id, 0.0), index, stack_id)
+                )
+            now, _, finished = heapq.heappop(running)
+            for dependent in self._dependents[finished]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(
+                        ready, (-bottom[dependent], self._index[dependent], dependent)
+                    )
+        return now
+
+
+GRAPH_FORMATS = ("dot", "mermaid", "json")
+
+
+def graph_to_dict(
+    graph: StackGraph,
+    pipeline_name: str,
+    durations: Optional[Mapping[str, float]] = None,
+) -> Dict[str, Any]:
+    """Describe the graph, its levels and any historical durations as plain data."""
+    durations = durations or {}
+    levels = graph.topological_levels()
+    level_of = {sid: n for n, level in enumerate(levels) for sid in level}
+    result: Dict[str, Any] = {
+        "pipeline": pipeline_name,
+        "stacks": [
+            {
+                "id": stack_id,
+                "level": level_of[stack_id],
+                "dependencies": graph.dependencies(stack_id),
+                "estimated_seconds": durations.get(stack_id),
+            }
+            for stack_id in graph.stack_ids
+        ],
+        "levels": [
+            {"level": n, "width": len(level), "stacks": level}
+            for n, level in enumerate(levels)
+        ],
+        "max_parallelism": max((len(level) for level in levels), default=0),
+    }
+    if durations:
+        path, total = graph.critical_path(durations)
+        result["critical_path"] = {"stacks": path, "estimated_seconds": total}
+    return result
+
+
+def _node_lines(stack_id: str, durations: Mapping[str, float]) -> List[str]:
+    if stack_id in durations:
+        return [stack_id, format_elapsed_time(durations[stack_id])]
+    return [stack_id]
+
+
+def _dot_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _dot_quote(value: str) -> str:
+    return f'"{_dot_escape(value)}"'
+
+
+def render_dot(
+    graph: StackGraph,
+    pipeline_name: str,
+    durations: Optional[Mapping[str, float]] = None,
+) -> str:
+    """Render the graph in Graphviz DOT, one rank per topological level."""
+    durations = durations or {}
+    critical = set(graph.critical_path(durations)[0]) if durations else set()
+    lines = [
+        f"digraph {_dot_quote(pipeline_name)} {{",
+        "  rankdir=LR;",
+        "  node [shape=box];",
+    ]
+    for n, level in enumerate(graph.topological_levels()):
+        lines.append(f"  // level {n}, width {len(level)}")
+        lines.append(
+            "  { rank=same; " + " ".join(f"{_dot_quote(s)};" for s in level) + " }"
+        )
+    for stack_id in graph.stack_ids:
+        label = "\\n".join(
+            _dot_escape(line) for line in _node_lines(stack_id, durations)
+        )
+        attributes = [f'label="{label}"']
+        if stack_id in critical:
+            attributes.append("penwidth=2")
+        lines.append(f"  {_dot_quote(stack_id)} [{', '.join(attributes)}];")
+    for stack_id in graph.stack_ids:
+        for dependency in graph.dependencies(stack_id):
+            lines.append(f"  {_dot_quote(dependency)} -> {_dot_quote(stack_id)};")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def render_mermaid(
+    graph: StackGraph,
+    pipeline_name: str,
+    durations: Optional[Mapping[str, float]] = None,
+) -> str:
+    """Render the graph as a Mermaid flowchart, one subgraph per level."""
+    durations = durations or {}
+    # Stack ids may contain characters Mermaid does not accept in node ids
+    node_ids = {stack_id: f"s{n}" for n, stack_id in enumerate(graph.stack_ids)}
+    lines = ["flowchart LR", f"  %% {pipeline_name}"]
+    for n, level in enumerate(graph.topological_levels()):
+        lines.append(f'  subgraph level{n}["Level {n} (width {len(level)})"]')
+        for stack_id in level:
+            label = "<br/>".join(_node_lines(stack_id, durations)).replace(
+                '"', "#quot;"
+            )
+            lines.append(f'    {node_ids[stack_id]}["{label}"]')
+        lines.append("  end")
+    for stack_id in graph.stack_ids:
+        for dependency in graph.dependencies(stack_id):
+            lines.append(f"  {node_ids[dependency]} --> {node_ids[stack_id]}")
+    return "\n".join(lines) + "\n"
+
+
+def render_graph(
+    graph: StackGraph,
+    output_format: str,
+    pipeline_name: str,
+    durations: Optional[Mapping[str, float]] = None,
+) -> str:
+    """Render the graph as 'dot', 'mermaid' or 'json'."""
+    if output_format == "dot":
+        return render_dot(graph, pipeline_name, durations)
+    if output_format == "mermaid":
+        return render_mermaid(graph, pipeline_name, durations)
+    if output_format == "json":
+        return (
+            json.dumps(graph_to_dict(graph, pipeline_name, durations), indent=2) + "\n"
+        )
+    raise ValueError(
+        f"Unknown graph format '{output_format}'. Expected one of: {', '.join(GRAPH_FORMATS)}"
+    )
@@ -0,0 +1,196 @@
+"""
+Single-pass discovery of SAM stack directories for `samstacks bootstrap`.
+
+The scan path is walked once with os.scandir. Each directory's entries are
+listed once and give both its template (template.yaml, then template.yml) and
+its samconfig (samconfig.toml, then .yaml, then .yml). Ignored directories
+are pruned before they are entered: build output, dependencies and VCS
+metadata (DEFAULT_IGNORE_PATTERNS), extra patterns given by the caller, and
+directories matched by .gitignore files found along the way.
+
+Ignore patterns use .gitignore syntax, relative to the scan path for the
+caller's patterns and to the .gitignore's directory for its own: a pattern
+without a slash matches a directory name at any depth, a pattern with a slash
+matches a path, ``*`` and ``?`` do not match ``/``, ``**`` matches any number
+of directories, and ``!`` re-includes a directory excluded by an earlier
+pattern. Only directories are matched. Symbolic links to directories are not
+followed.
+"""
+
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .template_index import TEMPLATE_FILE_NAMES
+
+logger = logging.getLogger(__name__)
+
+SAMCONFIG_FILE_NAMES = ("samconfig.toml", "samconfig.yaml", "samconfig.yml")
+# Build output, dependencies and VCS metadata never hold stacks to bootstrap
+DEFAULT_IGNORE_PATTERNS = (".aws-sam", ".git", ".venv", "cdk.out", "node_modules")
+
+
+class StackDirectory(NamedTuple):
+    """A directory holding a SAM template, and its samconfig if it has one."""
+
+    path: Path
+    template_path: Path
+    samconfig_path: Optional[Path]
+
+
+class IgnoreRule(NamedTuple):
+    """One compiled ignore pattern."""
+
+    base: str  # Directory the pattern is relative to, "" for the scan path
+    pattern: "re.Pattern[str]"
+    anchored: bool  # Matched against the path from base, else the name
+    negated: bool
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a .gitignore glob to a regular expression."""
+    parts: List[str] = []
+    i = 0
+    while i < len(glob):
+        char = glob[i]
+        if glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = glob.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = glob[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+def parse_ignore_patterns(lines: Iterable[str], base: str = "") -> List[IgnoreRule]:
+    """Compile .gitignore-style patterns that are relative to base."""
+    rules: List[IgnoreRule] = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):  # Escaped leading "#" or "!"
+            line = line[1:]
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        try:
+            pattern = re.compile(_glob_to_regex(line) + r"\Z")
+        except re.error as e:
+            logger.debug(f"Skipping invalid ignore pattern '{line}': {e}")
+            continue
+        rules.append(IgnoreRule(base, pattern, anchored, negated))
+    return rules
+
+
+def is_ignored(rules: Sequence[IgnoreRule], rel_path: str, name: str) -> bool:
+    """Check a directory against rules; the last matching rule decides."""
+    ignored = False
+    for rule in rules:
+        if rule.anchored:
+            subject = rel_path[len(rule.base) + 1 :] if rule.base else rel_path
+        else:
+            subject = name
+        if rule.pattern.match(subject):
+            ignored = not rule.negated
+    return ignored
+
+
+def _read_gitignore(path: str, base: str) -> List[IgnoreRule]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return parse_ignore_patterns(f, base)
+    except OSError as e:
+        logger.debug(f"Could not read {path}: {e}")
+        return []
+
+
+def find_stack_directories(
+    scan_path: Path,
+    ignore_patterns: Iterable[str] = DEFAULT_IGNORE_PATTERNS,
+    use_gitignore: bool = True,
+) -> List[StackDirectory]:
+    """Return every directory under scan_path (inclusive) that holds a template.
+
+    Directories are listed depth-first in name order.
+    """
+    root_rules = parse_ignore_patterns(ignore_patterns)
+    stack_dirs: List[StackDirectory] = []
+    # (absolute directory, path from scan_path, rules that apply inside it)
+    pending: List[Tuple[str, str, Sequence[IgnoreRule]]] = [
+        (str(scan_path), "", root_rules)
+    ]
+    while pending:
+        dir_path, rel_dir, rules = pending.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.debug(f"Skipping unreadable directory {dir_path}: {e}")
+            continue
+
+        files = set()
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry)
+                elif entry.is_file():
+                    files.add(entry.name)
+            except OSError:
+                continue
+
+        if use_gitignore and ".gitignore" in files:
+            rules = [
+                *rules,
+                *_read_gitignore(os.path.join(dir_path, ".gitignore"), rel_dir),
+            ]
+
+        template_name = next((n for n in TEMPLATE_FILE_NAMES if n in files), None)
+        if template_name is not None:
+            samconfig_name = next((n for n in SAMCONFIG_FILE_NAMES if n in files), None)
+            stack_dir = Path(dir_path)
+            stack_dirs.append(
+                StackDirectory(
+                    stack_dir,
+                    stack_dir / template_name,
+                    stack_dir / samconfig_name if samconfig_name else None,
+                )
+            )
+
+        children = []
+        for entry in subdirs:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if is_ignored(rules, rel_path, entry.name):
+                logger.debug(f"Skipping ignored directory: {entry.path}")
+                continue
+            children.append((entry.path, rel_path, rules))
+        # Reversed so the stack pops them in name order
+        pending.extend(reversed(children))
+    return stack_dirs
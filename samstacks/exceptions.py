@@ -49,3 +49,9 @@ class StackDeletionError(SamStacksError):
     """Error during CloudFormation stack deletion."""
 
     pass
+
+
+class HistoryError(SamStacksError):
+    """Raised when the run history database cannot be read or written."""
+
+    pass
@@ -0,0 +1,186 @@
+"""
+Local history of stack and phase durations, used for ETAs and scheduling.
+
+Every deploy records how long each stack, and each phase of each stack, took
+in a small SQLite database. Later deploys of the same pipeline use the recent
+durations to estimate the time remaining and, with ``--schedule
+critical-path``, to start the stacks with the longest remaining critical path
+first.
+
+The database is $SAMSTACKS_HISTORY_FILE, or history.sqlite in the user cache
+directory ($XDG_CACHE_HOME/samstacks, by default ~/.cache/samstacks).
+"""
+
+import os
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Union
+
+from .exceptions import HistoryError
+
+if TYPE_CHECKING:
+    from .pipeline_models import PhaseTiming
+
+HISTORY_FILE_ENV_VAR = "SAMSTACKS_HISTORY_FILE"
+# Estimates use the median of this many recent successful deploys of a stack
+ESTIMATE_RUNS = 5
+# Older runs of a pipeline are pruned when a new one is recorded
+MAX_RUNS_PER_PIPELINE = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pipeline TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    succeeded INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_pipeline ON runs (pipeline, id);
+CREATE TABLE IF NOT EXISTS stack_durations (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    stack_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stack_durations_by_run ON stack_durations (run_id);
+CREATE TABLE IF NOT EXISTS phase_durations (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    stack_id TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phase_durations_by_run ON phase_durations (run_id);
+"""
+
+
+def default_history_path() -> Path:
+    """Return the history database path from the environment or cache dir."""
+    configured = os.environ.get(HISTORY_FILE_ENV_VAR)
+    if configured:
+        return Path(configured).expanduser()
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "samstacks" / "history.sqlite"
+
+
+class RunHistory:
+    """Records and queries per-stack durations of past deploy runs."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(self.path)
+                connection.execute("PRAGMA foreign_keys = ON")
+                connection.executescript(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                raise HistoryError(f"Cannot open run history '{self.path}': {e}") from e
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    def record_run(
+        self,
+        pipeline: str,
+        succeeded: bool,
+        stack_durations: Mapping[str, float],
+        stack_outcomes: Mapping[str, str],
+        phase_durations: Sequence["PhaseTiming"],
+        started_at: Optional[float] = None,
+    ) -> int:
+        """Store one run's durations and return its run id.
+
+        Args:
+            pipeline: Pipeline name the durations belong to.
+            succeeded: Whether the run as a whole succeeded.
+            stack_durations: Seconds each processed stack took.
+            stack_outcomes: Outcome of each stack (deployed, skipped, failed, ...).
+            phase_durations: Seconds spent in each phase of each stack.
+            started_at: Start of the run as a Unix timestamp; defaults to now.
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO runs (pipeline, started_at, succeeded) VALUES (?, ?, ?)",
+                    (
+                        pipeline,
+                        time.time() if started_at is None else started_at,
+                        int(succeeded),
+                    ),
+                )
+                run_id = cursor.lastrowid
+                assert run_id is not None
+                connection.executemany(
+                    "INSERT INTO stack_durations (run_id, stack_id, outcome, seconds) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            run_id,
+                            stack_id,
+                            stack_outcomes.get(stack_id, "unknown"),
+                            seconds,
+                        )
+                        for stack_id, seconds in stack_durations.items()
+                    ],
+                )
+                connection.executemany(
+                    "INSERT INTO phase_durations (run_id, stack_id, phase, seconds) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (run_id, phase["stack_id"], phase["phase"], phase["seconds"])
+                        for phase in phase_durations
+                    ],
+                )
+                connection.execute(
+                    "DELETE FROM runs WHERE pipeline = ? AND id NOT IN "
+                    "(SELECT id FROM runs WHERE pipeline = ? ORDER BY id DESC LIMIT ?)",
+                    (pipeline, pipeline, MAX_RUNS_PER_PIPELINE),
+                )
+        except sqlite3.Error as e:
+            raise HistoryError(f"Cannot write run history '{self.path}': {e}") from e
+        return run_id
+
+    def stack_estimates(
+        self, pipeline: str, runs: int = ESTIMATE_RUNS
+    ) -> Dict[str, float]:
+        """Estimate each stack's duration from its recent successful deploys.
+
+        Returns the median of the last `runs` durations of every stack of the
+        pipeline that has at least one recorded deploy.
+        """
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT stack_durations.stack_id, stack_durations.seconds "
+                "FROM stack_durations JOIN runs ON runs.id = stack_durations.run_id "
+                "WHERE runs.pipeline = ? AND stack_durations.outcome = 'deployed' "
+                "ORDER BY runs.id DESC",
+                (pipeline,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise HistoryError(f"Cannot read run history '{self.path}': {e}") from e
+
+        recent: Dict[str, List[float]] = {}
+        for stack_id, seconds in rows:
+            durations = recent.setdefault(stack_id, [])
+            if len(durations) < runs:
+                durations.append(seconds)
+        return {
+            stack_id: statistics.median(durations)
+            for stack_id, durations in recent.items()
+        }
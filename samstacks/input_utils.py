@@ -2,11 +2,50 @@
 Utility functions for processing CLI input values.
 """
 
-from typing import Any, Dict, Optional
+import ast
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional
 
 from .exceptions import ManifestError
 
 
+class ResolvedInput(NamedTuple):
+    """The final value of a pipeline input, in every form the template engine needs."""
+
+    name: str
+    type: str
+    value: Any  # Coerced value from the CLI, or the default as defined
+    source: str  # "cli" or "default"
+    text: str  # Raw string form, used when the input is substituted on its own
+    literal: str  # Python literal form, pasted into expressions
+    evaluation_value: Any  # Python value bound to the input by the evaluator
+
+    @classmethod
+    def create(
+        cls, name: str, input_type: str, value: Any, source: str
+    ) -> "ResolvedInput":
+        """Build a ResolvedInput, precomputing its string and evaluation forms."""
+        if input_type == "boolean":
+            text = "true" if value else "false"
+            literal = str(bool(value))
+            evaluation_value: Any = bool(value)
+        elif input_type == "number":
+            text = str(value)
+            literal = str(value)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                evaluation_value = value
+            else:
+                try:
+                    evaluation_value = ast.literal_eval(literal)
+                except (ValueError, SyntaxError):
+                    evaluation_value = literal
+        else:
+            text = str(value)
+            literal = repr(text)
+            evaluation_value = text
+        return cls(name, input_type, value, source, text, literal, evaluation_value)
+
+
 def coerce_and_validate_value(
     value: Any,
     input_name: str,
@@ -90,3 +129,61 @@ def process_cli_input_value(
     return coerce_and_validate_value(
         trimmed_value, input_name, input_definition, value_source="CLI"
     )
+
+
+def resolve_input_value(
+    input_name: str,
+    input_definition: Dict[str, Any],
+    cli_value: Optional[str] = None,
+) -> Optional[ResolvedInput]:
+    """
+    Resolve the final value of a single input from its CLI value and definition.
+
+    Args:
+        input_name: Name of the input
+        input_definition: Input definition from manifest
+        cli_value: Raw CLI input value string, if provided
+
+    Returns:
+        The resolved input, or None if it has neither a CLI value nor a default.
+
+    Raises:
+        ManifestError: If the CLI value doesn't match the expected type.
+    """
+    input_type = input_definition.get("type", "string")
+
+    if cli_value is not None:
+        processed_cli_value = process_cli_input_value(
+            input_name, cli_value, input_definition
+        )
+        if processed_cli_value is not None:
+            return ResolvedInput.create(
+                input_name, input_type, processed_cli_value, "cli"
+            )
+
+    if "default" in input_definition:
+        return ResolvedInput.create(
+            input_name, input_type, input_definition["default"], "default"
+        )
+    return None
+
+
+def resolve_input_values(
+    defined_inputs: Dict[str, Dict[str, Any]], cli_inputs: Dict[str, str]
+) -> Mapping[str, ResolvedInput]:
+    """
+    Resolve every defined input once, returning a read-only name -> value table.
+
+    Inputs with neither a CLI value nor a default are omitted.
+
+    Raises:
+        ManifestError: If a CLI value doesn't match its input's type.
+    """
+    resolved: Dict[str, ResolvedInput] = {}
+    for input_name, input_definition in defined_inputs.items():
+        resolved_input = resolve_input_value(
+            input_name, input_definition, cli_inputs.get(input_name)
+        )
+        if resolved_input is not None:
+            resolved[input_name] = resolved_input
+    return MappingProxyType(resolved)
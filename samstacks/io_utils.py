@@ -0,0 +1,161 @@
+"""
+YAML and TOML file I/O for samstacks.
+
+YAML goes through PyYAML's LibYAML-backed CSafeLoader and CSafeDumper when
+PyYAML was built with LibYAML, which parse several times faster than the
+pure-Python SafeLoader and SafeDumper used as a fallback. Both produce the
+same data and the same output.
+
+Files read with load_yaml_file and load_toml_file are memoized for the rest
+of the process. The cache is keyed by path and parser and checked against the
+file's mtime_ns and size, so an edited file is parsed again. Callers for the
+same file share the parsed object, so copy it before modifying it.
+"""
+
+import os
+import tempfile
+import threading
+import tomllib
+from pathlib import Path
+from typing import IO, Any, Dict, Optional, Tuple, Type, Union
+
+import yaml
+
+from . import metrics
+
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:  # PyYAML was built without LibYAML
+    from yaml import SafeDumper, SafeLoader  # type: ignore[assignment]
+
+PARSE_CACHE_LOOKUPS = metrics.counter(
+    "samstacks_parse_cache_lookups",
+    "Reads of YAML and TOML files, by format and whether they were cached.",
+    ["format", "outcome"],
+)
+
+
+class TemplateLoader(SafeLoader):
+    """Loads CloudFormation and SAM templates.
+
+    Short-form intrinsic functions (!Ref, !Sub, !GetAtt, ...) are loaded as
+    the plain scalar, list or mapping they tag.
+    """
+
+
+def _construct_tagged(loader: yaml.SafeLoader, tag_suffix: str, node: yaml.Node) -> Any:
+    if isinstance(node, yaml.ScalarNode):
+        return loader.construct_scalar(node)
+    if isinstance(node, yaml.SequenceNode):
+        return loader.construct_sequence(node, deep=True)
+    if isinstance(node, yaml.MappingNode):
+        return loader.construct_mapping(node, deep=True)
+    return None
+
+
+TemplateLoader.add_multi_constructor("!", _construct_tagged)
+
+
+def load_yaml(
+    content: Union[str, bytes, IO[str], IO[bytes]],
+    loader: Type[SafeLoader] = SafeLoader,
+) -> Any:
+    """Parse a YAML document with the fastest available safe loader."""
+    return yaml.load(content, Loader=loader)
+
+
+def write_bytes_atomic(path: Union[str, Path], content: bytes) -> None:
+    """Write content to path through a temporary file and a rename.
+
+    Readers, including concurrent deploys, see either the old file or the new
+    one, never a partly written one.
+    """
+    target = Path(path)
+    try:
+        mode = target.stat().st_mode & 0o777
+    except OSError:
+        mode = 0o644  # mkstemp creates files readable by the owner only
+    fd, tmp_name = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.name}.", suffix=".tmp"
+    )
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def dump_yaml(data: Any, stream: Optional[IO[str]] = None, **options: Any) -> Any:
+    """Serialize data as block-style YAML, keeping the order of keys.
+
+    Returns the YAML text, or None when it is written to stream.
+    """
+    options = {
+        "sort_keys": False,
+        "default_flow_style": False,
+        "indent": 2,
+        **options,
+    }
+    return yaml.dump(data, stream, Dumper=SafeDumper, **options)
+
+
+# (absolute path, parser) -> (mtime_ns, size, parsed data)
+_parse_cache: Dict[Tuple[str, str], Tuple[int, int, Any]] = {}
+_parse_cache_lock = threading.Lock()
+
+
+def _load_cached(path: Union[str, Path], parser: str, file_format: str) -> Any:
+    file_path = os.path.abspath(path)
+    stat = os.stat(file_path)
+    key = (file_path, parser)
+    with _parse_cache_lock:
+        cached = _parse_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        PARSE_CACHE_LOOKUPS.inc(format=file_format, outcome="hit")
+        return cached[2]
+
+    PARSE_CACHE_LOOKUPS.inc(format=file_format, outcome="miss")
+    with open(file_path, "rb") as f:
+        if file_format == "toml":
+            data: Any = tomllib.load(f)
+        else:
+            loader = TemplateLoader if parser == "template" else SafeLoader
+            data = load_yaml(f, loader)
+    with _parse_cache_lock:
+        _parse_cache[key] = (stat.st_mtime_ns, stat.st_size, data)
+    return data
+
+
+def load_yaml_file(path: Union[str, Path], template: bool = False) -> Any:
+    """Parse a YAML file, reusing the previous result if it has not changed.
+
+    Args:
+        path: The file to read.
+        template: Parse the file as a CloudFormation/SAM template, accepting
+            short-form intrinsic function tags.
+
+    Raises:
+        OSError: If the file cannot be read.
+        yaml.YAMLError: If the file is not valid YAML.
+    """
+    return _load_cached(path, "template" if template else "yaml", "yaml")
+
+
+def load_toml_file(path: Union[str, Path]) -> Dict[str, Any]:
+    """Parse a TOML file, reusing the previous result if it has not changed.
+
+    Raises:
+        OSError: If the file cannot be read.
+        tomllib.TOMLDecodeError: If the file is not valid TOML.
+    """
+    data: Dict[str, Any] = _load_cached(path, "toml", "toml")
+    return data
+
+
+def clear_parse_cache() -> None:
+    """Forget all memoized file contents."""
+    with _parse_cache_lock:
+        _parse_cache.clear()
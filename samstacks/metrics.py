@@ -0,0 +1,268 @@
+"""
+In-process metrics registry with OpenMetrics textfile export.
+
+Modules declare their metrics once at import time, the way they declare
+loggers, and report into them as they run:
+
+    AWS_API_CALLS = metrics.counter(
+        "samstacks_aws_api_calls", "CloudFormation API calls.", ["operation"]
+    )
+    AWS_API_CALLS.inc(operation="DescribeStacks")
+
+The CLI writes the registry to a file (--metrics-file) in the OpenMetrics text
+format, for the node_exporter textfile collector or any OpenMetrics scraper.
+The registry is process-wide: pipelines run concurrently in one process report
+into the same metrics.
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from . import tracing
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """A metric family: a name, a type, help text and labelled samples."""
+
+    metric_type = "unknown"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"Metric '{self.name}' expects labels {list(self.label_names)}, "
+                f"got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _format_labels(self, label_values: LabelValues) -> str:
+        if not label_values:
+            return ""
+        pairs = ",".join(
+            f'{name}="{_escape_label_value(value)}"'
+            for name, value in zip(self.label_names, label_values)
+        )
+        return "{" + pairs + "}"
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """Return (sample name, label values, value) for every series."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Render this family in OpenMetrics text format."""
+        lines = [
+            f"# TYPE {self.name} {self.metric_type}",
+            f"# HELP {self.name} {self.help_text}",
+        ]
+        for sample_name, label_values, value in self.samples():
+            lines.append(
+                f"{sample_name}{self._format_labels(label_values)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._label_values(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            return [
+                (f"{self.name}_total", key, value)
+                for key, value in sorted(self._values.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Metric):
+    """A value that can go up and down; the last value set wins."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels: Any) -> Optional[float]:
+        return self._values.get(self._label_values(labels))
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            return [
+                (self.name, key, value) for key, value in sorted(self._values.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Summary(Metric):
+    """A count and sum of observations, e.g. durations."""
+
+    metric_type = "summary"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        super().__init__(name, help_text, label_names)
+        self._counts: Dict[LabelValues, float] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0.0) + 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def get_count(self, **labels: Any) -> float:
+        return self._counts.get(self._label_values(labels), 0.0)
+
+    def get_sum(self, **labels: Any) -> float:
+        return self._sums.get(self._label_values(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        samples = []
+        with self._lock:
+            for key in sorted(self._counts):
+                samples.append((f"{self.name}_count", key, self._counts[key]))
+                samples.append((f"{self.name}_sum", key, self._sums[key]))
+        return samples
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+class MetricsRegistry:
+    """Holds every metric family declared by samstacks modules."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or (
+                    existing.label_names != metric.label_names
+                ):
+                    raise ValueError(
+                        f"Metric '{metric.name}' is already registered differently"
+                    )
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self, name: str, help_text: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        counter: Counter = self._register(Counter(name, help_text, label_names))
+        return counter
+
+    def gauge(
+        self, name: str, help_text: str, label_names: Sequence[str] = ()
+    ) -> Gauge:
+        gauge: Gauge = self._register(Gauge(name, help_text, label_names))
+        return gauge
+
+    def summary(
+        self, name: str, help_text: str, label_names: Sequence[str] = ()
+    ) -> Summary:
+        summary: Summary = self._register(Summary(name, help_text, label_names))
+        return summary
+
+    def reset(self) -> None:
+        """Clear every sample, keeping the declared metric families."""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render_openmetrics(self) -> str:
+        """Render every metric family that has samples, ending with '# EOF'."""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            if metric.samples():
+                lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Union[str, Path]) -> None:
+        """Write the registry to path atomically, as textfile collectors expect."""
+        # io_utils reports into this module's registry, so import it lazily
+        from .io_utils import write_bytes_atomic
+
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(target, self.render_openmetrics().encode("utf-8"))
+
+
+REGISTRY = MetricsRegistry()
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+summary = REGISTRY.summary
+
+PHASE_DURATION = summary(
+    "samstacks_phase_duration_seconds",
+    "Duration of pipeline and per-stack phases.",
+    ["phase", "stack_id"],
+)
+
+
+def _record_phase(
+    name: str, category: str, duration: float, args: Dict[str, Any]
+) -> None:
+    PHASE_DURATION.observe(duration, phase=name, stack_id=args.get("stack_id", ""))
+
+
+def enable_phase_metrics() -> None:
+    """Record the duration of every traced phase in PHASE_DURATION."""
+    tracing.add_span_listener(_record_phase)
+
+
+def disable_phase_metrics() -> None:
+    """Stop recording phase durations."""
+    tracing.remove_span_listener(_record_phase)
@@ -234,6 +234,34 @@ class StackReportItem(TypedDict):
     outputs: Dict[str, str]
 
 
+class PhaseTiming(TypedDict):
+    stack_id: str
+    phase: str
+    seconds: float
+
+
+class RenderReportItem(TypedDict):
+    stack_id: str
+    deployed_stack_name: Optional[str]
+    config_path: Optional[str]
+    status: str  # "written", "unchanged" or "skipped"
+
+
+class ParallelismEstimate(TypedDict):
+    workers: Optional[int]  # None means as many workers as there are ready stacks
+    seconds: float
+    savings_seconds: float
+
+
+class TimingReport(TypedDict):
+    stack_durations: Dict[str, float]
+    sequential_seconds: float
+    critical_path: List[str]
+    critical_path_seconds: float
+    parallelism: List[ParallelismEstimate]
+    slowest_phases: List[PhaseTiming]
+
+
 # Example of how to parse in V2:
 # from pathlib import Path
 # import yaml
@@ -2,7 +2,20 @@
 Manages rich console output for samstacks.
 """
 
-from rich.console import Console
+from typing import TYPE_CHECKING, Any
 
-# Global console object for rich printing throughout the application
-console = Console()
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    # Global console object for rich printing throughout the application
+    console: Console
+
+
+def __getattr__(name: str) -> Any:
+    # rich is imported, and the console created, the first time it is used
+    if name == "console":
+        from rich.console import Console
+
+        globals()["console"] = Console()
+        return globals()["console"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
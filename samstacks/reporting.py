@@ -2,13 +2,27 @@
 Manages the generation and display of deployment reports.
 """
 
+import logging
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
-
-from .pipeline_models import StackReportItem, PipelineSettingsModel
+from typing import List, Mapping, Optional, Sequence, Tuple, Dict
+
+from .dependency_graph import StackGraph
+from .pipeline_models import (
+    ParallelismEstimate,
+    PhaseTiming,
+    StackReportItem,
+    PipelineSettingsModel,
+    TimingReport,
+)
 from . import ui as ui_module  # Import the ui module directly
 from .aws_utils import mask_sensitive_data
 
+logger = logging.getLogger(__name__)
+
+# Worker counts to estimate run time for; None means unbounded parallelism
+PARALLELISM_LEVELS: Tuple[Optional[int], ...] = (2, 4, 8, None)
+SLOWEST_PHASES_LIMIT = 5
+
 
 def _resolve_masking_config(
     pipeline_settings: Optional[PipelineSettingsModel] = None,
@@ -106,9 +120,178 @@ def _apply_masking(
         return str(value)
 
 
+def build_timing_report(
+    graph: StackGraph,
+    stack_durations: Mapping[str, float],
+    phase_durations: Sequence[PhaseTiming],
+    parallelism_levels: Sequence[Optional[int]] = PARALLELISM_LEVELS,
+) -> Optional[TimingReport]:
+    """
+    Analyze the durations of a sequential run against the stack dependency graph.
+
+    Args:
+        graph: Dependency graph of the pipeline's stacks.
+        stack_durations: Seconds each processed stack took.
+        phase_durations: Seconds spent in each phase of each stack.
+        parallelism_levels: Worker counts to estimate the run time for.
+
+    Returns:
+        The timing report, or None if no stack durations were recorded or the
+        graph has a cycle. Edges from sam_config_overrides and config paths
+        are not checked for cycles by validation, and the stacks have already
+        been deployed in manifest order by the time the report is built.
+    """
+    if not stack_durations:
+        return None
+
+    durations = {
+        stack_id: stack_durations[stack_id]
+        for stack_id in graph.stack_ids
+        if stack_id in stack_durations
+    }
+    sequential = sum(durations.values())
+    parallelism: List[ParallelismEstimate] = []
+    try:
+        critical_path, critical_path_seconds = graph.critical_path(durations)
+        for workers in parallelism_levels:
+            estimate = graph.estimate_makespan(durations, workers)
+            parallelism.append(
+                {
+                    "workers": workers,
+                    "seconds": estimate,
+                    "savings_seconds": max(sequential - estimate, 0.0),
+                }
+            )
+    except ValueError as e:
+        logger.debug(f"Skipping the timing report: {e}")
+        return None
+
+    slowest_phases = sorted(
+        phase_durations, key=lambda phase: phase["seconds"], reverse=True
+    )[:SLOWEST_PHASES_LIMIT]
+
+    return {
+        "stack_durations": durations,
+        "sequential_seconds": sequential,
+        "critical_path": [sid for sid in critical_path if sid in durations],
+        "critical_path_seconds": critical_path_seconds,
+        "parallelism": parallelism,
+        "slowest_phases": slowest_phases,
+    }
+
+
+def _format_workers(workers: Optional[int]) -> str:
+    return "unbounded" if workers is None else str(workers)
+
+
+def _format_share(seconds: float, total: float) -> str:
+    return f"{seconds / total:.0%}" if total else "-"
+
+
+def display_console_timing_report(timing: TimingReport) -> None:
+    """Displays stack durations, the critical path and parallelism estimates."""
+    total = timing["sequential_seconds"]
+    critical = set(timing["critical_path"])
+
+    ui_module.header("Deployment Timing")
+    ui_module.format_table(
+        ["Stack", "Duration", "Share", "Critical path"],
+        [
+            [
+                stack_id,
+                ui_module.format_elapsed_time(seconds),
+                _format_share(seconds, total),
+                "yes" if stack_id in critical else "",
+            ]
+            for stack_id, seconds in timing["stack_durations"].items()
+        ],
+    )
+    ui_module.info("Total (sequential)", ui_module.format_elapsed_time(total))
+    ui_module.info(
+        "Critical path",
+        f"{' -> '.join(timing['critical_path'])} "
+        f"({ui_module.format_elapsed_time(timing['critical_path_seconds'])})",
+    )
+
+    ui_module.format_table(
+        ["Parallel stacks", "Estimated duration", "Savings"],
+        [
+            [
+                _format_workers(estimate["workers"]),
+                ui_module.format_elapsed_time(estimate["seconds"]),
+                f"{ui_module.format_elapsed_time(estimate['savings_seconds'])} "
+                f"({_format_share(estimate['savings_seconds'], total)})",
+            ]
+            for estimate in timing["parallelism"]
+        ],
+        title="Estimated run time with parallel stacks",
+    )
+
+    if timing["slowest_phases"]:
+        ui_module.format_table(
+            ["Stack", "Phase", "Duration", "Share"],
+            [
+                [
+                    phase["stack_id"],
+                    phase["phase"],
+                    ui_module.format_elapsed_time(phase["seconds"]),
+                    _format_share(phase["seconds"], total),
+                ]
+                for phase in timing["slowest_phases"]
+            ],
+            title="Slowest phases",
+        )
+
+
+def _markdown_timing_lines(timing: TimingReport) -> List[str]:
+    total = timing["sequential_seconds"]
+    critical = set(timing["critical_path"])
+    critical_path = " → ".join(f"`{sid}`" for sid in timing["critical_path"])
+
+    lines = ["## Deployment Timing\n"]
+    lines.append(f"- **Total (sequential)**: {ui_module.format_elapsed_time(total)}")
+    lines.append(
+        f"- **Critical path**: {critical_path} "
+        f"({ui_module.format_elapsed_time(timing['critical_path_seconds'])})"
+    )
+    lines.append("")
+    lines.append("| Stack | Duration | Share | Critical path |")
+    lines.append("|-------|----------|-------|---------------|")
+    for stack_id, seconds in timing["stack_durations"].items():
+        lines.append(
+            f"| {stack_id} | {ui_module.format_elapsed_time(seconds)} | "
+            f"{_format_share(seconds, total)} | {'yes' if stack_id in critical else ''} |"
+        )
+
+    lines.append("\n#### Estimated run time with parallel stacks\n")
+    lines.append("| Parallel stacks | Estimated duration | Savings |")
+    lines.append("|-----------------|--------------------|---------|")
+    for estimate in timing["parallelism"]:
+        lines.append(
+            f"| {_format_workers(estimate['workers'])} | "
+            f"{ui_module.format_elapsed_time(estimate['seconds'])} | "
+            f"{ui_module.format_elapsed_time(estimate['savings_seconds'])} "
+            f"({_format_share(estimate['savings_seconds'], total)}) |"
+        )
+
+    if timing["slowest_phases"]:
+        lines.append("\n#### Slowest phases\n")
+        lines.append("| Stack | Phase | Duration | Share |")
+        lines.append("|-------|-------|----------|-------|")
+        for phase in timing["slowest_phases"]:
+            lines.append(
+                f"| {phase['stack_id']} | {phase['phase']} | "
+                f"{ui_module.format_elapsed_time(phase['seconds'])} | "
+                f"{_format_share(phase['seconds'], total)} |"
+            )
+    lines.append("\n---\n")
+    return lines
+
+
 def display_console_report(
     report_items: List[StackReportItem],
     pipeline_settings: Optional[PipelineSettingsModel] = None,
+    timing: Optional[TimingReport] = None,
 ) -> None:
     """Displays the deployment report to the console using the UI module."""
     if not report_items:
@@ -147,6 +330,9 @@ def display_console_report(
             ui_module.info("Stack Outputs", "None")
         ui_module.separator()
 
+    if timing:
+        display_console_timing_report(timing)
+
 
 def generate_markdown_report_string(
     report_items: List[StackReportItem],
@@ -154,6 +340,7 @@ def generate_markdown_report_string(
     pipeline_description: Optional[str] = None,
     processed_summary: Optional[str] = None,
     pipeline_settings: Optional[PipelineSettingsModel] = None,
+    timing: Optional[TimingReport] = None,
 ) -> str:
     """Generates a Markdown formatted string for the deployment report."""
     # Resolve masking configuration
@@ -213,6 +400,9 @@ def generate_markdown_report_string(
                 lines.append("  _None_")
             lines.append("\n---\n")  # Horizontal rule for separation
 
+    if timing:
+        lines.extend(_markdown_timing_lines(timing))
+
     # Add summary at the end if provided
     if processed_summary and processed_summary.strip():
         lines.append("## Pipeline Summary")
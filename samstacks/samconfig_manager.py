@@ -3,21 +3,49 @@
 Manages the generation and persistence of samconfig.yaml for individual stacks.
 """
 
-import yaml
 import os
 import shutil
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import logging
-import tomllib
 
+from . import metrics
 from . import ui  # Import UI module
+from .io_utils import dump_yaml, load_toml_file, load_yaml_file, write_bytes_atomic
 from .pipeline_models import SamConfigContentType, StackModel as PydanticStackModel
 from .templating import TemplateProcessor
 from .exceptions import ManifestError  # Or a more specific SamConfigError
 
 logger = logging.getLogger(__name__)
 
+SAMCONFIG_WRITES = metrics.counter(
+    "samstacks_samconfig_writes",
+    "SAM config files written, by mode (local samconfig.yaml, external, run or render).",
+    ["mode"],
+)
+SAMCONFIG_BACKUPS = metrics.counter(
+    "samstacks_samconfig_backups",
+    "Existing SAM config files moved aside to .bak before regeneration.",
+    ["format"],
+)
+
+SAMCONFIG_UNCHANGED = metrics.counter(
+    "samstacks_samconfig_unchanged",
+    "SAM config files left in place because the generated content was identical.",
+    ["mode"],
+)
+
+
+def _file_content_equals(path: Path, content: bytes) -> bool:
+    """Check whether the file at path holds exactly content."""
+    try:
+        if path.stat().st_size != len(content):
+            return False
+        return path.read_bytes() == content
+    except OSError:
+        return False
+
 
 class SamConfigManager:
     """
@@ -42,21 +70,28 @@ class SamConfigManager:
         )
         self.template_processor = template_processor
         self.logger = logger
+        # default_sam_config with its templates resolved, and what they read
+        self._pipeline_layer: Optional[Tuple[Dict[str, Any], Any]] = None
+        self._pipeline_layer_lock = threading.Lock()
 
     def _deep_copy(self, obj: Any) -> Any:
-        """Deep copy any object using YAML serialization."""
-        if obj is None:
-            return None
-        # Using yaml load/dump for a deep copy that handles nested structures well.
-        # More robust than manual recursion for complex Any types.
-        return yaml.safe_load(yaml.safe_dump(obj))
+        """Deep copy the dicts and lists of a config tree.
+
+        Config values come from YAML, so every container is a dict or a list
+        (tuples become lists, as a YAML round-trip would make them) and every
+        leaf is an immutable scalar that can be shared.
+        """
+        if isinstance(obj, dict):
+            return {key: self._deep_copy(value) for key, value in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [self._deep_copy(item) for item in obj]
+        return obj
 
     def _deep_copy_dict(self, d: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Deep copy a dictionary, returning empty dict if None."""
         if d is None:
             return {}
         result = self._deep_copy(d)
-        # Type cast since we know input was a dict and YAML round-trip preserves dict type
         return result if isinstance(result, dict) else {}
 
     def _deep_copy_any(self, obj: Any) -> Any:
@@ -70,21 +105,71 @@ class SamConfigManager:
         Recursively merges 'updates' dict into 'base' dict.
         'updates' values take precedence for conflicting keys.
         Lists from 'updates' replace lists in 'base' entirely.
+        Returns a new tree; each node of the result is copied exactly once.
         """
-        merged = self._deep_copy_dict(base)
+        return self._merge_layers(base, updates)
+
+    def _merge_layers(self, *layers: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Deep merge config layers into a new tree, later layers taking precedence.
+
+        Layers are merged after their template expressions are resolved, so a
+        templated key merges as the key it resolves to, with the precedence of
+        its own layer, and values a later layer overrides are still resolved.
+        """
+        merged: Dict[str, Any] = {}
+        for layer in layers:
+            if layer:
+                self._merge_into(merged, layer)
+        return merged
+
+    def _merge_into(self, target: Dict[str, Any], updates: Dict[str, Any]) -> None:
+        """Merge copies of the values in updates into target, in place."""
         for key, value_updates in updates.items():
-            value_base = merged.get(key)
-            if isinstance(value_base, dict) and isinstance(value_updates, dict):
-                merged[key] = self._deep_merge_dicts(value_base, value_updates)
+            value_target = target.get(key)
+            if isinstance(value_target, dict) and isinstance(value_updates, dict):
+                self._merge_into(value_target, value_updates)
             else:
                 # For lists, primitives, or type mismatches: replace entirely with deep copy
                 # Lists from updates replace lists in base completely (no element-wise merging)
-                merged[key] = (
-                    self._deep_copy_any(value_updates)
-                    if isinstance(value_updates, (dict, list))
-                    else value_updates
+                target[key] = self._deep_copy_any(value_updates)
+
+    def resolve_pipeline_layer(self) -> Dict[str, Any]:
+        """
+        Returns default_sam_config with its template expressions resolved.
+
+        The layer is resolved once and shared by every stack while the
+        environment variables and stack outputs its templates read keep their
+        values. Callers must not modify it.
+        """
+        with self._pipeline_layer_lock:
+            if self._pipeline_layer is not None:
+                layer, dependencies = self._pipeline_layer
+                if self.template_processor.dependencies_unchanged(dependencies):
+                    return layer
+            layer, dependencies = (
+                self.template_processor.process_structure_with_dependencies(
+                    self.default_sam_config_from_pipeline,
+                    pipeline_name=self.pipeline_name,
+                    pipeline_description=self.pipeline_description,
                 )
-        return merged
+            )
+            if not isinstance(layer, dict):
+                layer = {}
+            self._pipeline_layer = (layer, dependencies)
+            return layer
+
+    def _resolve_stack_layer(
+        self, config_layer: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Resolve the template expressions of a stack's own config layer."""
+        if not config_layer:
+            return None
+        resolved = self.template_processor.process_structure(
+            config_layer,
+            pipeline_name=self.pipeline_name,
+            pipeline_description=self.pipeline_description,
+        )
+        return resolved if isinstance(resolved, dict) else None
 
     def _apply_stack_specific_configs(
         self,
@@ -234,6 +319,44 @@ class SamConfigManager:
 
         return output_config
 
+    def _load_local_config(
+        self, stack_dir: Path
+    ) -> Tuple[Dict[str, Any], List[Tuple[Path, str]]]:
+        """
+        Loads the stack directory's own SAM config, in priority order: .toml,
+        then .yaml, then .yml.
+        Returns the config and the (path, format) of each file that a
+        regenerated samconfig.yaml replaces.
+        """
+        config_local_base: Dict[str, Any] = {}
+        loaded_from_local = False
+        replaced_files: List[Tuple[Path, str]] = []
+        for local_path, file_format in (
+            (stack_dir / "samconfig.toml", "toml"),
+            (stack_dir / "samconfig.yaml", "yaml"),
+            (stack_dir / "samconfig.yml", "yml"),
+        ):
+            if not local_path.is_file():
+                continue
+            if file_format == "yml" and loaded_from_local:
+                continue  # A leftover next to the config that was used; keep it
+            replaced_files.append((local_path, file_format))
+            if loaded_from_local:
+                continue
+            try:
+                if file_format == "toml":
+                    config_local_base = load_toml_file(local_path)
+                else:
+                    config_local_base = load_yaml_file(local_path) or {}
+                self.logger.debug(f"Loaded base config from {local_path.name}")
+                loaded_from_local = True
+            except Exception as e:
+                self.logger.warning(
+                    f"Could not parse {local_path.name}: {e}. Starting with empty base."
+                )
+                config_local_base = {}
+        return config_local_base, replaced_files
+
     def generate_samconfig_for_stack(
         self,
         stack_dir: Path,
@@ -250,116 +373,23 @@ class SamConfigManager:
         """
         target_samconfig_path = stack_dir / "samconfig.yaml"
 
-        existing_toml_path = stack_dir / "samconfig.toml"
-        backup_toml_path = stack_dir / "samconfig.toml.bak"
-
-        existing_yaml_path = (
-            stack_dir / "samconfig.yaml"
-        )  # This is also target_samconfig_path
-        backup_yaml_path = stack_dir / "samconfig.yaml.bak"
-
-        existing_yml_path = stack_dir / "samconfig.yml"
-        backup_yml_path = stack_dir / "samconfig.yml.bak"
-
-        config_local_base: Dict[str, Any] = {}
-        loaded_from_local = False
-
-        # 1. Backup existing files and load local config if present
-        # Priority: .toml, then .yaml, then .yml
-        if existing_toml_path.is_file():
-            ui.info("Existing samconfig.toml found", "Backing up.")
-            if backup_toml_path.exists():
-                os.remove(backup_toml_path)
-            shutil.move(str(existing_toml_path), str(backup_toml_path))
-            try:
-                with open(backup_toml_path, "rb") as f_local_bak:
-                    config_local_base = tomllib.load(f_local_bak)
-                self.logger.debug(f"Loaded base config from {backup_toml_path.name}")
-                loaded_from_local = True
-            except Exception as e:
-                self.logger.warning(
-                    f"Could not parse {backup_toml_path.name}: {e}. Starting with empty base."
-                )
-
-        # If a .yaml/.yml exists and no .toml was processed, it might be the source or a leftover.
-        # We always generate fresh, but need to back up what would be overwritten.
-        if (
-            existing_yaml_path.is_file()
-            and existing_yaml_path.resolve() == target_samconfig_path.resolve()
-        ):
-            ui.info("Existing samconfig.yaml found", "Backing up.")
-            if backup_yaml_path.exists():
-                os.remove(backup_yaml_path)
-            shutil.move(str(target_samconfig_path), str(backup_yaml_path))
-            if (
-                not loaded_from_local
-            ):  # If .toml wasn't found, try to load this .yaml.bak as base
-                try:
-                    with open(backup_yaml_path, "r", encoding="utf-8") as f_local_bak:
-                        config_local_base = yaml.safe_load(f_local_bak) or {}
-                    self.logger.debug(
-                        f"Loaded base config from {backup_yaml_path.name}"
-                    )
-                    loaded_from_local = True
-                except Exception as e:
-                    self.logger.warning(
-                        f"Could not parse {backup_yaml_path.name}: {e}. Starting with empty base."
-                    )
-                    config_local_base = {}
-
-        if (
-            existing_yml_path.is_file()
-        ):  # Check for .yml if .yaml wasn't the target and not loaded
-            if (
-                not loaded_from_local
-                or existing_yml_path.resolve() == target_samconfig_path.resolve()
-            ):  # if target happens to be .yml
-                ui.info("Existing samconfig.yml found", "Backing up.")
-                if backup_yml_path.exists():
-                    os.remove(backup_yml_path)
-                shutil.move(str(existing_yml_path), str(backup_yml_path))
-                if not loaded_from_local:
-                    try:
-                        with open(
-                            backup_yml_path, "r", encoding="utf-8"
-                        ) as f_local_bak:
-                            config_local_base = yaml.safe_load(f_local_bak) or {}
-                        self.logger.debug(
-                            f"Loaded base config from {backup_yml_path.name}"
-                        )
-                        loaded_from_local = (
-                            True  # Mark as successfully loaded from local
-                        )
-                    except Exception as e:
-                        self.logger.warning(
-                            f"Could not parse {backup_yml_path.name}: {e}. Starting with empty base."
-                        )
-                        config_local_base = {}
-
-        # 2. Derive Config_Pipeline_Defined from pipeline.yml settings
-        config_pipeline_defined = self._deep_copy_dict(
-            self.default_sam_config_from_pipeline
+        # 1. Load the local config. Files are read in place and only moved
+        # aside to .bak when the generated config differs from samconfig.yaml
+        config_local_base, backups = self._load_local_config(stack_dir)
+
+        # 2. Materialize each layer (resolve env, inputs, pipeline templates).
+        # The pipeline.yml defaults are resolved once for all stacks; only the
+        # local config and the stack's sam_config_overrides are resolved here
+        pipeline_layer = self.resolve_pipeline_layer()
+        local_layer = self._resolve_stack_layer(config_local_base)
+        overrides_layer = self._resolve_stack_layer(
+            pydantic_stack_model.sam_config_overrides
         )
-        if pydantic_stack_model.sam_config_overrides:
-            config_pipeline_defined = self._deep_merge_dicts(
-                config_pipeline_defined,
-                pydantic_stack_model.sam_config_overrides,
-            )
 
-        # 3. Deep Merge local base with pipeline-defined (pipeline takes precedence)
-        merged_config_base = self._deep_merge_dicts(
-            config_local_base, config_pipeline_defined
-        )
-        if not merged_config_base and (config_local_base or config_pipeline_defined):
-            self.logger.debug(
-                "Merge result is empty, but sources were not. Check merge logic or inputs."
-            )
-
-        # 4. Materialize merged_config_base (resolve env, inputs, pipeline templates)
-        merged_config_materialized = self.template_processor.process_structure(
-            merged_config_base,
-            pipeline_name=self.pipeline_name,
-            pipeline_description=self.pipeline_description,
+        # 3. Deep merge: local base, then pipeline defaults, then stack
+        # overrides (pipeline-defined config takes precedence)
+        merged_config_materialized = self._merge_layers(
+            local_layer, pipeline_layer, overrides_layer
         )
 
         # 5. Apply stack-specific computed values and merge resolved_stack_params
@@ -370,16 +400,27 @@ class SamConfigManager:
             resolved_stack_params,
         )
 
-        # 6. Write Final_Config to target_samconfig_path (which is always samconfig.yaml)
+        # 6. Write Final_Config to target_samconfig_path (which is always samconfig.yaml),
+        # unless the existing samconfig.yaml is the only local config and is identical
         try:
-            with open(target_samconfig_path, "w", encoding="utf-8") as f_yaml:
-                yaml.dump(
-                    final_config,
-                    f_yaml,
-                    sort_keys=False,
-                    default_flow_style=False,
-                    indent=2,
+            content = dump_yaml(final_config).encode("utf-8")
+            if backups == [(target_samconfig_path, "yaml")] and _file_content_equals(
+                target_samconfig_path, content
+            ):
+                SAMCONFIG_UNCHANGED.inc(mode="local")
+                self.logger.debug(
+                    f"{target_samconfig_path.name} for stack '{stack_id}' is unchanged."
                 )
+                return target_samconfig_path
+            for local_path, file_format in backups:
+                ui.info(f"Existing {local_path.name} found", "Backing up.")
+                backup_path = local_path.with_name(local_path.name + ".bak")
+                if backup_path.exists():
+                    os.remove(backup_path)
+                shutil.move(str(local_path), str(backup_path))
+                SAMCONFIG_BACKUPS.inc(format=file_format)
+            write_bytes_atomic(target_samconfig_path, content)
+            SAMCONFIG_WRITES.inc(mode="local")
             self.logger.debug(
                 f"Generated {target_samconfig_path.name} for stack '{stack_id}' at '{target_samconfig_path}'."
             )
@@ -408,34 +449,74 @@ class SamConfigManager:
         This does NOT touch any local samconfig files in stack directories.
         Returns the path to the generated external config file.
         """
-        # Ensure the target directory exists
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Backup existing external config file if it exists
-        if config_path.exists():
-            backup_path = config_path.with_suffix(config_path.suffix + ".bak")
-            ui.info(
-                "Existing external config found", f"Backing up to {backup_path.name}"
-            )
-            if backup_path.exists():
-                backup_path.unlink()  # Remove old backup
-            shutil.move(str(config_path), str(backup_path))
-
-        # Start with pipeline-defined config (no local config merging for external files)
-        config_pipeline_defined = self._deep_copy_dict(
-            self.default_sam_config_from_pipeline
+        final_config = self.build_external_config(
+            config_path=config_path,
+            stack_dir=stack_dir,
+            pydantic_stack_model=pydantic_stack_model,
+            deployed_stack_name=deployed_stack_name,
+            effective_region=effective_region,
+            resolved_stack_params=resolved_stack_params,
         )
-        if pydantic_stack_model.sam_config_overrides:
-            config_pipeline_defined = self._deep_merge_dicts(
-                config_pipeline_defined,
-                pydantic_stack_model.sam_config_overrides,
+
+        # Write the external config file, unless an identical one exists
+        try:
+            content = dump_yaml(final_config).encode("utf-8")
+            if _file_content_equals(config_path, content):
+                SAMCONFIG_UNCHANGED.inc(mode="external")
+                ui.info("External config unchanged", f"Kept {config_path}")
+                return config_path
+
+            # Ensure the target directory exists
+            config_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Backup existing external config file if it exists
+            if config_path.exists():
+                backup_path = config_path.with_suffix(config_path.suffix + ".bak")
+                ui.info(
+                    "Existing external config found",
+                    f"Backing up to {backup_path.name}",
+                )
+                if backup_path.exists():
+                    backup_path.unlink()  # Remove old backup
+                shutil.move(str(config_path), str(backup_path))
+                SAMCONFIG_BACKUPS.inc(format="external")
+
+            write_bytes_atomic(config_path, content)
+            SAMCONFIG_WRITES.inc(mode="external")
+            self.logger.debug(
+                f"Generated external config for stack '{stack_id}' at '{config_path}'"
+            )
+            ui.info("External config generated", f"Created {config_path}")
+        except Exception as e:
+            self.logger.error(
+                f"Failed to write external config for stack '{stack_id}': {e}"
             )
+            raise ManifestError(
+                f"Failed to write external config for stack '{stack_id}': {e}"
+            ) from e
 
-        # Materialize the config (resolve template expressions)
-        materialized_config = self.template_processor.process_structure(
-            config_pipeline_defined,
-            pipeline_name=self.pipeline_name,
-            pipeline_description=self.pipeline_description,
+        return config_path
+
+    def build_external_config(
+        self,
+        config_path: Path,
+        stack_dir: Path,
+        pydantic_stack_model: PydanticStackModel,
+        deployed_stack_name: str,
+        effective_region: Optional[str],
+        resolved_stack_params: Dict[str, str],
+    ) -> Dict[str, Any]:
+        """
+        Builds the SAM configuration of a stack in memory, as external config
+        mode writes it to config_path: the pipeline's default_sam_config and
+        the stack's sam_config_overrides, with template references relative
+        to config_path. The stack's own samconfig is not merged.
+        """
+        # Start with pipeline-defined config (no local config merging for external
+        # files), materialized once for all stacks, then the stack's overrides
+        materialized_config = self._merge_layers(
+            self.resolve_pipeline_layer(),
+            self._resolve_stack_layer(pydantic_stack_model.sam_config_overrides),
         )
 
         # Apply stack-specific configs and parameters
@@ -447,32 +528,114 @@ class SamConfigManager:
         )
 
         # Add template references for both build and deploy
-        final_config = self._add_template_references(
-            final_config, config_path, stack_dir
+        return self._add_template_references(final_config, config_path, stack_dir)
+
+    def build_stack_config(
+        self,
+        stack_dir: Path,
+        stack_id: str,
+        pydantic_stack_model: PydanticStackModel,
+        deployed_stack_name: str,
+        effective_region: Optional[str],
+        resolved_stack_params: Dict[str, str],
+    ) -> Dict[str, Any]:
+        """
+        Builds the SAM configuration of a stack in memory, as local mode would
+        write it: the stack's own samconfig, the pipeline's default_sam_config
+        and the stack's sam_config_overrides, merged in that order. Nothing is
+        read from or written to disk except the stack's own samconfig.
+        """
+        config_local_base, _ = self._load_local_config(stack_dir)
+        return self._apply_stack_specific_configs(
+            self._merge_layers(
+                self._resolve_stack_layer(config_local_base),
+                self.resolve_pipeline_layer(),
+                self._resolve_stack_layer(pydantic_stack_model.sam_config_overrides),
+            ),
+            deployed_stack_name,
+            effective_region,
+            resolved_stack_params,
         )
 
-        # Write the external config file
+    def write_config_file(
+        self, config_path: Path, config: Dict[str, Any], mode: str
+    ) -> bool:
+        """
+        Writes a config built by build_stack_config or build_external_config
+        to config_path, unless the file already holds the same content. No
+        backups are kept.
+        Only renders and writes, so it can run on several threads at once.
+        Returns whether the file was written.
+        """
+        content = dump_yaml(config).encode("utf-8")
+        if _file_content_equals(config_path, content):
+            SAMCONFIG_UNCHANGED.inc(mode=mode)
+            return False
         try:
-            with open(config_path, "w", encoding="utf-8") as f:
-                yaml.dump(
-                    final_config,
-                    f,
-                    sort_keys=False,
-                    default_flow_style=False,
-                    indent=2,
-                )
+            config_path.parent.mkdir(parents=True, exist_ok=True)
+            write_bytes_atomic(config_path, content)
+        except OSError as e:
+            raise ManifestError(
+                f"Failed to write config to '{config_path}': {e}"
+            ) from e
+        SAMCONFIG_WRITES.inc(mode=mode)
+        return True
+
+    def generate_run_config_file(
+        self,
+        config_path: Path,
+        build_dir: Path,
+        stack_dir: Path,
+        stack_id: str,
+        pydantic_stack_model: PydanticStackModel,
+        deployed_stack_name: str,
+        effective_region: Optional[str],
+        resolved_stack_params: Dict[str, str],
+    ) -> Path:
+        """
+        Generates the SAM configuration of a stack into a run-scoped directory.
+        The stack's own samconfig is merged as in local mode but is only read:
+        nothing in the stack directory is written or moved. The config names
+        the template, build directory and built template by absolute path, so
+        SAM can run with --config-file from any working directory.
+        Returns config_path.
+        """
+        final_config = self.build_stack_config(
+            stack_dir,
+            stack_id,
+            pydantic_stack_model,
+            deployed_stack_name,
+            effective_region,
+            resolved_stack_params,
+        )
+
+        template_file = next(
+            (
+                stack_dir / name
+                for name in ("template.yaml", "template.yml", "template.json")
+                if (stack_dir / name).exists()
+            ),
+            stack_dir / "template.yaml",
+        )
+        default_env = final_config.setdefault("default", {})
+        build_params = default_env.setdefault("build", {}).setdefault("parameters", {})
+        build_params["template_file"] = str(template_file)
+        build_params["build_dir"] = str(build_dir)
+        build_params["cache_dir"] = str(build_dir.parent / "cache")
+        deploy_params = default_env.setdefault("deploy", {}).setdefault(
+            "parameters", {}
+        )
+        deploy_params["template_file"] = str(build_dir / "template.yaml")
+
+        try:
+            self.write_config_file(config_path, final_config, mode="run")
             self.logger.debug(
-                f"Generated external config for stack '{stack_id}' at '{config_path}'"
+                f"Generated run config for stack '{stack_id}' at '{config_path}'"
             )
-            ui.info("External config generated", f"Created {config_path}")
         except Exception as e:
-            self.logger.error(
-                f"Failed to write external config for stack '{stack_id}': {e}"
-            )
             raise ManifestError(
-                f"Failed to write external config for stack '{stack_id}': {e}"
+                f"Failed to write run config for stack '{stack_id}': {e}"
             ) from e
-
         return config_path
 
     def _add_template_references(
@@ -0,0 +1,161 @@
+"""
+Index of the Parameters and Outputs that stack templates declare.
+
+ManifestValidator checks ``stacks.<id>.outputs.<name>`` references and stack
+``params`` against it, so a typo fails validation instead of a deploy after
+the upstream stacks are already deployed.
+
+Only the YAML node tree of a template is built, not Python objects, and only
+the top-level Parameters, Outputs and Transform sections are read, so
+intrinsic function tags (!Ref, !Sub, ...) need no constructors. Results are
+memoized for the rest of the process and checked against the template's
+mtime_ns and size. load_template_interfaces reads many templates on a thread
+pool, which overlaps their file reads; PyYAML holds the GIL while parsing.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+from .io_utils import SafeLoader
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FILE_NAMES = ("template.yaml", "template.yml")
+# Transforms that do not add parameters or outputs to a template. Any other
+# transform (or macro) may, so its templates are not checked
+KNOWN_TRANSFORMS = frozenset({"AWS::Serverless-2016-10-31", "AWS::LanguageExtensions"})
+# Outputs generated by AWS::LanguageExtensions loops have computed names
+FOR_EACH_PREFIX = "Fn::ForEach::"
+
+
+class TemplateInterface(NamedTuple):
+    """What a stack template declares; None where it cannot be known statically."""
+
+    path: Path
+    parameters: Optional[FrozenSet[str]]
+    outputs: Optional[FrozenSet[str]]
+
+
+def find_template(stack_dir: Path) -> Optional[Path]:
+    """Return the template.yaml or template.yml of a stack directory."""
+    for name in TEMPLATE_FILE_NAMES:
+        candidate = stack_dir / name
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _section_keys(node: yaml.Node) -> Optional[List[str]]:
+    if not isinstance(node, yaml.MappingNode):
+        return None
+    return [str(key.value) for key, _ in node.value if isinstance(key, yaml.ScalarNode)]
+
+
+def _transform_names(node: yaml.Node) -> List[str]:
+    items = node.value if isinstance(node, yaml.SequenceNode) else [node]
+    names: List[str] = []
+    for item in items:
+        if isinstance(item, yaml.ScalarNode):
+            names.append(str(item.value))
+        elif isinstance(item, yaml.MappingNode):  # e.g. AWS::Include with Name
+            names.extend(
+                str(value.value)
+                for key, value in item.value
+                if key.value == "Name" and isinstance(value, yaml.ScalarNode)
+            )
+        else:
+            names.append("")  # Unknown form: treat as an unknown transform
+    return names
+
+
+def parse_template_interface(content: str, path: Path) -> Optional[TemplateInterface]:
+    """Read the parameters and outputs a template declares.
+
+    Returns None if content is not a YAML mapping.
+    """
+    root = yaml.compose(content, Loader=SafeLoader)
+    if not isinstance(root, yaml.MappingNode):
+        return None
+    sections = {
+        key.value: value
+        for key, value in root.value
+        if isinstance(key, yaml.ScalarNode)
+        and key.value in ("Parameters", "Outputs", "Transform")
+    }
+    if "Transform" in sections and not KNOWN_TRANSFORMS.issuperset(
+        _transform_names(sections["Transform"])
+    ):
+        return TemplateInterface(path, None, None)
+
+    def declared(section: str) -> Optional[FrozenSet[str]]:
+        if section not in sections:
+            return frozenset()
+        keys = _section_keys(sections[section])
+        return None if keys is None else frozenset(keys)
+
+    outputs = declared("Outputs")
+    if outputs is not None and any(
+        name.startswith(FOR_EACH_PREFIX) for name in outputs
+    ):
+        outputs = None
+    return TemplateInterface(path, declared("Parameters"), outputs)
+
+
+# template path -> (mtime_ns, size, interface)
+_interface_cache: Dict[str, Tuple[int, int, Optional[TemplateInterface]]] = {}
+_interface_cache_lock = threading.Lock()
+
+
+def load_template_interface(stack_dir: Path) -> Optional[TemplateInterface]:
+    """Return the interface of a stack directory's template.
+
+    Returns None if the directory has no template, or it cannot be read or
+    parsed; the directory checks and SAM report those.
+    """
+    template_path = find_template(stack_dir)
+    if template_path is None:
+        return None
+    key = str(template_path)
+    try:
+        stat = os.stat(key)
+    except OSError:
+        return None
+    with _interface_cache_lock:
+        cached = _interface_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    try:
+        content = template_path.read_text(encoding="utf-8")
+        interface = parse_template_interface(content, template_path)
+    except (OSError, UnicodeDecodeError, yaml.YAMLError) as e:
+        logger.debug(f"Could not index template {template_path}: {e}")
+        interface = None
+    with _interface_cache_lock:
+        _interface_cache[key] = (stat.st_mtime_ns, stat.st_size, interface)
+    return interface
+
+
+def load_template_interfaces(
+    stack_dirs: Iterable[Path], max_workers: Optional[int] = None
+) -> List[Optional[TemplateInterface]]:
+    """Return the interfaces of many stack directories, in order, in parallel."""
+    stack_dirs = list(stack_dirs)
+    if len(stack_dirs) < 2:
+        return [load_template_interface(stack_dir) for stack_dir in stack_dirs]
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="samstacks-templates"
+    ) as executor:
+        return list(executor.map(load_template_interface, stack_dirs))
+
+
+def clear_template_index() -> None:
+    """Forget all memoized template interfaces."""
+    with _interface_cache_lock:
+        _interface_cache.clear()
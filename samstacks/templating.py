@@ -4,18 +4,122 @@ Template processing for samstacks manifest and configuration files.
 
 import os
 import re
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
-from .exceptions import TemplateError
+from simpleeval import simple_eval, DEFAULT_OPERATORS, DEFAULT_FUNCTIONS  # type: ignore
 
-# Import simpleeval for mathematical expressions
-try:
-    from simpleeval import simple_eval, DEFAULT_OPERATORS, DEFAULT_FUNCTIONS  # type: ignore
-except ImportError:
-    # Graceful fallback if simpleeval is not available
-    simple_eval = None
-    DEFAULT_OPERATORS = None
-    DEFAULT_FUNCTIONS = None
+from .exceptions import ManifestError, TemplateError
+from .input_utils import ResolvedInput, resolve_input_value
+
+
+# Matches quoted string literals (left untouched) or samstacks placeholders
+_QUOTED_OR_PLACEHOLDER_PATTERN = re.compile(
+    r"(?P<quoted>'[^']*'|\"[^\"]*\")"
+    r"|(?P<placeholder>\b(?:env|inputs|stacks|pipeline)\.(?:[a-zA-Z_][a-zA-Z0-9_.-]*(?:\.[a-zA-Z_][a-zA-Z0-9_.-]*)*)?)"
+)
+
+
+class _LazyPlaceholderNames(Mapping[str, Any]):
+    """Name mapping for simpleeval that resolves placeholders on first lookup."""
+
+    def __init__(
+        self, references: Dict[str, str], resolve: Callable[[str], Any]
+    ) -> None:
+        self._references = references
+        self._resolve = resolve
+        self._values: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._values:
+            placeholder = self._references[name]  # KeyError for unknown names
+            self._values[name] = self._resolve(placeholder)
+        return self._values[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._references)
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+
+# Path of dict keys / list indices from the root of a structure to a node
+_StructurePath = Tuple[Any, ...]
+
+# (structure, templated value paths, templated key paths)
+_StructureIndexEntry = Tuple[Any, List[_StructurePath], List[_StructurePath]]
+
+# Number of structures whose template paths are remembered by process_structure
+_STRUCTURE_INDEX_SIZE = 64
+
+
+def _shallow_copy(container: Any) -> Any:
+    """Copy a dict or list one level deep into a plain dict or list."""
+    return dict(container) if isinstance(container, dict) else list(container)
+
+
+def _writable_container(
+    root: Any, path: _StructurePath, copies: Dict[_StructurePath, Any]
+) -> Any:
+    """Return a private shallow copy of the container at path, copying its ancestors."""
+    container = copies.get(())
+    if container is None:
+        container = _shallow_copy(root)
+        copies[()] = container
+    for depth in range(1, len(path) + 1):
+        prefix = path[:depth]
+        child = copies.get(prefix)
+        if child is None:
+            child = _shallow_copy(container[prefix[-1]])
+            container[prefix[-1]] = child
+            copies[prefix] = child
+        container = child
+    return container
+
+
+# Cache key for memoized process_string results: (template, pipeline_name, pipeline_description)
+_CacheKey = Tuple[str, Optional[str], Optional[str]]
+
+
+class _TemplateDependencies:
+    """External values read while resolving template strings."""
+
+    def __init__(self) -> None:
+        # env var name -> value observed (None if unset)
+        self.env: Dict[str, Optional[str]] = {}
+        # (stack_id, output_name) -> value observed (None if not available)
+        self.outputs: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def update(self, other: "_TemplateDependencies") -> None:
+        """Add the values other observed."""
+        self.env.update(other.env)
+        self.outputs.update(other.outputs)
+
+
+class _CacheEntry:
+    """A memoized process_string result with the dependencies it was computed from."""
+
+    def __init__(self, value: str, dependencies: _TemplateDependencies) -> None:
+        self.value = value
+        self.dependencies = dependencies
+
+    def is_fresh(self) -> bool:
+        """Check that every environment variable read still has the same value."""
+        return all(
+            os.environ.get(name) == value
+            for name, value in self.dependencies.env.items()
+        )
 
 
 class TemplateProcessor:
@@ -37,10 +141,82 @@ class TemplateProcessor:
         self.pipeline_name = pipeline_name
         self.pipeline_description = pipeline_description
 
+        # Resolved input values; see use_resolved_inputs()
+        self._resolved_inputs: Optional[Mapping[str, ResolvedInput]] = None
+        self._lazily_resolved_inputs: Dict[str, Optional[ResolvedInput]] = {}
+
+        # Memoized process_string results, invalidated by add_stack_outputs
+        self._cache: Dict[_CacheKey, _CacheEntry] = {}
+        self._output_dependents: Dict[Tuple[str, str], Set[_CacheKey]] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_invalidations = 0
+        self._recording = threading.local()
+
+        # id(structure) -> (structure, templated value paths, templated key paths)
+        self._structure_index: "OrderedDict[int, _StructureIndexEntry]" = OrderedDict()
+        # Guards the LRU updates, which are not atomic across threads
+        self._structure_index_lock = threading.Lock()
+
+        # Rewritten expression bodies, keyed by the original body
+        self._compiled_expressions: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        # Placeholder namespace -> resolver(remainder, call_context)
+        self._placeholder_resolvers: Dict[str, Callable[[str, Dict[str, Any]], Any]] = {
+            "env": self._resolve_env_value,
+            "inputs": self._resolve_input_value,
+            "stacks": self._resolve_stack_value,
+            "pipeline": self._resolve_pipeline_value,
+        }
+
     def add_stack_outputs(self, stack_id: str, outputs: Dict[str, str]) -> None:
-        """Add outputs from a deployed stack for use in template substitution."""
+        """Add outputs from a deployed stack for use in template substitution.
+
+        Memoized results that read an output whose value changed are discarded.
+        """
+        previous_outputs = self.stack_outputs.get(stack_id, {})
         self.stack_outputs[stack_id] = outputs
 
+        for output_name in set(previous_outputs) | set(outputs):
+            if previous_outputs.get(output_name) == outputs.get(output_name):
+                continue
+            for cache_key in self._output_dependents.pop((stack_id, output_name), ()):
+                if self._cache.pop(cache_key, None) is not None:
+                    self._cache_invalidations += 1
+
+    def use_resolved_inputs(self, resolved_inputs: Mapping[str, ResolvedInput]) -> None:
+        """Read input values from a table resolved once by the pipeline.
+
+        See input_utils.resolve_input_values.
+        """
+        self._resolved_inputs = resolved_inputs
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the process_string memoization cache."""
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "invalidations": self._cache_invalidations,
+            "entries": len(self._cache),
+            "hit_rate": (self._cache_hits / lookups) if lookups else 0.0,
+        }
+
+    def _read_env(self, var_name: str) -> str:
+        """Read an environment variable, recording it as a dependency."""
+        value = os.environ.get(var_name)
+        dependencies = getattr(self._recording, "dependencies", None)
+        if dependencies is not None:
+            dependencies.env[var_name] = value
+        return value if value is not None else ""
+
+    def _lookup_stack_output(self, stack_id: str, output_name: str) -> Optional[str]:
+        """Look up a stack output, recording it as a dependency."""
+        value = self.stack_outputs.get(stack_id, {}).get(output_name)
+        dependencies = getattr(self._recording, "dependencies", None)
+        if dependencies is not None:
+            dependencies.outputs[(stack_id, output_name)] = value
+        return value
+
     def process_string(
         self,
         template_string: Optional[str],
@@ -50,6 +226,8 @@ class TemplateProcessor:
         """Process a template string, substituting all ${{ ... }} expressions."""
         if not template_string:
             return ""
+        if "${{" not in template_string:
+            return template_string
 
         # Effective pipeline context for this call
         current_call_context = {
@@ -61,6 +239,21 @@ class TemplateProcessor:
             else self.pipeline_description,
         }
 
+        cache_key: _CacheKey = (
+            template_string,
+            current_call_context["pipeline_name"],
+            current_call_context["pipeline_description"],
+        )
+        # Set while process_structure_with_dependencies records a whole structure
+        outer_dependencies = getattr(self._recording, "dependencies", None)
+        cached = self._cache.get(cache_key)
+        if cached is not None and cached.is_fresh():
+            self._cache_hits += 1
+            if outer_dependencies is not None:
+                outer_dependencies.update(cached.dependencies)
+            return cached.value
+        self._cache_misses += 1
+
         pattern = r"\$\{\{\s*([^}]+)\s*\}\}"
 
         def replace_expression(match: re.Match[str]) -> str:
@@ -69,14 +262,25 @@ class TemplateProcessor:
                 expression_body, current_call_context
             )
 
+        dependencies = _TemplateDependencies()
+        self._recording.dependencies = dependencies
         try:
-            return re.sub(pattern, replace_expression, template_string)
+            result = re.sub(pattern, replace_expression, template_string)
         except TemplateError:
             raise
         except Exception as e:
             raise TemplateError(
                 f"Failed to process template string '{template_string}': {e}"
             )
+        finally:
+            self._recording.dependencies = outer_dependencies
+        if outer_dependencies is not None:
+            outer_dependencies.update(dependencies)
+
+        self._cache[cache_key] = _CacheEntry(result, dependencies)
+        for output_key in dependencies.outputs:
+            self._output_dependents.setdefault(output_key, set()).add(cache_key)
+        return result
 
     def process_structure(
         self,
@@ -85,8 +289,13 @@ class TemplateProcessor:
         pipeline_description: Optional[str] = None,
     ) -> Any:
         """
-        Recursively processes a data structure (dict or list), applying
-        self.process_string() to all string values.
+        Processes a data structure (dict or list), applying self.process_string()
+        to all templated string keys and values.
+
+        Copy-on-write: only the containers on the path to a templated leaf are
+        copied; untouched subtrees (and the whole structure, when it contains no
+        templates) are returned as the original objects. Callers must not mutate
+        the result in place if they need the input to stay unchanged.
         Passes pipeline_name and pipeline_description for context.
         """
         current_pipeline_name = (
@@ -98,47 +307,143 @@ class TemplateProcessor:
             else self.pipeline_description
         )
 
-        if isinstance(data_structure, dict):
-            processed_dict = {}
-            for key, value in data_structure.items():
-                processed_key = (
-                    self.process_string(
-                        key,
-                        pipeline_name=current_pipeline_name,
-                        pipeline_description=current_pipeline_description,
-                    )
-                    if isinstance(key, str)
-                    else key
-                )
-
-                processed_dict[processed_key] = self.process_structure(
-                    value,
-                    pipeline_name=current_pipeline_name,
-                    pipeline_description=current_pipeline_description,
-                )
-            return processed_dict
-        elif isinstance(data_structure, list):
-            return [
-                self.process_structure(
-                    item,
-                    pipeline_name=current_pipeline_name,
-                    pipeline_description=current_pipeline_description,
-                )
-                for item in data_structure
-            ]
-        elif isinstance(data_structure, str):
+        if isinstance(data_structure, str):
             return self.process_string(
                 data_structure,
                 pipeline_name=current_pipeline_name,
                 pipeline_description=current_pipeline_description,
             )
-        else:
+        if not isinstance(data_structure, (dict, list)):
             return data_structure
 
+        value_paths, key_paths = self._template_paths_for(data_structure)
+        if not value_paths and not key_paths:
+            return data_structure
+
+        copies: Dict[_StructurePath, Any] = {}
+
+        for path in value_paths:
+            container = _writable_container(data_structure, path[:-1], copies)
+            container[path[-1]] = self.process_string(
+                container[path[-1]],
+                pipeline_name=current_pipeline_name,
+                pipeline_description=current_pipeline_description,
+            )
+
+        # Rename templated keys deepest-first so that paths to outer containers,
+        # which use the original keys, stay valid.
+        renames_by_container: Dict[_StructurePath, Dict[str, str]] = {}
+        for path in key_paths:
+            renames_by_container.setdefault(path[:-1], {})[path[-1]] = (
+                self.process_string(
+                    path[-1],
+                    pipeline_name=current_pipeline_name,
+                    pipeline_description=current_pipeline_description,
+                )
+            )
+        for container_path in sorted(renames_by_container, key=len, reverse=True):
+            renames = renames_by_container[container_path]
+            container = _writable_container(data_structure, container_path, copies)
+            items = list(container.items())
+            container.clear()
+            for key, value in items:
+                container[renames.get(key, key)] = value
+
+        return copies[()]
+
+    def process_structure_with_dependencies(
+        self,
+        data_structure: Any,
+        pipeline_name: Optional[str] = None,
+        pipeline_description: Optional[str] = None,
+    ) -> Tuple[Any, _TemplateDependencies]:
+        """
+        Like process_structure, but also return the environment variables and
+        stack outputs the structure's templates read, for dependencies_unchanged.
+        """
+        dependencies = _TemplateDependencies()
+        outer_dependencies = getattr(self._recording, "dependencies", None)
+        self._recording.dependencies = dependencies
+        try:
+            result = self.process_structure(
+                data_structure,
+                pipeline_name=pipeline_name,
+                pipeline_description=pipeline_description,
+            )
+        finally:
+            self._recording.dependencies = outer_dependencies
+        if outer_dependencies is not None:
+            outer_dependencies.update(dependencies)
+        return result, dependencies
+
+    def dependencies_unchanged(self, dependencies: _TemplateDependencies) -> bool:
+        """Check that every environment variable and stack output read still has
+        the value it had."""
+        return all(
+            os.environ.get(name) == value for name, value in dependencies.env.items()
+        ) and all(
+            self.stack_outputs.get(stack_id, {}).get(output_name) == value
+            for (stack_id, output_name), value in dependencies.outputs.items()
+        )
+
+    def _template_paths_for(
+        self, data_structure: Any
+    ) -> Tuple[List[_StructurePath], List[_StructurePath]]:
+        """Return the paths of templated values and templated keys in a structure.
+
+        The walk is iterative and its result is remembered per structure object,
+        so processing the same (unmutated) structure again only touches the
+        templated leaves.
+        """
+        with self._structure_index_lock:
+            cached = self._structure_index.get(id(data_structure))
+            if cached is not None and cached[0] is data_structure:
+                self._structure_index.move_to_end(id(data_structure))
+                return cached[1], cached[2]
+
+        value_paths: List[_StructurePath] = []
+        key_paths: List[_StructurePath] = []
+        pending: List[Tuple[Any, _StructurePath]] = [(data_structure, ())]
+        while pending:
+            node, path = pending.pop()
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    child_path = path + (key,)
+                    if isinstance(key, str) and "${{" in key:
+                        key_paths.append(child_path)
+                    if isinstance(value, str):
+                        if "${{" in value:
+                            value_paths.append(child_path)
+                    elif isinstance(value, (dict, list)):
+                        pending.append((value, child_path))
+            elif isinstance(node, list):
+                for index, item in enumerate(node):
+                    if isinstance(item, str):
+                        if "${{" in item:
+                            value_paths.append(path + (index,))
+                    elif isinstance(item, (dict, list)):
+                        pending.append((item, path + (index,)))
+
+        # Keep a reference to the structure so its id() cannot be reused
+        with self._structure_index_lock:
+            self._structure_index[id(data_structure)] = (
+                data_structure,
+                value_paths,
+                key_paths,
+            )
+            if len(self._structure_index) > _STRUCTURE_INDEX_SIZE:
+                self._structure_index.popitem(last=False)
+        return value_paths, key_paths
+
     def _evaluate_expression_with_fallbacks(
         self, expression_body: str, call_context: Optional[Dict[str, Any]] = None
     ) -> str:
-        """Evaluate a template expression by replacing placeholders and using simpleeval."""
+        """Evaluate a template expression with simpleeval, resolving placeholders lazily.
+
+        Placeholders are bound to names that simpleeval looks up on demand, so the
+        operands of ``||``, ``&&`` and ternary-style expressions are only resolved
+        when the evaluator actually reaches them.
+        """
         call_context = call_context or {}
 
         # Handle quoted literals first
@@ -147,16 +452,69 @@ class TemplateProcessor:
         ):
             return expression_body[1:-1]
 
-        # Step 1: Replace all placeholders with properly formatted values
-        resolved_expression = self._substitute_placeholders_for_evaluation(
-            expression_body, call_context
+        processed_expr, references = self._compile_expression(expression_body)
+        names = _LazyPlaceholderNames(
+            references,
+            lambda placeholder: self._resolve_placeholder_value(
+                placeholder, call_context
+            ),
         )
 
-        # Step 2: Normalize whitespace (strip newlines that cause Python syntax issues)
-        resolved_expression = re.sub(r"\s*\n\s*", " ", resolved_expression)
+        try:
+            result = simple_eval(
+                processed_expr,
+                names=names,
+                operators=DEFAULT_OPERATORS.copy(),
+                functions=DEFAULT_FUNCTIONS.copy(),
+            )
+        except TemplateError:
+            raise
+        except Exception as e:
+            # Convert various simpleeval exceptions to TemplateError for consistent error handling
+            raise TemplateError(
+                f"Failed to evaluate expression '{expression_body}': {e}"
+            ) from e
 
-        # Step 3: Convert JavaScript-style operators to Python
-        processed_expr = resolved_expression
+        # Convert result to string for template substitution
+        if isinstance(result, bool):
+            return "true" if result else "false"
+        # Floats keep their float representation so explicit float() calls return float format
+        return str(result)
+
+    def _compile_expression(self, expression_body: str) -> Tuple[str, Dict[str, str]]:
+        """Rewrite an expression body into simpleeval syntax, binding placeholders to names.
+
+        Returns the rewritten expression and a mapping of bound name to placeholder.
+        Placeholder syntax is validated here, but no values are resolved. Results
+        are memoized per expression body.
+        """
+        compiled = self._compiled_expressions.get(expression_body)
+        if compiled is not None:
+            return compiled
+
+        references: Dict[str, str] = {}
+        names_by_placeholder: Dict[str, str] = {}
+
+        def bind_placeholder(match: re.Match[str]) -> str:
+            if match.group("quoted") is not None:
+                return match.group("quoted")
+            placeholder = match.group("placeholder")
+            self._check_placeholder_syntax(placeholder)
+            name = names_by_placeholder.get(placeholder)
+            if name is None:
+                name = f"__samstacks_ref_{len(references)}__"
+                names_by_placeholder[placeholder] = name
+                references[name] = placeholder
+            return name
+
+        processed_expr = _QUOTED_OR_PLACEHOLDER_PATTERN.sub(
+            bind_placeholder, expression_body
+        )
+
+        # Normalize whitespace (strip newlines that cause Python syntax issues)
+        processed_expr = re.sub(r"\s*\n\s*", " ", processed_expr)
+
+        # Convert JavaScript-style operators to Python
         # Replace && with and (not within quoted strings)
         processed_expr = re.sub(
             r'&&(?=(?:[^\'"]|\'[^\']*\'|"[^"]*")*$)', " and ", processed_expr
@@ -168,398 +526,92 @@ class TemplateProcessor:
         # Replace ! with not (but be careful not to affect != operator)
         processed_expr = re.sub(r"(?<![=!<>])!\s*(?!=)", "not ", processed_expr)
 
-        # Step 4: Use simpleeval to evaluate the entire expression
-        if simple_eval is not None:
-            try:
-                result = simple_eval(
-                    processed_expr,
-                    names={},  # No custom names needed - placeholders already resolved
-                    operators=DEFAULT_OPERATORS.copy(),
-                    functions=DEFAULT_FUNCTIONS.copy(),
-                )
+        compiled = (processed_expr, references)
+        self._compiled_expressions[expression_body] = compiled
+        return compiled
 
-                # Convert result to string for template substitution
-                if isinstance(result, bool):
-                    return "true" if result else "false"
-                elif isinstance(result, int):
-                    return str(result)
-                elif isinstance(result, float):
-                    # For floats, always preserve the float representation
-                    # This ensures that explicit float() calls return float format
-                    return str(result)
-                else:
-                    return str(result)
-
-            except Exception as e:
-                # Convert various simpleeval exceptions to TemplateError for consistent error handling
+    def _check_placeholder_syntax(self, placeholder: str) -> None:
+        """Raise TemplateError for malformed placeholders, without resolving them."""
+        if placeholder == "inputs.":
+            raise TemplateError("Empty input name in expression 'inputs.'")
+        if placeholder.startswith("stacks."):
+            parts = placeholder.split(".")
+            if len(parts) != 4 or parts[2] != "outputs":
                 raise TemplateError(
-                    f"Failed to evaluate expression '{processed_expr}': {e}"
-                ) from e
-
-        # Fallback: return the resolved expression
-        return resolved_expression
-
-    def _resolve_single_part(
-        self, part_expression: str, call_context: Dict[str, Any]
-    ) -> Optional[str]:
-        """Resolve a single part of an expression by first substituting placeholders, then evaluating."""
-
-        # Handle quoted literals first
-        if (part_expression.startswith("'") and part_expression.endswith("'")) or (
-            part_expression.startswith('"') and part_expression.endswith('"')
-        ):
-            return part_expression[1:-1]
-
-        # Step 1: Find and resolve all samstacks placeholders in the expression
-        resolved_expression = self._substitute_placeholders(
-            part_expression, call_context
-        )
-
-        # Step 2: If the expression now contains only literals and operators, evaluate it with simpleeval
-        if simple_eval is not None and self._contains_operators_or_complex_logic(
-            resolved_expression
-        ):
-            try:
-                # Preprocess JavaScript-style operators
-                processed_expr = resolved_expression
-                # Replace && with and (but not within quotes)
-                processed_expr = re.sub(
-                    r'(?<!["\'])(\s*)&&(\s*)(?!["\'])', r"\1and\2", processed_expr
-                )
-                # Replace || with or (but not within quotes)
-                processed_expr = re.sub(
-                    r'(?<!["\'])(\s*)\|\|(\s*)(?!["\'])', r"\1or\2", processed_expr
+                    f"Invalid stack output expression format: '{placeholder}'. "
+                    "Expected format: stacks.stack_id.outputs.output_name"
                 )
-                # Replace ! with not (but be careful not to affect != operator)
-                processed_expr = re.sub(r"(?<![=!<>])!\s*(?!=)", "not ", processed_expr)
-
-                # Use simpleeval with minimal, safe context (no custom objects)
-                result = simple_eval(
-                    processed_expr,
-                    names={},  # No custom names needed - placeholders already resolved
-                    operators=DEFAULT_OPERATORS.copy(),
-                    functions=DEFAULT_FUNCTIONS.copy(),
-                )
-
-                # Convert result to string for template substitution
-                if isinstance(result, bool):
-                    return "true" if result else "false"
-                elif isinstance(result, (int, float)):
-                    # Preserve integer format if it's a whole number
-                    if isinstance(result, float) and result.is_integer():
-                        return str(int(result))
-                    return str(result)
-                else:
-                    return str(result)
-
-            except Exception:
-                # If simpleeval fails, return the resolved expression as-is
-                pass
-
-        # Step 3: Return the resolved expression (may be a simple substitution)
-        return resolved_expression
-
-    def _substitute_placeholders(
-        self, expression: str, call_context: Dict[str, Any]
-    ) -> str:
-        """Replace all samstacks placeholders (env.X, inputs.Y, etc.) with their actual values."""
-
-        # Find all placeholder patterns and replace them
-        import re
-
-        # Check if this is a simple single placeholder (no operators)
-        placeholder_pattern = r"\b(?:env|inputs|stacks|pipeline)\.(?:[a-zA-Z_][a-zA-Z0-9_.-]*(?:\.[a-zA-Z_][a-zA-Z0-9_.-]*)*)?"
-        placeholders = re.findall(placeholder_pattern, expression)
-
-        # If expression is just a single placeholder with no other content, return raw value
-        is_simple_substitution = (
-            len(placeholders) == 1 and expression.strip() == placeholders[0]
-        )
-
-        def replace_placeholder(match: re.Match[str]) -> str:
-            placeholder = match.group(0)
-
-            if placeholder.startswith("env."):
-                var_name = placeholder[4:]
-                if not var_name:
-                    return "None" if not is_simple_substitution else ""
-                value = os.environ.get(var_name, "")
-                return value if is_simple_substitution else repr(value)
-
-            elif placeholder.startswith("inputs."):
-                return self._resolve_input_placeholder(
-                    placeholder, is_simple_substitution
-                )
-
-            elif placeholder.startswith("stacks."):
-                return self._resolve_stack_placeholder(
-                    placeholder, is_simple_substitution
-                )
-
-            elif placeholder.startswith("pipeline."):
-                attr_name = placeholder[len("pipeline.") :]
-                if attr_name == "name":
-                    value = call_context.get("pipeline_name") or ""
-                elif attr_name == "description":
-                    value = call_context.get("pipeline_description") or ""
-                else:
-                    return "None" if not is_simple_substitution else ""
-                return value if is_simple_substitution else repr(value)
-
-            # If we can't resolve it, return appropriate default
-            return "None" if not is_simple_substitution else ""
-
-        return re.sub(placeholder_pattern, replace_placeholder, expression)
-
-    def _substitute_placeholders_for_evaluation(
-        self, expression: str, call_context: Dict[str, Any]
-    ) -> str:
-        """Replace all samstacks placeholders with properly formatted values for simpleeval."""
-
-        placeholder_pattern = r"\b(?:env|inputs|stacks|pipeline)\.(?:[a-zA-Z_][a-zA-Z0-9_.-]*(?:\.[a-zA-Z_][a-zA-Z0-9_.-]*)*)?"
-
-        def replace_placeholder(match: re.Match[str]) -> str:
-            placeholder = match.group(0)
-
-            if placeholder.startswith("env."):
-                var_name = placeholder[4:]
-                if not var_name:
-                    return "''"  # Empty string for malformed env placeholder
-                value = os.environ.get(var_name, "")
-                # Always return env vars as quoted strings
-                return repr(value)
 
-            elif placeholder.startswith("inputs."):
-                return self._resolve_input_placeholder_for_evaluation(placeholder)
-
-            elif placeholder.startswith("stacks."):
-                return self._resolve_stack_placeholder_for_evaluation(placeholder)
-
-            elif placeholder.startswith("pipeline."):
-                attr_name = placeholder[len("pipeline.") :]
-                if attr_name == "name":
-                    value = call_context.get("pipeline_name") or ""
-                elif attr_name == "description":
-                    value = call_context.get("pipeline_description") or ""
-                else:
-                    return "''"  # Empty string for unknown pipeline attr
-                # Always return pipeline attrs as quoted strings
-                return repr(value)
-
-            # Unknown placeholder
-            return "''"
-
-        return re.sub(placeholder_pattern, replace_placeholder, expression)
-
-    def _resolve_input_placeholder(
-        self, placeholder: str, is_simple_substitution: bool = False
-    ) -> str:
-        """Resolve an inputs.X placeholder to its actual value."""
-        input_name = placeholder[7:]  # Remove "inputs."
-
-        if not input_name:
-            # Empty input name should raise an error
-            raise TemplateError("Empty input name in expression 'inputs.'")
-
-        cli_value_str = self.cli_inputs.get(input_name)
-        input_definition = self.defined_inputs.get(input_name)
-
-        if input_definition is None:
-            return "" if is_simple_substitution else "None"
-
-        input_type = input_definition.get("type", "string")
-        resolved_value = None
-
-        # Process CLI input using shared utility
-        if cli_value_str is not None:
-            try:
-                from .input_utils import process_cli_input_value
-                from .exceptions import ManifestError
-
-                processed_cli_value = process_cli_input_value(
-                    input_name, cli_value_str, input_definition
-                )
-                if processed_cli_value is not None:
-                    resolved_value = processed_cli_value
-                elif "default" in input_definition:
-                    resolved_value = input_definition["default"]
-                else:
-                    return "" if is_simple_substitution else "None"
-            except ManifestError as e:
-                # Convert ManifestError to TemplateError for consistency
-                raise TemplateError(str(e)) from e
-        elif "default" in input_definition:
-            resolved_value = input_definition["default"]
-        else:
-            return "" if is_simple_substitution else "None"
-
-        # Return the value in appropriate format
-        if is_simple_substitution:
-            # For simple substitution, return the raw value as string
-            if input_type == "boolean":
-                # Convert Python boolean to lowercase string
-                return "true" if resolved_value else "false"
-            else:
-                return str(resolved_value)
-        else:
-            # For expressions, return properly formatted for simpleeval
-            if input_type == "string":
-                return repr(str(resolved_value))  # Quoted string
-            elif input_type in ("number", "boolean"):
-                return str(resolved_value)  # Unquoted number/boolean
-            else:
-                return repr(str(resolved_value))  # Default to quoted string
-
-    def _resolve_stack_placeholder(
-        self, placeholder: str, is_simple_substitution: bool = False
-    ) -> str:
-        """Resolve a stacks.X.outputs.Y placeholder to its actual value."""
-        parts = placeholder.split(".")
+    def _resolve_placeholder_value(
+        self, placeholder: str, call_context: Dict[str, Any]
+    ) -> Any:
+        """Resolve a placeholder to a Python value for simpleeval.
 
-        if len(parts) != 4 or parts[0] != "stacks" or parts[2] != "outputs":
-            # Malformed stack expression should raise an error
-            raise TemplateError(
-                f"Invalid stack output expression format: '{placeholder}'. "
-                "Expected format: stacks.stack_id.outputs.output_name"
-            )
+        Dispatches on the placeholder namespace (env, inputs, stacks, pipeline).
+        Unknown or missing values resolve to an empty string.
+        """
+        namespace, _, remainder = placeholder.partition(".")
+        resolver = self._placeholder_resolvers.get(namespace)
+        if resolver is None:
+            return ""
+        return resolver(remainder, call_context)
 
-        stack_id = parts[1]
-        output_name = parts[3]
+    def _resolve_env_value(self, var_name: str, call_context: Dict[str, Any]) -> Any:
+        """Resolve env.X to the environment variable's string value."""
+        if not var_name:
+            return ""
+        return self._read_env(var_name)
 
+    def _resolve_input_value(
+        self, input_name: str, call_context: Dict[str, Any]
+    ) -> Any:
+        """Resolve inputs.X to a typed value (str, number or bool)."""
+        resolved_input = self._get_resolved_input(input_name)
+        if resolved_input is None:
+            return ""  # Unknown input, or no value and no default
+        return resolved_input.evaluation_value
+
+    def _resolve_stack_value(
+        self, output_path: str, call_context: Dict[str, Any]
+    ) -> Any:
+        """Resolve stacks.X.outputs.Y to the output's string value."""
+        stack_id, _, output_name = output_path.partition(".outputs.")
         if not stack_id or not output_name:
-            return "" if is_simple_substitution else "None"
-
-        stack_outputs = self.stack_outputs.get(stack_id, {})
-        output_value = stack_outputs.get(output_name)
-
-        if output_value is None:
-            return "" if is_simple_substitution else "None"
-
-        # For simple substitution, return raw value; for expressions, quote it
-        return output_value if is_simple_substitution else repr(output_value)
+            return ""
+        output_value = self._lookup_stack_output(stack_id, output_name)
+        return output_value if output_value is not None else ""
 
-    def _resolve_input_placeholder_for_evaluation(self, placeholder: str) -> str:
-        """Resolve an inputs.X placeholder to a properly formatted value for simpleeval."""
-        input_name = placeholder[7:]  # Remove "inputs."
+    def _resolve_pipeline_value(
+        self, attr_name: str, call_context: Dict[str, Any]
+    ) -> Any:
+        """Resolve pipeline.name / pipeline.description."""
+        if attr_name == "name":
+            return call_context.get("pipeline_name") or ""
+        if attr_name == "description":
+            return call_context.get("pipeline_description") or ""
+        return ""
+
+    def _get_resolved_input(self, input_name: str) -> Optional[ResolvedInput]:
+        """Look up an input's resolved value, or None if it is undefined or unset.
+
+        Reads from the table installed with use_resolved_inputs(). Without one,
+        each input is resolved on first use and remembered.
+        """
+        if self._resolved_inputs is not None:
+            return self._resolved_inputs.get(input_name)
 
-        if not input_name:
-            raise TemplateError("Empty input name in expression 'inputs.'")
+        if input_name in self._lazily_resolved_inputs:
+            return self._lazily_resolved_inputs[input_name]
 
-        cli_value_str = self.cli_inputs.get(input_name)
         input_definition = self.defined_inputs.get(input_name)
-
         if input_definition is None:
-            return "''"  # Unknown input becomes empty string
-
-        input_type = input_definition.get("type", "string")
-        resolved_value = None
-
-        # Process CLI input using shared utility
-        if cli_value_str is not None:
-            try:
-                from .input_utils import process_cli_input_value
-                from .exceptions import ManifestError
-
-                processed_cli_value = process_cli_input_value(
-                    input_name, cli_value_str, input_definition
-                )
-                if processed_cli_value is not None:
-                    resolved_value = processed_cli_value
-                elif "default" in input_definition:
-                    resolved_value = input_definition["default"]
-                else:
-                    return "''"  # No value, no default
-            except ManifestError as e:
-                raise TemplateError(str(e)) from e
-        elif "default" in input_definition:
-            resolved_value = input_definition["default"]
-        else:
-            return "''"  # No CLI value, no default
-
-        # Format value appropriately for simpleeval
-        if input_type == "string":
-            return repr(str(resolved_value))  # Quoted string
-        elif input_type == "number":
-            return str(resolved_value)  # Unquoted number
-        elif input_type == "boolean":
-            # Convert to Python boolean (True/False, not 'true'/'false')
-            return str(bool(resolved_value))
-        else:
-            return repr(str(resolved_value))  # Default to quoted string
-
-    def _resolve_stack_placeholder_for_evaluation(self, placeholder: str) -> str:
-        """Resolve a stacks.X.outputs.Y placeholder to a properly formatted value for simpleeval."""
-        parts = placeholder.split(".")
-
-        if len(parts) != 4 or parts[0] != "stacks" or parts[2] != "outputs":
-            raise TemplateError(
-                f"Invalid stack output expression format: '{placeholder}'. "
-                "Expected format: stacks.stack_id.outputs.output_name"
+            return None
+        try:
+            resolved_input = resolve_input_value(
+                input_name, input_definition, self.cli_inputs.get(input_name)
             )
-
-        stack_id = parts[1]
-        output_name = parts[3]
-
-        if not stack_id or not output_name:
-            return "''"  # Malformed expression becomes empty string
-
-        stack_outputs = self.stack_outputs.get(stack_id, {})
-        output_value = stack_outputs.get(output_name)
-
-        if output_value is None:
-            return "''"  # Missing output becomes empty string
-
-        # Stack outputs are always treated as strings, so quote them
-        return repr(output_value)
-
-    def _contains_operators_or_complex_logic(self, expression: str) -> bool:
-        """Check if expression contains operators or logic that simpleeval should handle."""
-        # Look for mathematical operators, comparisons, boolean logic
-        operator_patterns = [
-            r"[+\-*/]",  # Math operators
-            r"[<>=!]=?",  # Comparison operators
-            r"\b(?:and|or|not)\b",  # Boolean operators
-            r"[()]",  # Parentheses
-        ]
-
-        for pattern in operator_patterns:
-            if re.search(pattern, expression):
-                return True
-        return False
-
-    def _is_complex_mathematical_expression(self, expression: str) -> bool:
-        """Check if expression is a complex mathematical expression that should not be split by ||."""
-        # Complex expressions are those that contain operators or logic beyond simple fallback patterns
-
-        # JavaScript-style && is a strong indicator of complex ternary logic
-        if re.search(r"&&", expression):
-            return True
-
-        # Mathematical operators make it complex
-        # Use word boundaries and spacing to distinguish operators from identifier characters
-        math_operators = [
-            r"\s[+\-*/]\s",  # Math operators with spaces around them
-            r"^[+\-*/]\s|\s[+\-*/]$",  # Math operators at start/end with space
-            r"[<>=!]=?",  # Comparison operators
-            r"\b(?:and|or|not)\b",  # Python boolean operators (when not part of simple fallback)
-        ]
-
-        for pattern in math_operators:
-            if re.search(pattern, expression):
-                return True
-
-        # Function calls make it complex
-        function_calls = [
-            r"\bint\(",  # Function calls like int()
-            r"\bfloat\(",  # Function calls like float()
-            r"\bstr\(",  # Function calls like str()
-        ]
-
-        for pattern in function_calls:
-            if re.search(pattern, expression):
-                return True
-
-        # Note: We don't consider simple || by itself as complex because that's used for fallbacks
-        # Only when || is combined with other operators (like &&, math, comparisons) is it complex
-
-        return False
+        except ManifestError as e:
+            # Convert ManifestError to TemplateError for consistency
+            raise TemplateError(str(e)) from e
+        self._lazily_resolved_inputs[input_name] = resolved_input
+        return resolved_input
@@ -0,0 +1,206 @@
+"""
+Span tracing for pipeline phases, exported as Chrome trace-event JSON.
+
+Tracing is off unless enable_tracing() is called (the CLI does this for
+--trace-file). Span listeners receive every finished span's duration whether
+or not a trace is being recorded: those added with add_span_listener see the
+spans of the whole process, and those added with span_listener only the spans
+finished in the same context (thread or asyncio task), so pipelines running
+concurrently in one process each see their own. With neither a tracer nor
+listeners, span() returns a shared no-op context manager, so instrumented code
+pays only for a function call.
+
+The exported file loads in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
+
+# Called with (name, category, duration_seconds, args) when a span finishes
+SpanListener = Callable[[str, str, float, Dict[str, Any]], None]
+
+
+class Tracer:
+    """Collects completed spans for one samstacks run."""
+
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        start_ns: int,
+        end_ns: int,
+        args: Dict[str, Any],
+    ) -> None:
+        """Record a completed span as a Chrome 'complete' (ph=X) event."""
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self._origin_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Return the trace in Chrome trace-event JSON object format."""
+        metadata = {
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "args": {"name": "samstacks"},
+        }
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        return {"traceEvents": [metadata] + events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Union[str, Path]) -> None:
+        """Write the trace to path as JSON."""
+        trace_path = Path(path)
+        trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+class Span:
+    """A timed phase; records itself on the tracer when the with-block exits.
+
+    The span's outcome is 'ok', or 'error' if the block raised, unless the
+    block sets one explicitly (e.g. span.set(outcome="skipped")).
+    """
+
+    __slots__ = ("_tracer", "name", "category", "args", "_start_ns")
+
+    def __init__(
+        self,
+        tracer: Optional[Tracer],
+        name: str,
+        category: str,
+        args: Dict[str, Any],
+    ) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self._start_ns = 0
+
+    def set(self, **args: Any) -> None:
+        """Attach extra arguments to the span."""
+        self.args.update(args)
+
+    def __enter__(self) -> "Span":
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        end_ns = time.perf_counter_ns()
+        if "outcome" not in self.args:
+            self.args["outcome"] = "error" if exc_type else "ok"
+        if exc_type is not None:
+            self.args.setdefault("error", str(exc_value))
+        if self._tracer is not None:
+            self._tracer.record(
+                self.name, self.category, self._start_ns, end_ns, self.args
+            )
+        duration = (end_ns - self._start_ns) / 1e9
+        for listener in (*_listeners, *_scoped_listeners.get()):
+            listener(self.name, self.category, duration, self.args)
+
+
+class _NullSpan:
+    """Stand-in returned by span() while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **args: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        pass
+
+
+AnySpan = Union[Span, _NullSpan]
+
+_NULL_SPAN = _NullSpan()
+_tracer: Optional[Tracer] = None
+_listeners: List[SpanListener] = []
+# Listeners added with span_listener, seen only in the context that added them
+_scoped_listeners: ContextVar[Tuple[SpanListener, ...]] = ContextVar(
+    "samstacks_span_listeners", default=()
+)
+
+
+def enable_tracing() -> Tracer:
+    """Start collecting spans, returning the active tracer."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def disable_tracing() -> None:
+    """Stop collecting spans and discard the active tracer."""
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the active tracer, or None if tracing is disabled."""
+    return _tracer
+
+
+def add_span_listener(listener: SpanListener) -> None:
+    """Call listener with the duration of every span that finishes from now on."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_span_listener(listener: SpanListener) -> None:
+    """Stop calling a listener added with add_span_listener."""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+@contextmanager
+def span_listener(listener: SpanListener) -> Generator[None, None, None]:
+    """Call listener for every span that finishes inside the with-block.
+
+    Only spans finished in the current context count, not those of other
+    threads or asyncio tasks running at the same time.
+    """
+    token = _scoped_listeners.set((*_scoped_listeners.get(), listener))
+    try:
+        yield
+    finally:
+        _scoped_listeners.reset(token)
+
+
+def span(name: str, category: str = "samstacks", **args: Any) -> AnySpan:
+    """Time the enclosed block as a span named name.
+
+    Args:
+        name: Span name shown in the trace viewer.
+        category: Trace-event category, used for filtering.
+        **args: Extra span arguments, e.g. stack_id and region.
+    """
+    tracer = _tracer
+    if tracer is None and not _listeners and not _scoped_listeners.get():
+        return _NULL_SPAN
+    return Span(tracer, name, category, args)
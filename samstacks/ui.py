@@ -267,21 +267,30 @@ def format_traceback(exc: Exception) -> str:
 
 
 def warning(text: str, details: str | None = None) -> None:
-    """Display a warning message with optional details.
+    """Display a warning message with optional details on stderr.
+
+    Warnings are diagnostics, so they stay out of output piped from stdout,
+    such as the JSON of ``samstacks graph``.
 
     Args:
         text: Warning message
         details: Optional warning details
     """
     click.secho(
-        f"{STYLE_CONFIG['warning_prefix']}Warning", fg=COLORS["warning"], nl=False
+        f"{STYLE_CONFIG['warning_prefix']}Warning",
+        fg=COLORS["warning"],
+        nl=False,
+        err=True,
     )
-    click.echo(f"{STYLE_CONFIG['separator']}{text}")
+    click.echo(f"{STYLE_CONFIG['separator']}{text}", err=True)
     if details:
         click.secho(
-            f"{STYLE_CONFIG['detail_prefix']}Detail", fg=COLORS["info"], nl=False
+            f"{STYLE_CONFIG['detail_prefix']}Detail",
+            fg=COLORS["info"],
+            nl=False,
+            err=True,
         )
-        click.echo(f"{STYLE_CONFIG['separator']}{details}")
+        click.echo(f"{STYLE_CONFIG['separator']}{details}", err=True)
 
 
 def spinner(text: str, callback: Callable[[], Any], color: str = "blue") -> Any:
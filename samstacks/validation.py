@@ -2,16 +2,40 @@
 Validation utilities for samstacks manifests and template expressions.
 """
 
+import difflib
+import logging
+import os
 import re
-from typing import Any, Dict, List, Set, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Set,
+    Optional,
+    Tuple,
+    Union,
+)
 from pathlib import Path
 
 import yaml
 
+from . import ui
+from .dependency_graph import STACK_OUTPUT_REFERENCE_PATTERN, template_expressions
 from .exceptions import ManifestError
+from .io_utils import SafeLoader
 from .pipeline_models import (
     PipelineManifestModel,
 )  # Import Pydantic models
+from .template_index import (
+    TemplateInterface,
+    load_template_interface,
+    load_template_interfaces,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class ValidationError:
@@ -39,73 +63,119 @@ class ValidationError:
         return message
 
 
+# A location in the parsed manifest: mapping keys and list indexes from the root,
+# in the same form as the ``loc`` of a Pydantic error, e.g. ("stacks", 0, "dir")
+ManifestPath = Tuple[Union[str, int], ...]
+
+# Compiled once: validation runs these for every templated value of every stack
+# "||" outside of quoted strings
+FALLBACK_SEPARATOR_PATTERN = re.compile(r"\|\|(?=(?:[^\'\"]|\"[^\"]*\"|\'[^\']*\')*$)")
+# Math, comparison and boolean operators, parentheses and numbers
+OPERATOR_OR_MATH_PATTERN = re.compile(
+    r"[+\-*/]|[<>=!]=?|\b(?:and|or|not|&&|\|\||!)\b|[()]|\b\d+\b"
+)
+MATH_OPERATOR_PATTERN = re.compile(r"[+\-*/]")
+# Quoted literals, whose text is never a reference
+QUOTED_STRING_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"")
+ENV_REFERENCE_PATTERN = re.compile(r"env\.(\w+)")
+
+MAPPING_TAG = yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG
+SEQUENCE_TAG = yaml.resolver.BaseResolver.DEFAULT_SEQUENCE_TAG
+STRING_TAG = yaml.resolver.BaseResolver.DEFAULT_SCALAR_TAG
+
+
 class LineNumberTracker:
-    """Tracks line numbers for YAML nodes."""
+    """Maps paths in a parsed manifest to their (line, column) in the YAML.
+
+    Locations are recorded while the document is built, for every mapping,
+    list and mapping key: a key's path points at the key itself, so errors
+    about a field point at the line that sets it. Scalar list items are not
+    recorded and resolve to their list, and aliases resolve to their anchor.
+    Lines and columns are 1-based.
+    """
 
     def __init__(self, manifest_path: Optional[Path] = None):
         self.manifest_path = manifest_path
-        self.node_lines: Dict[int, int] = {}  # Maps object id to line number
+        self.locations: Dict[ManifestPath, Tuple[int, int]] = {}
 
-    def track_node(self, node: Any, line_number: int) -> None:
-        """Track the line number for a YAML node."""
-        # Track all types of nodes, not just containers
-        self.node_lines[id(node)] = line_number
+    def get_location(self, path: ManifestPath) -> Optional[Tuple[int, int]]:
+        """Return the (line, column) of path, or of its closest recorded parent.
 
-    def get_line_number(self, obj: Any) -> Optional[int]:
-        """Get the line number for an object."""
-        # This will be less effective with Pydantic models as new objects are created.
-        # We might need to pass specific raw data snippets or values to this if trying to get line numbers
-        # for semantic errors related to parts of a Pydantic-validated structure.
-        # The line_tracker is primarily for errors found during the initial parse OR if we map Pydantic error paths back to raw data.
-        return self.node_lines.get(id(obj))
+        Path elements that are not in the manifest, such as the validator
+        names Pydantic adds to some error locations, are skipped over by
+        falling back to the parent.
+        """
+        path = tuple(path)
+        while True:
+            location = self.locations.get(path)
+            if location is not None or not path:
+                return location
+            path = path[:-1]
+
+    def get_line_number(self, path: ManifestPath) -> Optional[int]:
+        """Return the line of path, or of its closest recorded parent."""
+        location = self.get_location(path)
+        return location[0] if location else None
+
+    def _construct(
+        self,
+        loader: SafeLoader,
+        node: yaml.Node,
+        path: ManifestPath,
+        constructed: Dict[int, Any],
+    ) -> Any:
+        """Build the Python value of node, recording the locations under it."""
+        if id(node) in constructed:  # An alias: share the anchored value
+            return constructed[id(node)]
+        if isinstance(node, yaml.ScalarNode):
+            if node.tag == STRING_TAG:  # Most scalars; skip the constructor call
+                return node.value
+            scalar_constructor = loader.yaml_constructors.get(node.tag)
+            if scalar_constructor is None:
+                return loader.construct_object(node)  # Raises for unknown tags
+            return scalar_constructor(loader, node)
+
+        mark = node.start_mark
+        self.locations.setdefault(path, (mark.line + 1, mark.column + 1))
+        if isinstance(node, yaml.MappingNode) and node.tag == MAPPING_TAG:
+            mapping: Dict[Any, Any] = {}
+            constructed[id(node)] = mapping
+            loader.flatten_mapping(node)  # Apply << merge keys
+            for key_node, value_node in node.value:
+                key = self._construct(loader, key_node, (), constructed)
+                child = path + (key,)
+                key_mark = key_node.start_mark
+                self.locations[child] = (key_mark.line + 1, key_mark.column + 1)
+                mapping[key] = self._construct(loader, value_node, child, constructed)
+            return mapping
+        if node.tag == SEQUENCE_TAG:
+            sequence: List[Any] = []
+            constructed[id(node)] = sequence
+            for index, item_node in enumerate(node.value):
+                sequence.append(
+                    self._construct(loader, item_node, path + (index,), constructed)
+                )
+            return sequence
+        # Other collection tags (!!set, !!omap, ...) are rare in manifests
+        value = loader.construct_object(node, deep=True)
+        constructed[id(node)] = value
+        return value
 
     def parse_yaml_with_line_numbers(
         self, yaml_content: str
     ) -> tuple[Dict[str, Any], "LineNumberTracker"]:
-        """Parse YAML and track line numbers for all nodes."""
-
-        class LineNumberLoader(yaml.SafeLoader):
-            pass
-
-        def construct_mapping(
-            loader: yaml.SafeLoader, node: yaml.MappingNode
-        ) -> Dict[str, Any]:
-            loader.flatten_mapping(node)
-            result: Dict[str, Any] = {}
-            if hasattr(node, "start_mark") and node.start_mark:
-                self.track_node(result, node.start_mark.line + 1)
-            for key_node, value_node in node.value:
-                key = loader.construct_object(key_node)
-                value = loader.construct_object(value_node)
-                if hasattr(key_node, "start_mark") and key_node.start_mark:
-                    self.track_node(key, key_node.start_mark.line + 1)
-                if hasattr(value_node, "start_mark") and value_node.start_mark:
-                    self.track_node(value, value_node.start_mark.line + 1)
-                result[key] = value
-            return result
-
-        def construct_sequence(
-            loader: yaml.SafeLoader, node: yaml.SequenceNode
-        ) -> List[Any]:
-            result: List[Any] = []
-            if hasattr(node, "start_mark") and node.start_mark:
-                self.track_node(result, node.start_mark.line + 1)
-            for item_node in node.value:
-                item = loader.construct_object(item_node)
-                if hasattr(item_node, "start_mark") and item_node.start_mark:
-                    self.track_node(item, item_node.start_mark.line + 1)
-                result.append(item)
-            return result
-
-        LineNumberLoader.add_constructor(
-            yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, construct_mapping
-        )
-        LineNumberLoader.add_constructor(
-            yaml.resolver.BaseResolver.DEFAULT_SEQUENCE_TAG, construct_sequence
-        )
+        """Parse YAML and record the location of its containers and keys.
 
+        The document is composed by the (LibYAML) loader and then built in a
+        single walk that records locations as it goes.
+        """
         try:
-            data = yaml.load(yaml_content, Loader=LineNumberLoader)
+            loader = SafeLoader(yaml_content)
+            try:
+                root = loader.get_single_node()
+                data = self._construct(loader, root, (), {}) if root else None
+            finally:
+                loader.dispose()
             if not isinstance(data, dict):
                 # This check ensures the root of the YAML is a mapping, which Pydantic also expects.
                 raise ManifestError(
@@ -116,6 +186,20 @@ class LineNumberTracker:
             raise ManifestError(f"Failed to parse YAML: {e}")
 
 
+def show_warnings(messages: Iterable[str]) -> None:
+    """Display validation warnings, from a fresh validation or a cached one."""
+    for message in messages:
+        ui.warning(message)
+
+
+def _declared_names_hint(name: str, declared: FrozenSet[str], kind: str) -> str:
+    """Suggest the closest declared name, or list them all."""
+    close_matches = difflib.get_close_matches(name, declared, n=1)
+    if close_matches:
+        return f" Did you mean '{close_matches[0]}'?"
+    return f" Declared {kind}: {', '.join(sorted(declared)) if declared else 'none'}"
+
+
 class ManifestValidator:
     """Validates samstacks manifest structure and template expressions, post-Pydantic parsing."""
 
@@ -136,29 +220,43 @@ class ManifestValidator:
             manifest_base_dir if manifest_base_dir else Path(".").resolve()
         )
         self.errors: List[ValidationError] = []
+        # Problems that do not fail validation, e.g. params sam deploy ignores
+        self.warnings: List[ValidationError] = []
         # stack_ids are now easily accessible from self.pipeline_model.stacks
         # and uniqueness is checked by Pydantic validator on PipelineManifestModel.
+        # Position of each stack, so "is stack X defined before index i" is a
+        # lookup instead of a set built per stack
+        self._stack_indexes: Dict[str, int] = {}
+        for index, stack_model in enumerate(pipeline_model.stacks):
+            self._stack_indexes.setdefault(stack_model.id, index)
+        inputs = pipeline_model.pipeline_settings.inputs
+        self._input_ids: Set[str] = set(inputs.keys()) if inputs else set()
+        self._stack_dirs: Dict[int, Path] = {}
+        # Template interfaces by stack index, loaded up front for a full run
+        self._template_interfaces: Dict[int, Optional[TemplateInterface]] = {}
 
     # Removed from_yaml_content as parsing and Pydantic validation now happens in core.Pipeline.from_file
 
-    def _get_line_number_for_value(
-        self, value_object: Any, context_object: Any
-    ) -> Optional[int]:
-        """Attempt to get line number for a specific value if line tracker is available.
-        Context object is the Pydantic model or dict containing the value.
-        This is a heuristic because Pydantic creates new objects.
-        It's most reliable if 'value_object' itself was part of the raw parse tree tracked.
-        """
-        if self.line_tracker:
-            # Try direct lookup of the value object itself
-            line = self.line_tracker.get_line_number(value_object)
-            if line is not None:
-                return line
-            # Fallback: try line of the containing Pydantic model/dict if value is simple type.
-            # This is less precise for specific expressions within a string.
-            if isinstance(value_object, (str, int, float, bool)):
-                return self.line_tracker.get_line_number(context_object)
-        return None
+    def _stack_dir(self, index: int) -> Path:
+        """Return the resolved directory of the stack at index."""
+        stack_dir = self._stack_dirs.get(index)
+        if stack_dir is None:
+            # stack_model.dir is already a Path object from Pydantic.
+            # It needs to be resolved relative to manifest_base_dir.
+            stack_model = self.pipeline_model.stacks[index]
+            stack_dir = (self.manifest_base_dir / stack_model.dir).resolve()
+            self._stack_dirs[index] = stack_dir
+        return stack_dir
+
+    def template_interface(self, index: int) -> Optional[TemplateInterface]:
+        """Return the parameters and outputs the template of a stack declares."""
+        if index in self._template_interfaces:
+            return self._template_interfaces[index]
+        return load_template_interface(self._stack_dir(index))
+
+    def _line_number(self, path: ManifestPath) -> Optional[int]:
+        """Return the manifest line of path if a line tracker is available."""
+        return self.line_tracker.get_line_number(path) if self.line_tracker else None
 
     # Removed validate_manifest_schema and its helpers (_validate_fields, _suggest_field_name, _levenshtein_distance)
     # This is now handled by Pydantic models.
@@ -166,10 +264,26 @@ class ManifestValidator:
     def validate_semantic_rules_and_raise_if_errors(self) -> None:
         """Run all semantic validations and raise if any errors were found."""
         self.errors = []  # Reset errors for this validation run
+        self.warnings = []
 
-        self._validate_stack_directories_and_templates()
         self._validate_pipeline_input_definitions()  # Focus on what Pydantic doesn't cover for inputs
-        self.validate_template_expressions()  # Major remaining responsibility
+        # Parse every template up front, in parallel, for the reference checks
+        stack_indexes = range(len(self.pipeline_model.stacks))
+        interfaces = load_template_interfaces(self._stack_dir(i) for i in stack_indexes)
+        self._template_interfaces = dict(zip(stack_indexes, interfaces))
+        try:
+            # One pass over the stacks; expression errors are still reported
+            # after every directory error
+            expression_errors = self.pipeline_settings_errors()
+            for index in stack_indexes:
+                self._validate_stack_directory(index)
+                expression_errors.extend(self.stack_expression_errors(index))
+                self.warnings.extend(self.stack_param_warnings(index))
+            self.errors.extend(expression_errors)
+        finally:
+            # Later per-stack checks look templates up again, in case they changed
+            self._template_interfaces = {}
+        show_warnings(str(warning) for warning in self.warnings)
 
         if self.errors:
             error_messages = [str(error) for error in self.errors]
@@ -183,50 +297,41 @@ class ManifestValidator:
                     f"Found {error_count} validation errors:\n{formatted_errors}"
                 )
 
-    def _validate_stack_directories_and_templates(self) -> None:
-        """Validate that stack directories exist and contain a SAM template."""
-        if not self.pipeline_model.stacks:
-            # Pydantic might allow empty stacks list if default_factory is used and no stacks provided.
-            # Depending on requirements, could add a check here or via Pydantic validator.
-            # For now, if no stacks, this validation passes.
-            return
-
-        for stack_model in self.pipeline_model.stacks:
-            # stack_model.dir is already a Path object from Pydantic.
-            # It needs to be resolved relative to manifest_base_dir.
-            resolved_stack_dir = (self.manifest_base_dir / stack_model.dir).resolve()
+    def _validate_stack_directory(self, index: int) -> None:
+        """Validate that one stack's directory exists and contains a SAM template."""
+        stack_model = self.pipeline_model.stacks[index]
+        resolved_stack_dir = self._stack_dir(index)
 
-            if not resolved_stack_dir.exists():
-                # Try to get line number of the stack_model.dir field if possible
-                # This is tricky as stack_model.dir is a Path object, not the raw string from YAML
-                # We might need to pass the raw stack_data dict to line_tracker if we need this precision.
-                # For now, associate error with the stack id.
-                self.errors.append(
-                    ValidationError(
-                        f"Stack directory does not exist: {resolved_stack_dir}",
-                        context=f"stack '{stack_model.id}' field 'dir'",
-                    )
+        if not resolved_stack_dir.exists():
+            self.errors.append(
+                ValidationError(
+                    f"Stack directory does not exist: {resolved_stack_dir}",
+                    context=f"stack '{stack_model.id}' field 'dir'",
+                    line_number=self._line_number(("stacks", index, "dir")),
                 )
-                continue  # Don't check for template if dir doesn't exist
+            )
+            return  # Don't check for template if dir doesn't exist
 
-            if not resolved_stack_dir.is_dir():
-                self.errors.append(
-                    ValidationError(
-                        f"Stack path is not a directory: {resolved_stack_dir}",
-                        context=f"stack '{stack_model.id}' field 'dir'",
-                    )
+        if not resolved_stack_dir.is_dir():
+            self.errors.append(
+                ValidationError(
+                    f"Stack path is not a directory: {resolved_stack_dir}",
+                    context=f"stack '{stack_model.id}' field 'dir'",
+                    line_number=self._line_number(("stacks", index, "dir")),
                 )
-                continue
+            )
+            return
 
-            template_file_yaml = resolved_stack_dir / "template.yaml"
-            template_file_yml = resolved_stack_dir / "template.yml"
-            if not template_file_yaml.exists() and not template_file_yml.exists():
-                self.errors.append(
-                    ValidationError(
-                        f"No template.yaml or template.yml found in {resolved_stack_dir}",
-                        context=f"stack '{stack_model.id}'",
-                    )
+        template_file_yaml = resolved_stack_dir / "template.yaml"
+        template_file_yml = resolved_stack_dir / "template.yml"
+        if not template_file_yaml.exists() and not template_file_yml.exists():
+            self.errors.append(
+                ValidationError(
+                    f"No template.yaml or template.yml found in {resolved_stack_dir}",
+                    context=f"stack '{stack_model.id}'",
+                    line_number=self._line_number(("stacks", index, "dir")),
                 )
+            )
 
     def _validate_pipeline_input_definitions(self) -> None:
         """Validate aspects of pipeline inputs not covered by Pydantic type checks.
@@ -242,114 +347,135 @@ class ManifestValidator:
 
     def validate_template_expressions(self) -> None:
         """Validate all template expressions in the manifest using Pydantic models."""
-        pipeline_settings = self.pipeline_model.pipeline_settings
-        available_input_ids = (
-            set(pipeline_settings.inputs.keys()) if pipeline_settings.inputs else set()
-        )
+        self._validate_pipeline_settings_expressions()
+        for i in range(len(self.pipeline_model.stacks)):
+            self._validate_stack_expressions(i)
 
-        # Validate pipeline_settings expressions
+    def _validate_pipeline_settings_expressions(self) -> None:
+        """Validate the template expressions in pipeline_settings."""
+        pipeline_settings = self.pipeline_model.pipeline_settings
         for field_name in ["stack_name_prefix", "stack_name_suffix"]:
             field_value = getattr(pipeline_settings, field_name, None)
             if field_value is not None:
-                # Line number for expressions in pipeline_settings is harder to get accurately
-                # without deeper integration with Pydantic error context or raw data mapping.
-                # We can associate it with the pipeline_settings object itself for now.
                 self._validate_template_expressions_in_value(
                     field_value,
                     f"pipeline_settings.{field_name}",
-                    available_stack_ids=set(),  # No stacks available at pipeline_settings level
-                    available_input_ids=available_input_ids,
-                    context_object=pipeline_settings,  # Pass the Pydantic model for context
-                    original_value_for_line_tracking=str(
-                        field_value
-                    ),  # Pass original string for line tracking if possible
+                    available_stack_count=0,  # No stacks available at pipeline_settings level
+                    path=("pipeline_settings", field_name),
                 )
 
-        # Validate stack expressions
-        # Get all stack IDs first for forward reference checks
-        all_stack_ids = [s.id for s in self.pipeline_model.stacks]
-
-        for i, stack_model in enumerate(self.pipeline_model.stacks):
-            pre_deploy_available_stack_ids = set(all_stack_ids[:i])
-            run_script_available_stack_ids = set(all_stack_ids[: i + 1])
-
-            # Validate templated fields used BEFORE or DURING stack deployment
-            for field_name in ["stack_name_suffix", "if_condition"]:
-                field_value = getattr(stack_model, field_name, None)
-                if field_value is not None:
-                    self._validate_template_expressions_in_value(
-                        field_value,
-                        f"stack '{stack_model.id}' field '{field_name if field_name != 'if_condition' else 'if'}'",
-                        pre_deploy_available_stack_ids,
-                        available_input_ids,
-                        context_object=stack_model,
-                        original_value_for_line_tracking=str(field_value),
-                    )
+    def _validate_stack_expressions(self, i: int) -> None:
+        """Validate the template expressions of the stack at index i."""
+        stack_model = self.pipeline_model.stacks[i]
+        # Outputs can only come from stacks defined earlier: the first i
+        # before deployment, and the stack itself too in its run script
+        pre_deploy_available_stack_count = i
+        run_script_available_stack_count = i + 1
+
+        # Validate templated fields used BEFORE or DURING stack deployment
+        for field_name in ["stack_name_suffix", "if_condition"]:
+            field_value = getattr(stack_model, field_name, None)
+            if field_value is not None:
+                manifest_key = field_name if field_name != "if_condition" else "if"
+                self._validate_template_expressions_in_value(
+                    field_value,
+                    f"stack '{stack_model.id}' field '{manifest_key}'",
+                    pre_deploy_available_stack_count,
+                    path=("stacks", i, manifest_key),
+                )
+
+        # Validate 'run_script' (used AFTER stack deployment)
+        if stack_model.run_script is not None:
+            self._validate_template_expressions_in_value(
+                stack_model.run_script,
+                f"stack '{stack_model.id}' field 'run'",
+                run_script_available_stack_count,
+                path=("stacks", i, "run"),
+            )
 
-            # Validate 'run_script' (used AFTER stack deployment)
-            if stack_model.run_script is not None:
+        # Validate params (used DURING stack deployment)
+        if stack_model.params:
+            for param_name, param_value in stack_model.params.items():
                 self._validate_template_expressions_in_value(
-                    stack_model.run_script,
-                    f"stack '{stack_model.id}' field 'run'",
-                    run_script_available_stack_ids,
-                    available_input_ids,
-                    context_object=stack_model,
-                    original_value_for_line_tracking=stack_model.run_script,
+                    param_value,
+                    f"stack '{stack_model.id}' param '{param_name}'",
+                    pre_deploy_available_stack_count,
+                    path=("stacks", i, "params", param_name),
                 )
 
-            # Validate params (used DURING stack deployment)
-            if stack_model.params:
-                for param_name, param_value in stack_model.params.items():
-                    self._validate_template_expressions_in_value(
-                        param_value,
-                        f"stack '{stack_model.id}' param '{param_name}'",
-                        pre_deploy_available_stack_ids,
-                        available_input_ids,
-                        context_object=stack_model.params,  # Context is the params dict
-                        original_value_for_line_tracking=str(param_value),
-                    )
+    def stack_param_warnings(self, index: int) -> List[ValidationError]:
+        """Return a warning for each param the stack's template does not declare.
+
+        sam deploy drops parameter overrides the template does not declare, so
+        such a param is likely a typo but does not fail the deploy.
+        """
+        stack_model = self.pipeline_model.stacks[index]
+        template = self.template_interface(index) if stack_model.params else None
+        if template is None or template.parameters is None:
+            return []
+        return [
+            ValidationError(
+                f"Parameter '{param_name}' is not declared in "
+                f"{template.path.name} and will be ignored."
+                + _declared_names_hint(param_name, template.parameters, "parameters"),
+                f"stack '{stack_model.id}' param '{param_name}'",
+                self._line_number(("stacks", index, "params", param_name)),
+            )
+            for param_name in stack_model.params or {}
+            if param_name not in template.parameters
+        ]
+
+    def _collect_errors(self, check: Callable[[], None]) -> List[ValidationError]:
+        """Run one validation step and return its errors, leaving self.errors as is."""
+        saved_errors, self.errors = self.errors, []
+        try:
+            check()
+            return self.errors
+        finally:
+            self.errors = saved_errors
+
+    def pipeline_settings_errors(self) -> List[ValidationError]:
+        """Return the errors in the template expressions of pipeline_settings."""
+        return self._collect_errors(self._validate_pipeline_settings_expressions)
+
+    def stack_file_errors(self, index: int) -> List[ValidationError]:
+        """Return the errors in the directory and template of one stack."""
+        return self._collect_errors(lambda: self._validate_stack_directory(index))
+
+    def stack_expression_errors(self, index: int) -> List[ValidationError]:
+        """Return the errors in the template expressions of one stack."""
+        return self._collect_errors(lambda: self._validate_stack_expressions(index))
 
     def _is_string_template(self, value: Any) -> bool:
         """Check if a value is a string containing one or more template patterns '${{...}}'."""
         if not isinstance(value, str):
             return False
-        # Use shared template pattern - check for presence, not if entire string is a template
-        return bool(re.search(r"\$\{\{\s*([^}]+)\s*\}\}", value))
+        # Check for presence, not if entire string is a template
+        return bool(template_expressions(value))
 
     def _validate_template_expressions_in_value(
         self,
         value: Any,
         context_str: str,  # Renamed from 'context' to avoid clash with kwarg
-        available_stack_ids: Set[str],
-        available_input_ids: Set[str],
-        context_object: Any,  # The Pydantic model or dict holding this value
-        original_value_for_line_tracking: Optional[
-            str
-        ] = None,  # Pass the original string value if available
+        available_stack_count: int,  # Stacks before this index can be referenced
+        path: ManifestPath = (),  # Where the value is set in the manifest
     ) -> None:
         """Validate template expressions in a single value."""
-        if not isinstance(value, str):
+        # Most values hold no expression; skip them before running the regex
+        if not isinstance(value, str) or "${{" not in value:
             return
 
-        # Find all template expressions
-        pattern = r"\$\{\{\s*([^}]+)\s*\}\}"
-        matches = re.finditer(pattern, value)
-        # Try to get a general line number for the whole string value containing the expression(s)
-        # This is an approximation. LineNumberTracker is best with raw YAML nodes.
-        line_num_for_value = self._get_line_number_for_value(
-            original_value_for_line_tracking or value, context_object
-        )
+        # The line of the key that sets the value containing the expression(s)
+        line_num_for_value = self._line_number(path)
 
-        for match in matches:
-            expression_body = match.group(1).strip()
+        for expression_body in template_expressions(value):
             # TODO: Try to get more precise line numbers for individual expressions if possible,
-            # e.g. by searching for expression_body in original_value_for_line_tracking
-            # and calculating offset if line_num_for_value is known.
+            # e.g. by offsetting line_num_for_value by the newlines before the match
+            # in block scalars such as multi-line run scripts.
             self._validate_single_expression(
                 expression_body,
                 context_str,  # Use the passed context string
-                available_stack_ids,
-                available_input_ids,
+                available_stack_count,
                 line_num_for_value,  # Use the general line number for the containing string
             )
 
@@ -357,21 +483,20 @@ class ManifestValidator:
         self,
         expression_body: str,
         context_str: str,  # Renamed
-        available_stack_ids: Set[str],
-        available_input_ids: Set[str],
+        available_stack_count: int,
         line_number: Optional[int] = None,
     ) -> None:
         """Validate a single template expression body."""
-        parts = re.split(
-            r"\|\|(?=(?:[^\'\"]|\"[^\"]*\"|\'[^\']*\')*$)", expression_body
-        )
+        if "||" in expression_body:
+            parts = FALLBACK_SEPARATOR_PATTERN.split(expression_body)
+        else:
+            parts = [expression_body]
         for part_str in parts:
             part_trimmed = part_str.strip()
             self._validate_expression_part(
                 part_trimmed,
                 context_str,  # Use the passed context string
-                available_stack_ids,
-                available_input_ids,
+                available_stack_count,
                 line_number,
             )
 
@@ -379,8 +504,7 @@ class ManifestValidator:
         self,
         part_expression: str,
         context_str: str,  # Renamed
-        available_stack_ids: Set[str],
-        available_input_ids: Set[str],
+        available_stack_count: int,
         line_number: Optional[int] = None,
     ) -> None:
         """Validate a single part of an expression using simple pattern validation."""
@@ -397,8 +521,7 @@ class ManifestValidator:
         self._validate_expression_part_basic(
             part_expression,
             context_str,
-            available_stack_ids,
-            available_input_ids,
+            available_stack_count,
             line_number,
         )
 
@@ -406,8 +529,7 @@ class ManifestValidator:
         self,
         part_expression: str,
         context_str: str,
-        available_stack_ids: Set[str],
-        available_input_ids: Set[str],
+        available_stack_count: int,
         line_number: Optional[int] = None,
     ) -> None:
         """Basic validation without simpleeval - focus on placeholder syntax."""
@@ -416,6 +538,17 @@ class ManifestValidator:
         if self._contains_operators_or_math(part_expression):
             # Check for potential env variable math warnings
             self._check_for_env_math_warning(part_expression, context_str, line_number)
+            # Outputs referenced anywhere in the expression must exist as well
+            unquoted = QUOTED_STRING_PATTERN.sub("''", part_expression)
+            for stack_id, output_name in STACK_OUTPUT_REFERENCE_PATTERN.findall(
+                unquoted
+            ):
+                self._validate_stack_output_expression(
+                    f"stacks.{stack_id}.outputs.{output_name}",
+                    context_str,
+                    available_stack_count,
+                    line_number,
+                )
             return
 
         # Now check for simple placeholder patterns
@@ -431,21 +564,13 @@ class ManifestValidator:
 
         if part_expression.startswith("inputs."):
             self._validate_pipeline_input_expression(
-                part_expression,
-                context_str,
-                available_input_ids,
-                line_number,
-                all_stack_ids=[s.id for s in self.pipeline_model.stacks],
+                part_expression, context_str, line_number
             )
             return
 
         if part_expression.startswith("stacks."):
             self._validate_stack_output_expression(
-                part_expression,
-                context_str,
-                available_stack_ids,
-                line_number,
-                all_stack_ids=[s.id for s in self.pipeline_model.stacks],
+                part_expression, context_str, available_stack_count, line_number
             )
             return
 
@@ -487,21 +612,8 @@ class ManifestValidator:
 
     def _contains_operators_or_math(self, expression: str) -> bool:
         """Check if expression contains operators or math that should be accepted."""
-
         # Look for mathematical operators, comparisons, boolean logic, numbers
-        operator_patterns = [
-            r"[+\-*/]",  # Math operators
-            r"[<>=!]=?",  # Comparison operators
-            r"\b(?:and|or|not|&&|\|\||!)\b",  # Boolean operators
-            r"[()]",  # Parentheses
-            r"\b\d+\b",  # Numbers
-        ]
-
-        for pattern in operator_patterns:
-            if re.search(pattern, expression):
-                return True
-
-        return False
+        return OPERATOR_OR_MATH_PATTERN.search(expression) is not None
 
     def _check_for_env_math_warning(
         self, expression: str, context_str: str, line_number: Optional[int] = None
@@ -509,30 +621,26 @@ class ManifestValidator:
         """Check if expression uses env variables in mathematical context and warn about explicit conversion."""
 
         # Look for env.VAR in expressions that contain math operators
-        if re.search(r"env\.\w+", expression) and re.search(r"[+\-*/]", expression):
-            # Check if the env var looks like it could be numeric
-            env_matches = re.findall(r"env\.(\w+)", expression)
-            for env_var in env_matches:
-                # This is a heuristic - we can't check the actual value during validation
-                # but we can suggest the pattern
-                import os
-
-                env_value = os.environ.get(env_var, "")
-                if env_value and self._looks_like_number(env_value):
-                    suggestion = expression.replace(
-                        f"env.{env_var}", f"int(env.{env_var})"
-                    )
-                    warning_msg = (
-                        f"Environment variable '{env_var}' contains '{env_value}' which looks numeric. "
-                        f"For mathematical operations, consider using explicit conversion: '{suggestion}'"
-                    )
-                    # We could add this as a warning rather than an error
-                    # For now, let's make it a validation error to help users
-                    self.errors.append(
-                        ValidationError(
-                            f"Suggestion: {warning_msg}", context_str, line_number
-                        )
+        if "env." not in expression or not MATH_OPERATOR_PATTERN.search(expression):
+            return
+        # Check if the env var looks like it could be numeric
+        for env_var in ENV_REFERENCE_PATTERN.findall(expression):
+            # This is a heuristic - we can't check the actual value during validation
+            # but we can suggest the pattern
+            env_value = os.environ.get(env_var, "")
+            if env_value and self._looks_like_number(env_value):
+                suggestion = expression.replace(f"env.{env_var}", f"int(env.{env_var})")
+                warning_msg = (
+                    f"Environment variable '{env_var}' contains '{env_value}' which looks numeric. "
+                    f"For mathematical operations, consider using explicit conversion: '{suggestion}'"
+                )
+                # We could add this as a warning rather than an error
+                # For now, let's make it a validation error to help users
+                self.errors.append(
+                    ValidationError(
+                        f"Suggestion: {warning_msg}", context_str, line_number
                     )
+                )
 
     def _looks_like_number(self, value: str) -> bool:
         """Check if a string value looks like it could be a number."""
@@ -546,16 +654,10 @@ class ManifestValidator:
         self,
         expression: str,
         context_str: str,  # Renamed
-        available_stack_ids: Set[str],
+        available_stack_count: int,
         line_number: Optional[int] = None,
-        all_stack_ids: Optional[List[str]] = None,  # Now passed in
     ) -> None:
         """Validate a stack output expression."""
-        all_stack_ids = (
-            all_stack_ids
-            if all_stack_ids is not None
-            else [s.id for s in self.pipeline_model.stacks]
-        )
         parts = expression.split(".")
         if len(parts) != 4 or parts[0] != "stacks" or parts[2] != "outputs":
             error_msg = (
@@ -576,21 +678,40 @@ class ManifestValidator:
                 )
             )
             return
-        if stack_id not in available_stack_ids:
-            if stack_id in all_stack_ids:
-                stack_index = all_stack_ids.index(stack_id)
+        stack_index = self._stack_indexes.get(stack_id)
+        if stack_index is None or stack_index >= available_stack_count:
+            if stack_index is not None:
                 error_msg = (
                     f"Stack '{stack_id}' is defined later in the pipeline "
                     f"(at index {stack_index}). Stack outputs can only reference stacks defined earlier."
                 )
             else:
                 # Show all stacks in the pipeline, not just available ones
+                all_stack_ids = [s.id for s in self.pipeline_model.stacks]
                 available_list = sorted(all_stack_ids) if all_stack_ids else "none"
                 error_msg = (
                     f"Stack '{stack_id}' does not exist in the pipeline. "
                     f"Available stacks: {available_list}"
                 )
             self.errors.append(ValidationError(error_msg, context_str, line_number))
+        elif output_name:
+            template = self.template_interface(stack_index)
+            if (
+                template is not None
+                and template.outputs is not None
+                and output_name not in template.outputs
+            ):
+                self.errors.append(
+                    ValidationError(
+                        f"Stack '{stack_id}' does not declare output '{output_name}' "
+                        f"in {template.path.name}."
+                        + _declared_names_hint(
+                            output_name, template.outputs, "outputs"
+                        ),
+                        context_str,
+                        line_number,
+                    )
+                )
         if not output_name:
             self.errors.append(
                 ValidationError(
@@ -604,10 +725,7 @@ class ManifestValidator:
         self,
         expression: str,
         context_str: str,  # Renamed
-        available_input_ids: Set[str],
         line_number: Optional[int] = None,
-        # Added all_stack_ids to maintain signature consistency, though not used here
-        all_stack_ids: Optional[List[str]] = None,
     ) -> None:
         """Validate a pipeline input expression: inputs.input_name."""
         input_name = expression[len("inputs.") :]
@@ -620,10 +738,10 @@ class ManifestValidator:
                 )
             )
             return
-        if input_name not in available_input_ids:
+        if input_name not in self._input_ids:
             available_list_str = (
-                ", ".join(sorted(available_input_ids))
-                if available_input_ids
+                ", ".join(sorted(self._input_ids))
+                if self._input_ids
                 else "none defined"
             )
             self.errors.append(
@@ -0,0 +1,185 @@
+"""
+Cache of successful manifest validations.
+
+Validating a manifest parses it, runs the Pydantic schema and the semantic
+checks, and looks at every stack directory and template. When none of those
+inputs changed since the last successful validation, the result is the same,
+so ``samstacks validate`` can return at once and ``deploy`` can skip the
+semantic checks.
+
+An entry is keyed by a hash of the samstacks version, the kind of validation,
+the manifest's resolved path and bytes, and the values of the environment
+variables it references. The path is part of the key because stack
+directories are relative to the manifest, so the same manifest copied
+elsewhere validates different stacks. An entry lists the files and
+directories the validation looked at with their mtime and size, and the
+warnings it reported, which are shown again on a hit. An entry is a hit only
+if all of the files are unchanged.
+Only successful validations are cached, so errors are always reported from a
+fresh run.
+
+Entries live in $SAMSTACKS_VALIDATION_CACHE_DIR, or validation/ in the user
+cache directory ($XDG_CACHE_HOME/samstacks, by default ~/.cache/samstacks).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union
+
+from . import __version__, metrics
+
+logger = logging.getLogger(__name__)
+
+VALIDATION_CACHE_DIR_ENV_VAR = "SAMSTACKS_VALIDATION_CACHE_DIR"
+# Oldest entries are removed when a new one would exceed this
+MAX_ENTRIES = 500
+
+# Environment variables a manifest reads through ${{ env.NAME }}
+ENV_REFERENCE_PATTERN = re.compile(rb"\benv\.([A-Za-z_][A-Za-z0-9_]*)")
+
+VALIDATION_CACHE_LOOKUPS = metrics.counter(
+    "samstacks_validation_cache_lookups",
+    "Manifest validation cache lookups, by scope and outcome.",
+    ["scope", "outcome"],
+)
+
+# (exists, is_dir, mtime_ns, size); missing files are part of the fingerprint
+FileSignature = List[Union[bool, int]]
+
+
+def default_validation_cache_dir() -> Path:
+    """Return the cache directory from the environment or the cache dir."""
+    configured = os.environ.get(VALIDATION_CACHE_DIR_ENV_VAR)
+    if configured:
+        return Path(configured).expanduser()
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "samstacks" / "validation"
+
+
+def stack_files(stack_dirs: Iterable[Path]) -> List[Path]:
+    """Return the paths whose state a validation of these stacks depends on."""
+    paths: List[Path] = []
+    for stack_dir in stack_dirs:
+        paths.extend(
+            [stack_dir, stack_dir / "template.yaml", stack_dir / "template.yml"]
+        )
+    return paths
+
+
+def file_signature(path: str) -> FileSignature:
+    """Return what a change to the file or directory at path would change."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [False, False, 0, 0]
+    is_dir = os.path.isdir(path)
+    # A directory's mtime changes whenever an entry is added or removed
+    return [True, is_dir, stat.st_mtime_ns, 0 if is_dir else stat.st_size]
+
+
+class ValidationCache:
+    """Records and checks successful validations of manifests."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    def key(
+        self, manifest_content: bytes, scope: str, manifest_path: Union[str, Path]
+    ) -> str:
+        """Return the cache key of a manifest for one kind of validation.
+
+        Args:
+            manifest_content: The raw bytes of the manifest file.
+            scope: What was validated, e.g. "manifest" for the checks in
+                Pipeline.from_file and "pipeline" for the validate command.
+            manifest_path: Path of the manifest file; stack directories are
+                resolved against its directory.
+        """
+        digest = hashlib.sha256()
+        location = os.fsencode(Path(manifest_path).resolve())
+        for part in (__version__.encode(), scope.encode(), location, manifest_content):
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        for name in sorted(set(ENV_REFERENCE_PATTERN.findall(manifest_content))):
+            value = os.environ.get(name.decode())
+            digest.update(name + b"=" + (b"\0" if value is None else value.encode()))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def lookup(self, key: str, scope: str = "manifest") -> Optional[List[str]]:
+        """Return the warnings of a cached validation of key, or None on a miss.
+
+        A validation is cached if it succeeded and none of its files changed
+        since.
+        """
+        outcome = "miss"
+        warnings: Optional[List[str]] = None
+        try:
+            entry = json.loads(self._entry_path(key).read_text(encoding="utf-8"))
+            if all(
+                file_signature(path) == signature for path, signature in entry["files"]
+            ):
+                warnings = [str(warning) for warning in entry.get("warnings", [])]
+                outcome = "hit"
+            else:
+                outcome = "stale"
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass  # Missing or unreadable entries are misses
+        VALIDATION_CACHE_LOOKUPS.inc(scope=scope, outcome=outcome)
+        return warnings
+
+    def is_valid(self, key: str, scope: str = "manifest") -> bool:
+        """Whether key was validated and none of its files changed since."""
+        return self.lookup(key, scope) is not None
+
+    def store(
+        self, key: str, paths: Iterable[Path], warnings: Sequence[str] = ()
+    ) -> None:
+        """Record a successful validation that depended on paths.
+
+        Failures to write are logged and otherwise ignored: the cache only
+        ever saves work.
+        """
+        files = {str(path): file_signature(str(path)) for path in paths}
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entry_path = self._entry_path(key)
+            temporary_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+            temporary_path.write_text(
+                json.dumps(
+                    {"files": sorted(files.items()), "warnings": list(warnings)}
+                ),
+                encoding="utf-8",
+            )
+            os.replace(temporary_path, entry_path)
+            self._prune()
+        except OSError as e:
+            logger.debug(f"Could not write validation cache entry: {e}")
+
+    def _prune(self) -> None:
+        entries = list(self.directory.glob("*.json"))
+        if len(entries) <= MAX_ENTRIES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[: len(entries) - MAX_ENTRIES]:
+            entry.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for entry in self.directory.glob("*.json"):
+            entry.unlink(missing_ok=True)
+
+
+def open_validation_cache(
+    enabled: bool = True, directory: Optional[Path] = None
+) -> Optional[ValidationCache]:
+    """Return the cache at directory (default: the user cache), or None if disabled."""
+    if not enabled:
+        return None
+    return ValidationCache(directory or default_validation_cache_dir())
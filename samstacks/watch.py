@@ -0,0 +1,227 @@
+"""
+Incremental revalidation of a manifest for ``samstacks validate --watch``.
+
+ManifestWatcher keeps the parsed manifest, its ManifestValidator and the
+errors of the last run in memory and polls the mtime and size of the manifest
+and of every stack's directory and template. When a stack's files change,
+only that stack's directory checks run again, and the template expressions
+of the stacks that reference it if the parameters or outputs it declares
+changed. When the manifest changes, it is parsed again, but a stack's template
+expressions are only validated again if the stack, its position, the stack
+IDs, the inputs, its line numbers or the templates it references changed. Each check reports the errors that appeared and the ones that went
+away since the previous check.
+"""
+
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .core import load_manifest_model
+from .dependency_graph import stack_model_references
+from .exceptions import ManifestError
+from .validation import ManifestPath, ManifestValidator
+from .validation_cache import FileSignature, file_signature, stack_files
+
+
+class ValidationChanges(NamedTuple):
+    """What changed since the previous check."""
+
+    changed_files: List[str]
+    new_errors: List[str]
+    resolved_errors: List[str]
+    errors: List[str]  # Every current error, in validation order
+
+
+class ManifestWatcher:
+    """Validates a manifest again whenever it or its stack files change."""
+
+    def __init__(self, manifest_path: Union[str, Path]):
+        self.manifest_path = Path(manifest_path).resolve()
+        self.errors: List[str] = []
+        self._manifest_signature: Optional[FileSignature] = None
+        self._validator: Optional[ManifestValidator] = None
+        # Errors of the manifest as a whole: parsing, schema, pipeline_settings
+        self._manifest_errors: List[str] = []
+        # Per stack index: signatures of its files and the errors found in them
+        self._stack_signatures: List[Dict[str, FileSignature]] = []
+        self._file_errors: List[List[str]] = []
+        # Per stack index: what its directory checks depend on in the manifest
+        self._file_keys: List[Tuple[Any, ...]] = []
+        # Template expression errors by everything they depend on, so stacks
+        # an edit did not touch are not validated again
+        self._expression_errors: Dict[Tuple[Any, ...], List[str]] = {}
+        self._stack_expression_keys: List[Tuple[Any, ...]] = []
+        # Per stack index: the manifest part of its expression key, and the
+        # indexes of the stacks whose templates its expressions are checked against
+        self._manifest_keys: List[Tuple[Any, ...]] = []
+        self._template_dependencies: List[FrozenSet[int]] = []
+
+    def check(self) -> Optional[ValidationChanges]:
+        """Revalidate what changed since the last check.
+
+        Returns None if no watched file changed. The first check validates
+        the whole manifest.
+        """
+        changed_files: List[str] = []
+        # Signatures are taken before reading, so a write during the check
+        # is picked up by the next one
+        signature = file_signature(str(self.manifest_path))
+        if signature != self._manifest_signature:
+            self._manifest_signature = signature
+            changed_files.append(str(self.manifest_path))
+            self._reload_manifest()
+        else:
+            changed_stacks = set()
+            for index, signatures in enumerate(self._stack_signatures):
+                changed = [
+                    path
+                    for path, stack_signature in signatures.items()
+                    if file_signature(path) != stack_signature
+                ]
+                if changed:
+                    changed_files.extend(changed)
+                    changed_stacks.add(index)
+                    self._check_stack_files(index)
+            if changed_stacks:
+                # Stacks checked against a changed template; unchanged
+                # declarations keep their keys and are not validated again
+                self._update_expression_errors(
+                    index
+                    for index, dependencies in enumerate(self._template_dependencies)
+                    if not dependencies.isdisjoint(changed_stacks)
+                )
+        if not changed_files:
+            return None
+
+        previous_errors = self.errors
+        self.errors = self._current_errors()
+        previous, current = set(previous_errors), set(self.errors)
+        return ValidationChanges(
+            changed_files=changed_files,
+            new_errors=[error for error in self.errors if error not in previous],
+            resolved_errors=[
+                error for error in previous_errors if error not in current
+            ],
+            errors=self.errors,
+        )
+
+    def _current_errors(self) -> List[str]:
+        # Same order as ManifestValidator.validate_semantic_rules_and_raise_if_errors
+        errors = [error for stack_errors in self._file_errors for error in stack_errors]
+        errors.extend(self._manifest_errors)
+        for key in self._stack_expression_keys:
+            errors.extend(self._expression_errors[key])
+        return errors
+
+    def _reload_manifest(self) -> None:
+        try:
+            model, line_tracker, _ = load_manifest_model(self.manifest_path)
+        except ManifestError as e:
+            self._validator = None
+            self._manifest_errors = [str(e)]
+            self._stack_signatures, self._file_errors, self._file_keys = [], [], []
+            self._stack_expression_keys = []
+            self._manifest_keys, self._template_dependencies = [], []
+            return
+
+        validator = ManifestValidator(model, line_tracker, self.manifest_path.parent)
+        self._validator = validator
+        self._manifest_errors = [str(e) for e in validator.pipeline_settings_errors()]
+
+        # The recorded locations under each stack, in document order
+        stack_locations: Dict[int, List[Tuple[ManifestPath, Tuple[int, int]]]] = {}
+        for path, location in line_tracker.locations.items():
+            if len(path) > 1 and path[0] == "stacks" and isinstance(path[1], int):
+                stack_locations.setdefault(path[1], []).append((path[2:], location))
+
+        stack_ids = tuple(stack.id for stack in model.stacks)
+        stack_indexes: Dict[str, int] = {}
+        for index, stack_id in enumerate(stack_ids):
+            stack_indexes.setdefault(stack_id, index)
+        inputs = model.pipeline_settings.inputs
+        input_ids = tuple(sorted(inputs)) if inputs else ()
+        self._manifest_keys = []
+        self._template_dependencies = []
+        for index, stack_model in enumerate(model.stacks):
+            definition = stack_model.model_dump_json()
+            self._manifest_keys.append(
+                (
+                    index,
+                    definition,
+                    stack_ids,
+                    input_ids,
+                    tuple(stack_locations.get(index, ())),
+                )
+            )
+            referenced = {
+                stack_indexes[stack_id]
+                for stack_id in stack_model_references(stack_model)
+                if stack_id in stack_indexes
+            }
+            self._template_dependencies.append(frozenset(referenced | {index}))
+        self._stack_expression_keys = [() for _ in model.stacks]
+        self._update_expression_errors(range(len(model.stacks)))
+
+        # Reuse the directory checks of stacks whose dir, line and files are
+        # unchanged; resolving every stack directory again dominates otherwise
+        previous_checks = dict(
+            zip(self._file_keys, zip(self._stack_signatures, self._file_errors))
+        )
+        self._file_keys = [
+            (stack.id, str(stack.dir), line_tracker.get_location(("stacks", i, "dir")))
+            for i, stack in enumerate(model.stacks)
+        ]
+        self._stack_signatures = [{} for _ in model.stacks]
+        self._file_errors = [[] for _ in model.stacks]
+        for index, file_key in enumerate(self._file_keys):
+            previous_check = previous_checks.get(file_key)
+            if previous_check is not None and all(
+                file_signature(path) == signature
+                for path, signature in previous_check[0].items()
+            ):
+                self._stack_signatures[index], self._file_errors[index] = previous_check
+            else:
+                self._check_stack_files(index)
+
+    def _update_expression_errors(self, indexes: Iterable[int]) -> None:
+        if self._validator is None:
+            return
+        validator = self._validator
+        for index in indexes:
+            key = self._manifest_keys[index] + tuple(
+                validator.template_interface(dependency)
+                for dependency in sorted(self._template_dependencies[index])
+            )
+            if key not in self._expression_errors:
+                self._expression_errors[key] = [
+                    str(e) for e in validator.stack_expression_errors(index)
+                ]
+            self._stack_expression_keys[index] = key
+        # Only keep the entries of the current manifest and templates
+        current = set(self._stack_expression_keys)
+        self._expression_errors = {
+            key: errors
+            for key, errors in self._expression_errors.items()
+            if key in current
+        }
+
+    def _check_stack_files(self, index: int) -> None:
+        if self._validator is None:
+            return
+        stack_model = self._validator.pipeline_model.stacks[index]
+        stack_dir = (self.manifest_path.parent / stack_model.dir).resolve()
+        self._stack_signatures[index] = {
+            str(path): file_signature(str(path)) for path in stack_files([stack_dir])
+        }
+        self._file_errors[index] = [
+            str(e) for e in self._validator.stack_file_errors(index)
+        ]
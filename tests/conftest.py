@@ -18,10 +18,30 @@ def temp_project_dir(tmp_path: Path) -> Path:
 def create_mock_template_processor(mocker) -> mock.MagicMock:
     """Creates a mock TemplateProcessor instance."""
     mock_tp = mocker.MagicMock(spec=TemplateProcessor)
-    mock_tp.process_structure.side_effect = (
-        lambda data_structure, **kwargs: data_structure
+    mock_tp.process_structure.side_effect = lambda data_structure, **kwargs: (
+        data_structure
     )
-    mock_tp.process_string.side_effect = (
-        lambda template_string, **kwargs: template_string if template_string else ""
+    mock_tp.process_string.side_effect = lambda template_string, **kwargs: (
+        template_string if template_string else ""
     )
+    mock_tp.process_structure_with_dependencies.side_effect = (
+        lambda data_structure, **kwargs: (data_structure, None)
+    )
+    mock_tp.dependencies_unchanged.return_value = True
     return mock_tp
+
+
+@pytest.fixture(autouse=True)
+def isolated_run_history(tmp_path: Path, monkeypatch) -> Path:
+    """Keep deploys run by tests from touching the user's run history."""
+    history_file = tmp_path / "history.sqlite"
+    monkeypatch.setenv("SAMSTACKS_HISTORY_FILE", str(history_file))
+    return history_file
+
+
+@pytest.fixture(autouse=True)
+def isolated_validation_cache(tmp_path: Path, monkeypatch) -> Path:
+    """Keep validations run by tests out of the user's validation cache."""
+    cache_dir = tmp_path / "validation-cache"
+    monkeypatch.setenv("SAMSTACKS_VALIDATION_CACHE_DIR", str(cache_dir))
+    return cache_dir
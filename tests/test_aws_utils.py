@@ -3,6 +3,7 @@ Tests for AWS utilities including account ID masking functionality.
 """
 
 from samstacks.aws_utils import (
+    get_all_stack_outputs,
     mask_account_id,
     mask_api_endpoints,
     mask_database_endpoints,
@@ -444,3 +445,48 @@ class TestMaskSensitiveData:
         categories = {"account_ids": True}
         assert mask_sensitive_data(123456789012, categories) == "************"
         assert mask_sensitive_data(None, categories) == "None"
+
+
+class TestGetAllStackOutputs:
+    """Test the paginated lookup of every stack's outputs."""
+
+    def test_follows_pages_and_maps_outputs_by_stack_name(self, mocker):
+        client = mocker.MagicMock()
+        client.describe_stacks.side_effect = [
+            {
+                "Stacks": [
+                    {
+                        "StackName": "network",
+                        "Outputs": [{"OutputKey": "VpcId", "OutputValue": "vpc-1"}],
+                    },
+                    {"StackName": "empty"},
+                ],
+                "NextToken": "page-2",
+            },
+            {
+                "Stacks": [
+                    {
+                        "StackName": "app",
+                        "Outputs": [{"OutputKey": "Url", "OutputValue": "https://x"}],
+                    }
+                ]
+            },
+        ]
+        session = mocker.patch("samstacks.aws_utils._session")
+        session.return_value.client.return_value = client
+
+        outputs = get_all_stack_outputs("us-west-2", "dev")
+
+        assert outputs == {
+            "network": {"VpcId": "vpc-1"},
+            "empty": {},
+            "app": {"Url": "https://x"},
+        }
+        session.assert_called_once_with("dev")
+        session.return_value.client.assert_called_once_with(
+            "cloudformation", region_name="us-west-2"
+        )
+        assert [call.kwargs for call in client.describe_stacks.call_args_list] == [
+            {},
+            {"NextToken": "page-2"},
+        ]
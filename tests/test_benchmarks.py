@@ -0,0 +1,124 @@
+"""
+Smoke tests for the benchmark helpers in benchmarks/.
+"""
+
+import pytest
+
+from benchmarks.bench_orchestration import run_scenario
+from benchmarks.bench_startup import (
+    STARTUP_CASES,
+    forbidden_imports,
+    parse_importtime,
+    run_case,
+)
+from benchmarks.bench_templating import run_benchmarks
+from benchmarks.common import find_regressions
+from benchmarks.manifests import build_manifest, stack_dependencies
+from samstacks.pipeline_models import PipelineManifestModel
+
+
+class TestSyntheticManifests:
+    """Test the synthetic manifest generator."""
+
+    def test_manifest_is_valid_and_sized(self):
+        """Generated manifests parse and carry the requested expressions."""
+        manifest = build_manifest(1000, expressions_per_stack=12)
+        model = PipelineManifestModel.model_validate(manifest)
+
+        assert len(model.stacks) == 1000
+        expression_count = sum(len(stack["params"]) for stack in manifest["stacks"])
+        assert expression_count >= 10_000
+
+    def test_run_benchmarks_small_manifest(self):
+        """Every benchmark case runs end to end on a tiny manifest."""
+        results = run_benchmarks((3,), repeat=1)
+
+        assert "pipeline_from_file[stacks=3]" in results
+        assert all(result["seconds"] > 0 for result in results.values())
+
+    @pytest.mark.parametrize(
+        "shape, expected",
+        [
+            ("chain", [[], [0], [1], [2]]),
+            ("fan", [[], [0], [0], [0]]),
+            ("diamond", [[], [0], [0], [1, 2]]),
+        ],
+    )
+    def test_stack_dependencies_shapes(self, shape, expected):
+        assert stack_dependencies(shape, 4) == expected
+
+
+class TestOrchestrationHarness:
+    """Test the fake sam / CloudFormation orchestration harness."""
+
+    def test_deploy_redeploy_and_delete_against_fakes(self):
+        results = run_scenario("diamond", 3, no_changes=True, quiet=False)
+
+        deploy = results["deploy[diamond:3]"]
+        assert deploy["sam_invocations"] == 6  # build + deploy per stack
+        assert deploy["api_calls"] > 0
+        # Redeploys report no changes, so each stack also cleans up a changeset
+        assert results["redeploy[diamond:3]"]["api_calls"] > deploy["api_calls"]
+        assert results["delete[diamond:3]"]["sam_invocations"] == 3
+
+
+class TestFindRegressions:
+    """Test baseline comparison."""
+
+    def test_slowdown_beyond_threshold_is_reported(self):
+        baseline = {"case": {"seconds": 0.1, "ops_per_sec": 10.0, "peak_kib": 100.0}}
+        current = {"case": {"seconds": 0.2, "ops_per_sec": 5.0, "peak_kib": 100.0}}
+
+        regressions = find_regressions(baseline, current, time_threshold=0.25)
+
+        assert len(regressions) == 1
+        assert "case" in regressions[0]
+
+    def test_memory_growth_beyond_threshold_is_reported(self):
+        baseline = {"case": {"seconds": 0.1, "ops_per_sec": 10.0, "peak_kib": 100.0}}
+        current = {"case": {"seconds": 0.1, "ops_per_sec": 10.0, "peak_kib": 200.0}}
+
+        regressions = find_regressions(baseline, current, memory_threshold=0.25)
+
+        assert len(regressions) == 1
+        assert "peak memory" in regressions[0]
+
+    def test_noise_and_missing_cases_are_ignored(self):
+        baseline = {
+            "tiny": {"seconds": 0.0001, "ops_per_sec": 1.0, "peak_kib": 1.0},
+            "gone": {"seconds": 1.0, "ops_per_sec": 1.0, "peak_kib": 1.0},
+        }
+        current = {"tiny": {"seconds": 0.0003, "ops_per_sec": 1.0, "peak_kib": 1.0}}
+
+        assert find_regressions(baseline, current) == []
+
+
+# Import times vary between machines; the tests only catch gross regressions
+# and python -m benchmarks.bench_startup checks the budgets themselves
+BUDGET_SLACK = 5
+
+
+class TestStartupBudgets:
+    """Test that samstacks imports stay within their budgets."""
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |     yaml._yaml\n"
+            "import time:       200 |        300 |   yaml\n"
+            "import time:       500 |       1500 | samstacks.cli\n"
+        )
+
+        assert parse_importtime(output) == [
+            ("yaml._yaml", 2, 0.0001),
+            ("yaml", 1, 0.0003),
+            ("samstacks.cli", 0, 0.0015),
+        ]
+
+    @pytest.mark.parametrize("name", sorted(STARTUP_CASES))
+    def test_startup_stays_within_budget(self, name):
+        case = STARTUP_CASES[name]
+        seconds, modules = run_case(case.statement)
+
+        assert 0 < seconds < case.budget_seconds * BUDGET_SLACK
+        assert forbidden_imports(case, modules) == []
@@ -195,6 +195,21 @@ class TestBootstrapManagerDiscoverStacks:
             f"Expected {expected_rel_path}, got {Path(stack.relative_dir_path)}"
         )
 
+    def test_discover_stacks_skips_default_and_extra_ignored_dirs(
+        self, temp_project_dir: Path
+    ):
+        """Test that build output and user-ignored directories are not scanned."""
+        for stack_dir in ["app", "app/.aws-sam/build/Fn", "node_modules/pkg", "old"]:
+            (temp_project_dir / stack_dir).mkdir(parents=True)
+            (temp_project_dir / stack_dir / "template.yaml").touch()
+
+        manager = BootstrapManager(
+            scan_path=str(temp_project_dir), ignore_patterns=["old"]
+        )
+        manager._discover_stacks()
+
+        assert [s.id for s in manager.discovered_stacks] == ["app"]
+
     # TODO: Add tests for default_stack_id_source = "samconfig_stack_name" once _analyze_stacks is testable
 
 
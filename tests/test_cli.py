@@ -1,4 +1,6 @@
 # tests/test_cli.py
+import json
+
 import pytest
 from click.testing import CliRunner
 from pathlib import Path
@@ -10,17 +12,31 @@ from samstacks.bootstrap import BootstrapManager  # We need to mock this
 
 
 # Helper to create a minimal valid stack directory
-def create_stack_dir_with_template(base_path: Path, stack_dir_name: str) -> Path:
+def create_stack_dir_with_template(
+    base_path: Path,
+    stack_dir_name: str,
+    parameters: tuple[str, ...] = (),
+    outputs: tuple[str, ...] = (),
+) -> Path:
     stack_dir = base_path / stack_dir_name
     stack_dir.mkdir(parents=True, exist_ok=True)
-    # A minimal valid SAM template
-    (stack_dir / "template.yaml").write_text(
+    # A minimal valid SAM template, declaring what the pipeline references
+    template = (
         "AWSTemplateFormatVersion: '2010-09-09'\n"
         "Description: Minimal stack for CLI test\n"
         "Resources:\n"
         "  MyBucket: \n"
         "    Type: AWS::S3::Bucket\n"
     )
+    if parameters:
+        template += "Parameters:\n" + "".join(
+            f"  {name}:\n    Type: String\n" for name in parameters
+        )
+    if outputs:
+        template += "Outputs:\n" + "".join(
+            f"  {name}:\n    Value: !Ref MyBucket\n" for name in outputs
+        )
+    (stack_dir / "template.yaml").write_text(template)
     return stack_dir
 
 
@@ -77,7 +93,9 @@ class TestCliDeployCommand:
         pipeline_file = tmp_path / "pipeline.yml"
         with open(pipeline_file, "w") as f:
             yaml.dump(pipeline_data, f)
-        stack1_dir = create_stack_dir_with_template(tmp_path, "stack1")
+        stack1_dir = create_stack_dir_with_template(
+            tmp_path, "stack1", parameters=("BucketName",)
+        )
 
         sam_build_called_flag_obj = {"called": False}
         sam_deploy_called_flag_obj = {"called": False}
@@ -134,6 +152,246 @@ class TestCliDeployCommand:
         assert "--config-file" not in deploy_call_args_actual
         assert "--stack-name" not in deploy_call_args_actual
 
+    def test_deploy_with_isolated_configs_leaves_stack_dir_untouched(
+        self, tmp_path: Path, mocker, mock_aws_utilities
+    ):
+        pipeline_data = {
+            "pipeline_name": "IsolatedPipe",
+            "pipeline_settings": {"stack_name_prefix": "IsolatedPipe-"},
+            "stacks": [{"id": "s1", "dir": "./stack1/", "params": {"BucketName": "b"}}],
+        }
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        stack1_dir = create_stack_dir_with_template(
+            tmp_path, "stack1", parameters=("BucketName",)
+        )
+        run_configs = []
+
+        def stderr_capture_side_effect_fn(cmd, cwd, env_dict):
+            config_path = Path(cwd) / cmd[cmd.index("--config-file") + 1]
+            run_configs.append(yaml.safe_load(config_path.read_text()))
+            return (0, "")
+
+        mock_stderr_capture_helper = mocker.patch(
+            "samstacks.core._run_command_with_stderr_capture",
+            side_effect=stderr_capture_side_effect_fn,
+        )
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["deploy", "--isolated-configs", str(pipeline_file)]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert [
+            call.args[0][:2] for call in mock_stderr_capture_helper.call_args_list
+        ] == [
+            ["sam", "build"],
+            ["sam", "deploy"],
+        ]
+        run_dir = Path(mock_stderr_capture_helper.call_args_list[0].kwargs["cwd"])
+        assert not run_dir.is_relative_to(stack1_dir)
+        assert not run_dir.exists()  # Removed when the run ends
+        assert sorted(p.name for p in stack1_dir.iterdir()) == ["template.yaml"]
+        config = run_configs[0]["default"]
+        assert config["build"]["parameters"]["template_file"] == str(
+            stack1_dir / "template.yaml"
+        )
+        assert config["deploy"]["parameters"]["stack_name"] == "IsolatedPipe-s1"
+        assert config["deploy"]["parameters"]["parameter_overrides"] == ["BucketName=b"]
+
+    def test_deploy_with_trace_file_exports_stack_phase_spans(
+        self, tmp_path: Path, mocker
+    ):
+        pipeline_data = {
+            "pipeline_name": "TracePipe",
+            "pipeline_settings": {"default_region": "us-west-2"},
+            "stacks": [{"id": "s1", "dir": "./stack1/"}],
+        }
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        create_stack_dir_with_template(tmp_path, "stack1")
+
+        mocker.patch(
+            "samstacks.core._run_command_with_stderr_capture", return_value=(0, "")
+        )
+        mocker.patch("samstacks.core.get_stack_outputs", return_value={})
+        mocker.patch("samstacks.core.get_stack_status", return_value="CREATE_COMPLETE")
+        trace_file = tmp_path / "trace.json"
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["--trace-file", str(trace_file), "deploy", str(pipeline_file)]
+        )
+
+        assert result.exit_code == 0, result.output
+        events = json.loads(trace_file.read_text())["traceEvents"]
+        spans = {event["name"]: event for event in events if event["ph"] == "X"}
+        for name in [
+            "deploy pipeline",
+            "parse manifest",
+            "validate schema",
+            "validate semantics",
+            "resolve templates",
+            "generate samconfig",
+            "sam build",
+            "sam deploy",
+            "retrieve outputs",
+            "deploy stack",
+        ]:
+            assert name in spans, f"missing span '{name}'"
+        assert spans["sam deploy"]["args"] == {
+            "stack_id": "s1",
+            "region": "us-west-2",
+            "outcome": "ok",
+        }
+
+    def test_deploy_with_metrics_file_writes_openmetrics(self, tmp_path: Path, mocker):
+        pipeline_data = {
+            "pipeline_name": "MetricsPipe",
+            "stacks": [
+                {"id": "s1", "dir": "./stack1/"},
+                {"id": "s2", "dir": "./stack2/", "if": "false"},
+            ],
+        }
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        create_stack_dir_with_template(tmp_path, "stack1")
+        create_stack_dir_with_template(tmp_path, "stack2")
+
+        mocker.patch("samstacks.core.subprocess.run").return_value = mock.Mock(
+            returncode=0, stderr=""
+        )
+        mocker.patch("samstacks.core.get_stack_outputs", return_value={})
+        mocker.patch("samstacks.core.get_stack_status", return_value="CREATE_COMPLETE")
+        metrics_file = tmp_path / "samstacks.prom"
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["deploy", str(pipeline_file), "--metrics-file", str(metrics_file)]
+        )
+
+        assert result.exit_code == 0, result.output
+        content = metrics_file.read_text()
+        assert content.endswith("# EOF\n")
+        assert 'samstacks_stacks_total{operation="deploy",outcome="deployed"} 1' in (
+            content
+        )
+        assert 'samstacks_stacks_total{operation="deploy",outcome="skipped"} 1' in (
+            content
+        )
+        assert 'samstacks_subprocess_runs_total{command="sam build",exit_code="0"}' in (
+            content
+        )
+        assert (
+            'samstacks_phase_duration_seconds_count{phase="sam deploy",stack_id="s1"} 1'
+            in content
+        )
+        assert 'samstacks_samconfig_writes_total{mode="local"}' in content
+        assert 'samstacks_run_success{command="deploy"} 1' in content
+
+    def test_deploy_report_includes_timing_analysis(self, tmp_path: Path, mocker):
+        pipeline_data = {
+            "pipeline_name": "TimingPipe",
+            "stacks": [
+                {"id": "network", "dir": "./stack1/"},
+                {
+                    "id": "app",
+                    "dir": "./stack2/",
+                    "params": {"Vpc": "${{ stacks.network.outputs.VpcId }}"},
+                },
+            ],
+        }
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        create_stack_dir_with_template(tmp_path, "stack1", outputs=("VpcId",))
+        create_stack_dir_with_template(tmp_path, "stack2", parameters=("Vpc",))
+
+        mocker.patch(
+            "samstacks.core._run_command_with_stderr_capture", return_value=(0, "")
+        )
+        mocker.patch(
+            "samstacks.core.get_stack_outputs", return_value={"VpcId": "vpc-123"}
+        )
+        mocker.patch("samstacks.core.get_stack_status", return_value="CREATE_COMPLETE")
+        report_file = tmp_path / "report.md"
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["deploy", str(pipeline_file), "--report-file", str(report_file)]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Deployment Timing" in result.output
+        report = report_file.read_text()
+        assert "## Deployment Timing" in report
+        assert "- **Critical path**: `network` → `app`" in report
+        assert "#### Slowest phases" in report
+
+    def test_deploy_uses_history_for_eta_and_critical_path_schedule(
+        self, tmp_path: Path, mocker
+    ):
+        from samstacks.history import RunHistory
+
+        pipeline_data = {
+            "pipeline_name": "HistoryPipe",
+            "stacks": [
+                {"id": "quick", "dir": "./stack1/"},
+                {"id": "slow", "dir": "./stack2/"},
+            ],
+        }
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        create_stack_dir_with_template(tmp_path, "stack1")
+        create_stack_dir_with_template(tmp_path, "stack2")
+        history_file = tmp_path / "runs.sqlite"
+        with RunHistory(history_file) as run_history:
+            run_history.record_run(
+                "HistoryPipe",
+                True,
+                {"quick": 5.0, "slow": 600.0},
+                {"quick": "deployed", "slow": "deployed"},
+                [],
+            )
+
+        deployed_dirs = []
+
+        def run_sam(cmd, cwd, env_dict):
+            if cmd[:2] == ["sam", "deploy"]:
+                deployed_dirs.append(Path(cwd).name)
+            return (0, "")
+
+        mocker.patch(
+            "samstacks.core._run_command_with_stderr_capture", side_effect=run_sam
+        )
+        mocker.patch("samstacks.core.get_stack_outputs", return_value={})
+        mocker.patch("samstacks.core.get_stack_status", return_value="CREATE_COMPLETE")
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            [
+                "deploy",
+                str(pipeline_file),
+                "--history-file",
+                str(history_file),
+                "--schedule",
+                "critical-path",
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert deployed_dirs == ["stack2", "stack1"]
+        assert "Estimated time remaining (2 of 2 stacks)" in result.output
+        assert "10m 5s" in result.output
+        with RunHistory(history_file) as run_history:
+            assert set(run_history.stack_estimates("HistoryPipe")) == {"quick", "slow"}
+
     def test_deploy_with_existing_samconfig_toml_backup(
         self, tmp_path: Path, mocker, mock_aws_utilities
     ):
@@ -220,7 +478,7 @@ class TestCliBootstrapCommand:
         mock_instance.stack_name_prefix = None  # Default for one test path
 
         mock_constructor = mocker.patch(
-            "samstacks.cli.BootstrapManager", return_value=mock_instance
+            "samstacks.bootstrap.BootstrapManager", return_value=mock_instance
         )
         return mock_constructor, mock_instance
 
@@ -242,6 +500,8 @@ class TestCliBootstrapCommand:
             pipeline_name=None,  # Default
             stack_name_prefix=None,  # Default
             overwrite=False,  # Default
+            ignore_patterns=(),  # Default
+            use_gitignore=True,  # Default
         )
         mock_instance.bootstrap_pipeline.assert_called_once()
 
@@ -267,6 +527,11 @@ class TestCliBootstrapCommand:
                 "--stack-name-prefix",
                 "test-",
                 "--overwrite",
+                "--ignore",
+                "legacy",
+                "--ignore",
+                "build/*",
+                "--no-gitignore",
             ],
         )
 
@@ -278,6 +543,8 @@ class TestCliBootstrapCommand:
             pipeline_name="MyCustomPipeline",
             stack_name_prefix="test-",
             overwrite=True,
+            ignore_patterns=("legacy", "build/*"),
+            use_gitignore=False,
         )
         mock_instance.bootstrap_pipeline.assert_called_once()
 
@@ -303,6 +570,8 @@ class TestCliBootstrapCommand:
             pipeline_name=None,
             stack_name_prefix=None,
             overwrite=False,
+            ignore_patterns=(),
+            use_gitignore=True,
         )
         mock_instance.bootstrap_pipeline.assert_called_once()
 
@@ -350,3 +619,375 @@ class TestCliBootstrapCommand:
             f"Invalid value for '[SCAN_PATH]': Directory '{str(non_existent_path.resolve())}' does not exist."
             in result.output
         )
+
+
+class TestCliGraphCommand:
+    def write_pipeline(self, tmp_path: Path) -> Path:
+        pipeline_data = {
+            "pipeline_name": "GraphPipe",
+            "stacks": [
+                {"id": "network", "dir": "./stack1/"},
+                {"id": "queue", "dir": "./stack2/"},
+                {
+                    "id": "app",
+                    "dir": "./stack3/",
+                    "params": {
+                        "Vpc": "${{ stacks.network.outputs.VpcId }}",
+                        "Queue": "${{ stacks.queue.outputs.QueueUrl }}",
+                    },
+                },
+            ],
+        }
+        create_stack_dir_with_template(tmp_path, "stack1", outputs=("VpcId",))
+        create_stack_dir_with_template(tmp_path, "stack2", outputs=("QueueUrl",))
+        create_stack_dir_with_template(tmp_path, "stack3", parameters=("Vpc", "Queue"))
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        return pipeline_file
+
+    def test_graph_json_with_history_durations(self, tmp_path: Path, mocker):
+        from samstacks.history import RunHistory
+
+        pipeline_file = self.write_pipeline(tmp_path)
+        history_file = tmp_path / "runs.sqlite"
+        with RunHistory(history_file) as run_history:
+            run_history.record_run(
+                "GraphPipe", True, {"queue": 30.0}, {"queue": "deployed"}, []
+            )
+        get_outputs = mocker.patch("samstacks.core.get_stack_outputs")
+
+        result = CliRunner().invoke(
+            cli,
+            [
+                "graph",
+                str(pipeline_file),
+                "--format",
+                "json",
+                "--history-file",
+                str(history_file),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.output)
+        assert [level["stacks"] for level in data["levels"]] == [
+            ["network", "queue"],
+            ["app"],
+        ]
+        assert data["max_parallelism"] == 2
+        assert data["stacks"][1]["estimated_seconds"] == 30.0
+        assert data["critical_path"]["stacks"] == ["queue", "app"]
+        get_outputs.assert_not_called()
+
+    def test_graph_json_stays_parseable_with_validation_warnings(self, tmp_path: Path):
+        pipeline_file = self.write_pipeline(tmp_path)
+        manifest = yaml.safe_load(pipeline_file.read_text())
+        manifest["stacks"][2]["params"]["Undeclared"] = "value"
+        pipeline_file.write_text(yaml.dump(manifest))
+
+        result = CliRunner().invoke(
+            cli, ["graph", str(pipeline_file), "--format", "json", "--no-history"]
+        )
+
+        assert result.exit_code == 0, result.output
+        data = json.loads(result.stdout)
+        assert [stack["id"] for stack in data["stacks"]] == ["network", "queue", "app"]
+        assert "Parameter 'Undeclared' is not declared" in result.stderr
+
+    def test_graph_does_not_create_history_database(self, tmp_path: Path):
+        pipeline_file = self.write_pipeline(tmp_path)
+        output_file = tmp_path / "graph.dot"
+
+        result = CliRunner().invoke(
+            cli, ["graph", str(pipeline_file), "-o", str(output_file)]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert '"queue" -> "app";' in output_file.read_text()
+        assert not (tmp_path / "history.sqlite").exists()
+
+
+class TestCliRenderCommand:
+    def write_pipeline(self, tmp_path: Path) -> Path:
+        pipeline_data = {
+            "pipeline_name": "RenderPipe",
+            "pipeline_settings": {
+                "stack_name_prefix": "RenderPipe-",
+                "default_region": "us-west-2",
+            },
+            "stacks": [
+                {"id": "network", "dir": "./stack1/"},
+                {
+                    "id": "app",
+                    "dir": "./stack2/",
+                    "params": {
+                        "Vpc": "${{ stacks.network.outputs.VpcId }}",
+                        "Subnet": "${{ stacks.network.outputs.SubnetId }}",
+                    },
+                },
+                {"id": "extra", "dir": "./stack3/", "if": "${{ env.MISSING }}"},
+            ],
+        }
+        create_stack_dir_with_template(
+            tmp_path, "stack1", outputs=("VpcId", "SubnetId")
+        )
+        create_stack_dir_with_template(tmp_path, "stack2", parameters=("Vpc", "Subnet"))
+        create_stack_dir_with_template(tmp_path, "stack3")
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        return pipeline_file
+
+    def rendered_overrides(self, output_dir: Path, stack_id: str) -> list:
+        config = yaml.safe_load((output_dir / stack_id / "samconfig.yaml").read_text())
+        return sorted(config["default"]["deploy"]["parameters"]["parameter_overrides"])
+
+    def test_offline_render_uses_given_values_and_placeholders(
+        self, tmp_path: Path, mocker
+    ):
+        pipeline_file = self.write_pipeline(tmp_path)
+        output_dir = tmp_path / "rendered"
+        get_outputs = mocker.patch("samstacks.core.get_all_stack_outputs")
+        run_command = mocker.patch("samstacks.core._run_command_with_stderr_capture")
+        args = [
+            "render",
+            str(pipeline_file),
+            "-o",
+            str(output_dir),
+            "--offline",
+            "--output-value",
+            "network.VpcId=vpc-123",
+        ]
+
+        result = CliRunner().invoke(cli, args)
+
+        assert result.exit_code == 0, result.output
+        assert self.rendered_overrides(output_dir, "app") == [
+            "Subnet=<stacks.network.outputs.SubnetId>",
+            "Vpc=vpc-123",
+        ]
+        assert (output_dir / "network" / "samconfig.yaml").exists()
+        assert not (output_dir / "extra").exists()
+        assert not (tmp_path / "stack1" / "samconfig.yaml").exists()
+        get_outputs.assert_not_called()
+        run_command.assert_not_called()
+
+        config_file = output_dir / "app" / "samconfig.yaml"
+        mtime = config_file.stat().st_mtime_ns
+        result = CliRunner().invoke(cli, args)
+
+        assert result.exit_code == 0, result.output
+        assert config_file.stat().st_mtime_ns == mtime
+
+    def test_render_looks_up_outputs_once_per_region(self, tmp_path: Path, mocker):
+        pipeline_file = self.write_pipeline(tmp_path)
+        output_dir = tmp_path / "rendered"
+        get_outputs = mocker.patch(
+            "samstacks.core.get_all_stack_outputs",
+            return_value={
+                "RenderPipe-network": {"VpcId": "vpc-live", "SubnetId": "subnet-live"}
+            },
+        )
+
+        result = CliRunner().invoke(
+            cli,
+            [
+                "render",
+                str(pipeline_file),
+                "-o",
+                str(output_dir),
+                "--output-value",
+                "network.SubnetId=subnet-given",
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        get_outputs.assert_called_once_with("us-west-2", None)
+        assert self.rendered_overrides(output_dir, "app") == [
+            "Subnet=subnet-given",
+            "Vpc=vpc-live",
+        ]
+
+    def test_external_config_stack_is_rendered_as_deploy_writes_it(
+        self, tmp_path: Path, mocker
+    ):
+        pipeline_data = {
+            "pipeline_name": "RenderPipe",
+            "pipeline_settings": {
+                "stack_name_prefix": "RenderPipe-",
+                "default_region": "us-west-2",
+                "default_sam_config": {
+                    "version": 0.1,
+                    "default": {
+                        "deploy": {"parameters": {"capabilities": "CAPABILITY_IAM"}}
+                    },
+                },
+            },
+            "stacks": [
+                {
+                    "id": "app",
+                    "dir": "./stack1/",
+                    "config": "configs/app/samconfig.yaml",
+                    "params": {"BucketName": "b"},
+                }
+            ],
+        }
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(pipeline_data, f)
+        stack_dir = create_stack_dir_with_template(
+            tmp_path, "stack1", parameters=("BucketName",)
+        )
+        # Local samconfigs are only merged in local mode
+        (stack_dir / "samconfig.toml").write_text(
+            'version = 0.1\n[default.deploy.parameters]\ns3_prefix = "local-only"\n'
+        )
+        config_file = tmp_path / "configs" / "app" / "samconfig.yaml"
+        mocker.patch("samstacks.aws_utils.get_stack_outputs", return_value={})
+        mocker.patch("samstacks.aws_utils.get_stack_status", return_value=None)
+        mocker.patch(
+            "samstacks.aws_utils.list_failed_no_update_changesets", return_value=[]
+        )
+        mocker.patch(
+            "samstacks.core._run_command_with_stderr_capture", return_value=(0, "")
+        )
+        result = CliRunner().invoke(cli, ["deploy", str(pipeline_file)])
+        assert result.exit_code == 0, result.output
+        deployed = config_file.read_text()
+        config_file.unlink()
+
+        result = CliRunner().invoke(
+            cli,
+            ["render", str(pipeline_file), "-o", str(tmp_path / "out"), "--offline"],
+        )
+
+        assert result.exit_code == 0, result.output
+        # Written under the output directory, with template references
+        # relative to the config path deploy uses
+        rendered = tmp_path / "out" / "app" / "samconfig.yaml"
+        assert rendered.read_text() == deployed
+        assert not config_file.exists()
+        assert "local-only" not in deployed
+        assert "template: ../../stack1/template.yaml" in deployed
+
+    def test_malformed_output_value_is_rejected(self, tmp_path: Path):
+        pipeline_file = self.write_pipeline(tmp_path)
+
+        result = CliRunner().invoke(
+            cli,
+            [
+                "render",
+                str(pipeline_file),
+                "-o",
+                str(tmp_path / "rendered"),
+                "--output-value",
+                "VpcId=vpc-123",
+            ],
+        )
+
+        assert result.exit_code == 2
+        assert "stack_id.OutputName=value" in result.output
+
+
+class TestCliProfileOption:
+    def test_profile_writes_pstats_and_summary(self, tmp_path: Path):
+        create_stack_dir_with_template(tmp_path, "stack1")
+        pipeline_file = tmp_path / "pipeline.yml"
+        with open(pipeline_file, "w") as f:
+            yaml.dump(
+                {
+                    "pipeline_name": "ProfilePipe",
+                    "stacks": [{"id": "s1", "dir": "./stack1/"}],
+                },
+                f,
+            )
+        profile_file = tmp_path / "validate.pstats"
+
+        result = CliRunner().invoke(
+            cli,
+            [
+                "--profile",
+                str(profile_file),
+                "--profile-memory",
+                "validate",
+                str(pipeline_file),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert profile_file.exists()
+        assert "functions by cumulative time" in result.stderr
+        assert "allocation sites by memory growth" in result.stderr
+        assert "cumulative time" not in result.stdout
+
+    def test_profile_memory_requires_profile(self, tmp_path: Path):
+        result = CliRunner().invoke(
+            cli, ["--profile-memory", "validate", str(tmp_path)]
+        )
+
+        assert result.exit_code != 0
+        assert "--profile-memory requires --profile" in result.output
+
+
+class TestCliValidateCommand:
+    def write_pipeline(self, tmp_path: Path) -> Path:
+        create_stack_dir_with_template(tmp_path, "stack1")
+        pipeline_file = tmp_path / "pipeline.yml"
+        pipeline_file.write_text(
+            "pipeline_name: ValidatePipe\nstacks:\n  - id: app\n    dir: ./stack1/\n"
+        )
+        return pipeline_file
+
+    def test_unchanged_manifest_is_validated_from_cache(self, tmp_path: Path):
+        pipeline_file = self.write_pipeline(tmp_path)
+        runner = CliRunner()
+
+        first = runner.invoke(cli, ["validate", str(pipeline_file)])
+        with mock.patch("samstacks.core.Pipeline.from_file") as from_file:
+            second = runner.invoke(cli, ["validate", str(pipeline_file)])
+
+        assert first.exit_code == 0, first.output
+        assert "(cached)" not in first.output
+        assert second.exit_code == 0, second.output
+        assert "Manifest file is valid! (cached)" in second.output
+        from_file.assert_not_called()
+
+    def test_changed_template_is_validated_again(self, tmp_path: Path):
+        pipeline_file = self.write_pipeline(tmp_path)
+        runner = CliRunner()
+        runner.invoke(cli, ["validate", str(pipeline_file)])
+
+        (tmp_path / "stack1" / "template.yaml").rename(
+            tmp_path / "stack1" / "other.yaml"
+        )
+        result = runner.invoke(cli, ["validate", str(pipeline_file)])
+
+        assert result.exit_code == 1
+        assert "No template.yaml or template.yml" in result.output
+
+    def test_no_validation_cache_always_validates(self, tmp_path: Path):
+        pipeline_file = self.write_pipeline(tmp_path)
+        runner = CliRunner()
+
+        for _ in range(2):
+            result = runner.invoke(
+                cli, ["validate", str(pipeline_file), "--no-validation-cache"]
+            )
+            assert result.exit_code == 0, result.output
+            assert "(cached)" not in result.output
+        assert not (tmp_path / "validation-cache").exists()
+
+    def test_watch_reports_errors_until_interrupted(self, tmp_path: Path):
+        pipeline_file = self.write_pipeline(tmp_path)
+        (tmp_path / "stack1" / "template.yaml").unlink()
+
+        with mock.patch("samstacks.cli.time.sleep", side_effect=KeyboardInterrupt):
+            result = CliRunner().invoke(
+                cli, ["validate", str(pipeline_file), "--watch"]
+            )
+
+        assert result.exit_code == 0, result.output
+        assert "Watching" in result.output
+        assert "No template.yaml or template.yml" in result.output
+        assert "Validation errors" in result.output
@@ -201,6 +201,34 @@ class TestPipelineInputLogic:
         ):
             Pipeline.from_dict(manifest_dict, manifest_base_dir=Path("."))
 
+    def test_validate_builds_resolved_input_table_for_templates(self, mocker):
+        manifest_dict = {
+            **MINIMAL_MANIFEST_DICT,
+            "pipeline_settings": {
+                "inputs": {
+                    "count": {"type": "number"},
+                    "env_name": {"type": "string", "default": "dev"},
+                }
+            },
+        }
+        pipeline = Pipeline.from_dict(
+            manifest_dict, cli_inputs={"count": " 3 "}, manifest_base_dir=Path(".")
+        )
+        pipeline.validate()
+
+        assert pipeline.resolved_inputs["count"].value == 3
+        assert pipeline.resolved_inputs["count"].source == "cli"
+        assert pipeline.resolved_inputs["env_name"].source == "default"
+
+        coerce = mocker.patch("samstacks.input_utils.process_cli_input_value")
+        assert (
+            pipeline.template_processor.process_string(
+                "${{ inputs.env_name }}-${{ inputs.count * 2 }}"
+            )
+            == "dev-6"
+        )
+        coerce.assert_not_called()
+
 
 class TestPipelineStorageOfPydanticModelsAndSamConfig:
     """Tests that Pydantic models and SAM config fields are stored correctly."""
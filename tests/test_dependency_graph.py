@@ -0,0 +1,225 @@
+"""
+Tests for the stack dependency graph and timing analysis.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from samstacks.dependency_graph import (
+    StackGraph,
+    extract_stack_references,
+    render_graph,
+    stack_model_references,
+    template_expressions,
+)
+from samstacks.pipeline_models import StackModel
+from samstacks.reporting import build_timing_report, generate_markdown_report_string
+
+
+def diamond_graph() -> StackGraph:
+    # network -> (db, queue) -> app
+    return StackGraph(
+        ["network", "db", "queue", "app"],
+        {"db": ["network"], "queue": ["network"], "app": ["db", "queue"]},
+    )
+
+
+class TestStackReferences:
+    """Test extraction of stack references from template expressions."""
+
+    def test_extracts_references_from_nested_values(self):
+        value = {
+            "VpcId": "${{ stacks.network.outputs.VpcId }}",
+            "Nested": ["${{ stacks.db.outputs.Url || stacks.cache.outputs.Url }}"],
+            "Plain": "stacks.ignored.outputs.NotATemplate",
+        }
+
+        assert extract_stack_references(value) == {"network", "db", "cache"}
+
+    def test_template_expressions_are_stripped_bodies(self):
+        value = "${{ stacks.a.outputs.X }}-${{env.STAGE || 'dev'}}"
+
+        assert template_expressions(value) == [
+            "stacks.a.outputs.X",
+            "env.STAGE || 'dev'",
+        ]
+        assert template_expressions("stacks.a.outputs.X") == []
+
+    def test_stack_model_references_cover_all_templated_fields(self):
+        stack = StackModel(
+            id="app",
+            dir=Path("app"),
+            params={"Vpc": "${{ stacks.network.outputs.VpcId }}"},
+            **{"if": "${{ stacks.flags.outputs.Enabled == 'true' }}"},
+            run="echo ${{ stacks.app.outputs.Url }} ${{ stacks.db.outputs.Url }}",
+            sam_config_overrides={
+                "default": {
+                    "deploy": {
+                        "parameters": {"tags": "${{ stacks.tags.outputs.Tags }}"}
+                    }
+                }
+            },
+        )
+
+        assert stack_model_references(stack) == {"network", "flags", "db", "tags"}
+
+
+class TestStackGraph:
+    """Test graph ordering and scheduling estimates."""
+
+    def test_topological_levels_group_independent_stacks(self):
+        assert diamond_graph().topological_levels() == [
+            ["network"],
+            ["db", "queue"],
+            ["app"],
+        ]
+
+    def test_cycle_is_reported(self):
+        graph = StackGraph(["a", "b"], {"a": ["b"], "b": ["a"]})
+
+        with pytest.raises(ValueError, match="cycle among: a, b"):
+            graph.topological_order()
+
+    def test_critical_path_follows_longest_chain(self):
+        durations = {"network": 10.0, "db": 60.0, "queue": 5.0, "app": 20.0}
+
+        path, total = diamond_graph().critical_path(durations)
+
+        assert path == ["network", "db", "app"]
+        assert total == 90.0
+
+    @pytest.mark.parametrize(
+        "workers, expected",
+        [(1, 95.0), (2, 90.0), (None, 90.0)],
+    )
+    def test_estimate_makespan(self, workers, expected):
+        durations = {"network": 10.0, "db": 60.0, "queue": 5.0, "app": 20.0}
+
+        assert diamond_graph().estimate_makespan(durations, workers) == expected
+
+    def test_priority_order_starts_longest_chain_first(self):
+        graph = StackGraph(
+            ["small", "base", "top"],
+            {"top": ["base"]},
+        )
+
+        assert graph.priority_order({}) == ["small", "base", "top"]
+        assert graph.priority_order({"small": 30.0, "base": 10.0, "top": 25.0}) == [
+            "base",
+            "small",
+            "top",
+        ]
+
+    def test_estimate_makespan_prefers_longest_remaining_path(self):
+        # With one spare worker, starting 'slow' first lets 'after' overlap 'fast'
+        graph = StackGraph(
+            ["fast", "slow", "after"],
+            {"after": ["slow"]},
+        )
+        durations = {"fast": 10.0, "slow": 10.0, "after": 10.0}
+
+        assert graph.estimate_makespan(durations, workers=2) == 20.0
+
+
+class TestTimingReport:
+    """Test the timing analysis added to deployment reports."""
+
+    def test_build_timing_report(self):
+        phases = [
+            {"stack_id": "db", "phase": "sam deploy", "seconds": 50.0},
+            {"stack_id": "db", "phase": "sam build", "seconds": 8.0},
+            {"stack_id": "app", "phase": "sam deploy", "seconds": 15.0},
+        ]
+
+        timing = build_timing_report(
+            diamond_graph(),
+            {"network": 10.0, "db": 60.0, "queue": 5.0, "app": 20.0},
+            phases,
+            parallelism_levels=(2, None),
+        )
+
+        assert timing is not None
+        assert timing["sequential_seconds"] == 95.0
+        assert timing["critical_path"] == ["network", "db", "app"]
+        assert [p["workers"] for p in timing["parallelism"]] == [2, None]
+        assert timing["parallelism"][0]["savings_seconds"] == 5.0
+        assert [p["seconds"] for p in timing["slowest_phases"]] == [50.0, 15.0, 8.0]
+
+    def test_build_timing_report_without_durations(self):
+        assert build_timing_report(diamond_graph(), {}, []) is None
+
+    def test_build_timing_report_skips_cyclic_graph(self):
+        # A cycle through sam_config_overrides passes validation
+        graph = StackGraph(["a", "b"], {"a": ["b"], "b": ["a"]})
+
+        assert build_timing_report(graph, {"a": 1.0, "b": 2.0}, []) is None
+
+    def test_markdown_report_includes_timing_section(self):
+        timing = build_timing_report(
+            diamond_graph(),
+            {"network": 10.0, "db": 60.0},
+            [{"stack_id": "db", "phase": "sam deploy", "seconds": 50.0}],
+        )
+        report_items = [
+            {
+                "stack_id_from_pipeline": "network",
+                "deployed_stack_name": "network",
+                "cfn_status": "CREATE_COMPLETE",
+                "parameters": {},
+                "outputs": {},
+            }
+        ]
+
+        report = generate_markdown_report_string(report_items, "Pipe", timing=timing)
+
+        assert "## Deployment Timing" in report
+        assert "- **Critical path**: `network` → `db` (1m 10s)" in report
+        assert "| unbounded | 1m 10s | 0.0s (0%) |" in report
+        assert "| db | sam deploy | 50.0s | 71% |" in report
+
+
+class TestGraphRendering:
+    """Test DOT, Mermaid and JSON output of the graph."""
+
+    def test_dot_has_one_rank_per_level_and_duration_labels(self):
+        dot = render_graph(diamond_graph(), "dot", "Pipe", {"db": 65.0})
+
+        assert dot.startswith('digraph "Pipe" {')
+        assert '  { rank=same; "db"; "queue"; }' in dot
+        assert '  "db" [label="db\\n1m 5s", penwidth=2];' in dot
+        assert '  "network" -> "db";' in dot
+
+    def test_mermaid_uses_safe_node_ids(self):
+        graph = StackGraph(["my-net", "app"], {"app": ["my-net"]})
+
+        mermaid = render_graph(graph, "mermaid", "Pipe")
+
+        assert '  subgraph level0["Level 0 (width 1)"]' in mermaid
+        assert '    s0["my-net"]' in mermaid
+        assert "  s0 --> s1" in mermaid
+
+    def test_json_reports_levels_and_critical_path(self):
+        data = json.loads(
+            render_graph(
+                diamond_graph(), "json", "Pipe", {"network": 1.0, "queue": 9.0}
+            )
+        )
+
+        assert data["max_parallelism"] == 2
+        assert [level["width"] for level in data["levels"]] == [1, 2, 1]
+        assert data["stacks"][3] == {
+            "id": "app",
+            "level": 2,
+            "dependencies": ["db", "queue"],
+            "estimated_seconds": None,
+        }
+        assert data["critical_path"] == {
+            "stacks": ["network", "queue", "app"],
+            "estimated_seconds": 10.0,
+        }
+
+    def test_unknown_format_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown graph format"):
+            render_graph(diamond_graph(), "svg", "Pipe")
@@ -0,0 +1,138 @@
+"""
+Tests for the single-pass stack directory walker used by bootstrap.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from samstacks.discovery import (
+    find_stack_directories,
+    is_ignored,
+    parse_ignore_patterns,
+)
+
+
+def touch(path: Path, content: str = "") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def relative_dirs(root: Path, **kwargs) -> list:
+    return [
+        d.path.relative_to(root).as_posix()
+        for d in find_stack_directories(root, **kwargs)
+    ]
+
+
+class TestIgnorePatterns:
+    """Test the .gitignore subset used to prune directories."""
+
+    @pytest.mark.parametrize(
+        "pattern, rel_path, ignored",
+        [
+            ("node_modules", "a/b/node_modules", True),
+            ("node_modules/", "node_modules", True),
+            ("/build", "build", True),
+            ("/build", "src/build", False),
+            ("src/build", "src/build", True),
+            ("src/build", "other/src/build", False),
+            ("**/cache", "a/b/cache", True),
+            ("**/cache", "cache", True),
+            ("tmp-*", "tmp-1", True),
+            ("tmp-?", "tmp-12", False),
+            ("docs/**", "docs/api", True),
+            ("stack[0-9]", "stack1", True),
+            ("stack[!0-9]", "stack1", False),
+            ("# comment", "# comment", False),
+        ],
+    )
+    def test_pattern_matches(self, pattern, rel_path, ignored):
+        rules = parse_ignore_patterns([pattern])
+
+        assert is_ignored(rules, rel_path, rel_path.rsplit("/", 1)[-1]) is ignored
+
+    def test_last_matching_pattern_wins(self):
+        rules = parse_ignore_patterns(["build-*", "!build-keep"])
+
+        assert is_ignored(rules, "build-tmp", "build-tmp")
+        assert not is_ignored(rules, "build-keep", "build-keep")
+
+    def test_anchored_patterns_are_relative_to_their_gitignore(self):
+        rules = parse_ignore_patterns(["/out"], base="services")
+
+        assert is_ignored(rules, "services/out", "out")
+        assert not is_ignored(rules, "services/api/out", "out")
+
+
+class TestFindStackDirectories:
+    """Test which directories are found and which are never entered."""
+
+    def test_finds_templates_and_samconfig_variants_in_one_pass(self, tmp_path: Path):
+        touch(tmp_path / "template.yaml")
+        touch(tmp_path / "api" / "template.yml")
+        touch(tmp_path / "api" / "samconfig.yml")
+        touch(tmp_path / "api" / "samconfig.yaml")
+        touch(tmp_path / "both" / "template.yaml")
+        touch(tmp_path / "both" / "template.yml")
+        touch(tmp_path / "both" / "samconfig.toml")
+        touch(tmp_path / "both" / "samconfig.yaml")
+        touch(tmp_path / "empty" / "README.md")
+
+        found = find_stack_directories(tmp_path)
+
+        assert [(d.path, d.template_path, d.samconfig_path) for d in found] == [
+            (tmp_path, tmp_path / "template.yaml", None),
+            (
+                tmp_path / "api",
+                tmp_path / "api" / "template.yml",
+                tmp_path / "api" / "samconfig.yaml",
+            ),
+            (
+                tmp_path / "both",
+                tmp_path / "both" / "template.yaml",
+                tmp_path / "both" / "samconfig.toml",
+            ),
+        ]
+
+    def test_ignored_directories_are_not_entered(self, tmp_path: Path, mocker):
+        touch(tmp_path / "app" / "template.yaml")
+        for ignored in [".aws-sam", "node_modules", ".git", ".venv", "cdk.out"]:
+            touch(tmp_path / "app" / ignored / "nested" / "template.yaml")
+        scandir = mocker.patch("samstacks.discovery.os.scandir", wraps=os.scandir)
+
+        assert relative_dirs(tmp_path) == ["app"]
+        assert sorted(Path(call.args[0]) for call in scandir.call_args_list) == [
+            tmp_path,
+            tmp_path / "app",
+        ]
+
+    def test_extra_ignore_patterns_replace_the_defaults(self, tmp_path: Path):
+        touch(tmp_path / "legacy" / "template.yaml")
+        touch(tmp_path / "stacks" / "build" / "template.yaml")
+        touch(tmp_path / "node_modules" / "pkg" / "template.yaml")
+
+        assert relative_dirs(tmp_path, ignore_patterns=["legacy", "stacks/build"]) == [
+            "node_modules/pkg"
+        ]
+
+    def test_gitignore_files_apply_below_their_directory(self, tmp_path: Path):
+        touch(tmp_path / ".gitignore", "generated/\n/vendor\n")
+        touch(tmp_path / "generated" / "template.yaml")
+        touch(tmp_path / "vendor" / "template.yaml")
+        touch(tmp_path / "services" / ".gitignore", "*-old\n!keep-old\n")
+        touch(tmp_path / "services" / "vendor" / "template.yaml")
+        touch(tmp_path / "services" / "api-old" / "template.yaml")
+        touch(tmp_path / "services" / "keep-old" / "template.yaml")
+
+        assert relative_dirs(tmp_path) == ["services/keep-old", "services/vendor"]
+        assert len(relative_dirs(tmp_path, use_gitignore=False)) == 5
+
+    @pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+    def test_symlinked_directories_are_not_followed(self, tmp_path: Path):
+        touch(tmp_path / "real" / "template.yaml")
+        (tmp_path / "link").symlink_to(tmp_path / "real", target_is_directory=True)
+
+        assert relative_dirs(tmp_path) == ["real"]
@@ -0,0 +1,81 @@
+"""
+Tests for the run history database.
+"""
+
+import sqlite3
+
+import pytest
+
+from samstacks import history
+from samstacks.exceptions import HistoryError
+from samstacks.history import RunHistory, default_history_path
+
+
+def record(run_history: RunHistory, pipeline: str, **durations: float) -> int:
+    return run_history.record_run(
+        pipeline,
+        True,
+        durations,
+        {stack_id: "deployed" for stack_id in durations},
+        [
+            {"stack_id": stack_id, "phase": "sam deploy", "seconds": seconds}
+            for stack_id, seconds in durations.items()
+        ],
+    )
+
+
+class TestRunHistory:
+    """Test recording runs and estimating stack durations."""
+
+    def test_default_path_honours_environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SAMSTACKS_HISTORY_FILE", str(tmp_path / "h.sqlite"))
+        assert default_history_path() == tmp_path / "h.sqlite"
+
+        monkeypatch.delenv("SAMSTACKS_HISTORY_FILE")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        assert default_history_path() == (
+            tmp_path / "cache" / "samstacks" / "history.sqlite"
+        )
+
+    def test_estimates_use_median_of_recent_deploys(self, tmp_path):
+        with RunHistory(tmp_path / "history.sqlite") as run_history:
+            for seconds in [100.0, 10.0, 12.0, 11.0]:
+                record(run_history, "pipe", db=seconds, app=5.0)
+            record(run_history, "other", db=999.0)
+
+            estimates = run_history.stack_estimates("pipe", runs=3)
+
+        assert estimates == {"db": 11.0, "app": 5.0}
+
+    def test_only_deployed_stacks_count(self, tmp_path):
+        with RunHistory(tmp_path / "history.sqlite") as run_history:
+            run_history.record_run(
+                "pipe",
+                False,
+                {"db": 1.0, "app": 2.0},
+                {"db": "skipped", "app": "failed"},
+                [],
+            )
+
+            assert run_history.stack_estimates("pipe") == {}
+
+    def test_old_runs_are_pruned(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(history, "MAX_RUNS_PER_PIPELINE", 2)
+        path = tmp_path / "history.sqlite"
+        with RunHistory(path) as run_history:
+            for _ in range(4):
+                record(run_history, "pipe", db=1.0)
+
+        with sqlite3.connect(path) as connection:
+            runs = connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            phases = connection.execute(
+                "SELECT COUNT(*) FROM phase_durations"
+            ).fetchone()[0]
+        assert (runs, phases) == (2, 2)
+
+    def test_unusable_database_raises_history_error(self, tmp_path):
+        path = tmp_path / "history.sqlite"
+        path.write_text("not a database")
+
+        with pytest.raises(HistoryError, match="run history"):
+            RunHistory(path).stack_estimates("pipe")
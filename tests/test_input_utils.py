@@ -3,7 +3,11 @@ Tests for the input_utils module.
 """
 
 import pytest
-from samstacks.input_utils import process_cli_input_value
+from samstacks.input_utils import (
+    ResolvedInput,
+    process_cli_input_value,
+    resolve_input_values,
+)
 from samstacks.exceptions import ManifestError
 
 
@@ -108,3 +112,51 @@ class TestProcessCliInputValue:
         result = process_cli_input_value("test_input", "  true  ", definition)
         assert result is True
         assert isinstance(result, bool)
+
+
+class TestResolveInputValues:
+    """Test the resolved-input table built once per pipeline."""
+
+    def test_cli_value_takes_precedence_over_default(self):
+        table = resolve_input_values(
+            {"env": {"type": "string", "default": "dev"}}, {"env": " prod "}
+        )
+        assert table["env"] == ResolvedInput.create("env", "string", "prod", "cli")
+
+    def test_whitespace_cli_value_falls_back_to_default(self):
+        table = resolve_input_values(
+            {"env": {"type": "string", "default": "dev"}}, {"env": "  "}
+        )
+        assert table["env"].value == "dev"
+        assert table["env"].source == "default"
+
+    def test_inputs_without_value_or_default_are_omitted(self):
+        table = resolve_input_values({"env": {"type": "string"}}, {})
+        assert "env" not in table
+
+    def test_table_is_read_only(self):
+        table = resolve_input_values({"env": {"type": "string", "default": "dev"}}, {})
+        with pytest.raises(TypeError):
+            table["env"] = None  # type: ignore[index]
+
+    @pytest.mark.parametrize(
+        "input_type, value, text, literal, evaluation_value",
+        [
+            ("string", "dev", "dev", "'dev'", "dev"),
+            ("number", 3, "3", "3", 3),
+            ("number", "2.5", "2.5", "2.5", 2.5),
+            ("boolean", True, "true", "True", True),
+            ("boolean", False, "false", "False", False),
+        ],
+    )
+    def test_precomputed_forms(
+        self, input_type, value, text, literal, evaluation_value
+    ):
+        resolved = ResolvedInput.create("x", input_type, value, "default")
+        assert resolved.text == text
+        assert resolved.literal == literal
+        assert resolved.evaluation_value == evaluation_value
+
+    def test_invalid_cli_value_raises(self):
+        with pytest.raises(ManifestError, match="CLI must be a number"):
+            resolve_input_values({"count": {"type": "number"}}, {"count": "abc"})
@@ -0,0 +1,119 @@
+"""
+Tests for YAML/TOML I/O and the parse cache.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+
+from samstacks.io_utils import (
+    PARSE_CACHE_LOOKUPS,
+    dump_yaml,
+    load_toml_file,
+    load_yaml,
+    load_yaml_file,
+    write_bytes_atomic,
+)
+
+
+def lookups(outcome: str, file_format: str = "yaml") -> float:
+    return PARSE_CACHE_LOOKUPS.get(format=file_format, outcome=outcome)
+
+
+class TestParseCache:
+    """Test memoization of parsed files."""
+
+    def test_unchanged_file_is_parsed_once(self, tmp_path: Path):
+        path = tmp_path / "samconfig.yaml"
+        path.write_text(
+            "default:\n  deploy:\n    parameters:\n      region: eu-west-1\n"
+        )
+        misses, hits = lookups("miss"), lookups("hit")
+
+        first = load_yaml_file(path)
+        second = load_yaml_file(path)
+
+        assert first == {"default": {"deploy": {"parameters": {"region": "eu-west-1"}}}}
+        assert second is first
+        assert lookups("miss") == misses + 1
+        assert lookups("hit") == hits + 1
+
+    def test_modified_file_is_parsed_again(self, tmp_path: Path):
+        path = tmp_path / "samconfig.yaml"
+        path.write_text("version: 0.1\n")
+        assert load_yaml_file(path) == {"version": 0.1}
+
+        path.write_text("version: 0.2\n")
+        # Same size: the new mtime alone must invalidate the entry
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert load_yaml_file(path) == {"version": 0.2}
+
+    def test_toml_files_are_cached(self, tmp_path: Path):
+        path = tmp_path / "samconfig.toml"
+        path.write_text(
+            'version = 0.1\n[default.deploy.parameters]\nregion = "us-east-1"\n'
+        )
+
+        first = load_toml_file(path)
+
+        assert first["default"]["deploy"]["parameters"]["region"] == "us-east-1"
+        assert load_toml_file(path) is first
+
+    def test_missing_file_raises(self, tmp_path: Path):
+        with pytest.raises(FileNotFoundError):
+            load_yaml_file(tmp_path / "missing.yaml")
+
+
+class TestYamlLoadersAndDumpers:
+    """Test the template loader and block-style dumping."""
+
+    def test_template_loader_accepts_intrinsic_function_tags(self, tmp_path: Path):
+        path = tmp_path / "template.yaml"
+        path.write_text(
+            "Outputs:\n"
+            "  Url:\n"
+            "    Value: !Sub 'https://${Api}.example.com'\n"
+            "  Arn:\n"
+            "    Value: !GetAtt [Fn, Arn]\n"
+        )
+
+        template = load_yaml_file(path, template=True)
+
+        assert template["Outputs"]["Url"]["Value"] == "https://${Api}.example.com"
+        assert template["Outputs"]["Arn"]["Value"] == ["Fn", "Arn"]
+        with pytest.raises(yaml.YAMLError):
+            load_yaml_file(path)
+
+    def test_dump_yaml_keeps_key_order_and_block_style(self):
+        text = dump_yaml({"version": 0.1, "default": {"deploy": {"tags": ["a", "b"]}}})
+
+        assert (
+            text == "version: 0.1\ndefault:\n  deploy:\n    tags:\n    - a\n    - b\n"
+        )
+        assert load_yaml(text)["default"]["deploy"]["tags"] == ["a", "b"]
+
+
+class TestWriteBytesAtomic:
+    """Test atomic replacement of files."""
+
+    def test_replaces_content_and_keeps_mode(self, tmp_path: Path):
+        path = tmp_path / "samconfig.yaml"
+        path.write_text("old\n")
+        path.chmod(0o640)
+
+        write_bytes_atomic(path, b"new\n")
+
+        assert path.read_bytes() == b"new\n"
+        assert path.stat().st_mode & 0o777 == 0o640
+        assert [p.name for p in tmp_path.iterdir()] == ["samconfig.yaml"]
+
+    def test_new_file_is_world_readable(self, tmp_path: Path):
+        path = tmp_path / "samconfig.yaml"
+
+        write_bytes_atomic(path, b"new\n")
+
+        assert path.stat().st_mode & 0o777 == 0o644
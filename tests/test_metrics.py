@@ -0,0 +1,126 @@
+"""
+Tests for the metrics registry and its OpenMetrics export.
+"""
+
+import pytest
+from botocore.exceptions import ClientError
+
+from samstacks import aws_utils, tracing
+from samstacks.metrics import MetricsRegistry, REGISTRY, PHASE_DURATION
+from samstacks import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+    metrics.disable_phase_metrics()
+
+
+class TestMetricsRegistry:
+    """Test metric families and rendering."""
+
+    def test_render_openmetrics(self):
+        registry = MetricsRegistry()
+        calls = registry.counter("app_calls", "Calls.", ["operation"])
+        ratio = registry.gauge("app_ratio", "Ratio.")
+        latency = registry.summary("app_latency_seconds", "Latency.", ["operation"])
+        registry.counter("app_unused", "Never incremented.")
+
+        calls.inc(operation="Describe")
+        calls.inc(2, operation="Describe")
+        ratio.set(0.5)
+        latency.observe(0.25, operation="Describe")
+        latency.observe(0.75, operation="Describe")
+
+        assert registry.render_openmetrics() == (
+            "# TYPE app_calls counter\n"
+            "# HELP app_calls Calls.\n"
+            'app_calls_total{operation="Describe"} 3\n'
+            "# TYPE app_latency_seconds summary\n"
+            "# HELP app_latency_seconds Latency.\n"
+            'app_latency_seconds_count{operation="Describe"} 2\n'
+            'app_latency_seconds_sum{operation="Describe"} 1\n'
+            "# TYPE app_ratio gauge\n"
+            "# HELP app_ratio Ratio.\n"
+            "app_ratio 0.5\n"
+            "# EOF\n"
+        )
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("app_runs", "Runs.", ["command"]).inc(command='say "hi"\n')
+
+        assert 'app_runs_total{command="say \\"hi\\"\\n"} 1' in (
+            registry.render_openmetrics()
+        )
+
+    def test_labels_must_match_declaration(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("app_calls", "Calls.", ["operation"])
+
+        with pytest.raises(ValueError, match="expects labels"):
+            counter.inc(op="Describe")
+
+    def test_conflicting_redeclaration_is_rejected(self):
+        registry = MetricsRegistry()
+        first = registry.counter("app_calls", "Calls.", ["operation"])
+
+        assert registry.counter("app_calls", "Calls.", ["operation"]) is first
+        with pytest.raises(ValueError, match="already registered"):
+            registry.gauge("app_calls", "Calls.")
+
+    def test_write_textfile_replaces_file_atomically(self, tmp_path):
+        registry = MetricsRegistry()
+        registry.gauge("app_up", "Up.").set(1)
+        target = tmp_path / "metrics" / "samstacks.prom"
+
+        registry.write_textfile(target)
+
+        assert target.read_text().endswith("app_up 1\n# EOF\n")
+        assert [p.name for p in target.parent.iterdir()] == ["samstacks.prom"]
+        # Readable by a node_exporter running as another user
+        assert target.stat().st_mode & 0o777 == 0o644
+
+    def test_phase_metrics_come_from_spans(self):
+        metrics.enable_phase_metrics()
+
+        with tracing.span("sam build", "sam", stack_id="s1", region="us-east-1"):
+            pass
+
+        assert PHASE_DURATION.get_count(phase="sam build", stack_id="s1") == 1
+
+
+class TestAwsApiCallMetrics:
+    """Test CloudFormation API call accounting in aws_utils."""
+
+    def test_successful_call_records_count_latency_and_retries(self):
+        with aws_utils._track_api_call("DescribeStacks") as call:
+            call["response"] = {"ResponseMetadata": {"RetryAttempts": 2}}
+
+        assert (
+            aws_utils.AWS_API_CALLS.get(operation="DescribeStacks", outcome="success")
+            == 1
+        )
+        assert aws_utils.AWS_API_CALL_DURATION.get_count(operation="DescribeStacks")
+        assert aws_utils.AWS_API_RETRIES.get(operation="DescribeStacks") == 2
+
+    def test_throttled_call_is_recorded(self):
+        error = ClientError(
+            {
+                "Error": {"Code": "Throttling", "Message": "Rate exceeded"},
+                "ResponseMetadata": {"RetryAttempts": 4},
+            },
+            "DescribeStacks",
+        )
+
+        with pytest.raises(ClientError):
+            with aws_utils._track_api_call("DescribeStacks"):
+                raise error
+
+        assert (
+            aws_utils.AWS_API_CALLS.get(operation="DescribeStacks", outcome="throttled")
+            == 1
+        )
+        assert aws_utils.AWS_API_RETRIES.get(operation="DescribeStacks") == 4
@@ -0,0 +1,52 @@
+"""
+Tests for the profiling module.
+"""
+
+import pstats
+import tracemalloc
+
+from samstacks.profiling import Profiler
+
+
+def busy_function() -> list:
+    return [str(i) * 10 for i in range(20000)]
+
+
+class TestProfiler:
+    """Test cProfile and tracemalloc capture."""
+
+    def test_writes_pstats_and_summarizes_top_functions(self, tmp_path):
+        stats_file = tmp_path / "nested" / "run.pstats"
+        profiler = Profiler(stats_file, top=2)
+
+        profiler.start()
+        busy_function()
+        lines = profiler.stop()
+
+        assert stats_file.exists()
+        assert any(
+            "busy_function" in func[2] for func in pstats.Stats(str(stats_file)).stats
+        )
+        assert lines[0] == f"Profile written to {stats_file}"
+        assert lines[1].startswith("Top 2 functions by cumulative time")
+        assert len(lines) == 3 + 2
+        assert not any("allocation sites" in line for line in lines)
+
+    def test_memory_summary_lists_growing_allocation_sites(self, tmp_path):
+        profiler = Profiler(tmp_path / "run.pstats", trace_memory=True, top=3)
+        retained = []
+
+        profiler.start()
+        retained.append(busy_function())
+        lines = profiler.stop()
+
+        memory_lines = lines[lines.index("Top 3 allocation sites by memory growth:") :]
+        assert len(memory_lines) == 2 + 3
+        assert "test_profiling.py" in memory_lines[2]
+        assert not tracemalloc.is_tracing()
+
+    def test_stop_without_start_is_a_noop(self, tmp_path):
+        profiler = Profiler(tmp_path / "run.pstats")
+
+        assert profiler.stop() == []
+        assert not (tmp_path / "run.pstats").exists()
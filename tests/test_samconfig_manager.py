@@ -1,11 +1,13 @@
 # tests/test_samconfig_manager.py
+import datetime
+
 import pytest
 import yaml  # For loading string to dict for test inputs
 
-from samstacks.samconfig_manager import SamConfigManager
+from samstacks.samconfig_manager import SAMCONFIG_UNCHANGED, SamConfigManager
 from samstacks.pipeline_models import StackModel as PydanticStackModel
 from samstacks.templating import TemplateProcessor
-from samstacks.exceptions import ManifestError  # Import ManifestError
+from samstacks.exceptions import ManifestError, TemplateError
 
 
 # Helper to create a mock TemplateProcessor
@@ -13,12 +15,16 @@ def create_mock_template_processor(mocker):
     mock_tp = mocker.MagicMock(spec=TemplateProcessor)
     # Make process_structure and process_string pass through data by default for simple tests
     # or return a modified version if needed by specific tests.
-    mock_tp.process_structure.side_effect = (
-        lambda data_structure, **kwargs: data_structure
+    mock_tp.process_structure.side_effect = lambda data_structure, **kwargs: (
+        data_structure
+    )
+    mock_tp.process_string.side_effect = lambda template_string, **kwargs: (
+        template_string if template_string else ""
     )
-    mock_tp.process_string.side_effect = (
-        lambda template_string, **kwargs: template_string if template_string else ""
+    mock_tp.process_structure_with_dependencies.side_effect = (
+        lambda data_structure, **kwargs: (data_structure, None)
     )
+    mock_tp.dependencies_unchanged.return_value = True
     return mock_tp
 
 
@@ -54,6 +60,12 @@ class TestSamConfigManagerHelpers:
         assert copied["b"]["d"] is not original["b"]["d"]
         assert copied["e"][0] is not original["e"][0]
 
+    def test_deep_copy_dict_tuples_and_scalars(self, manager_instance):
+        released = datetime.date(2025, 7, 1)
+        original = {"tags": ("a", "b"), "released": released, "ratio": 0.5}
+        copied = manager_instance._deep_copy_dict(original)
+        assert copied == {"tags": ["a", "b"], "released": released, "ratio": 0.5}
+
     # Tests for _deep_merge_dicts
     def test_deep_merge_dicts_empty(self, manager_instance):
         assert manager_instance._deep_merge_dicts({}, {}) == {}
@@ -88,6 +100,16 @@ class TestSamConfigManagerHelpers:
         }
         assert manager_instance._deep_merge_dicts(base, updates) == expected
 
+    def test_deep_merge_leaves_inputs_unchanged(self, manager_instance):
+        base = {"a": {"b": [1, {"c": 2}]}, "d": {"e": 1}}
+        updates = {"d": {"f": [3]}, "g": {"h": 4}}
+        merged = manager_instance._deep_merge_dicts(base, updates)
+        merged["a"]["b"][1]["c"] = 99
+        merged["d"]["f"].append(5)
+        merged["g"]["h"] = 5
+        assert base == {"a": {"b": [1, {"c": 2}]}, "d": {"e": 1}}
+        assert updates == {"d": {"f": [3]}, "g": {"h": 4}}
+
     def test_deep_merge_updates_list_replaces(self, manager_instance):
         base = {"a": [1, 2], "b": {"c": [10, 20]}}
         updates = {"a": [3, 4], "b": {"c": [30, 40]}}
@@ -107,6 +129,323 @@ class TestSamConfigManagerHelpers:
         assert manager_instance._deep_merge_dicts(base, updates) == expected
 
 
+class TestSamConfigManagerPipelineLayer:
+    """Test that default_sam_config is resolved once for every stack."""
+
+    def test_pipeline_layer_is_reused_until_a_dependency_changes(
+        self, mocker, monkeypatch
+    ):
+        monkeypatch.setenv("LAYER_TEST_TEAM", "core")
+        processor = TemplateProcessor(pipeline_name="LayerPipeline")
+        manager = SamConfigManager(
+            pipeline_name="LayerPipeline",
+            pipeline_description=None,
+            default_sam_config_from_pipeline={
+                "default": {
+                    "deploy": {
+                        "parameters": {
+                            "tags": "team=${{ env.LAYER_TEST_TEAM }}",
+                            "s3_prefix": "${{ pipeline.name }}",
+                        }
+                    }
+                }
+            },
+            template_processor=processor,
+        )
+        resolve = mocker.spy(processor, "process_structure_with_dependencies")
+
+        first = manager.resolve_pipeline_layer()
+        assert manager.resolve_pipeline_layer() is first
+        assert resolve.call_count == 1
+        assert first["default"]["deploy"]["parameters"] == {
+            "tags": "team=core",
+            "s3_prefix": "LayerPipeline",
+        }
+
+        monkeypatch.setenv("LAYER_TEST_TEAM", "platform")
+        second = manager.resolve_pipeline_layer()
+
+        assert resolve.call_count == 2
+        assert second["default"]["deploy"]["parameters"]["tags"] == "team=platform"
+
+    def test_stacks_overlay_their_own_layers(self, tmp_path, mocker):
+        processor = TemplateProcessor(pipeline_name="LayerPipeline")
+        manager = SamConfigManager(
+            pipeline_name="LayerPipeline",
+            pipeline_description=None,
+            default_sam_config_from_pipeline={
+                "default": {"deploy": {"parameters": {"region": "us-east-1"}}}
+            },
+            template_processor=processor,
+        )
+        dump = mocker.patch("samstacks.io_utils.yaml.dump", wraps=yaml.dump)
+        stack_dir = tmp_path / "app"
+        stack_dir.mkdir()
+        (stack_dir / "samconfig.yml").write_text(
+            "default:\n  deploy:\n    parameters:\n"
+            "      region: eu-west-1\n      profile: ${{ pipeline.name }}\n"
+        )
+        stack_model = PydanticStackModel(
+            id="app",
+            dir=stack_dir.name,
+            sam_config_overrides={
+                "default": {"deploy": {"parameters": {"confirm_changeset": False}}}
+            },
+        )
+
+        manager.generate_samconfig_for_stack(
+            stack_dir=stack_dir,
+            stack_id="app",
+            pydantic_stack_model=stack_model,
+            deployed_stack_name="LayerPipeline-app",
+            effective_region=None,
+            resolved_stack_params={},
+        )
+
+        parameters = dump.call_args[0][0]["default"]["deploy"]["parameters"]
+        assert parameters["region"] == "us-east-1"  # Pipeline over local config
+        assert parameters["profile"] == "LayerPipeline"  # Local templates resolved
+        assert parameters["confirm_changeset"] is False
+        # The shared layer is not modified by the stack's overlay
+        assert manager.resolve_pipeline_layer() == {
+            "default": {"deploy": {"parameters": {"region": "us-east-1"}}}
+        }
+
+    def test_templated_keys_merge_as_the_keys_they_resolve_to(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("LAYER_TEST_COMMAND", "deploy")
+        manager = SamConfigManager(
+            pipeline_name="LayerPipeline",
+            pipeline_description=None,
+            default_sam_config_from_pipeline={
+                "default": {
+                    "${{ env.LAYER_TEST_COMMAND }}": {
+                        "parameters": {
+                            "profile": "pipeline",
+                            "capabilities": "CAPABILITY_IAM",
+                        }
+                    }
+                }
+            },
+            template_processor=TemplateProcessor(pipeline_name="LayerPipeline"),
+        )
+        stack_model = PydanticStackModel(
+            id="app",
+            dir="app",
+            sam_config_overrides={
+                "default": {"deploy": {"parameters": {"profile": "override"}}}
+            },
+        )
+
+        config = manager.build_stack_config(
+            stack_dir=tmp_path,
+            stack_id="app",
+            pydantic_stack_model=stack_model,
+            deployed_stack_name="LayerPipeline-app",
+            effective_region=None,
+            resolved_stack_params={},
+        )
+
+        parameters = config["default"]["deploy"]["parameters"]
+        # Deep merged with the overrides' deploy section, which wins
+        assert parameters["profile"] == "override"
+        assert parameters["capabilities"] == "CAPABILITY_IAM"
+
+    def test_overridden_values_are_still_resolved(self, tmp_path):
+        manager = SamConfigManager(
+            pipeline_name="LayerPipeline",
+            pipeline_description=None,
+            default_sam_config_from_pipeline={
+                "default": {
+                    "deploy": {"parameters": {"s3_prefix": "${{ stacks.bad }}"}}
+                }
+            },
+            template_processor=TemplateProcessor(pipeline_name="LayerPipeline"),
+        )
+        stack_model = PydanticStackModel(
+            id="app",
+            dir="app",
+            sam_config_overrides={
+                "default": {"deploy": {"parameters": {"s3_prefix": "override"}}}
+            },
+        )
+
+        with pytest.raises(TemplateError, match="stacks.bad"):
+            manager.build_stack_config(
+                stack_dir=tmp_path,
+                stack_id="app",
+                pydantic_stack_model=stack_model,
+                deployed_stack_name="LayerPipeline-app",
+                effective_region=None,
+                resolved_stack_params={},
+            )
+
+    def test_missing_pipeline_layer_is_cached_as_empty(self, mocker):
+        processor = TemplateProcessor(pipeline_name="LayerPipeline")
+        manager = SamConfigManager(
+            pipeline_name="LayerPipeline",
+            pipeline_description=None,
+            default_sam_config_from_pipeline=None,
+            template_processor=processor,
+        )
+        resolve = mocker.spy(processor, "process_structure_with_dependencies")
+
+        assert manager.resolve_pipeline_layer() == {}
+        assert manager.resolve_pipeline_layer() == {}
+        assert resolve.call_count == 1
+
+
+class TestSamConfigManagerWriteIfChanged:
+    """Test that identical configs are not written or backed up again."""
+
+    @pytest.fixture
+    def manager(self):
+        return SamConfigManager(
+            pipeline_name="Pipe",
+            pipeline_description=None,
+            default_sam_config_from_pipeline={
+                "default": {
+                    "deploy": {"parameters": {"capabilities": "CAPABILITY_IAM"}}
+                }
+            },
+            template_processor=TemplateProcessor(pipeline_name="Pipe"),
+        )
+
+    def generate(self, manager, stack_dir, region="us-east-1"):
+        return manager.generate_samconfig_for_stack(
+            stack_dir=stack_dir,
+            stack_id="app",
+            pydantic_stack_model=PydanticStackModel(id="app", dir=stack_dir.name),
+            deployed_stack_name="Pipe-app",
+            effective_region=region,
+            resolved_stack_params={"Stage": "dev"},
+        )
+
+    def test_unchanged_samconfig_is_left_in_place(self, manager, tmp_path):
+        stack_dir = tmp_path / "app"
+        stack_dir.mkdir()
+        target = self.generate(manager, stack_dir)
+        stat = target.stat()
+        unchanged = SAMCONFIG_UNCHANGED.get(mode="local")
+
+        assert self.generate(manager, stack_dir) == target
+
+        assert target.stat().st_mtime_ns == stat.st_mtime_ns
+        assert target.stat().st_ino == stat.st_ino
+        assert not (stack_dir / "samconfig.yaml.bak").exists()
+        assert SAMCONFIG_UNCHANGED.get(mode="local") == unchanged + 1
+
+    def test_changed_samconfig_is_backed_up_and_replaced(self, manager, tmp_path):
+        stack_dir = tmp_path / "app"
+        stack_dir.mkdir()
+        target = self.generate(manager, stack_dir)
+        previous = target.read_text()
+
+        self.generate(manager, stack_dir, region="eu-west-1")
+
+        assert (stack_dir / "samconfig.yaml.bak").read_text() == previous
+        assert "region: eu-west-1" in target.read_text()
+
+    def test_toml_config_is_still_migrated(self, manager, tmp_path):
+        stack_dir = tmp_path / "app"
+        stack_dir.mkdir()
+        self.generate(manager, stack_dir)
+        (stack_dir / "samconfig.toml").write_text("version = 0.1\n")
+
+        self.generate(manager, stack_dir)
+
+        assert (stack_dir / "samconfig.toml.bak").exists()
+        assert not (stack_dir / "samconfig.toml").exists()
+        assert (stack_dir / "samconfig.yaml.bak").exists()
+
+    def test_unchanged_external_config_is_left_in_place(self, manager, tmp_path):
+        stack_dir = tmp_path / "app"
+        stack_dir.mkdir()
+        config_path = tmp_path / "configs" / "app.yaml"
+
+        def generate():
+            return manager.generate_external_config_file(
+                config_path=config_path,
+                stack_dir=stack_dir,
+                stack_id="app",
+                pydantic_stack_model=PydanticStackModel(id="app", dir=stack_dir.name),
+                deployed_stack_name="Pipe-app",
+                effective_region="us-east-1",
+                resolved_stack_params={},
+            )
+
+        generate()
+        stat = config_path.stat()
+        generate()
+
+        assert config_path.stat().st_mtime_ns == stat.st_mtime_ns
+        assert not config_path.with_suffix(".yaml.bak").exists()
+
+
+class TestSamConfigManagerRunConfig:
+    """Test run-scoped configs generated outside the stack directory."""
+
+    def generate(self, stack_dir, run_dir):
+        manager = SamConfigManager(
+            pipeline_name="Pipe",
+            pipeline_description=None,
+            default_sam_config_from_pipeline={
+                "default": {
+                    "deploy": {"parameters": {"capabilities": "CAPABILITY_IAM"}}
+                }
+            },
+            template_processor=TemplateProcessor(pipeline_name="Pipe"),
+        )
+        return manager.generate_run_config_file(
+            config_path=run_dir / "app" / "samconfig.yaml",
+            build_dir=run_dir / "app" / "build",
+            stack_dir=stack_dir,
+            stack_id="app",
+            pydantic_stack_model=PydanticStackModel(id="app", dir=stack_dir.name),
+            deployed_stack_name="Pipe-app",
+            effective_region="us-east-1",
+            resolved_stack_params={"Stage": "dev"},
+        )
+
+    def test_stack_dir_is_read_but_not_written(self, tmp_path):
+        stack_dir = tmp_path / "app"
+        stack_dir.mkdir()
+        (stack_dir / "template.yml").write_text("Resources: {}\n")
+        local_config = (
+            "version = 0.1\n[default.deploy.parameters]\nconfirm_changeset = true\n"
+        )
+        (stack_dir / "samconfig.toml").write_text(local_config)
+
+        config_path = self.generate(stack_dir, tmp_path / "run")
+
+        assert config_path == tmp_path / "run" / "app" / "samconfig.yaml"
+        assert (stack_dir / "samconfig.toml").read_text() == local_config
+        assert sorted(p.name for p in stack_dir.iterdir()) == [
+            "samconfig.toml",
+            "template.yml",
+        ]
+        config = yaml.safe_load(config_path.read_text())["default"]
+        assert config["deploy"]["parameters"]["confirm_changeset"] is True
+        assert config["deploy"]["parameters"]["capabilities"] == "CAPABILITY_IAM"
+        assert config["deploy"]["parameters"]["stack_name"] == "Pipe-app"
+
+    def test_paths_are_absolute(self, tmp_path):
+        stack_dir = tmp_path / "app"
+        stack_dir.mkdir()
+        run_dir = tmp_path / "run"
+
+        config = yaml.safe_load(self.generate(stack_dir, run_dir).read_text())
+
+        build = config["default"]["build"]["parameters"]
+        assert build["template_file"] == str(stack_dir / "template.yaml")
+        assert build["build_dir"] == str(run_dir / "app" / "build")
+        assert build["cache_dir"] == str(run_dir / "app" / "cache")
+        assert config["default"]["deploy"]["parameters"]["template_file"] == str(
+            run_dir / "app" / "build" / "template.yaml"
+        )
+
+
 class TestSamConfigManagerApplySpecifics:
     @pytest.fixture
     def manager_instance(self, mocker):
@@ -395,7 +734,9 @@ class TestSamConfigManagerGenerate:
         self, manager_and_fileop_mocks, temp_project_dir, mocker
     ):
         manager, _, _, mock_shutil_move = manager_and_fileop_mocks
-        mock_yaml_dump_sut = mocker.patch("samstacks.samconfig_manager.yaml.dump")
+        mock_yaml_dump_sut = mocker.patch(
+            "samstacks.io_utils.yaml.dump", wraps=yaml.dump
+        )
 
         stack_dir = temp_project_dir / "greenfield_stack"
         stack_dir.mkdir()
@@ -436,7 +777,9 @@ class TestSamConfigManagerGenerate:
         self, manager_real_fileops, temp_project_dir, mocker
     ):
         manager, _ = manager_real_fileops
-        mock_yaml_dump_sut = mocker.patch("samstacks.samconfig_manager.yaml.dump")
+        mock_yaml_dump_sut = mocker.patch(
+            "samstacks.io_utils.yaml.dump", wraps=yaml.dump
+        )
 
         stack_dir = temp_project_dir / "toml_backup_stack"
         stack_dir.mkdir()
@@ -486,7 +829,9 @@ beta_features = true
         self, manager_real_fileops, temp_project_dir, mocker
     ):
         manager, _ = manager_real_fileops
-        mock_yaml_dump_sut = mocker.patch("samstacks.samconfig_manager.yaml.dump")
+        mock_yaml_dump_sut = mocker.patch(
+            "samstacks.io_utils.yaml.dump", wraps=yaml.dump
+        )
 
         stack_dir = temp_project_dir / "yaml_backup_stack"
         stack_dir.mkdir()
@@ -533,7 +878,9 @@ custom_env:
         manager, mock_tp, _, _ = (
             manager_and_fileop_mocks  # Corrected unpacking - only 4 items
         )
-        mock_yaml_dump_sut = mocker.patch("samstacks.samconfig_manager.yaml.dump")
+        mock_yaml_dump_sut = mocker.patch(
+            "samstacks.io_utils.yaml.dump", wraps=yaml.dump
+        )
 
         stack_dir = temp_project_dir / "override_stack"
         stack_dir.mkdir()
@@ -581,6 +928,10 @@ custom_env:
         assert (
             dumped_config["another_env"]["build"]["parameters"]["UseContainer"] is True
         )
+        # The pipeline defaults are not modified by the generation
+        assert manager.default_sam_config_from_pipeline["default"]["deploy"][
+            "parameters"
+        ] == {"GlobalParam": "GlobalVal"}
 
     def test_generate_samconfig_write_failure(
         self, manager_and_fileop_mocks, temp_project_dir, mocker
@@ -589,7 +940,7 @@ custom_env:
             manager_and_fileop_mocks  # Corrected unpacking - only 4 items
         )
         mocker.patch(
-            "samstacks.samconfig_manager.yaml.dump",
+            "samstacks.io_utils.yaml.dump",
             side_effect=yaml.YAMLError("Failed to dump"),
         )
 
@@ -0,0 +1,148 @@
+"""
+Tests for the index of parameters and outputs declared by stack templates.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from samstacks.template_index import (
+    clear_template_index,
+    load_template_interface,
+    load_template_interfaces,
+    parse_template_interface,
+)
+
+SAM_TEMPLATE = """\
+AWSTemplateFormatVersion: '2010-09-09'
+Transform: AWS::Serverless-2016-10-31
+Parameters:
+  Stage:
+    Type: String
+Resources:
+  Function:
+    Type: AWS::Serverless::Function
+    Properties:
+      Handler: !Sub "${Stage}.handler"
+      Role: !GetAtt [Role, Arn]
+Outputs:
+  FunctionArn:
+    Value: !GetAtt Function.Arn
+  FunctionName:
+    Value: !Ref Function
+"""
+
+
+@pytest.fixture(autouse=True)
+def empty_index():
+    clear_template_index()
+    yield
+    clear_template_index()
+
+
+def write_stack(stack_dir: Path, content: str, name: str = "template.yaml") -> Path:
+    stack_dir.mkdir(parents=True, exist_ok=True)
+    (stack_dir / name).write_text(content)
+    return stack_dir
+
+
+class TestParseTemplateInterface:
+    """Test which declarations are read from a template."""
+
+    def test_reads_parameters_and_outputs_with_intrinsic_tags(self):
+        interface = parse_template_interface(SAM_TEMPLATE, Path("template.yaml"))
+
+        assert interface is not None
+        assert interface.parameters == frozenset({"Stage"})
+        assert interface.outputs == frozenset({"FunctionArn", "FunctionName"})
+
+    def test_missing_sections_declare_nothing(self):
+        interface = parse_template_interface("Resources: {}\n", Path("t.yaml"))
+
+        assert interface is not None
+        assert interface.parameters == interface.outputs == frozenset()
+
+    def test_unknown_transform_declares_unknown_names(self):
+        interface = parse_template_interface(
+            "Transform:\n  - Name: AWS::Include\n" + SAM_TEMPLATE.split("\n", 2)[2],
+            Path("t.yaml"),
+        )
+
+        assert interface is not None
+        assert interface.parameters is None and interface.outputs is None
+
+    def test_for_each_outputs_are_unknown(self):
+        interface = parse_template_interface(
+            "Transform: AWS::LanguageExtensions\n"
+            "Parameters:\n  Names:\n    Type: CommaDelimitedList\n"
+            "Outputs:\n"
+            "  Fn::ForEach::Buckets:\n"
+            "    - Name\n"
+            "    - !Ref Names\n"
+            "    - ${Name}Arn:\n"
+            "        Value: !Ref AWS::StackName\n",
+            Path("t.yaml"),
+        )
+
+        assert interface is not None
+        assert interface.parameters == frozenset({"Names"})
+        assert interface.outputs is None
+
+    def test_non_mapping_content_is_not_a_template(self):
+        assert parse_template_interface("- just\n- a list\n", Path("t.yaml")) is None
+
+
+class TestLoadTemplateInterface:
+    """Test loading from stack directories and the mtime-checked memo."""
+
+    def test_finds_template_yml_and_reports_missing_templates(self, tmp_path: Path):
+        stack_dir = write_stack(tmp_path / "app", SAM_TEMPLATE, "template.yml")
+
+        interface = load_template_interface(stack_dir)
+
+        assert interface is not None
+        assert interface.path == stack_dir / "template.yml"
+        assert load_template_interface(tmp_path / "missing") is None
+
+    def test_invalid_yaml_is_skipped(self, tmp_path: Path):
+        stack_dir = write_stack(tmp_path / "app", "Outputs: [unclosed\n")
+
+        assert load_template_interface(stack_dir) is None
+
+    def test_memo_is_reused_until_the_template_changes(self, tmp_path: Path, mocker):
+        stack_dir = write_stack(tmp_path / "app", SAM_TEMPLATE)
+        parse = mocker.patch(
+            "samstacks.template_index.parse_template_interface",
+            wraps=parse_template_interface,
+        )
+
+        first = load_template_interface(stack_dir)
+        assert load_template_interface(stack_dir) is first
+        assert parse.call_count == 1
+
+        template = stack_dir / "template.yaml"
+        template.write_text(SAM_TEMPLATE.replace("Stage", "Env"))
+        stat = template.stat()
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        second = load_template_interface(stack_dir)
+
+        assert parse.call_count == 2
+        assert second is not None and second.parameters == frozenset({"Env"})
+
+    def test_loads_many_directories_in_order(self, tmp_path: Path):
+        stack_dirs = [
+            write_stack(
+                tmp_path / f"stack{i}",
+                f"Outputs:\n  Output{i}:\n    Value: !Ref AWS::StackName\n",
+            )
+            for i in range(8)
+        ]
+
+        interfaces = load_template_interfaces(
+            stack_dirs + [tmp_path / "missing"], max_workers=4
+        )
+
+        assert [i.outputs if i else None for i in interfaces] == [
+            frozenset({f"Output{i}"}) for i in range(8)
+        ] + [None]
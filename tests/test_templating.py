@@ -3,6 +3,8 @@ Tests for the templating module.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from samstacks.templating import TemplateProcessor
@@ -682,3 +684,152 @@ class TestTemplateProcessorProcessStructure:
         assert tp_no_default.process_structure(data, pipeline_name=None) == {
             "name_check": "Pipeline is "
         }
+
+
+class TestTemplateMemoization:
+    """Test memoization of process_string results."""
+
+    def test_repeated_string_is_served_from_cache(self):
+        processor = TemplateProcessor(
+            defined_inputs={"env": {"type": "string", "default": "dev"}}
+        )
+        assert processor.process_string("app-${{ inputs.env }}") == "app-dev"
+        assert processor.process_string("app-${{ inputs.env }}") == "app-dev"
+
+        stats = processor.cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_strings_without_templates_bypass_cache(self):
+        processor = TemplateProcessor()
+        assert processor.process_string("plain") == "plain"
+        assert processor.cache_stats()["misses"] == 0
+
+    def test_pipeline_context_is_part_of_cache_key(self):
+        processor = TemplateProcessor(pipeline_name="first")
+        assert processor.process_string("${{ pipeline.name }}") == "first"
+        assert (
+            processor.process_string("${{ pipeline.name }}", pipeline_name="second")
+            == "second"
+        )
+
+    def test_changed_stack_output_invalidates_dependents(self):
+        processor = TemplateProcessor()
+        processor.add_stack_outputs("vpc", {"VpcId": "vpc-1", "Other": "x"})
+        assert processor.process_string("${{ stacks.vpc.outputs.VpcId }}") == "vpc-1"
+        assert processor.process_string("${{ stacks.vpc.outputs.Other }}") == "x"
+
+        processor.add_stack_outputs("vpc", {"VpcId": "vpc-2", "Other": "x"})
+
+        assert processor.process_string("${{ stacks.vpc.outputs.VpcId }}") == "vpc-2"
+        assert processor.process_string("${{ stacks.vpc.outputs.Other }}") == "x"
+        stats = processor.cache_stats()
+        assert stats["invalidations"] == 1
+        assert stats["hits"] == 1
+
+    def test_output_added_later_invalidates_fallback(self):
+        processor = TemplateProcessor()
+        template = "${{ stacks.db.outputs.Url || 'none' }}"
+        assert processor.process_string(template) == "none"
+
+        processor.add_stack_outputs("db", {"Url": "db://host"})
+
+        assert processor.process_string(template) == "db://host"
+
+    def test_changed_env_var_is_not_served_stale(self, monkeypatch):
+        processor = TemplateProcessor()
+        monkeypatch.setenv("MEMO_TEST_VAR", "one")
+        assert processor.process_string("${{ env.MEMO_TEST_VAR }}") == "one"
+
+        monkeypatch.setenv("MEMO_TEST_VAR", "two")
+
+        assert processor.process_string("${{ env.MEMO_TEST_VAR }}") == "two"
+
+    def test_errors_are_not_cached(self):
+        processor = TemplateProcessor()
+        with pytest.raises(TemplateError):
+            processor.process_string("${{ stacks.bad }}")
+        assert processor.cache_stats()["entries"] == 0
+
+    def test_structure_dependencies_include_cached_strings(self, monkeypatch):
+        processor = TemplateProcessor()
+        processor.add_stack_outputs("vpc", {"VpcId": "vpc-1"})
+        monkeypatch.setenv("MEMO_TEST_VAR", "one")
+        structure = {
+            "a": "${{ env.MEMO_TEST_VAR }}",
+            "b": ["${{ stacks.vpc.outputs.VpcId }}"],
+        }
+        processor.process_string("${{ env.MEMO_TEST_VAR }}")  # Cached beforehand
+
+        result, dependencies = processor.process_structure_with_dependencies(structure)
+
+        assert result == {"a": "one", "b": ["vpc-1"]}
+        assert dependencies.env == {"MEMO_TEST_VAR": "one"}
+        assert dependencies.outputs == {("vpc", "VpcId"): "vpc-1"}
+        assert processor.dependencies_unchanged(dependencies)
+        processor.add_stack_outputs("vpc", {"VpcId": "vpc-2"})
+        assert not processor.dependencies_unchanged(dependencies)
+        processor.add_stack_outputs("vpc", {"VpcId": "vpc-1"})
+        monkeypatch.setenv("MEMO_TEST_VAR", "two")
+        assert not processor.dependencies_unchanged(dependencies)
+
+
+class TestProcessStructureCopyOnWrite:
+    """Test that process_structure only copies containers holding templates."""
+
+    def test_structure_without_templates_is_returned_as_is(self):
+        tp = TemplateProcessor()
+        data = {
+            "default": {"deploy": {"parameters": {"capabilities": ["CAPABILITY_IAM"]}}}
+        }
+        assert tp.process_structure(data) is data
+
+    def test_untouched_subtrees_are_shared(self):
+        tp = TemplateProcessor(pipeline_name="pipe")
+        static = {"capabilities": ["CAPABILITY_IAM"]}
+        data = {"static": static, "dynamic": {"name": "${{ pipeline.name }}"}}
+
+        result = tp.process_structure(data)
+
+        assert result == {"static": static, "dynamic": {"name": "pipe"}}
+        assert result is not data
+        assert result["static"] is static
+        assert data["dynamic"]["name"] == "${{ pipeline.name }}"
+
+    def test_templated_keys_and_nested_values(self):
+        tp = TemplateProcessor(pipeline_name="pipe")
+        data = {
+            "${{ pipeline.name }}-env": {"items": ["a", "${{ pipeline.name }}"]},
+            "other": 1,
+        }
+
+        result = tp.process_structure(data)
+
+        assert result == {"pipe-env": {"items": ["a", "pipe"]}, "other": 1}
+        assert list(result) == ["pipe-env", "other"]
+        assert list(data) == ["${{ pipeline.name }}-env", "other"]
+
+    def test_repeated_processing_reuses_template_index(self, mocker):
+        tp = TemplateProcessor(pipeline_name="pipe")
+        data = {"a": {"b": "${{ pipeline.name }}"}, "c": ["x", "y"]}
+        tp.process_structure(data)
+
+        walk = mocker.spy(tp, "process_string")
+        assert tp.process_structure(data, pipeline_name="other") == {
+            "a": {"b": "other"},
+            "c": ["x", "y"],
+        }
+        assert walk.call_count == 1
+
+    def test_template_index_is_safe_to_share_between_threads(self):
+        tp = TemplateProcessor(pipeline_name="pipe")
+        structures = [
+            {"id": str(i), "name": "${{ pipeline.name }}"} for i in range(500)
+        ]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(tp.process_structure, structures * 4))
+
+        assert results == [{"id": s["id"], "name": "pipe"} for s in structures * 4]
+        assert len(tp._structure_index) <= 64
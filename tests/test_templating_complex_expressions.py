@@ -323,3 +323,81 @@ class TestComplexExpressions:
             "${{ inputs.enabled && inputs.name || 'default' }}"
         )
         assert result == "test-app"  # True && "test-app" = "test-app"
+
+
+class TestLazyPlaceholderResolution:
+    """Test that placeholders are only resolved when the evaluator reaches them."""
+
+    def setup_method(self):
+        self.processor = TemplateProcessor(
+            defined_inputs={
+                "primary": {"type": "string", "default": "first"},
+                "empty": {"type": "string", "default": ""},
+                "count": {"type": "number", "default": 3},
+            },
+            cli_inputs={},
+        )
+
+    def _spy_on(self, namespace):
+        calls = []
+        original = self.processor._placeholder_resolvers[namespace]
+
+        def spy(remainder, call_context):
+            calls.append(remainder)
+            return original(remainder, call_context)
+
+        self.processor._placeholder_resolvers[namespace] = spy
+        return calls
+
+    def test_or_fallbacks_stop_at_first_truthy_operand(self):
+        env_calls = self._spy_on("env")
+        stack_calls = self._spy_on("stacks")
+
+        result = self.processor.process_string(
+            "${{ inputs.primary || env.LAZY_B || stacks.x.outputs.Y }}"
+        )
+
+        assert result == "first"
+        assert env_calls == []
+        assert stack_calls == []
+
+    def test_or_fallbacks_resolve_until_truthy_operand(self, monkeypatch):
+        monkeypatch.setenv("LAZY_B", "from-env")
+        stack_calls = self._spy_on("stacks")
+
+        result = self.processor.process_string(
+            "${{ inputs.empty || env.LAZY_B || stacks.x.outputs.Y }}"
+        )
+
+        assert result == "from-env"
+        assert stack_calls == []
+
+    def test_and_short_circuits_on_falsy_operand(self):
+        stack_calls = self._spy_on("stacks")
+
+        result = self.processor.process_string(
+            "${{ inputs.count > 5 && stacks.x.outputs.Y || 'small' }}"
+        )
+
+        assert result == "small"
+        assert stack_calls == []
+
+    def test_repeated_placeholder_is_resolved_once(self):
+        input_calls = self._spy_on("inputs")
+
+        result = self.processor.process_string(
+            "${{ inputs.count * inputs.count + inputs.count }}"
+        )
+
+        assert result == "12"
+        assert input_calls == ["count"]
+
+    def test_malformed_placeholder_in_unreached_operand_still_errors(self):
+        with pytest.raises(TemplateError, match="Invalid stack output expression"):
+            self.processor.process_string("${{ inputs.primary || stacks.bad }}")
+
+    def test_placeholder_text_inside_quotes_is_literal(self):
+        result = self.processor.process_string(
+            "${{ inputs.empty || 'inputs.primary' }}"
+        )
+        assert result == "inputs.primary"
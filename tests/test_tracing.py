@@ -0,0 +1,124 @@
+"""
+Tests for the tracing module.
+"""
+
+import json
+import threading
+
+import pytest
+
+from samstacks import tracing
+
+
+@pytest.fixture(autouse=True)
+def reset_tracing():
+    tracing.disable_tracing()
+    yield
+    tracing.disable_tracing()
+
+
+class TestSpans:
+    """Test span recording and Chrome trace export."""
+
+    def test_span_is_noop_when_disabled(self):
+        """Spans cost nothing and record nothing while tracing is off."""
+        with tracing.span("phase", stack_id="s1") as span:
+            span.set(outcome="skipped")
+
+        assert tracing.get_tracer() is None
+        assert tracing.span("a") is tracing.span("b")
+
+    def test_span_records_complete_event_with_args(self):
+        tracer = tracing.enable_tracing()
+
+        with tracing.span("sam build", "sam", stack_id="s1", region="us-east-1"):
+            pass
+
+        (event,) = tracer.events
+        assert event["name"] == "sam build"
+        assert event["cat"] == "sam"
+        assert event["ph"] == "X"
+        assert event["dur"] >= 0
+        assert event["args"] == {
+            "stack_id": "s1",
+            "region": "us-east-1",
+            "outcome": "ok",
+        }
+
+    def test_span_outcome_reflects_exceptions_and_explicit_values(self):
+        tracer = tracing.enable_tracing()
+
+        with pytest.raises(RuntimeError):
+            with tracing.span("sam deploy"):
+                raise RuntimeError("boom")
+        with tracing.span("deploy stack") as span:
+            span.set(outcome="skipped")
+
+        failed, skipped = tracer.events
+        assert failed["args"]["outcome"] == "error"
+        assert failed["args"]["error"] == "boom"
+        assert skipped["args"]["outcome"] == "skipped"
+
+    def test_write_produces_chrome_trace_json(self, tmp_path):
+        tracer = tracing.enable_tracing()
+        with tracing.span("outer"):
+            with tracing.span("inner"):
+                pass
+
+        trace_file = tmp_path / "traces" / "run.json"
+        tracer.write(trace_file)
+
+        trace = json.loads(trace_file.read_text())
+        names = [event["name"] for event in trace["traceEvents"]]
+        assert names == ["process_name", "outer", "inner"]
+        outer, inner = trace["traceEvents"][1:]
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+class TestSpanListeners:
+    """Test which spans process-wide and scoped listeners receive."""
+
+    def test_scoped_listener_ignores_spans_of_other_threads(self):
+        seen = {"main": [], "other": []}
+        started = threading.Event()
+        finished = threading.Event()
+
+        def other_run():
+            with tracing.span_listener(lambda name, *_: seen["other"].append(name)):
+                started.set()
+                finished.wait()
+                with tracing.span("other stack"):
+                    pass
+
+        thread = threading.Thread(target=other_run)
+        thread.start()
+        started.wait()
+        with tracing.span_listener(lambda name, *_: seen["main"].append(name)):
+            with tracing.span("main stack"):
+                pass
+            finished.set()
+            thread.join()
+
+        assert seen == {"main": ["main stack"], "other": ["other stack"]}
+        assert tracing.span("after") is tracing.span("after")
+
+    def test_process_listener_sees_every_thread(self):
+        seen = []
+
+        def listener(name, *_):
+            seen.append(name)
+
+        def worker():
+            with tracing.span("worker"):
+                pass
+
+        tracing.add_span_listener(listener)
+        try:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+        finally:
+            tracing.remove_span_listener(listener)
+
+        assert seen == ["worker"]
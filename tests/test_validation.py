@@ -36,13 +36,16 @@ class TestManifestValidatorSemantic:
         stack1_dir = tmp_path / "stack1"
         stack1_dir.mkdir()
         (stack1_dir / "template.yaml").write_text(
-            "AWSTemplateFormatVersion: '2010-09-09'"
+            "AWSTemplateFormatVersion: '2010-09-09'\n"
+            "Parameters:\n  Param1:\n    Type: String\n"
+            "Outputs:\n  Output1:\n    Value: !Ref AWS::StackName\n"
         )
 
         stack2_dir = tmp_path / "stack2"
         stack2_dir.mkdir()
         (stack2_dir / "template.yaml").write_text(
-            "AWSTemplateFormatVersion: '2010-09-09'"
+            "AWSTemplateFormatVersion: '2010-09-09'\n"
+            "Parameters:\n  Param2:\n    Type: String\n"
         )
 
         manifest_data = {
@@ -288,6 +291,144 @@ class TestManifestValidatorSemantic:
         ):
             validator.validate_semantic_rules_and_raise_if_errors()
 
+    def test_run_script_can_reference_its_own_stack(self, tmp_path: Path) -> None:
+        (tmp_path / "stack1").mkdir()
+        (tmp_path / "stack1" / "template.yaml").touch()
+        manifest_data = {
+            "pipeline_name": "test",
+            "stacks": [
+                {
+                    "id": "stack1",
+                    "dir": "stack1/",
+                    "params": {"Self": "${{ stacks.stack1.outputs.Url }}"},
+                    "run": "curl ${{ stacks.stack1.outputs.Url }}",
+                },
+                {"id": "missing", "dir": "missing/"},
+            ],
+        }
+        validator = setup_validator(manifest_data, manifest_base_dir_str=str(tmp_path))
+
+        with pytest.raises(ManifestError) as exc_info:
+            validator.validate_semantic_rules_and_raise_if_errors()
+
+        # Directory errors come first, then expression errors in stack order
+        message = str(exc_info.value)
+        assert message.startswith("Found 2 validation errors:")
+        assert message.index("Stack directory does not exist") < message.index(
+            "stack 'stack1' param 'Self': Stack 'stack1' is defined later in the pipeline (at index 0)"
+        )
+        assert "field 'run'" not in message
+
+    def test_undeclared_output_suggests_closest_name(self, tmp_path: Path) -> None:
+        from samstacks.core import Pipeline
+
+        for stack_id in ["network", "app"]:
+            (tmp_path / stack_id).mkdir()
+        (tmp_path / "network" / "template.yaml").write_text(
+            "Resources:\n  Vpc:\n    Type: AWS::EC2::VPC\n"
+            "Outputs:\n  VpcId:\n    Value: !Ref Vpc\n"
+            "  SubnetIds:\n    Value: !Join [',', !GetAZs '']\n"
+        )
+        (tmp_path / "app" / "template.yaml").write_text(
+            "Parameters:\n  Vpc:\n    Type: String\n"
+        )
+        manifest = tmp_path / "pipeline.yml"
+        manifest.write_text(
+            "pipeline_name: p\n"
+            "stacks:\n"
+            "  - id: network\n"
+            "    dir: ./network\n"
+            "  - id: app\n"
+            "    dir: ./app\n"
+            "    params:\n"
+            "      Vpc: ${{ stacks.network.outputs.VpcID }}\n"
+        )
+
+        with pytest.raises(ManifestError) as exc_info:
+            Pipeline.from_file(manifest)
+
+        assert str(exc_info.value) == (
+            "Validation error: stack 'app' param 'Vpc': Stack 'network' does not "
+            "declare output 'VpcID' in template.yaml. Did you mean 'VpcId'? (line 8)"
+        )
+
+    def test_undeclared_param_is_a_warning(self, tmp_path: Path, capsys) -> None:
+        (tmp_path / "stack1").mkdir()
+        (tmp_path / "stack1" / "template.yaml").write_text(
+            "Parameters:\n  Stage:\n    Type: String\n  LogLevel:\n    Type: String\n"
+        )
+        manifest_data = {
+            "pipeline_name": "test",
+            "stacks": [
+                {"id": "stack1", "dir": "stack1/", "params": {"Region": "x"}},
+            ],
+        }
+        validator = setup_validator(manifest_data, manifest_base_dir_str=str(tmp_path))
+
+        validator.validate_semantic_rules_and_raise_if_errors()  # Should not raise
+
+        message = (
+            "stack 'stack1' param 'Region': Parameter 'Region' is not declared in "
+            "template.yaml and will be ignored. Declared parameters: LogLevel, Stage"
+        )
+        assert [str(warning) for warning in validator.warnings] == [message]
+        captured = capsys.readouterr()
+        assert message in captured.err
+        assert captured.out == ""
+
+    def test_output_references_inside_operator_expressions_are_checked(
+        self, tmp_path: Path
+    ) -> None:
+        (tmp_path / "flags").mkdir()
+        (tmp_path / "flags" / "template.yaml").write_text(
+            "Outputs:\n  Enabled:\n    Value: 'true'\n"
+        )
+        (tmp_path / "app").mkdir()
+        (tmp_path / "app" / "template.yaml").write_text("Resources: {}\n")
+        manifest_data = {
+            "pipeline_name": "test",
+            "stacks": [
+                {"id": "flags", "dir": "flags/"},
+                {
+                    "id": "app",
+                    "dir": "app/",
+                    "if": "${{ stacks.flags.outputs.Enabld == 'true' }}",
+                    "run": "echo ${{ stacks.flags.outputs.Enabled == 'stacks.x.outputs.Y' }}",
+                },
+            ],
+        }
+        validator = setup_validator(manifest_data, manifest_base_dir_str=str(tmp_path))
+
+        with pytest.raises(ManifestError) as exc_info:
+            validator.validate_semantic_rules_and_raise_if_errors()
+
+        assert str(exc_info.value) == (
+            "Validation error: stack 'app' field 'if': Stack 'flags' does not "
+            "declare output 'Enabld' in template.yaml. Did you mean 'Enabled'?"
+        )
+
+    def test_unknown_transform_skips_declaration_checks(self, tmp_path: Path) -> None:
+        (tmp_path / "stack1").mkdir()
+        (tmp_path / "stack1" / "template.yaml").write_text(
+            "Transform: [AWS::Serverless-2016-10-31, MyMacro]\nResources: {}\n"
+        )
+        (tmp_path / "stack2").mkdir()
+        (tmp_path / "stack2" / "template.yaml").write_text("Resources: {}\n")
+        manifest_data = {
+            "pipeline_name": "test",
+            "stacks": [
+                {"id": "stack1", "dir": "stack1/", "params": {"FromMacro": "x"}},
+                {
+                    "id": "stack2",
+                    "dir": "stack2/",
+                    "run": "echo ${{ stacks.stack1.outputs.FromMacro }}",
+                },
+            ],
+        }
+        validator = setup_validator(manifest_data, manifest_base_dir_str=str(tmp_path))
+
+        validator.validate_semantic_rules_and_raise_if_errors()  # Should not raise
+
 
 class TestLineNumberTrackerDirect:
     def test_parse_and_get_line_numbers(self):
@@ -297,22 +438,69 @@ key2:
 list_key:
   - item1
   - item2
+stacks:
+  - id: a
+    dir: ./a
 """
         tracker = LineNumberTracker()
         data, _ = tracker.parse_yaml_with_line_numbers(yaml_content)
 
-        assert tracker.get_line_number(data) == 1  # Root dict
-        assert tracker.get_line_number(data["key1"]) == 1  # value1
-        assert (
-            tracker.get_line_number(data["key2"]) == 3
-        )  # nested_key dict (starts at line 3 where nested_key is)
-        assert tracker.get_line_number(data["key2"]["nested_key"]) == 3  # nested_value
-        assert (
-            tracker.get_line_number(data["list_key"]) == 5
-        )  # list object itself (starts at line 5 where first item is)
-        if isinstance(data["list_key"], list) and len(data["list_key"]) > 0:
-            assert tracker.get_line_number(data["list_key"][0]) == 5  # item1
-            assert tracker.get_line_number(data["list_key"][1]) == 6  # item2
+        assert data["key2"] == {"nested_key": "nested_value"}
+        assert tracker.get_line_number(()) == 1  # Root mapping
+        assert tracker.get_line_number(("key1",)) == 1
+        assert tracker.get_line_number(("key2",)) == 2  # The key, not its value
+        assert tracker.get_line_number(("key2", "nested_key")) == 3
+        # Scalar list items resolve to their list
+        assert tracker.get_line_number(("list_key", 1)) == 4
+        assert tracker.get_location(("stacks", 0)) == (8, 5)
+        assert tracker.get_location(("stacks", 0, "dir")) == (9, 5)
+
+    def test_pydantic_locations_fall_back_to_closest_parent(self):
+        tracker = LineNumberTracker()
+        tracker.parse_yaml_with_line_numbers("stacks:\n  - id: a\n    dri: ./a\n")
+
+        assert tracker.get_line_number(("stacks", 0, "dri")) == 3
+        # A missing field, or a validator name in the loc, maps to the stack
+        assert tracker.get_line_number(("stacks", 0, "dir")) == 2
+        assert tracker.get_line_number(("stacks", 0, "function-after", "id")) == 2
+        assert tracker.get_line_number(("other",)) == 1
+
+    def test_aliases_resolve_to_their_anchor(self):
+        yaml_content = """defaults: &defaults
+  region: us-east-1
+stacks:
+  - params: *defaults
+recursive: &loop [*loop]
+"""
+        tracker = LineNumberTracker()
+        tracker.parse_yaml_with_line_numbers(yaml_content)
+
+        assert tracker.get_line_number(("stacks", 0, "params")) == 4
+        assert tracker.get_line_number(("defaults", "region")) == 2
+        assert tracker.get_line_number(("recursive", 0)) == 5
+
+    def test_pipeline_errors_report_manifest_lines(self, tmp_path: Path):
+        from samstacks.core import Pipeline
+
+        (tmp_path / "a").mkdir()
+        (tmp_path / "a" / "template.yaml").write_text("Resources: {}\n")
+        manifest = tmp_path / "pipeline.yml"
+        manifest.write_text(
+            "pipeline_name: p\n"
+            "stacks:\n"
+            "  - id: a\n"
+            "    dir: ./a\n"
+            "    params:\n"
+            "      Url: ${{ stacks.missing.outputs.Url }}\n"
+        )
+
+        with pytest.raises(ManifestError, match=r"param 'Url'.*\(line 6\)"):
+            Pipeline.from_file(manifest)
+
+        manifest.write_text("pipeline_name: p\nstacks:\n  - id: a\n    dri: ./a\n")
+
+        with pytest.raises(ManifestError, match=r"Unknown field 'dri'.*\(line 4\)"):
+            Pipeline.from_file(manifest)
 
     def test_parse_invalid_yaml_raises_manifest_error(self):
         yaml_content = "key: value: another_value # Invalid YAML"
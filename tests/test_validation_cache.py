@@ -0,0 +1,167 @@
+"""
+Tests for the cache of successful manifest validations.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from samstacks.core import Pipeline
+from samstacks.exceptions import ManifestError
+from samstacks.validation_cache import (
+    VALIDATION_CACHE_LOOKUPS,
+    ValidationCache,
+    default_validation_cache_dir,
+    stack_files,
+)
+
+
+def lookups(outcome: str, scope: str = "manifest") -> float:
+    return VALIDATION_CACHE_LOOKUPS.get(scope=scope, outcome=outcome)
+
+
+def touch_later(path: Path) -> None:
+    """Move the mtime forward, as an edit on a coarse-mtime filesystem would."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    stack_dir = tmp_path / "stacks" / "app"
+    stack_dir.mkdir(parents=True)
+    (stack_dir / "template.yaml").write_text("Resources: {}\n")
+    (tmp_path / "pipeline.yml").write_text(
+        "pipeline_name: Cached\nstacks:\n  - id: app\n    dir: stacks/app\n"
+    )
+    return tmp_path
+
+
+class TestValidationCache:
+    """Test keys, fingerprints and storage of cache entries."""
+
+    def test_default_directory_comes_from_environment(self, tmp_path: Path):
+        # conftest points SAMSTACKS_VALIDATION_CACHE_DIR at the test's tmp_path
+        assert default_validation_cache_dir() == tmp_path / "validation-cache"
+
+    def test_key_depends_on_content_scope_path_and_referenced_env(
+        self, tmp_path: Path, monkeypatch
+    ):
+        cache = ValidationCache(tmp_path)
+        content = b"params:\n  Stage: ${{ env.STAGE }}\n"
+        manifest = tmp_path / "pipeline.yml"
+        monkeypatch.setenv("STAGE", "dev")
+        key = cache.key(content, "manifest", manifest)
+
+        assert cache.key(content, "manifest", manifest) == key
+        assert cache.key(content, "pipeline", manifest) != key
+        assert cache.key(content + b"\n", "manifest", manifest) != key
+        assert (
+            cache.key(content, "manifest", tmp_path / "other" / "pipeline.yml") != key
+        )
+        monkeypatch.setenv("UNRELATED", "x")
+        assert cache.key(content, "manifest", manifest) == key
+        monkeypatch.setenv("STAGE", "prod")
+        assert cache.key(content, "manifest", manifest) != key
+        monkeypatch.delenv("STAGE")
+        assert cache.key(content, "manifest", manifest) != key
+
+    def test_entry_is_stale_after_a_file_changes(self, tmp_path: Path):
+        cache = ValidationCache(tmp_path / "cache")
+        template = tmp_path / "template.yaml"
+        template.write_text("Resources: {}\n")
+        cache.store("k", [template, tmp_path / "template.yml"])
+        stale = lookups("stale")
+
+        assert cache.is_valid("k")
+        touch_later(template)
+        assert not cache.is_valid("k")
+        assert lookups("stale") == stale + 1
+
+    def test_entry_is_stale_after_a_missing_file_appears(self, tmp_path: Path):
+        cache = ValidationCache(tmp_path / "cache")
+        cache.store("k", stack_files([tmp_path / "app"]))
+
+        (tmp_path / "app").mkdir()
+
+        assert not cache.is_valid("k")
+
+    def test_unknown_and_corrupt_entries_are_misses(self, tmp_path: Path):
+        cache = ValidationCache(tmp_path)
+        (tmp_path / "corrupt.json").write_text("{not json")
+
+        assert not cache.is_valid("unknown")
+        assert not cache.is_valid("corrupt")
+
+    def test_store_ignores_unwritable_directory(self, tmp_path: Path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        cache = ValidationCache(blocker / "cache")
+
+        cache.store("k", [])
+
+        assert not cache.is_valid("k")
+
+
+class TestPipelineFromFileWithCache:
+    """Test that Pipeline.from_file skips unchanged semantic validations."""
+
+    def test_second_load_skips_semantic_validation(self, project: Path, mocker):
+        cache = ValidationCache(project / "cache")
+        Pipeline.from_file(project / "pipeline.yml", validation_cache=cache)
+        validate = mocker.patch(
+            "samstacks.core.ManifestValidator.validate_semantic_rules_and_raise_if_errors"
+        )
+
+        pipeline = Pipeline.from_file(project / "pipeline.yml", validation_cache=cache)
+
+        validate.assert_not_called()
+        assert [stack.id for stack in pipeline.stacks] == ["app"]
+
+    def test_cached_validation_shows_the_same_warnings(self, project: Path, capsys):
+        (project / "stacks" / "app" / "template.yaml").write_text(
+            "Parameters:\n  Stage:\n    Type: String\n"
+        )
+        manifest = project / "pipeline.yml"
+        manifest.write_text(manifest.read_text() + "    params:\n      Stag: dev\n")
+        cache = ValidationCache(project / "cache")
+
+        fresh = Pipeline.from_file(manifest, validation_cache=cache)
+        fresh_err = capsys.readouterr().err
+        hits = lookups("hit")
+        cached = Pipeline.from_file(manifest, validation_cache=cache)
+
+        assert lookups("hit") == hits + 1
+        assert "Parameter 'Stag' is not declared" in fresh_err
+        assert capsys.readouterr().err == fresh_err
+        assert cached.validation_warnings == fresh.validation_warnings != []
+
+    def test_removed_template_is_reported_again(self, project: Path):
+        cache = ValidationCache(project / "cache")
+        Pipeline.from_file(project / "pipeline.yml", validation_cache=cache)
+
+        (project / "stacks" / "app" / "template.yaml").unlink()
+
+        with pytest.raises(ManifestError, match="No template.yaml or template.yml"):
+            Pipeline.from_file(project / "pipeline.yml", validation_cache=cache)
+
+    def test_failed_validation_is_not_cached(self, project: Path):
+        cache = ValidationCache(project / "cache")
+        (project / "stacks" / "app" / "template.yaml").unlink()
+
+        for _ in range(2):
+            with pytest.raises(ManifestError):
+                Pipeline.from_file(project / "pipeline.yml", validation_cache=cache)
+        assert not list((project / "cache").glob("*.json"))
+
+    def test_same_manifest_in_another_directory_is_validated(
+        self, project: Path, tmp_path_factory
+    ):
+        cache = ValidationCache(project / "cache")
+        Pipeline.from_file(project / "pipeline.yml", validation_cache=cache)
+        copy = tmp_path_factory.mktemp("copy") / "pipeline.yml"
+        copy.write_bytes((project / "pipeline.yml").read_bytes())
+
+        with pytest.raises(ManifestError, match="stacks/app"):
+            Pipeline.from_file(copy, validation_cache=cache)
@@ -0,0 +1,163 @@
+"""
+Tests for incremental revalidation in validate --watch.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from samstacks.validation import ManifestValidator
+from samstacks.watch import ManifestWatcher
+
+MANIFEST = """\
+pipeline_name: Watched
+stacks:
+  - id: network
+    dir: stacks/network
+  - id: app
+    dir: stacks/app
+    params:
+      Vpc: ${{ stacks.network.outputs.VpcId }}
+"""
+NETWORK_TEMPLATE = "Outputs:\n  VpcId:\n    Value: !Ref Vpc\n"
+APP_TEMPLATE = "Parameters:\n  Vpc:\n    Type: String\n"
+
+
+def write(path: Path, content: str) -> None:
+    """Write content and move the mtime forward, as a later edit would."""
+    path.write_text(content)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    for stack in ["network", "app"]:
+        stack_dir = tmp_path / "stacks" / stack
+        stack_dir.mkdir(parents=True)
+    (tmp_path / "stacks" / "network" / "template.yaml").write_text(NETWORK_TEMPLATE)
+    (tmp_path / "stacks" / "app" / "template.yaml").write_text(APP_TEMPLATE)
+    (tmp_path / "pipeline.yml").write_text(MANIFEST)
+    return tmp_path
+
+
+class TestManifestWatcher:
+    """Test change detection and the reported error differences."""
+
+    def test_first_check_validates_and_later_checks_wait_for_changes(
+        self, project: Path
+    ):
+        watcher = ManifestWatcher(project / "pipeline.yml")
+
+        changes = watcher.check()
+
+        assert changes is not None
+        assert changes.changed_files == [str((project / "pipeline.yml").resolve())]
+        assert changes.errors == []
+        assert watcher.check() is None
+
+    def test_removed_template_reports_only_the_new_error(self, project: Path, mocker):
+        watcher = ManifestWatcher(project / "pipeline.yml")
+        watcher.check()
+        expression_errors = mocker.spy(ManifestValidator, "stack_expression_errors")
+        file_errors = mocker.spy(ManifestValidator, "stack_file_errors")
+
+        (project / "stacks" / "app" / "template.yaml").unlink()
+        changes = watcher.check()
+
+        assert changes is not None
+        assert len(changes.new_errors) == 1
+        assert "stack 'app': No template.yaml or template.yml" in changes.new_errors[0]
+        assert changes.resolved_errors == []
+        # Only the changed stack's files and expressions are checked again
+        assert [call.args[1] for call in file_errors.call_args_list] == [1]
+        assert [call.args[1] for call in expression_errors.call_args_list] == [1]
+
+        (project / "stacks" / "app" / "template.yaml").write_text(APP_TEMPLATE)
+        changes = watcher.check()
+
+        assert changes is not None
+        assert changes.new_errors == []
+        assert len(changes.resolved_errors) == 1
+        assert changes.errors == []
+
+    def test_renamed_output_is_reported_on_the_referencing_stack(self, project: Path):
+        watcher = ManifestWatcher(project / "pipeline.yml")
+        watcher.check()
+
+        write(
+            project / "stacks" / "network" / "template.yaml",
+            NETWORK_TEMPLATE.replace("VpcId", "VpcID"),
+        )
+        changes = watcher.check()
+
+        assert changes is not None
+        assert len(changes.new_errors) == 1
+        assert "stack 'app' param 'Vpc'" in changes.new_errors[0]
+        assert "Did you mean 'VpcID'?" in changes.new_errors[0]
+
+        write(project / "stacks" / "network" / "template.yaml", NETWORK_TEMPLATE)
+        changes = watcher.check()
+
+        assert changes is not None
+        assert changes.errors == []
+
+    def test_template_edit_keeping_declarations_skips_expressions(
+        self, project: Path, mocker
+    ):
+        watcher = ManifestWatcher(project / "pipeline.yml")
+        watcher.check()
+        expression_errors = mocker.spy(ManifestValidator, "stack_expression_errors")
+
+        write(
+            project / "stacks" / "network" / "template.yaml",
+            "Resources:\n  Vpc:\n    Type: AWS::EC2::VPC\n" + NETWORK_TEMPLATE,
+        )
+        changes = watcher.check()
+
+        assert changes is not None
+        assert changes.errors == []
+        expression_errors.assert_not_called()
+
+    def test_manifest_edit_revalidates_only_changed_stacks(self, project: Path, mocker):
+        watcher = ManifestWatcher(project / "pipeline.yml")
+        watcher.check()
+        expression_errors = mocker.spy(ManifestValidator, "stack_expression_errors")
+
+        write(
+            project / "pipeline.yml",
+            MANIFEST.replace("outputs.VpcId", "outputs.VpcId }}-${{ inputs.missing"),
+        )
+        changes = watcher.check()
+
+        assert changes is not None
+        assert [call.args[1] for call in expression_errors.call_args_list] == [1]
+        assert len(changes.new_errors) == 1
+        assert "Input 'missing' is not defined" in changes.new_errors[0]
+        assert "(line 8)" in changes.new_errors[0]
+
+    def test_unchanged_errors_are_not_reported_again(self, project: Path):
+        manifest = MANIFEST.replace("network.outputs", "db.outputs")
+        write(project / "pipeline.yml", manifest)
+        watcher = ManifestWatcher(project / "pipeline.yml")
+        first = watcher.check()
+
+        write(project / "pipeline.yml", manifest + "# a comment at the end\n")
+        second = watcher.check()
+
+        assert first is not None and len(first.new_errors) == 1
+        assert second is not None
+        assert second.new_errors == second.resolved_errors == []
+        assert second.errors == first.errors
+
+    def test_schema_errors_replace_stack_errors(self, project: Path):
+        watcher = ManifestWatcher(project / "pipeline.yml")
+        watcher.check()
+
+        write(project / "pipeline.yml", MANIFEST.replace("dir:", "directory:", 1))
+        changes = watcher.check()
+
+        assert changes is not None
+        assert len(changes.errors) == 1
+        assert "directory" in changes.errors[0]